@@ -1,2 +1,4 @@
 from EasyHTTPServerAJM.CustomHandlers.mixins import UploadHandlerMixin
 from EasyHTTPServerAJM.CustomHandlers.pretty_dir_handler import PrettyDirectoryHandler, UploadPrettyDirectoryHandler
+from EasyHTTPServerAJM.CustomHandlers.metrics import MetricsHandler, MetricsMixin
+from EasyHTTPServerAJM.CustomHandlers.timing import RequestTimingMixin
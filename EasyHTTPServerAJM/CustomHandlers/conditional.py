@@ -0,0 +1,76 @@
+import os
+import re
+from hashlib import blake2s
+from http import HTTPStatus
+from stat import S_ISREG
+from typing import List, Optional
+
+
+class ConditionalRequestMixin:
+    """
+    Adds entity tags and ``If-None-Match`` handling to file downloads and directory listings.
+
+    Files get a strong ETag built from their inode, size and ``st_mtime_ns``. Listings get a weak
+    ETag built from the directory's ``st_mtime_ns``, the requested URL and the template version;
+    it is weak because the per-file columns of a listing can change without the directory mtime
+    changing. A matching ``If-None-Match`` is answered with ``304 Not Modified`` after a single
+    ``stat`` call, before any file is opened or any listing is rendered.
+
+    Must come before ``RangeRequestMixin`` in the MRO, whose file hooks it extends.
+    """
+    _ETAG_PATTERN = re.compile(r'(?:W/)?"[^"]*"')
+
+    @staticmethod
+    def make_file_etag(fs: os.stat_result) -> str:
+        return f'"{fs.st_ino:x}-{fs.st_size:x}-{fs.st_mtime_ns:x}"'
+
+    @staticmethod
+    def make_listing_etag(mtime_ns: int, *parts) -> str:
+        digest = blake2s(repr(parts).encode('utf-8', 'surrogateescape'), digest_size=8).hexdigest()
+        return f'W/"{mtime_ns:x}-{digest}"'
+
+    @staticmethod
+    def _opaque_tag(etag: str) -> str:
+        return etag[2:] if etag.startswith('W/') else etag
+
+    @classmethod
+    def _split_etags(cls, header: str) -> List[str]:
+        return cls._ETAG_PATTERN.findall(header)
+
+    def _if_none_match(self, etag: Optional[str]) -> bool:
+        """True if the request's If-None-Match matches ``etag`` (weak comparison, RFC 7232 3.2)."""
+        header = self.headers.get("If-None-Match")
+        if header is None or etag is None:
+            return False
+        if header.strip() == '*':
+            return True
+        opaque = self._opaque_tag(etag)
+        return any(self._opaque_tag(tag) == opaque for tag in self._split_etags(header))
+
+    def _send_not_modified(self, etag: str, fs: Optional[os.stat_result] = None):
+        self.send_response(HTTPStatus.NOT_MODIFIED)
+        self.send_header("ETag", etag)
+        if fs is not None:
+            self.send_header("Last-Modified", self.date_time_string(fs.st_mtime))
+        self.end_headers()
+
+    def _send_file_head(self, path: str):
+        if "If-None-Match" in self.headers and not path.endswith("/"):
+            try:
+                fs = os.stat(path)
+            except OSError:
+                fs = None
+            if fs is not None and S_ISREG(fs.st_mode):
+                etag = self.make_file_etag(fs)
+                if self._if_none_match(etag):
+                    self._send_not_modified(etag, fs)
+                    return None
+        return super()._send_file_head(path)
+
+    def _send_file_validator_headers(self, fs: os.stat_result):
+        super()._send_file_validator_headers(fs)
+        self.send_header("ETag", self.make_file_etag(fs))
+
+    def _if_range_etag_matches(self, if_range: str, fs: os.stat_result) -> bool:
+        # If-Range requires the strong comparison function, so weak tags never match
+        return not if_range.startswith('W/') and if_range == self.make_file_etag(fs)
@@ -0,0 +1,136 @@
+import io
+import os
+from http import HTTPStatus
+from stat import S_ISREG
+from typing import Optional
+
+from EasyHTTPServerAJM.Helpers.content_encoding import ContentEncoder
+
+
+class CompressingWriter:
+    """Wraps a binary stream and compresses everything written to it with an incremental compressor."""
+    def __init__(self, wfile, compressor):
+        self.wfile = wfile
+        self.compressor = compressor
+
+    def write(self, data: bytes) -> int:
+        compressed = self.compressor.compress(data)
+        if compressed:
+            self.wfile.write(compressed)
+        return len(data)
+
+    def close(self) -> None:
+        # only flushes the compressor, the wrapped stream is left open
+        self.wfile.write(self.compressor.flush())
+
+
+class CompressionMixin:
+    """
+    Adds ``Accept-Encoding`` negotiated compression (see ``ContentEncoder``) to file downloads
+    and directory listings.
+
+    Files with a compressible MIME type are sent from a fresh ``.gz``/``.zst`` sidecar when one
+    exists, and are otherwise compressed in memory (up to ``ContentEncoder.max_size``) with the
+    result kept in the encoder's variant cache. Requests with a ``Range`` header always get the
+    identity coding, so byte ranges keep referring to the file on disk. Encoded responses carry
+    their own ETag, and every response that could have been encoded carries
+    ``Vary: Accept-Encoding``.
+
+    Must come before ``ConditionalRequestMixin`` (whose ETag helpers it uses) and
+    ``StreamingListingMixin`` (whose stream compressor hook it provides) in the MRO.
+    """
+    content_encoder: Optional[ContentEncoder] = None
+    _content_encoding: Optional[str] = None
+    _vary_accept_encoding: bool = False
+
+    def _configure_compression(self, **kwargs):
+        content_encoder = kwargs.pop('content_encoder', None)
+        if not kwargs.pop('compression', True):
+            content_encoder = None
+        elif content_encoder is None:
+            content_encoder = ContentEncoder.shared()
+        self.content_encoder = content_encoder
+        return kwargs
+
+    def _negotiate_content_encoding(self, ctype: str, size: Optional[int] = None) -> Optional[str]:
+        if self.content_encoder is None or not self.content_encoder.is_compressible(ctype):
+            return None
+        self._vary_accept_encoding = True
+        if "Range" in self.headers or (size is not None and size < self.content_encoder.min_size):
+            return None
+        return self.content_encoder.negotiate(self.headers.get("Accept-Encoding"))
+
+    def _send_content_encoding_headers(self, encoding: Optional[str]):
+        if self._vary_accept_encoding:
+            self.send_header("Vary", "Accept-Encoding")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+
+    def _compress_body(self, data: bytes, encoding: Optional[str], key=None):
+        """Return (body, encoding); bodies under the minimum size are left uncompressed."""
+        if encoding is None or len(data) < self.content_encoder.min_size:
+            return data, None
+        body = self.content_encoder.cached_variant(key, encoding) if key is not None else None
+        if body is None:
+            body = self.content_encoder.compress(data, encoding, key)
+        return body, encoding
+
+    def _get_stream_compressor(self):
+        if self._content_encoding is None:
+            return None
+        return self.content_encoder.compressobj(self._content_encoding)
+
+    @staticmethod
+    def _encoded_etag(etag: str, encoding: str) -> str:
+        return f'{etag[:-1]}-{encoding}"'
+
+    def _send_file_head(self, path: str):
+        self._vary_accept_encoding = False
+        if self.content_encoder is None or path.endswith("/"):
+            return super()._send_file_head(path)
+        try:
+            fs = os.stat(path)
+        except OSError:
+            return super()._send_file_head(path)
+        ctype = self.guess_type(path)
+        encoding = self._negotiate_content_encoding(ctype, fs.st_size) if S_ISREG(fs.st_mode) else None
+        if encoding is None:
+            return super()._send_file_head(path)
+
+        sidecar = self.content_encoder.find_sidecar(path, fs, encoding)
+        if sidecar is None and fs.st_size > self.content_encoder.max_size:
+            return super()._send_file_head(path)
+        etag = self._encoded_etag(self.make_file_etag(sidecar[1] if sidecar else fs), encoding)
+        if self._if_none_match(etag) or self._is_not_modified_since(fs):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self._send_content_encoding_headers(None)
+            self.end_headers()
+            return None
+        try:
+            if sidecar is not None:
+                f = open(sidecar[0], 'rb')
+                length = os.fstat(f.fileno()).st_size
+            else:
+                key = (path, fs.st_ino, fs.st_size, fs.st_mtime_ns)
+                body = self.content_encoder.cached_variant(key, encoding)
+                if body is None:
+                    with open(path, 'rb') as original:
+                        body = self.content_encoder.compress(original.read(), encoding, key)
+                f, length = io.BytesIO(body), len(body)
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-type", ctype)
+        self.send_header("Content-Length", str(length))
+        self._send_content_encoding_headers(encoding)
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", self.date_time_string(fs.st_mtime))
+        self.end_headers()
+        return f
+
+    def _send_file_validator_headers(self, fs: os.stat_result):
+        super()._send_file_validator_headers(fs)
+        self._send_content_encoding_headers(None)
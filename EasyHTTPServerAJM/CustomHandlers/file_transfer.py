@@ -0,0 +1,285 @@
+import datetime
+import email.utils
+import io
+import os
+import re
+from http import HTTPStatus
+from secrets import token_hex
+from shutil import copyfileobj
+from stat import S_ISREG
+from typing import List, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+class ZeroCopyFileMixin:
+    """
+    Serves regular files with ``socket.sendfile`` so the kernel copies the data straight from the
+    page cache to the socket (``os.sendfile`` on Linux and the BSDs), instead of pulling every byte
+    through Python in 64 KB chunks.
+
+    The buffered ``shutil.copyfileobj`` path is still used when ``use_sendfile`` is False, when the
+    platform has no ``os.sendfile`` (e.g. Windows), or when the source is not a regular file.
+    """
+    COPY_BUFFER_SIZE = 64 * 1024
+
+    use_sendfile: bool = True
+
+    def _configure_file_transfer(self, **kwargs):
+        self.use_sendfile = kwargs.pop('use_sendfile', True)
+        return kwargs
+
+    def _can_sendfile(self, source, outputfile) -> bool:
+        if not self.use_sendfile or not hasattr(os, 'sendfile'):
+            return False
+        # only the raw connection can be handed to the kernel, never a wrapped/buffered stream
+        if outputfile is not self.wfile or getattr(self, 'connection', None) is None:
+            return False
+        try:
+            return S_ISREG(os.fstat(source.fileno()).st_mode)
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            return False
+
+    def _send_file_segment(self, source, offset: int, count: int = None) -> int:
+        """Send ``count`` bytes (or up to EOF) of ``source`` starting at ``offset``; returns bytes sent."""
+        if self._can_sendfile(source, self.wfile):
+            self.wfile.flush()
+            return self.connection.sendfile(source, offset, count)
+        source.seek(offset)
+        if count is None:
+            copyfileobj(source, self.wfile, self.__class__.COPY_BUFFER_SIZE)
+            return source.tell() - offset
+        remaining = count
+        while remaining > 0:
+            chunk = source.read(min(remaining, self.__class__.COPY_BUFFER_SIZE))
+            if not chunk:
+                break
+            self.wfile.write(chunk)
+            remaining -= len(chunk)
+        return count - remaining
+
+    def copyfile(self, source, outputfile):
+        if self._can_sendfile(source, outputfile):
+            self._send_file_segment(source, source.tell())
+        else:
+            super().copyfile(source, outputfile)
+
+
+class RangeRequestMixin(ZeroCopyFileMixin):
+    """
+    Adds HTTP ``Range`` support (RFC 7233) to file downloads.
+
+    A single satisfiable range is answered with ``206 Partial Content`` and ``Content-Range``,
+    several ranges with a ``multipart/byteranges`` body, and a Range that cannot be satisfied
+    with ``416``. ``If-Range`` is honoured, so a client resuming with an outdated validator gets
+    the whole (new) file instead of a mismatched piece. Every byte range is still sent through
+    ``_send_file_segment``, so ranges use the zero-copy path as well.
+    """
+    # more ranges than this in one request are ignored and the full file is sent instead
+    MAX_RANGES = 32
+    _RANGE_SPEC = re.compile(r'^\s*(\d*)\s*-\s*(\d*)\s*$')
+
+    _byte_ranges: Optional[List[Tuple[int, int]]] = None
+    _multipart_boundary: Optional[str] = None
+    _range_content_type: Optional[str] = None
+    _range_file_size: int = 0
+
+    @classmethod
+    def parse_byte_ranges(cls, header: str, size: int) -> Optional[List[Tuple[int, int]]]:
+        """
+        Parse a Range header against a file of ``size`` bytes into sorted, merged, inclusive
+        ``(start, end)`` ranges. Returns None when the header should be ignored (other units,
+        bad syntax, too many ranges) and an empty list when no range is satisfiable.
+        """
+        unit, sep, specs = header.partition('=')
+        if not sep or unit.strip().lower() != 'bytes':
+            return None
+        specs = [spec for spec in specs.split(',') if spec.strip()]
+        if not specs or len(specs) > cls.MAX_RANGES:
+            return None
+
+        ranges = []
+        for spec in specs:
+            match = cls._RANGE_SPEC.match(spec)
+            if match is None:
+                return None
+            first, last = match.groups()
+            if not first and not last:
+                return None
+            if not first:
+                # suffix range: the last N bytes
+                suffix_len = int(last)
+                if suffix_len == 0 or size == 0:
+                    continue
+                ranges.append((max(0, size - suffix_len), size - 1))
+                continue
+            start = int(first)
+            if last and int(last) < start:
+                return None
+            if start >= size:
+                continue
+            end = min(int(last), size - 1) if last else size - 1
+            ranges.append((start, end))
+
+        merged = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    @staticmethod
+    def _parse_http_date(value: Optional[str]) -> Optional[datetime.datetime]:
+        try:
+            parsed = email.utils.parsedate_to_datetime(value)
+        except (TypeError, IndexError, OverflowError, ValueError):
+            return None
+        if parsed.tzinfo is None:
+            # obsolete format with no timezone, cf. RFC 7231 section 7.1.1.1
+            parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+        return parsed
+
+    @staticmethod
+    def _last_modified_utc(fs: os.stat_result) -> datetime.datetime:
+        # HTTP dates have a resolution of one second
+        return datetime.datetime.fromtimestamp(fs.st_mtime, datetime.timezone.utc).replace(microsecond=0)
+
+    def _is_not_modified_since(self, fs: os.stat_result) -> bool:
+        if "If-Modified-Since" not in self.headers or "If-None-Match" in self.headers:
+            return False
+        ims = self._parse_http_date(self.headers["If-Modified-Since"])
+        if ims is None or ims.tzinfo is not datetime.timezone.utc:
+            return False
+        return self._last_modified_utc(fs) <= ims
+
+    def _if_range_matches(self, fs: os.stat_result) -> bool:
+        if_range = self.headers.get("If-Range")
+        if if_range is None:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith(('"', 'W/')):
+            return self._if_range_etag_matches(if_range, fs)
+        since = self._parse_http_date(if_range)
+        # a date validator only matches if it is exactly the current Last-Modified
+        return since is not None and since == self._last_modified_utc(fs)
+
+    # noinspection PyUnusedLocal
+    def _if_range_etag_matches(self, if_range: str, fs: os.stat_result) -> bool:
+        # without entity tags (see ConditionalRequestMixin) an entity-tag If-Range can never match
+        return False
+
+    def _get_requested_ranges(self, fs: os.stat_result) -> Optional[List[Tuple[int, int]]]:
+        range_header = self.headers.get("Range")
+        if range_header is None or not S_ISREG(fs.st_mode) or not self._if_range_matches(fs):
+            return None
+        return self.parse_byte_ranges(range_header, fs.st_size)
+
+    def _find_index_file(self, path: str) -> Optional[str]:
+        for index in "index.html", "index.htm":
+            index = os.path.join(path, index)
+            if os.path.isfile(index):
+                return index
+        return None
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            index = self._find_index_file(path)
+            # redirects and directory listings are left to SimpleHTTPRequestHandler
+            if index is None or not urlsplit(self.path).path.endswith('/'):
+                return super().send_head()
+            path = index
+        return self._send_file_head(path)
+
+    def _send_file_head(self, path: str):
+        self._byte_ranges = None
+        ctype = self.guess_type(path)
+        # check for trailing "/" which should return 404, like SimpleHTTPRequestHandler does
+        if path.endswith("/"):
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+
+        try:
+            fs = os.fstat(f.fileno())
+            if self._is_not_modified_since(fs):
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.end_headers()
+                f.close()
+                return None
+
+            ranges = self._get_requested_ranges(fs)
+            if ranges is not None and not ranges:
+                self._send_range_not_satisfiable(fs)
+                f.close()
+                return None
+            if ranges:
+                self._send_partial_content_headers(ctype, fs, ranges)
+            else:
+                self.send_response(HTTPStatus.OK)
+                self.send_header("Content-type", ctype)
+                self.send_header("Content-Length", str(fs.st_size))
+                self._send_file_validator_headers(fs)
+                self.end_headers()
+            return f
+        except:
+            f.close()
+            raise
+
+    def _send_file_validator_headers(self, fs: os.stat_result):
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Last-Modified", self.date_time_string(fs.st_mtime))
+
+    def _send_range_not_satisfiable(self, fs: os.stat_result):
+        self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.send_header("Content-Range", f"bytes */{fs.st_size}")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _multipart_part_header(self, start: int, end: int) -> bytes:
+        return (f"--{self._multipart_boundary}\r\n"
+                f"Content-Type: {self._range_content_type}\r\n"
+                f"Content-Range: bytes {start}-{end}/{self._range_file_size}\r\n\r\n").encode('latin-1')
+
+    def _multipart_closing(self) -> bytes:
+        return f"--{self._multipart_boundary}--\r\n".encode('latin-1')
+
+    def _send_partial_content_headers(self, ctype: str, fs: os.stat_result, ranges: List[Tuple[int, int]]):
+        self._byte_ranges = ranges
+        self._range_content_type = ctype
+        self._range_file_size = fs.st_size
+        self.send_response(HTTPStatus.PARTIAL_CONTENT)
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            self._multipart_boundary = None
+            self.send_header("Content-type", ctype)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{fs.st_size}")
+            content_length = end - start + 1
+        else:
+            self._multipart_boundary = token_hex(16)
+            self.send_header("Content-type", f"multipart/byteranges; boundary={self._multipart_boundary}")
+            # each part is "<part header><data>\r\n", followed by the closing delimiter
+            content_length = sum(len(self._multipart_part_header(start, end)) + (end - start + 1) + 2
+                                 for start, end in ranges) + len(self._multipart_closing())
+        self.send_header("Content-Length", str(content_length))
+        self._send_file_validator_headers(fs)
+        self.end_headers()
+
+    def copyfile(self, source, outputfile):
+        ranges, self._byte_ranges = self._byte_ranges, None
+        if not ranges or outputfile is not self.wfile:
+            return super().copyfile(source, outputfile)
+        if self._multipart_boundary is None:
+            start, end = ranges[0]
+            self._send_file_segment(source, start, end - start + 1)
+            return None
+        for start, end in ranges:
+            self.wfile.write(self._multipart_part_header(start, end))
+            self._send_file_segment(source, start, end - start + 1)
+            self.wfile.write(b"\r\n")
+        self.wfile.write(self._multipart_closing())
+        return None
@@ -0,0 +1,162 @@
+from typing import Optional
+
+
+class _CountingReader:
+    """Wraps a handler's ``rfile`` and counts the bytes read through it."""
+    def __init__(self, raw):
+        self.raw = raw
+        self.bytes_read = 0
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        data = self.raw.read(size)
+        self.bytes_read += len(data)
+        return data
+
+    def read1(self, size: int = -1) -> bytes:
+        data = getattr(self.raw, 'read1', self.raw.read)(size)
+        self.bytes_read += len(data)
+        return data
+
+    def readinto(self, buffer) -> Optional[int]:
+        count = self.raw.readinto(buffer)
+        self.bytes_read += count or 0
+        return count
+
+    def readline(self, limit: Optional[int] = -1) -> bytes:
+        line = self.raw.readline(limit)
+        self.bytes_read += len(line)
+        return line
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+
+class KeepAliveMixin:
+    """
+    Serves HTTP/1.1 with persistent connections, so a browser that loads a listing and then
+    follows its links reuses one TCP connection instead of paying a handshake per request.
+
+    A connection is closed after ``keep_alive_timeout`` seconds without data from the client, and
+    after ``max_keep_alive_requests`` requests; the last response carries ``Connection: close``.
+    Nagle's algorithm is disabled, since a response written as headers and body would otherwise
+    wait for the client's delayed ACK on a reused connection. ``keep_alive=False`` goes back to
+    one request per connection (HTTP/1.0).
+
+    Every response needs a known length to keep the connection usable: a ``Content-Length``,
+    chunked coding, or ``Connection: close``. A request body the handler left unread would be
+    parsed as the next request, so after every request the rest of a body of up to
+    ``MAX_DRAIN_BYTES`` is read and discarded, and the connection is closed after a larger one
+    or a ``Transfer-Encoding`` body (which no handler here decodes).
+
+    A server that dedicates a thread to each connection can keep idle clients from holding its
+    threads: its ``idle_timeout`` attribute caps the wait for a request line, and while its
+    ``queue_depth`` is above zero every response closes the connection (see
+    ``BoundedThreadPoolHTTPServer``).
+
+    Engines that create a handler per request rather than per connection (see
+    ``AsyncioHTTPServer``) count the requests themselves and expose the count as the
+    ``requests_served`` attribute of ``request``.
+    """
+    DEFAULT_KEEP_ALIVE_TIMEOUT = 15.0
+    DEFAULT_MAX_KEEP_ALIVE_REQUESTS = 100
+    MAX_DRAIN_BYTES = 64 * 1024
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    keep_alive_timeout: Optional[float] = DEFAULT_KEEP_ALIVE_TIMEOUT
+    max_keep_alive_requests: Optional[int] = DEFAULT_MAX_KEEP_ALIVE_REQUESTS
+
+    def _configure_keep_alive(self, **kwargs):
+        if not kwargs.pop('keep_alive', True):
+            self.protocol_version = "HTTP/1.0"
+            self.disable_nagle_algorithm = False
+        self.keep_alive_timeout = kwargs.pop('keep_alive_timeout', self.__class__.DEFAULT_KEEP_ALIVE_TIMEOUT)
+        self.max_keep_alive_requests = kwargs.pop('max_keep_alive_requests',
+                                                  self.__class__.DEFAULT_MAX_KEEP_ALIVE_REQUESTS)
+        # read by StreamRequestHandler.setup, so it bounds how long an idle connection is kept
+        self.timeout = self.keep_alive_timeout
+        self._requests_served = 0
+        self._connection_close_sent = False
+        self._body_start: Optional[int] = None
+        self._idle_timeout_set = False
+        return kwargs
+
+    @property
+    def is_last_request(self) -> bool:
+        """True if the connection closes after this response because of ``max_keep_alive_requests``."""
+        return self.max_keep_alive_requests is not None and self._requests_served >= self.max_keep_alive_requests
+
+    def setup(self):
+        super().setup()
+        self._requests_served = getattr(self.request, 'requests_served', 0)
+        self.rfile = _CountingReader(self.rfile)
+
+    def parse_request(self) -> bool:
+        if self._idle_timeout_set:
+            self.connection.settimeout(self.timeout)
+            self._idle_timeout_set = False
+        if not super().parse_request():
+            return False
+        # everything read from here on belongs to the request body
+        self._body_start = self.rfile.bytes_read
+        return True
+
+    @property
+    def _connections_waiting(self) -> bool:
+        return bool(getattr(self.server, 'queue_depth', 0))
+
+    def _get_idle_timeout(self) -> Optional[float]:
+        idle_timeout = getattr(self.server, 'idle_timeout', None)
+        if idle_timeout is None:
+            return self.timeout
+        return idle_timeout if self.timeout is None else min(idle_timeout, self.timeout)
+
+    def handle_one_request(self):
+        self._requests_served += 1
+        self._connection_close_sent = False
+        self._body_start = None
+        # only the wait for the request line is shortened, parse_request restores the timeout
+        idle_timeout = self._get_idle_timeout()
+        self._idle_timeout_set = idle_timeout != self.timeout
+        if self._idle_timeout_set:
+            self.connection.settimeout(idle_timeout)
+        super().handle_one_request()
+        if self.is_last_request:
+            self.close_connection = True
+        self._finish_request_body()
+
+    def _finish_request_body(self) -> None:
+        """Read the rest of a small unread request body, or close the connection, so it is never taken for a request."""
+        if self.close_connection or self._body_start is None:
+            return
+        if self.headers.get('Transfer-Encoding'):
+            self.close_connection = True
+            return
+        length = (self.headers.get('Content-Length') or '0').strip()
+        if not length.isdigit():
+            self.close_connection = True
+            return
+        unread = int(length) - (self.rfile.bytes_read - self._body_start)
+        if unread <= 0:
+            return
+        if unread <= self.__class__.MAX_DRAIN_BYTES:
+            try:
+                if len(self.rfile.read(unread)) == unread:
+                    return
+            except OSError:
+                pass
+        self.close_connection = True
+
+    def send_response(self, code, message=None):
+        super().send_response(code, message)
+        if (code >= 200 and (self.is_last_request or self._connections_waiting)
+                and self.request_version >= "HTTP/1.1"):
+            self.send_header("Connection", "close")
+
+    def send_header(self, keyword, value):
+        if keyword.lower() == 'connection' and value.lower() == 'close':
+            # send_error and the close-delimited paths send their own, keep a single one
+            if self._connection_close_sent:
+                return
+            self._connection_close_sent = True
+        super().send_header(keyword, value)
@@ -0,0 +1,173 @@
+from http.server import BaseHTTPRequestHandler
+from time import perf_counter
+from typing import Optional
+from urllib.parse import urlsplit
+
+from EasyHTTPServerAJM.Helpers.metrics import ServerMetrics
+
+
+class CountingWriter:
+    """Wraps the handler's ``wfile`` and counts the bytes written through it."""
+    def __init__(self, wfile):
+        self.wfile = wfile
+        self.bytes_written = 0
+
+    def write(self, data) -> int:
+        written = self.wfile.write(data)
+        self.bytes_written += len(data) if written is None else written
+        return written
+
+    def __getattr__(self, name):
+        # flush, close, closed, ... go to the wrapped stream
+        return getattr(self.wfile, name)
+
+
+class MetricsMixin:
+    """
+    Records every request in a shared ``ServerMetrics`` and serves them at ``metrics_path``.
+
+    A request is timed from the moment its request line has been read, so time spent waiting
+    on an idle keep-alive connection is not counted. Responses are sorted into the route classes
+    ``listing``, ``file``, ``upload``, ``metrics`` and ``other``; the handler sets
+    ``_route_class = 'listing'`` when it renders a listing. Bytes sent are counted on
+    ``wfile`` plus what ``sendfile`` sends past it. Bytes received are the request's
+    ``Content-Length``.
+
+    Without ``metrics`` nothing is recorded. With ``metrics_path=None`` nothing is served, e.g.
+    because the metrics have their own port (see ``MetricsHandler``).
+    """
+    DEFAULT_METRICS_PATH = '/metrics'
+
+    metrics: Optional[ServerMetrics] = None
+    metrics_path: Optional[str] = DEFAULT_METRICS_PATH
+
+    def _configure_metrics(self, **kwargs):
+        self.metrics = kwargs.pop('metrics', None)
+        self.metrics_path = kwargs.pop('metrics_path', self.__class__.DEFAULT_METRICS_PATH)
+        self._route_class: Optional[str] = None
+        self._response_status: Optional[int] = None
+        self._request_started: Optional[float] = None
+        return kwargs
+
+    def setup(self):
+        super().setup()
+        if self.metrics is not None:
+            self.wfile = CountingWriter(self.wfile)
+            # engines that count their own connections (asyncio) build a handler per request
+            if not hasattr(self.server, 'active_connections'):
+                self.metrics.connection_opened()
+
+    def finish(self):
+        try:
+            super().finish()
+        finally:
+            if self.metrics is not None and not hasattr(self.server, 'active_connections'):
+                self.metrics.connection_closed()
+
+    def parse_request(self):
+        # the request line has been read: the request starts now, not when the connection went idle
+        if self.metrics is not None:
+            self._request_started = perf_counter()
+            self._route_class = None
+            self._response_status = None
+            self._bytes_before_request = self.wfile.bytes_written
+            self.metrics.request_started()
+        return super().parse_request()
+
+    def handle_one_request(self):
+        self._request_started = None
+        try:
+            super().handle_one_request()
+        finally:
+            if self._request_started is not None:
+                self._record_request()
+
+    def _get_route_class(self) -> str:
+        # an upload answered with a listing is still an upload
+        if self._route_class != 'metrics' and self.command in ('POST', 'PATCH', 'PUT'):
+            return 'upload'
+        return self._route_class or 'other'
+
+    def _get_request_body_length(self) -> int:
+        headers = getattr(self, 'headers', None)
+        try:
+            return max(0, int(headers.get('Content-Length', 0) if headers else 0))
+        except ValueError:
+            return 0
+
+    def _record_request(self) -> None:
+        self.metrics.request_finished(self.command or 'other', self._response_status or 0, self._get_route_class(),
+                                      perf_counter() - self._request_started, self._get_request_body_length(),
+                                      self.wfile.bytes_written - self._bytes_before_request)
+        self._request_started = None
+
+    def send_response(self, code, message=None):
+        if code >= 200:
+            self._response_status = code
+        super().send_response(code, message)
+
+    def _is_metrics_request(self) -> bool:
+        return self.metrics is not None and self.metrics_path is not None \
+            and urlsplit(self.path).path == self.metrics_path
+
+    def _send_metrics(self):
+        self._route_class = 'metrics'
+        body = self.metrics.render()
+        self.send_response(200)
+        self.send_header("Content-Type", ServerMetrics.CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def do_GET(self):
+        if self._is_metrics_request():
+            return self._send_metrics()
+        return super().do_GET()
+
+    def do_HEAD(self):
+        if self._is_metrics_request():
+            return self._send_metrics()
+        return super().do_HEAD()
+
+    def _send_file_head(self, path: str):
+        self._route_class = 'file'
+        return super()._send_file_head(path)
+
+    def _send_file_segment(self, source, offset: int, count: int = None) -> int:
+        if self.metrics is None:
+            return super()._send_file_segment(source, offset, count)
+        before = self.wfile.bytes_written
+        sent = super()._send_file_segment(source, offset, count)
+        # sendfile writes past wfile; the buffered path has already been counted
+        self.wfile.bytes_written = before + sent
+        return sent
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Answers only ``GET``/``HEAD`` of ``metrics_path``, for serving the metrics on a port of their own."""
+    protocol_version = "HTTP/1.1"
+
+    def __init__(self, request, client_address, server, **kwargs):
+        self.metrics: ServerMetrics = kwargs['metrics']
+        self.metrics_path = kwargs.get('metrics_path', None) or MetricsMixin.DEFAULT_METRICS_PATH
+        super().__init__(request, client_address, server)
+
+    def do_GET(self):
+        if urlsplit(self.path).path != self.metrics_path:
+            self.send_error(404, "Not found")
+            return
+        body = self.metrics.render()
+        self.send_response(200)
+        self.send_header("Content-Type", ServerMetrics.CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    do_HEAD = do_GET
+
+    def log_message(self, format, *args):
+        # scrapes every few seconds would drown the access log
+        pass
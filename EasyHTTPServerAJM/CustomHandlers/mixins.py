@@ -1,6 +1,23 @@
-import cgi
+import json
 import os
+from contextlib import nullcontext
 from abc import ABCMeta, abstractmethod
+from typing import List, NamedTuple, Optional
+
+from EasyHTTPServerAJM.Helpers.multipart import MultipartError, MultipartParser, MultipartPart, parse_options_header
+from EasyHTTPServerAJM.Helpers.upload_writer import AtomicUploadWriter
+from EasyHTTPServerAJM.Helpers.filename_allocator import UniqueFilenameAllocator
+
+
+class UploadedFile(NamedTuple):
+    filename: str
+    size: int
+    path: str
+
+
+class FailedUpload(NamedTuple):
+    filename: Optional[str]
+    error: str
 
 
 class _AbcDirectoryHandler(metaclass=ABCMeta):
@@ -19,8 +36,6 @@ class _AbcDirectoryHandler(metaclass=ABCMeta):
 
 class _UploadInfoCheck(_AbcDirectoryHandler, metaclass=ABCMeta):
     POST = 'POST'
-    _REQUEST_METHOD_ENVIRON_KEY = 'REQUEST_METHOD'
-    _CONTENT_TYPE_ENVIRON_KEY = 'CONTENT_TYPE'
     PARSE_FAIL_ERR_TEXT = 'Failed to parse multipart form data'
     SAVE_FAIL_ERR_TEXT = 'Error saving uploaded file'
 
@@ -29,15 +44,6 @@ class _UploadInfoCheck(_AbcDirectoryHandler, metaclass=ABCMeta):
         self.path = None
         self.headers = {}
 
-    @property
-    def field_storage_environ(self):
-        return {
-            self.__class__._REQUEST_METHOD_ENVIRON_KEY:
-                self.__class__.POST,
-            self.__class__._CONTENT_TYPE_ENVIRON_KEY:
-                self.headers.get('Content-Type')
-        }
-
     @staticmethod
     def _safe_filename(name: str) -> str:
         base = os.path.basename(name)
@@ -47,25 +53,34 @@ class _UploadInfoCheck(_AbcDirectoryHandler, metaclass=ABCMeta):
 
     @staticmethod
     def _unique_path(directory: str, filename: str) -> str:
-        candidate = os.path.join(directory, filename)
-        if not os.path.exists(candidate):
-            return candidate
-        root, ext = os.path.splitext(filename)
-        i = 1
-        while True:
-            new_name = f"{root} ({i}){ext}"
-            candidate = os.path.join(directory, new_name)
-            if not os.path.exists(candidate):
-                return candidate
-            i += 1
+        """
+        Claim a free name for ``filename`` in ``directory`` (see ``UniqueFilenameAllocator``).
+        An empty placeholder is left under the returned path until the upload replaces it or
+        ``_release_path`` removes it.
+        """
+        return UniqueFilenameAllocator.shared().allocate(directory, filename)
+
+    @staticmethod
+    def _release_path(path: str) -> None:
+        UniqueFilenameAllocator.release(path)
 
     def _check_content_type(self):
-        ctype, pdict = cgi.parse_header(self.headers.get('Content-Type', ''))
-        if ctype != 'multipart/form-data':
+        ctype, pdict = parse_options_header(self.headers.get('Content-Type', ''))
+        if ctype != 'multipart/form-data' or not pdict.get('boundary'):
             self.send_error(400, "Unsupported Content-Type")
             return
         return pdict
 
+    def _check_content_length(self) -> Optional[int]:
+        try:
+            length = int(self.headers.get('Content-Length', ''))
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.send_error(411, "Content-Length required")
+            return None
+        return length
+
     def _get_and_log_upload_fail_type(self, exception, was_parse=True,
                                       was_save=False):
         if was_parse:
@@ -87,6 +102,23 @@ class _UploadInfoCheck(_AbcDirectoryHandler, metaclass=ABCMeta):
 
 
 class UploadHandlerMixin(_UploadInfoCheck, metaclass=ABCMeta):
+    """
+    Adds ``multipart/form-data`` file uploads to a directory handler. The request body is parsed
+    incrementally by ``MultipartParser`` and every ``UPLOAD_FIELD_NAME`` file part is written to
+    disk in blocks of ``UPLOAD_BUFFER_SIZE`` bytes as it arrives, so one POST can carry any number
+    of files and memory use does not depend on their size. The POST is answered with a single
+    summary: the listing with a message, or JSON when the client sends ``Accept: application/json``.
+
+    Files are written through ``AtomicUploadWriter``: they only appear under their final name
+    once complete, and ``upload_fsync_policy`` ('none', 'final' or 'periodic') sets how hard the
+    data is pushed to disk before the upload is reported as saved.
+    """
+    UPLOAD_FIELD_NAME = 'file'
+    UPLOAD_BUFFER_SIZE = MultipartParser.DEFAULT_BUFFER_SIZE
+    DEFAULT_UPLOAD_FSYNC_POLICY = AtomicUploadWriter.FSYNC_NONE
+
+    upload_fsync_policy: str = DEFAULT_UPLOAD_FSYNC_POLICY
+
     def __init__(self):
         super().__init__()
         self.headers = {}
@@ -94,14 +126,33 @@ class UploadHandlerMixin(_UploadInfoCheck, metaclass=ABCMeta):
         self.path = None
         self.logger = None
 
+    def _configure_uploads(self, **kwargs):
+        self.upload_fsync_policy = kwargs.pop('upload_fsync_policy', self.__class__.DEFAULT_UPLOAD_FSYNC_POLICY)
+        return kwargs
+
+    # noinspection PyMethodMayBeStatic
+    def _timed_phase(self, name: str):
+        # overridden by RequestTimingMixin
+        return nullcontext()
+
+    # noinspection PyMethodMayBeStatic
+    def _timed_writer(self, stream, phase: str):
+        # overridden by RequestTimingMixin
+        return stream
+
     def _get_upload_success_msg(self, filename, data_len: int):
         ...
 
     def _get_upload_fail_msg(self, exception):
         ...
 
+    def _get_upload_summary_msg(self, uploaded: List[UploadedFile], failed: List[FailedUpload]):
+        ...
+
     def _handle_upload_failed(self, exception, **kwargs):
         self._get_and_log_upload_fail_type(exception, **kwargs)
+        if self._wants_json_response():
+            return self._send_upload_json(400, [], [FailedUpload(None, str(exception))])
         msg = self._get_upload_fail_msg(exception)
         return self._render_directory(self.translate_path(self.path), {'message': msg})
 
@@ -110,49 +161,111 @@ class UploadHandlerMixin(_UploadInfoCheck, metaclass=ABCMeta):
         self.logger.info(f"Uploaded file saved to {dest_path}")
         return self._render_directory(directory, {'message': msg})
 
-    def _get_fieldstorage_field(self):
-        # Use FieldStorage to parse the incoming data stream
-        try:
-            form = cgi.FieldStorage(fp=self.rfile,
-                                    headers=self.headers,
-                                    environ=self.field_storage_environ)
-        except Exception as e:
-            self._handle_upload_failed(e)
-            form = None
-        try:
-            field = form['file']
-        except KeyError as e:
-            self.logger.error(e, exc_info=True)
-            field = None
+    def _wants_json_response(self) -> bool:
+        return 'application/json' in self.headers.get('Accept', '')
 
-        if not getattr(field, 'filename', None):
-            return self._handle_upload_failed('No file provided.')
-        return field
+    def _send_upload_json(self, code: int, uploaded: List[UploadedFile], failed: List[FailedUpload]):
+        body = json.dumps({'uploaded': [{'filename': u.filename, 'size': u.size,
+                                         'path': os.path.basename(u.path)} for u in uploaded],
+                           'failed': [{'filename': f.filename, 'error': f.error} for f in failed]}).encode('utf-8')
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        return None
+
+    def _handle_upload_results(self, uploaded: List[UploadedFile], failed: List[FailedUpload], directory):
+        """Answer the whole POST with one summary, however many files it carried."""
+        if self._wants_json_response():
+            return self._send_upload_json(200 if uploaded or not failed else 400, uploaded, failed)
+        if len(uploaded) == 1 and not failed:
+            return self._handle_upload_success(uploaded[0].filename, uploaded[0].size, uploaded[0].path, directory)
+        return self._render_directory(directory, {'message': self._get_upload_summary_msg(uploaded, failed)})
+
+    def _get_multipart_parser(self, boundary: str, content_length: int) -> MultipartParser:
+        return MultipartParser(self.rfile, boundary, content_length,
+                               buffer_size=self.__class__.UPLOAD_BUFFER_SIZE, logger=self.logger)
 
-    def _write_file_to_stream(self, dest_path, field, filename, directory):
+    def _is_file_part(self, part: MultipartPart) -> bool:
+        # browsers send an empty file part when nothing was selected
+        return part.name == self.__class__.UPLOAD_FIELD_NAME and bool(part.filename)
+
+    def _get_upload_writer(self, dest_path, expected_size: Optional[int] = None) -> AtomicUploadWriter:
+        return AtomicUploadWriter(dest_path, expected_size, fsync_policy=self.upload_fsync_policy,
+                                  logger=self.logger)
+
+    @staticmethod
+    def _expected_part_size(part: MultipartPart) -> Optional[int]:
+        """The part's own Content-Length, if the client sent one; the parser can't tell more in advance."""
+        length = (part.headers.get('content-length') or '').strip()
+        return int(length) if length.isdigit() else None
+
+    def _write_file_to_stream(self, dest_path, part: MultipartPart, expected_size: Optional[int] = None) -> int:
         try:
-            with open(dest_path, 'wb') as out:
-                data = field.file.read()
-                out.write(data)
-            return self._handle_upload_success(filename, len(data), dest_path, directory)
-        except Exception as e:
-            return self._handle_upload_failed(e, was_save=True)
+            with self._timed_phase('write'):
+                writer = self._get_upload_writer(dest_path, expected_size)
+            with writer:
+                # reading the part from the request is 'parse', only handing it to the writer is 'write'
+                part.write_to(self._timed_writer(writer, 'write'))
+                with self._timed_phase('write'):
+                    return writer.commit()
+        except BaseException:
+            self._release_path(dest_path)
+            raise
+
+    def _save_file_parts(self, parser: MultipartParser, directory):
+        """
+        Write every file part of the form to ``directory`` while it streams in.
+        Returns (uploaded, failed); a broken body ends the loop, files saved before that are kept.
+        """
+        uploaded: List[UploadedFile] = []
+        failed: List[FailedUpload] = []
+        try:
+            for part in parser:
+                if not self._is_file_part(part):
+                    continue
+                filename = self._safe_filename(part.filename)
+                dest_path = self._unique_path(directory, filename)
+                try:
+                    # not the rest of the body: with more files to come that would preallocate all of them
+                    data_len = self._write_file_to_stream(dest_path, part, self._expected_part_size(part))
+                except OSError as e:
+                    self._get_and_log_upload_fail_type(e, was_parse=False, was_save=True)
+                    failed.append(FailedUpload(filename, str(e)))
+                    continue
+                self.logger.info(f"Uploaded file saved to {dest_path}")
+                uploaded.append(UploadedFile(filename, data_len, dest_path))
+        except MultipartError as e:
+            self._get_and_log_upload_fail_type(e)
+            failed.append(FailedUpload(None, str(e)))
+        return uploaded, failed
+
+    def _close_if_body_unread(self, parser: Optional[MultipartParser] = None) -> None:
+        # unread body bytes would be taken for the next request on a persistent connection
+        if parser is None or parser.remaining_bytes != 0:
+            self.close_connection = True
 
     def do_POST(self):
         pdict = self._check_content_type()
         if not pdict:
             return None
-
-        pdict['boundary'] = (pdict['boundary'].encode()
-                             if isinstance(pdict.get('boundary'), str)
-                             else pdict.get('boundary'))
-
-        field = self._get_fieldstorage_field()
+        content_length = self._check_content_length()
+        if content_length is None:
+            return None
 
         directory = self._check_upload_path_is_dir()
+        if directory is None:
+            return None
 
-        filename = self._safe_filename(field.filename)
-        dest_path = self._unique_path(directory, filename)
-
-        render = self._write_file_to_stream(dest_path, field, filename, directory)
-        return render
+        try:
+            parser = self._get_multipart_parser(pdict['boundary'], content_length)
+        except MultipartError as e:
+            self._close_if_body_unread()
+            return self._handle_upload_failed(e)
+        with self._timed_phase('parse'):
+            uploaded, failed = self._save_file_parts(parser, directory)
+        self._close_if_body_unread(parser)
+        if not uploaded and not failed:
+            return self._handle_upload_failed('No file provided.')
+        return self._handle_upload_results(uploaded, failed, directory)
@@ -1,14 +1,29 @@
 from http.server import SimpleHTTPRequestHandler
+from hashlib import blake2s
 from html import escape
 from logging import getLogger
-import os
 from socketserver import BaseServer
 import socket
-from EasyHTTPServerAJM.Helpers.HtmlTemplateBuilder import HTMLTemplateBuilder, HTMLTemplateBuilderUpload
+from time import time
+from typing import Optional, Union
+from pathlib import Path
+from urllib.parse import urlsplit
+from EasyHTTPServerAJM.Helpers import DirectoryScanner, ListingCache
+from EasyHTTPServerAJM.Helpers.HtmlTemplateBuilder import HTMLTemplateBuilder, HTMLTemplateBuilderUpload, SiteConfig
 from EasyHTTPServerAJM.CustomHandlers.mixins import UploadHandlerMixin
-
-
-class PrettyDirectoryHandler(SimpleHTTPRequestHandler):
+from EasyHTTPServerAJM.CustomHandlers.streaming import StreamingListingMixin
+from EasyHTTPServerAJM.CustomHandlers.file_transfer import RangeRequestMixin
+from EasyHTTPServerAJM.CustomHandlers.conditional import ConditionalRequestMixin
+from EasyHTTPServerAJM.CustomHandlers.content_encoding import CompressionMixin
+from EasyHTTPServerAJM.CustomHandlers.resumable import ResumableUploadMixin
+from EasyHTTPServerAJM.CustomHandlers.keep_alive import KeepAliveMixin
+from EasyHTTPServerAJM.CustomHandlers.metrics import MetricsMixin
+from EasyHTTPServerAJM.CustomHandlers.timing import RequestTimingMixin
+
+
+class PrettyDirectoryHandler(MetricsMixin, RequestTimingMixin, KeepAliveMixin, CompressionMixin,
+                             ConditionalRequestMixin, RangeRequestMixin, StreamingListingMixin,
+                             SimpleHTTPRequestHandler):
     """
     Handles HTTP requests to provide custom directory listings in a user-friendly HTML format.
 
@@ -23,68 +38,208 @@ class PrettyDirectoryHandler(SimpleHTTPRequestHandler):
     :ivar template_builder: Instance of the HTML template builder responsible for creating
         directory page content.
     :type template_builder: HTMLTemplateBuilder
+    :ivar directory_scanner: Lists directories as stat'ed DirectoryEntryRecords. A shared
+        FilesystemIndex serves them from memory instead.
+    :type directory_scanner: DirectoryScanner
+    :ivar listing_cache: Optional cache of encoded listing pages, usually shared by the whole server.
+    :type listing_cache: ListingCache or None
+
+    Listings with more than ``stream_threshold`` entries are streamed in batches instead of being
+    rendered in one piece, and ``?page=N&per_page=M`` selects a single page of a listing
+    (see ``StreamingListingMixin``). Regular files are sent with ``socket.sendfile`` where the
+    platform supports it (see ``ZeroCopyFileMixin``), and ``Range`` requests are answered with
+    partial content (see ``RangeRequestMixin``). Files and listings carry ETags and a matching
+    ``If-None-Match`` gets a 304 without anything being read or rendered (see ``ConditionalRequestMixin``).
+    Listings and compressible files are gzip/zstd encoded when the client accepts it (see ``CompressionMixin``).
+    Connections are kept open for further requests (HTTP/1.1) until they are idle for
+    ``keep_alive_timeout`` seconds or have served ``max_keep_alive_requests`` (see ``KeepAliveMixin``).
+    With a shared ``metrics`` object every request is counted and timed, and the counters are
+    served at ``metrics_path`` (see ``MetricsMixin``). With ``timing_hooks`` or ``server_timing``
+    the phases of every request (translate, listing, stat, render, encode, send, ...) are timed
+    and reported (see ``RequestTimingMixin``).
+
+    Passing a ``site_config`` (see ``build_site_config``) skips all asset path validation,
+    which is how ``EasyHTTPServer`` keeps per-request handler construction free of filesystem calls.
     """
+    TEMPLATE_BUILDER_CLASS = HTMLTemplateBuilder
+    # longest time a listing ETag stays valid when the listing cache has no max_age of its own
+    DEFAULT_LISTING_MAX_AGE = ListingCache.DEFAULT_MAX_AGE
+
     def __init__(self, request: socket.SocketType, client_address,
                  server: BaseServer, **kwargs):
+        kwargs = self._configure_timing(**kwargs)
         self.logger = kwargs.pop('logger', getLogger(__name__))
+        directory = kwargs.pop('directory', None)
         self.html_template_path = kwargs.pop('html_template_path', None)
+        self.directory_scanner = kwargs.pop('directory_scanner', None) or DirectoryScanner(logger=self.logger)
+        self.listing_cache: Optional[ListingCache] = kwargs.pop('listing_cache', None)
+        self._listing_etag: Optional[str] = None
+        kwargs = self._configure_metrics(**kwargs)
+        kwargs = self._configure_keep_alive(**kwargs)
+        kwargs = self._configure_streaming(**kwargs)
+        kwargs = self._configure_file_transfer(**kwargs)
+        kwargs = self._configure_compression(**kwargs)
         self.template_builder = (
-            kwargs.pop('html_template_builder_class', HTMLTemplateBuilder)(
+            kwargs.pop('html_template_builder_class', self.__class__.TEMPLATE_BUILDER_CLASS)(
                 self.html_template_path, logger=self.logger, **kwargs
             )
         )
         self.template_builder.enc = "utf-8"
 
-        super().__init__(request, client_address, server)
+        super().__init__(request, client_address, server, directory=directory)
+
+    @classmethod
+    def build_site_config(cls, html_template_path: Optional[Union[str, Path]] = None, **kwargs) -> SiteConfig:
+        """
+        Validate the template and asset paths once and return them as an immutable SiteConfig
+        that can be passed to every handler instance as ``site_config``.
+        """
+        builder_class = kwargs.pop('html_template_builder_class', cls.TEMPLATE_BUILDER_CLASS)
+        return builder_class(html_template_path, **kwargs).to_site_config()
 
     def _setup_template_builder_for_page(self):
-        self.template_builder.displaypath = escape(self.path)
-        self.template_builder.path = self.path
+        # the query (i.e. ?page=2) is not part of the directory being listed
+        url_path = urlsplit(self.path).path
+        self.template_builder.displaypath = escape(url_path)
+        self.template_builder.path = url_path
         self.template_builder.title = f"Index of {self.template_builder.displaypath}"
-        self.logger.debug(f"Setting up template builder for page {self.template_builder.displaypath}")
+        self.template_builder.timings = self._timings
+        self.logger.debug("Setting up template builder for page %s", self.template_builder.displaypath)
+
+    def _send_listing_entity_headers(self):
+        if self._listing_etag is not None:
+            self.send_header("ETag", self._listing_etag)
+        self._send_content_encoding_headers(self._content_encoding)
 
     def _send_response_code_and_headers(self, encoded):
         self.send_response(200)
         self.send_header("Content-type", f"text/html; charset={self.template_builder.enc}")
         self.send_header("Content-Length", str(len(encoded)))
+        self._send_listing_entity_headers()
         self.end_headers()
-        self.logger.debug(f"Sent headers for {self.template_builder.displaypath}")
+        self.logger.debug("Sent headers for %s", self.template_builder.displaypath)
 
     def _get_directory_entries(self, path):
         try:
-            entries = sorted(os.listdir(path))
-            self.logger.debug(f"Listing directory {path}")
+            with self._timed_phase('listing'):
+                entries = self.directory_scanner.scan(path, timings=self._timings)
+            self.logger.debug("Listing directory %s", path)
             return entries
         except OSError:
             self.logger.warning(f"Failed to list directory {path}")
             self.send_error(404, "No permission to list directory")
             return None
 
-    def _render_directory(self, path, add_to_context: dict = None):
-        entries = self._get_directory_entries(path)
-        if not entries:
+    def _get_listing_validator(self, path, add_to_context: dict = None) -> Optional[tuple]:
+        """
+        Return (listing version, template version, age bucket) for a plain GET/HEAD listing. The
+        listing version comes from the directory scanner: the directory's st_mtime_ns, or the version
+        of its snapshot when a FilesystemIndex lists it. Rewriting a file in place changes neither,
+        so the age bucket (the wall clock in steps of the listing cache's ``max_age``) retires the
+        validator after at most that long, like the cached page. Pages carrying an upload message
+        are one-off responses, so they get no validator and are never cached.
+        """
+        if add_to_context or self.command not in ('GET', 'HEAD'):
+            return None
+        # taken *before* listing: if the directory changes while rendering, the page gets stored
+        # under the old version and the next request misses instead of serving stale content
+        try:
+            with self._timed_phase('stat'):
+                listing_version = self.directory_scanner.listing_version(path)
+        except OSError:
+            return None
+        return listing_version, self.template_builder.template_version, self._listing_age_bucket()
+
+    def _listing_age_bucket(self) -> int:
+        max_age = self.listing_cache.max_age if self.listing_cache is not None else None
+        # wall clock, so every worker process hands out the same ETag
+        return int(time() // (max_age or self.__class__.DEFAULT_LISTING_MAX_AGE))
+
+    def _listing_cache_key(self, path, validator: Optional[tuple]):
+        if self.listing_cache is None or validator is None:
             return None
+        return (path, self.path) + validator
 
+    def _get_cached_listing(self, cache_key):
+        if cache_key is None:
+            return None
+        return self.listing_cache.get(cache_key)
+
+    @staticmethod
+    def _listing_variant_key(path, url_path: str, encoded: bytes) -> tuple:
+        # keyed on the page bytes themselves: the validator does not change when a file is
+        # rewritten in place, so it can't tell an old page from a fresh one
+        return path, url_path, blake2s(encoded, digest_size=16).digest()
+
+    def _build_encoded_listing(self, entries, path, add_to_context: dict = None):
+        with self._timed_phase('render'):
+            page_body = self.template_builder.build_page_body(entries, path, add_to_context)
+        with self._timed_phase('encode'):
+            return page_body.encode(self.template_builder.enc, "surrogateescape")
+
+    def _render_directory(self, path, add_to_context: dict = None):
         self._setup_template_builder_for_page()
 
-        page_body = self.template_builder.build_page_body(entries, path, add_to_context)
-        encoded = page_body.encode(self.template_builder.enc, "surrogateescape")
+        self._vary_accept_encoding = False
+        self._content_encoding = self._negotiate_content_encoding("text/html")
+        validator = self._get_listing_validator(path, add_to_context)
+        self._listing_etag = (self.make_listing_etag(validator[0], self.path, *validator[1:], self._content_encoding)
+                              if validator else None)
+        if self._if_none_match(self._listing_etag):
+            self._send_not_modified(self._listing_etag)
+            self.logger.debug("Listing for %s not modified", self.template_builder.displaypath)
+            return None
+
+        cache_key = self._listing_cache_key(path, validator)
+        encoded = self._get_cached_listing(cache_key)
+        # only a page from the listing cache has compressed variants worth looking up,
+        # a freshly rendered one is compressed as it is
+        variant_key = None
+        if encoded is not None:
+            self.logger.debug("Serving cached listing for %s", self.template_builder.displaypath)
+            variant_key = self._listing_variant_key(path, self.path, encoded)
+        else:
+            entries = self._get_directory_entries(path)
+            # an empty list is a valid (empty) directory, None means listing failed
+            if entries is None:
+                return None
+            entries, add_to_context = self._apply_pagination(entries, add_to_context)
+            if self._should_stream(entries):
+                return self._stream_directory(path, entries, add_to_context)
+
+            encoded = self._build_encoded_listing(entries, path, add_to_context)
+            if cache_key is not None:
+                self.listing_cache.put(cache_key, encoded)
+
+        with self._timed_phase('compress'):
+            encoded, self._content_encoding = self._compress_body(encoded, self._content_encoding, variant_key)
 
         # Send HTTP headers
         self._send_response_code_and_headers(encoded)
 
-        self.wfile.write(encoded)
+        # on a persistent connection a body after HEAD would be read as the next response
+        if self.command != 'HEAD':
+            with self._timed_phase('send'):
+                self.wfile.write(encoded)
         self.logger.info(f"Sent directory listing for {self.template_builder.displaypath}")
         return None
 
     def list_directory(self, path):
         """Generate a custom HTML directory listing."""
+        self._route_class = 'listing'
         return self._render_directory(path)
 
 
-class UploadPrettyDirectoryHandler(PrettyDirectoryHandler, UploadHandlerMixin):
+class UploadPrettyDirectoryHandler(ResumableUploadMixin, PrettyDirectoryHandler, UploadHandlerMixin):
+    """
+    PrettyDirectoryHandler that also accepts form uploads (see ``UploadHandlerMixin``) and
+    resumable tus-style uploads (see ``ResumableUploadMixin``).
+    """
+    TEMPLATE_BUILDER_CLASS = HTMLTemplateBuilderUpload
+
     def __init__(self, request: socket.SocketType, client_address, server: BaseServer, **kwargs):
-        kwargs['html_template_builder_class'] = kwargs.pop('html_template_builder_class', HTMLTemplateBuilderUpload)
+        kwargs = self._configure_resumable_uploads(**kwargs)
+        kwargs = self._configure_uploads(**kwargs)
         super().__init__(request, client_address, server, **kwargs)
 
     # noinspection PyProtectedMember,PyUnresolvedReferences
@@ -94,3 +249,7 @@ class UploadPrettyDirectoryHandler(PrettyDirectoryHandler, UploadHandlerMixin):
     # noinspection PyProtectedMember,PyUnresolvedReferences
     def _get_upload_fail_msg(self, exception):
         return self.template_builder._get_upload_fail_msg(exception)
+
+    # noinspection PyProtectedMember,PyUnresolvedReferences
+    def _get_upload_summary_msg(self, uploaded, failed):
+        return self.template_builder._get_upload_summary_msg(uploaded, failed)
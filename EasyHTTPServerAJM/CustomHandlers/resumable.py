@@ -0,0 +1,237 @@
+import base64
+import binascii
+import os
+from http import HTTPStatus
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from EasyHTTPServerAJM.Helpers.resumable_uploads import ResumableUploadStore, UploadSession, UploadSessionError
+
+
+class ResumableUploadMixin:
+    """
+    Adds resumable uploads modelled on the tus 1.0 protocol (core, creation, termination and
+    expiration) to an upload handler.
+
+    * ``POST <directory>`` with ``Tus-Resumable`` and ``Upload-Length`` (and optionally
+      ``Upload-Metadata: filename <base64>``) creates a session and answers ``201`` with its
+      ``Location`` under ``/.resumable/``.
+    * ``HEAD <session>`` reports the current ``Upload-Offset``.
+    * ``PATCH <session>`` with ``Upload-Offset`` and an ``application/offset+octet-stream`` body
+      appends a chunk. Once all bytes have arrived the file is renamed into the target directory.
+    * ``DELETE <session>`` abandons the upload.
+
+    Partial files and session state live in ``ResumableUploadStore.STAGING_DIR_NAME`` inside the
+    served directory, which is hidden from listings and cannot be downloaded.
+    Must come before the directory handler in the MRO.
+    """
+    TUS_VERSION = '1.0.0'
+    TUS_EXTENSIONS = 'creation,termination,expiration'
+    SESSION_URL_PREFIX = '/.resumable/'
+    RESUMABLE_BUFFER_SIZE = 64 * 1024
+
+    resumable_store: Optional[ResumableUploadStore] = None
+
+    def _configure_resumable_uploads(self, **kwargs):
+        self.resumable_store = kwargs.pop('resumable_store', None)
+        return kwargs
+
+    def _get_resumable_store(self) -> ResumableUploadStore:
+        if self.resumable_store is None:
+            self.resumable_store = ResumableUploadStore.for_root(self.directory, logger=self.logger)
+        return self.resumable_store
+
+    def _is_tus_request(self) -> bool:
+        return "Tus-Resumable" in self.headers
+
+    def _session_id_from_path(self) -> Optional[str]:
+        url_path = urlsplit(self.path).path
+        if not url_path.startswith(self.__class__.SESSION_URL_PREFIX):
+            return None
+        return url_path[len(self.__class__.SESSION_URL_PREFIX):]
+
+    def _is_staging_path(self, path: str) -> bool:
+        staging_dir = os.path.normcase(os.path.realpath(self._get_resumable_store().staging_dir))
+        path = os.path.normcase(os.path.realpath(path))
+        return path == staging_dir or path.startswith(staging_dir + os.sep)
+
+    def _check_upload_path_is_dir(self):
+        # files planted among the session state could forge a session, so nothing is uploaded there
+        if self._is_staging_path(self.translate_path(self.path)):
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+        return super()._check_upload_path_is_dir()
+
+    @staticmethod
+    def _parse_upload_metadata(header: Optional[str]) -> Dict[str, str]:
+        metadata = {}
+        for pair in (header or '').split(','):
+            key, _, value = pair.strip().partition(' ')
+            if not key:
+                continue
+            try:
+                metadata[key] = base64.b64decode(value, validate=True).decode('utf-8') if value else ''
+            except (binascii.Error, UnicodeDecodeError):
+                raise ValueError(f"invalid Upload-Metadata value for {key!r}") from None
+        return metadata
+
+    @staticmethod
+    def _parse_non_negative_header(value: Optional[str]) -> Optional[int]:
+        if value is None or not value.strip().isdigit():
+            return None
+        return int(value)
+
+    def _send_tus_response(self, code: int, headers: Optional[Dict[str, str]] = None, message: str = None):
+        if code >= 400:
+            # a rejected request body may still be unread
+            self.close_connection = True
+        self.send_response(code, message)
+        self.send_header("Tus-Resumable", self.__class__.TUS_VERSION)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _check_tus_version(self) -> bool:
+        if self.headers.get("Tus-Resumable") != self.__class__.TUS_VERSION:
+            self._send_tus_response(HTTPStatus.PRECONDITION_FAILED, {"Tus-Version": self.__class__.TUS_VERSION})
+            return False
+        return True
+
+    def _get_session_or_404(self) -> Optional[UploadSession]:
+        session = self._get_resumable_store().get(self._session_id_from_path())
+        if session is None:
+            self._send_tus_response(HTTPStatus.NOT_FOUND)
+        return session
+
+    def _session_headers(self, session: UploadSession) -> Dict[str, str]:
+        store = self._get_resumable_store()
+        return {"Upload-Offset": str(session.offset),
+                "Upload-Expires": self.date_time_string(store.expires_at(session))}
+
+    def do_OPTIONS(self):
+        headers = {"Tus-Version": self.__class__.TUS_VERSION, "Tus-Extension": self.__class__.TUS_EXTENSIONS}
+        if self._get_resumable_store().max_size is not None:
+            headers["Tus-Max-Size"] = str(self._get_resumable_store().max_size)
+        self._send_tus_response(HTTPStatus.NO_CONTENT, headers)
+
+    def do_POST(self):
+        if not self._is_tus_request():
+            return super().do_POST()
+        if not self._check_tus_version():
+            return None
+        directory = self._check_upload_path_is_dir()
+        if directory is None:
+            return None
+        length = self._parse_non_negative_header(self.headers.get("Upload-Length"))
+        if length is None:
+            self._send_tus_response(HTTPStatus.BAD_REQUEST, message="Upload-Length required")
+            return None
+        try:
+            metadata = self._parse_upload_metadata(self.headers.get("Upload-Metadata"))
+        except ValueError as e:
+            self._send_tus_response(HTTPStatus.BAD_REQUEST, message=str(e))
+            return None
+        filename = self._safe_filename(metadata.get('filename', ''))
+        try:
+            session = self._get_resumable_store().create(directory, filename, length, metadata)
+        except UploadSessionError as e:
+            self._send_tus_response(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, message=str(e))
+            return None
+        location = f"{self.__class__.SESSION_URL_PREFIX}{session.upload_id}"
+        if session.is_complete:
+            # a zero-length upload is complete as soon as it exists
+            self._finalize_upload(session)
+        self._send_tus_response(HTTPStatus.CREATED, {"Location": location, **self._session_headers(session)})
+        return None
+
+    def do_HEAD(self):
+        if self._session_id_from_path() is None:
+            return super().do_HEAD()
+        session = self._get_session_or_404()
+        if session is not None:
+            self._send_tus_response(HTTPStatus.OK, {"Upload-Length": str(session.length),
+                                                    "Cache-Control": "no-store",
+                                                    **self._session_headers(session)})
+
+    def do_PATCH(self):
+        if not self._check_tus_version():
+            return None
+        if self.headers.get("Content-Type") != "application/offset+octet-stream":
+            self._send_tus_response(HTTPStatus.UNSUPPORTED_MEDIA_TYPE)
+            return None
+        offset = self._parse_non_negative_header(self.headers.get("Upload-Offset"))
+        count = self._parse_non_negative_header(self.headers.get("Content-Length"))
+        if offset is None or count is None:
+            self._send_tus_response(HTTPStatus.BAD_REQUEST, message="Upload-Offset and Content-Length required")
+            return None
+
+        session = self._get_session_or_404()
+        if session is None:
+            return None
+        lock = self._get_resumable_store().lock(session.upload_id)
+        if not lock.acquire(blocking=False):
+            self._send_tus_response(HTTPStatus.LOCKED)
+            return None
+        try:
+            response = self._append_chunk(session.upload_id, offset, count)
+        finally:
+            # released before answering, so the client's next PATCH never finds the session locked
+            lock.release()
+        if response is not None:
+            self._send_tus_response(*response)
+        return None
+
+    def _append_chunk(self, upload_id: str, offset: int, count: int):
+        """Append the request body to a locked session; returns the (code, headers, message) to answer with."""
+        store = self._get_resumable_store()
+        # re-read under the lock, another PATCH may just have moved the offset
+        session = store.get(upload_id)
+        if session is None:
+            return HTTPStatus.NOT_FOUND, None, None
+        if offset != session.offset:
+            return HTTPStatus.CONFLICT, self._session_headers(session), None
+        try:
+            new_offset = store.append(session, self.rfile, count, self.__class__.RESUMABLE_BUFFER_SIZE)
+        except UploadSessionError as e:
+            return HTTPStatus.REQUEST_ENTITY_TOO_LARGE, None, str(e)
+        if new_offset < offset + count:
+            # the client went away mid-chunk; what did arrive is kept for the next PATCH
+            self.close_connection = True
+            return None
+        headers = self._session_headers(session)
+        if session.is_complete:
+            headers["Content-Location"] = self._finalize_upload(session)
+        return HTTPStatus.NO_CONTENT, headers, None
+
+    def do_DELETE(self):
+        if not self._check_tus_version():
+            return None
+        session = self._get_session_or_404()
+        if session is not None:
+            self._get_resumable_store().delete(session.upload_id)
+            self._send_tus_response(HTTPStatus.NO_CONTENT)
+
+    def _finalize_upload(self, session: UploadSession) -> str:
+        """Move a complete upload into its target directory and return the URL path of the file."""
+        dest_path = self._unique_path(session.target_dir, self._safe_filename(session.filename))
+        try:
+            self._get_resumable_store().finalize(session, dest_path)
+        except OSError:
+            self._release_path(dest_path)
+            raise
+        rel_path = os.path.relpath(dest_path, self.directory).replace(os.sep, '/')
+        return '/' + rel_path
+
+    def send_head(self):
+        if self._is_staging_path(self.translate_path(self.path)):
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+        return super().send_head()
+
+    def _get_directory_entries(self, path):
+        entries = super()._get_directory_entries(path)
+        if entries is None or os.path.abspath(path) != os.path.dirname(self._get_resumable_store().staging_dir):
+            return entries
+        staging_name = ResumableUploadStore.STAGING_DIR_NAME
+        return [entry for entry in entries if getattr(entry, 'name', entry) != staging_name]
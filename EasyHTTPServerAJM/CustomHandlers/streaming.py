@@ -0,0 +1,129 @@
+from contextlib import nullcontext
+from typing import Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+from EasyHTTPServerAJM.CustomHandlers.content_encoding import CompressingWriter
+
+
+class ChunkedWriter:
+    """Wraps a binary stream and writes everything to it using HTTP/1.1 chunked transfer coding."""
+    def __init__(self, wfile):
+        self.wfile = wfile
+        self.closed = False
+
+    def write(self, data: bytes) -> int:
+        # a zero-length chunk would terminate the body, so empty writes are skipped
+        if data:
+            self.wfile.write(b"%X\r\n%b\r\n" % (len(data), data))
+        return len(data)
+
+    def close(self) -> None:
+        if not self.closed:
+            self.wfile.write(b"0\r\n\r\n")
+            self.closed = True
+
+
+class StreamingListingMixin:
+    """
+    Adds streaming and paginated rendering of very large directory listings to a directory handler.
+
+    When a listing has more than ``stream_threshold`` entries, the page head is sent straight away
+    and the rows follow in batches of ``stream_batch_size`` from a generator, so the whole page is
+    never held in memory. HTTP/1.1 responses use ``Transfer-Encoding: chunked``; for HTTP/1.0 the
+    body is terminated by closing the connection. Alternatively a client can ask for one page of
+    the listing with ``?page=N&per_page=M``.
+    """
+    DEFAULT_STREAM_THRESHOLD = 5000
+    DEFAULT_STREAM_BATCH_SIZE = 500
+    DEFAULT_PER_PAGE = 100
+    MAX_PER_PAGE = 5000
+
+    stream_threshold: Optional[int] = DEFAULT_STREAM_THRESHOLD
+    stream_batch_size: int = DEFAULT_STREAM_BATCH_SIZE
+
+    def _configure_streaming(self, **kwargs):
+        self.stream_threshold = kwargs.pop('stream_threshold', self.__class__.DEFAULT_STREAM_THRESHOLD)
+        self.stream_batch_size = kwargs.pop('stream_batch_size', self.__class__.DEFAULT_STREAM_BATCH_SIZE)
+        return kwargs
+
+    @staticmethod
+    def _parse_positive_int(values: Optional[list], default: int) -> int:
+        try:
+            value = int(values[0])
+        except (TypeError, ValueError, IndexError):
+            return default
+        return value if value > 0 else default
+
+    def _get_pagination(self) -> Optional[Tuple[int, int]]:
+        query = parse_qs(urlsplit(self.path).query)
+        if 'page' not in query and 'per_page' not in query:
+            return None
+        page = self._parse_positive_int(query.get('page'), 1)
+        per_page = min(self._parse_positive_int(query.get('per_page'), self.__class__.DEFAULT_PER_PAGE),
+                       self.__class__.MAX_PER_PAGE)
+        return page, per_page
+
+    def _apply_pagination(self, entries: list, add_to_context: dict = None):
+        pagination = self._get_pagination()
+        if pagination is None:
+            return entries, add_to_context
+        page, per_page = pagination
+        start = (page - 1) * per_page
+        nav = self.template_builder.build_pagination_nav(page, per_page, len(entries))
+        return entries[start:start + per_page], {**(add_to_context or {}), 'pagination': nav}
+
+    def _should_stream(self, entries: list) -> bool:
+        return self.stream_threshold is not None and len(entries) > self.stream_threshold
+
+    # noinspection PyMethodMayBeStatic
+    def _get_stream_compressor(self):
+        # overridden by CompressionMixin
+        return None
+
+    # noinspection PyMethodMayBeStatic
+    def _timed_phase(self, name: str):
+        # overridden by RequestTimingMixin
+        return nullcontext()
+
+    # noinspection PyMethodMayBeStatic
+    def _timed_writer(self, stream, phase: str):
+        # overridden by RequestTimingMixin
+        return stream
+
+    def _can_use_chunked(self) -> bool:
+        return self.request_version >= "HTTP/1.1" and self.protocol_version >= "HTTP/1.1"
+
+    def _stream_directory(self, path, entries: list, add_to_context: dict = None):
+        enc = self.template_builder.enc
+        with self._timed_phase('render'):
+            head, tail = self.template_builder.build_page_parts(path, add_to_context)
+        use_chunked = self._can_use_chunked()
+
+        self.send_response(200)
+        self.send_header("Content-type", f"text/html; charset={enc}")
+        self._send_listing_entity_headers()
+        if use_chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        else:
+            # without chunked coding the end of the body can only be signalled by closing
+            self.send_header("Connection", "close")
+        self.end_headers()
+        if self.command == 'HEAD':
+            return None
+
+        out = self._timed_writer(ChunkedWriter(self.wfile) if use_chunked else self.wfile, 'send')
+        compressor = self._get_stream_compressor()
+        writer = self._timed_writer(CompressingWriter(out, compressor), 'compress') if compressor is not None else out
+        # rows are rendered while they are sent: everything but the writes is 'render'
+        with self._timed_phase('render'):
+            writer.write(head.encode(enc, "surrogateescape"))
+            for batch in self.template_builder.iter_directory_rows(entries, path, self.stream_batch_size):
+                writer.write(batch.encode(enc, "surrogateescape"))
+            writer.write(tail.encode(enc, "surrogateescape"))
+            if compressor is not None:
+                writer.close()
+            if use_chunked:
+                out.close()
+        self.logger.info(f"Streamed directory listing of {len(entries)} entries "
+                         f"for {self.template_builder.displaypath}")
+        return None
@@ -0,0 +1,105 @@
+from contextlib import nullcontext
+from time import perf_counter
+from typing import Optional
+
+from EasyHTTPServerAJM.Helpers.request_timings import RequestTimings, TimedWriter
+
+
+class RequestTimingMixin:
+    """
+    Times the phases of every request (see ``RequestTimings``) and hands the timings of each
+    finished request to the ``timing_hooks``: objects with an ``on_request_complete(timings)``
+    method (see ``RequestTimingHook``) or plain callables taking the timings. A failing hook is
+    logged and does not affect the response.
+
+    With ``server_timing`` the phases are also sent to the client in a ``Server-Timing`` header.
+    The header goes out with the other headers, so it only holds the phases that ran before the
+    response started; sending the body is only seen by the hooks.
+
+    Without hooks and ``server_timing`` nothing is timed and the request path is unchanged.
+    """
+    _NO_PHASE = nullcontext()
+
+    timing_hooks: tuple = ()
+    server_timing: bool = False
+
+    def _configure_timing(self, **kwargs):
+        self._handler_started = perf_counter()
+        self.timing_hooks = tuple(kwargs.pop('timing_hooks', None) or ())
+        self.server_timing = kwargs.pop('server_timing', False)
+        self._timings: Optional[RequestTimings] = None
+        self._init_seconds: Optional[float] = None
+        return kwargs
+
+    @property
+    def timing_enabled(self) -> bool:
+        return bool(self.timing_hooks) or self.server_timing
+
+    def _timed_phase(self, name: str):
+        """Context manager timing its block as phase ``name`` of the current request, if it is timed."""
+        return self._timings.phase(name) if self._timings is not None else self._NO_PHASE
+
+    def _timed_writer(self, stream, phase: str):
+        """``stream``, with its writes timed as ``phase`` if the current request is timed."""
+        return TimedWriter(stream, self._timings, phase) if self._timings is not None else stream
+
+    def setup(self):
+        super().setup()
+        if self.timing_enabled:
+            # charged to the first request of the connection
+            self._init_seconds = perf_counter() - self._handler_started
+
+    def parse_request(self):
+        if not self.timing_enabled:
+            return super().parse_request()
+        self._timings = RequestTimings()
+        if self._init_seconds is not None:
+            self._timings.add('init', self._init_seconds)
+            self._init_seconds = None
+        result = super().parse_request()
+        self._timings.method = self.command
+        self._timings.path = self.path
+        return result
+
+    def handle_one_request(self):
+        self._timings = None
+        try:
+            super().handle_one_request()
+        finally:
+            if self._timings is not None:
+                self._complete_timings()
+
+    def _complete_timings(self) -> None:
+        timings, self._timings = self._timings, None
+        timings.finish()
+        for hook in self.timing_hooks:
+            try:
+                getattr(hook, 'on_request_complete', hook)(timings)
+            except Exception as e:
+                self.logger.exception(f"Request timing hook {hook!r} failed: {e}")
+
+    def send_response(self, code, message=None):
+        if self._timings is not None and code >= 200:
+            self._timings.status = code
+        super().send_response(code, message)
+
+    def end_headers(self):
+        # interim responses (100 Continue) have no status recorded and get no header
+        if self.server_timing and self._timings is not None and self._timings.status is not None \
+                and self._timings.phases:
+            self.send_header("Server-Timing", self._timings.server_timing())
+        super().end_headers()
+
+    def translate_path(self, path):
+        if self._timings is None:
+            return super().translate_path(path)
+        with self._timings.phase('translate'):
+            return super().translate_path(path)
+
+    def _send_file_head(self, path: str):
+        with self._timed_phase('open'):
+            return super()._send_file_head(path)
+
+    def copyfile(self, source, outputfile):
+        with self._timed_phase('send'):
+            return super().copyfile(source, outputfile)
@@ -11,6 +11,8 @@ def is_frozen() -> bool:
     return bool(getattr(sys, "frozen", False))
 
 
+from EasyHTTPServerAJM.Helpers.HtmlTemplateBuilder.template_cache import TemplateCache
+from EasyHTTPServerAJM.Helpers.HtmlTemplateBuilder.site_config import SiteConfig
 from EasyHTTPServerAJM.Helpers.HtmlTemplateBuilder.template_asset_helper import AssetHelper, UploadAssetHelper
 from EasyHTTPServerAJM.Helpers.HtmlTemplateBuilder.mixins import FormatDirectoryEntryMixin
 from EasyHTTPServerAJM.Helpers.HtmlTemplateBuilder.template_wrappers import TableWrapperHelper, HTMLWrapperHelper
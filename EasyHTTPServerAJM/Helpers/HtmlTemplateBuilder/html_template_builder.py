@@ -1,13 +1,12 @@
 from html import escape
 from logging import getLogger
 from pathlib import Path
-from string import Template
-from typing import Optional, Union
+from typing import Optional, Union, Tuple
 
-from EasyHTTPServerAJM.Helpers import GetUploadSize
+from EasyHTTPServerAJM.Helpers import GetUploadSize, DirectoryEntryRecord
 from EasyHTTPServerAJM.Helpers.HtmlTemplateBuilder import (AssetHelper, UploadAssetHelper,
                                                            TableWrapperHelper, HTMLWrapperHelper,
-                                                           FormatDirectoryEntryMixin)
+                                                           FormatDirectoryEntryMixin, TemplateCache)
 
 
 class HTMLTemplateBuilder(AssetHelper, FormatDirectoryEntryMixin, TableWrapperHelper):
@@ -29,12 +28,17 @@ class HTMLTemplateBuilder(AssetHelper, FormatDirectoryEntryMixin, TableWrapperHe
     :ivar title: Title of the HTML page.
     :ivar displaypath: Path for display purposes in the HTML page.
     :ivar path: Path to be used for naming and reference within the HTML template.
+    :ivar template_cache: Cache that templates and injected assets are read through.
+        Defaults to the process-wide ``TemplateCache.shared()`` instance.
     """
 
     TABLE_HEADERS = ['Name', 'access_time', 'modified_time', 'created_time']
+    # stands in for $rows when the page is split into a head and a tail for streaming
+    _ROWS_PLACEHOLDER = '\x00rows\x00'
 
     def __init__(self, html_template_path: Optional[Union[str, Path]] = None, **kwargs):
         self.logger = kwargs.pop('logger', getLogger(__name__))
+        self.template_cache: TemplateCache = kwargs.pop('template_cache', None) or TemplateCache.shared()
         super().__init__(html_template_path, logger=self.logger, **kwargs)
         self.back_svg = None
         self.dir_page_css = None
@@ -59,19 +63,53 @@ class HTMLTemplateBuilder(AssetHelper, FormatDirectoryEntryMixin, TableWrapperHe
             self.dir_page_css = None
             self.logger.error("directory_page_css could not be loaded.")
 
+    def _template_version_paths(self) -> tuple:
+        return self.html_template_path, self.back_svg_path, self.directory_page_css_path
+
+    @property
+    def template_version(self) -> tuple:
+        """Changes whenever the builder class or any template/asset it renders with changes on disk."""
+        return (self.__class__.__name__,) + self.template_cache.version(*self._template_version_paths())
+
     def _read_text_file(self, path: Union[str, Path]):
         try:
-            return Path(path).read_text(encoding='utf-8')
+            return self.template_cache.get_text(path)
         except TypeError as e:
             self.logger.error(f"Could not read file {path}")
             raise FileNotFoundError(f"Could not read file {path}") from e
 
     def _build_directory_rows(self, entries, path):
+        # entries are DirectoryEntryRecords from DirectoryScanner, or plain names (which get stat'ed here)
         table_rows = []
-        for name in entries:
-            table_rows.append(self._process_directory_entry(path, name))
+        for entry in entries:
+            if isinstance(entry, DirectoryEntryRecord):
+                table_rows.append(self._process_directory_record(entry))
+            else:
+                table_rows.append(self._process_directory_entry(path, entry))
         return table_rows
 
+    def iter_directory_rows(self, entries, path, batch_size: int):
+        """Yield the rendered table rows for ``entries`` in newline-joined batches of ``batch_size`` rows."""
+        batch = []
+        for row in self._build_directory_rows(entries, path):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield '\n'.join(batch) + '\n'
+                batch = []
+        if batch:
+            yield '\n'.join(batch) + '\n'
+
+    def build_pagination_nav(self, page: int, per_page: int, total: int) -> str:
+        last_page = max(1, -(-total // per_page))
+        parts = []
+        if page > 1:
+            parts.append(self._process_link_entry(f"?page={min(page - 1, last_page)}&amp;per_page={per_page}",
+                                                  '&laquo; Previous'))
+        parts.append(f"Page {page} of {last_page} ({total} entries)")
+        if page < last_page:
+            parts.append(self._process_link_entry(f"?page={page + 1}&amp;per_page={per_page}", 'Next &raquo;'))
+        return f"<p class='pagination'>{' | '.join(parts)}</p>"
+
     def _build_parent_dir_link(self):
         # <td><a href='..'>..</a></td>
         pdl_base = self.wrap_table_data(self._process_link_entry('..','..'))
@@ -105,17 +143,18 @@ class HTMLTemplateBuilder(AssetHelper, FormatDirectoryEntryMixin, TableWrapperHe
                         'back_svg': self.back_svg,
                         'css_contents': self.dir_page_css,
                         'upload_form': '',
+                        'pagination': '',
                         'message': message}
 
         return {**full_context, **(add_to_context or {})}
 
     def _build_template(self, template_path:Path, context: dict):
         try:
-            template = Template(self._read_text_file(template_path))
+            template = self.template_cache.get_template(template_path)
             return template.safe_substitute(context)
-        except FileNotFoundError as e:
+        except (TypeError, FileNotFoundError) as e:
             self.logger.critical(f"Could not read template file {template_path}")
-            raise e
+            raise FileNotFoundError(f"Could not read template file {template_path}") from e
 
     def _build_body_template(self, context: dict):
         return self._build_template(self.html_template_path, context)
@@ -124,6 +163,17 @@ class HTMLTemplateBuilder(AssetHelper, FormatDirectoryEntryMixin, TableWrapperHe
         safe_context = self._build_template_safe_context(entries, path, add_to_context)
         return self._build_body_template(safe_context)
 
+    def build_page_parts(self, path, add_to_context: dict = None) -> Tuple[str, str]:
+        """
+        Render the page without any entry rows and split it where the rows go, returning (head, tail).
+        A template without ``$rows`` is returned whole as the head.
+        """
+        safe_context = self._build_template_safe_context([], path, add_to_context)
+        safe_context['rows'] = self.__class__._ROWS_PLACEHOLDER
+        page = self._build_body_template(safe_context)
+        head, _, tail = page.partition(self.__class__._ROWS_PLACEHOLDER)
+        return head, tail
+
 
 class HTMLTemplateBuilderUpload(HTMLTemplateBuilder, UploadAssetHelper, HTMLWrapperHelper):
     DEFAULT_UPLOAD_FORM_PATH = Path(HTMLTemplateBuilder.DEFAULT_TEMPLATES_PATH, '_upload_form.html')
@@ -136,6 +186,17 @@ class HTMLTemplateBuilderUpload(HTMLTemplateBuilder, UploadAssetHelper, HTMLWrap
         msg = self.wrap_error_paragraph(f"Upload failed: {escape(str(exception))}")
         return msg
 
+    def _get_upload_summary_msg(self, uploaded: list, failed: list):
+        total_str = GetUploadSize.conversion_to_str('auto_convert', sum(u.size for u in uploaded))
+        msg = self.wrap_success_paragraph(f'Uploaded {len(uploaded)} file(s) ({total_str})') if uploaded else ''
+        for failure in failed:
+            name = f"{escape(failure.filename)}: " if failure.filename else ''
+            msg += self.wrap_error_paragraph(f"Upload failed: {name}{escape(failure.error)}")
+        return msg
+
+    def _template_version_paths(self) -> tuple:
+        return super()._template_version_paths() + (self.upload_form_path,)
+
     # noinspection PyMethodMayBeStatic
     def _build_upload_form(self, context: dict = None):
         if context is None:
@@ -1,5 +1,7 @@
 import os
+from datetime import datetime
 from html import escape
+from EasyHTTPServerAJM.Helpers.directory_scanner import DirectoryEntryRecord
 # long form to prevent circular import
 from EasyHTTPServerAJM.Helpers.HtmlTemplateBuilder.template_wrappers import TableWrapperHelper
 
@@ -8,10 +10,11 @@ class FormatDirectoryEntryMixin(TableWrapperHelper):
     DEFAULT_FILE_STATS = {'access_time': 'unknown',
                           'modified_time': 'unknown',
                           'created_time': 'unknown'}
+    # RequestTimings of the request being rendered, set by the handler when it times requests
+    timings = None
 
     def _get_file_stats(self, file_path):
         if os.path.exists(file_path):
-            from datetime import datetime
             stats = os.stat(file_path)
             file_stats = {'access_time': datetime.fromtimestamp(stats.st_atime).ctime(),
                           'modified_time': datetime.fromtimestamp(stats.st_mtime).ctime(),
@@ -20,13 +23,27 @@ class FormatDirectoryEntryMixin(TableWrapperHelper):
             file_stats = self.__class__.DEFAULT_FILE_STATS
         return file_stats
 
-    def _format_file_entry_stats(self, file_path):
-        fstats = [self.wrap_table_data(f"{x[1]}") for x
-                  in self._get_file_stats(file_path=file_path).items()]
+    def _get_record_stats(self, record: DirectoryEntryRecord):
+        # records are stat'ed by the scanner already, so this never touches the filesystem
+        if record.mtime is None:
+            return self.__class__.DEFAULT_FILE_STATS
+        return {'access_time': datetime.fromtimestamp(record.atime).ctime(),
+                'modified_time': datetime.fromtimestamp(record.mtime).ctime(),
+                'created_time': datetime.fromtimestamp(record.ctime).ctime()}
+
+    def _format_entry_stats(self, file_stats: dict):
+        fstats = [self.wrap_table_data(f"{x[1]}") for x in file_stats.items()]
         fstats.reverse()
         entry_stats = (''.join(fstats))
         return entry_stats
 
+    def _format_file_entry_stats(self, file_path):
+        if self.timings is None:
+            return self._format_entry_stats(self._get_file_stats(file_path=file_path))
+        with self.timings.phase('stat'):
+            file_stats = self._get_file_stats(file_path=file_path)
+        return self._format_entry_stats(file_stats)
+
     def _format_table_data_row(self, entry_stats, **kwargs):
         link, display = kwargs.get('link_tup', (None, None))
         table_data = None
@@ -50,3 +67,12 @@ class FormatDirectoryEntryMixin(TableWrapperHelper):
         table_data = self._format_table_data_row(entry_stats, link_tup=(link, display))
 
         return self.wrap_table_row(table_data)
+
+    def _process_directory_record(self, record: DirectoryEntryRecord):
+        display = record.name + ("/" if record.is_dir else "")
+        link = escape(display)
+
+        entry_stats = self._format_entry_stats(self._get_record_stats(record))
+        table_data = self._format_table_data_row(entry_stats, link_tup=(link, display))
+
+        return self.wrap_table_row(table_data)
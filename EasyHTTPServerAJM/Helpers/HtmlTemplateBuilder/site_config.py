@@ -0,0 +1,21 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class SiteConfig:
+    """
+    Immutable snapshot of the already validated asset and template paths for a site.
+
+    A SiteConfig is produced once (usually by ``EasyHTTPServer.__init__``) from a fully
+    validated ``AssetHelper`` and then injected into every handler, so building a
+    handler does not have to run ``PathValidator`` against the filesystem again.
+    Paths that failed validation are stored as None, exactly as ``AssetHelper`` leaves them.
+    """
+    templates_path: Optional[Path] = None
+    html_template_path: Optional[Path] = None
+    assets_path: Optional[Path] = None
+    back_svg_path: Optional[Path] = None
+    directory_page_css_path: Optional[Path] = None
+    upload_form_path: Optional[Path] = None
@@ -1,7 +1,8 @@
 from logging import getLogger
 from pathlib import Path
-from typing import Optional, Union, Tuple
+from typing import Dict, Optional, Union, Tuple
 from EasyHTTPServerAJM.Helpers import PathValidator, PathValidationType
+from EasyHTTPServerAJM.Helpers.HtmlTemplateBuilder.site_config import SiteConfig
 
 
 class AssetHelper:
@@ -22,6 +23,9 @@ class AssetHelper:
     :type DEFAULT_BACK_SVG_PATH: Path
     :ivar DEFAULT_DIRECTORY_PAGE_CSS_PATH: Default path to the CSS file for directory pages.
     :type DEFAULT_DIRECTORY_PAGE_CSS_PATH: Path
+
+    If a ``site_config`` keyword argument is given, its already validated paths are used as-is
+    and no path validation (or filesystem access) takes place.
     """
     _BASE_DIR = Path(__file__).resolve().parent
     DEFAULT_ASSETS_PATH = Path(_BASE_DIR / 'assets').resolve()
@@ -39,44 +43,59 @@ class AssetHelper:
         self._back_svg_path = None
         self._directory_page_css_path = None
 
-        self.path_validator = kwargs.pop('path_validator_class', PathValidator)(**kwargs, logger=self.logger)
-        self._set_paths(html_template_path, **kwargs)
+        site_config: Optional[SiteConfig] = kwargs.pop('site_config', None)
+        if site_config is not None:
+            self.path_validator = None
+            self._apply_site_config(site_config)
+        else:
+            self.path_validator = kwargs.pop('path_validator_class', PathValidator)(**kwargs, logger=self.logger)
+            self._set_paths(html_template_path, **kwargs)
+
+    def _asset_paths(self, html_template_path: Optional[Union[str, Path]] = None,
+                     **kwargs) -> Dict[str, Tuple[Union[str, Path], PathValidationType]]:
+        """Map each private attr name to the (path, PathValidationType) it should be set to."""
+        return {
+            "_templates_path": (kwargs.get('templates_path', self.__class__.DEFAULT_TEMPLATES_PATH),
+                                PathValidationType.DIR),
+            "_html_template_path": (html_template_path
+                                    if html_template_path is not None
+                                    else self.__class__.DEFAULT_HTML_TEMPLATE_PATH,
+                                    PathValidationType.HTML),
+            "_assets_path": (kwargs.get('assets_path', self.__class__.DEFAULT_ASSETS_PATH), PathValidationType.DIR),
+            "_back_svg_path": (kwargs.get('back_svg_path', self.__class__.DEFAULT_BACK_SVG_PATH),
+                               PathValidationType.SVG),
+            "_directory_page_css_path": (kwargs.get('directory_page_css_path',
+                                                    self.__class__.DEFAULT_DIRECTORY_PAGE_CSS_PATH),
+                                         PathValidationType.CSS),
+        }
 
     def _set_paths(self, html_template_path: Optional[Union[str, Path]] = None, **kwargs):
-        # Each call passes (path, PathValidationType) plus the private attr name
-        self._set_property(
-            (kwargs.get('templates_path', self.__class__.DEFAULT_TEMPLATES_PATH), PathValidationType.DIR),
-            "_templates_path",
-        )
-        self._set_property(
-            (
-                html_template_path
-                if html_template_path is not None
-                else self.__class__.DEFAULT_HTML_TEMPLATE_PATH,
-                PathValidationType.HTML,
-            ),
-            "_html_template_path",
-        )
-        self._set_property(
-            (kwargs.get('assets_path', self.__class__.DEFAULT_ASSETS_PATH), PathValidationType.DIR),
-            "_assets_path",
-        )
-        self._set_property(
-            (kwargs.get('back_svg_path', self.__class__.DEFAULT_BACK_SVG_PATH), PathValidationType.SVG),
-            "_back_svg_path",
-        )
-        self._set_property(
-            (
-                kwargs.get(
-                    'directory_page_css_path',
-                    self.__class__.DEFAULT_DIRECTORY_PAGE_CSS_PATH,
-                ),
-                PathValidationType.CSS,
-            ),
-            "_directory_page_css_path",
-        )
+        # all paths are validated in one batch: one (cached) stat per unique path
+        asset_paths = self._asset_paths(html_template_path, **kwargs)
+        results = self.path_validator.validate_many(asset_paths.values())
+        for (private_property_name, value), is_valid in zip(asset_paths.items(), results):
+            if is_valid:
+                self.__setattr__(private_property_name, value[0])
+                self.logger.debug("%s set to %s", private_property_name, value[0])
+            else:
+                self.logger.error(f"Failed to set {private_property_name} to {value[0]} - did not validate")
         self.logger.debug("Paths set")
 
+    def _site_config_fields(self) -> dict:
+        return {'templates_path': self._templates_path,
+                'html_template_path': self._html_template_path,
+                'assets_path': self._assets_path,
+                'back_svg_path': self._back_svg_path,
+                'directory_page_css_path': self._directory_page_css_path}
+
+    def _apply_site_config(self, site_config: SiteConfig):
+        for field_name, value in self._site_config_fields().items():
+            self.__setattr__(f"_{field_name}", getattr(site_config, field_name))
+
+    def to_site_config(self) -> SiteConfig:
+        """Return an immutable snapshot of the validated paths of this helper."""
+        return SiteConfig(**self._site_config_fields())
+
     @property
     def templates_path(self) -> Optional[Path]:
         return self._templates_path
@@ -101,19 +120,8 @@ class AssetHelper:
         self.path_validator.candidate_path = kwargs.get('candidate_path', None)
         self.path_validator.candidate_path_validation_type = kwargs.get('candidate_path_validation_type',
                                                                         PathValidationType.FILE)
-        self.logger.debug(f"SET Candidate path: {self.path_validator.candidate_path} "
-                          f"with validation type: {self.path_validator.candidate_path_validation_type}")
-
-    def _set_property(self, value: Tuple[Union[str, Path], PathValidationType],
-                      private_property_name: str):
-        self.set_validator_paths(candidate_path=value[0],
-                                 candidate_path_validation_type=value[1])
-        self.path_validator.resolve_flags()
-        if self.path_validator.validate():
-            self.__setattr__(private_property_name, value[0])
-            self.logger.debug(f"{private_property_name} set to {value[0]}")
-        else:
-            self.logger.error(f"Failed to set {private_property_name} to {value[0]} - did not validate")
+        self.logger.debug("SET Candidate path: %s with validation type: %s", self.path_validator.candidate_path,
+                          self.path_validator.candidate_path_validation_type)
 
 
 class UploadAssetHelper(AssetHelper):
@@ -122,22 +130,23 @@ class UploadAssetHelper(AssetHelper):
     def __init__(self, html_template_path: Optional[Union[str, Path]] = None,
                  upload_form_path: Optional[Union[str, Path]] = None, **kwargs):
         self._upload_form_path = None
-        super().__init__(html_template_path, **kwargs)
-        self._set_paths(html_template_path, upload_form_path, **kwargs)
-
-    def _set_paths(self, html_template_path: Optional[Union[str, Path]] = None,
-                   upload_form_path: Optional[Union[str, Path]] = None,
-                   **kwargs):
-        super()._set_paths(html_template_path, **kwargs)
-        self._set_property(
-            (
-                upload_form_path
-                if upload_form_path is not None
-                else self.__class__.DEFAULT_UPLOAD_FORM_TEMPLATE_PATH,
-                PathValidationType.HTML,
-            ),
-            "_upload_form_path",
-        )
+        # AssetHelper._set_paths validates our _asset_paths, the upload form included
+        super().__init__(html_template_path, upload_form_path=upload_form_path, **kwargs)
+
+    def _asset_paths(self, html_template_path: Optional[Union[str, Path]] = None,
+                     upload_form_path: Optional[Union[str, Path]] = None,
+                     **kwargs) -> Dict[str, Tuple[Union[str, Path], PathValidationType]]:
+        asset_paths = super()._asset_paths(html_template_path, **kwargs)
+        asset_paths["_upload_form_path"] = (upload_form_path
+                                            if upload_form_path is not None
+                                            else self.__class__.DEFAULT_UPLOAD_FORM_TEMPLATE_PATH,
+                                            PathValidationType.HTML)
+        return asset_paths
+
+    def _site_config_fields(self) -> dict:
+        fields = super()._site_config_fields()
+        fields['upload_form_path'] = self._upload_form_path
+        return fields
 
     @property
     def upload_form_path(self) -> Optional[Path]:
@@ -0,0 +1,146 @@
+import os
+from logging import getLogger
+from pathlib import Path
+from string import Template
+from threading import Lock
+from time import monotonic
+from typing import Optional, Union
+
+
+class _TemplateCacheEntry:
+    __slots__ = ('mtime_ns', 'size', 'checked_at', 'text', 'template')
+
+    def __init__(self, mtime_ns: int, size: int, checked_at: float, text: str):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.checked_at = checked_at
+        self.text = text
+        self.template: Optional[Template] = None
+
+
+class TemplateCache:
+    """
+    Process-wide, thread-safe cache of template and asset file contents.
+
+    Entries are keyed by the path of the file and hold both the raw text and
+    (on demand) the compiled ``string.Template``. An entry is invalidated when the
+    ``st_mtime_ns`` or size of its file changes. To keep the hot path free of file I/O,
+    a file is only re-stat'ed once ``check_interval`` seconds have passed since the
+    last check.
+
+    :ivar check_interval: Minimum number of seconds between freshness checks of a cached file.
+    :type check_interval: float
+    :ivar hits: Number of lookups served from the cache.
+    :type hits: int
+    :ivar misses: Number of lookups that had to read the file from disk.
+    :type misses: int
+    :ivar generation: Incremented every time an entry is (re)loaded from disk.
+    :type generation: int
+    """
+    DEFAULT_CHECK_INTERVAL = 2.0
+    _shared_instance = None
+    _shared_lock = Lock()
+
+    def __init__(self, check_interval: Optional[float] = None, **kwargs):
+        self.logger = kwargs.get('logger', getLogger(__name__))
+        self.check_interval = (check_interval if check_interval is not None
+                               else self.__class__.DEFAULT_CHECK_INTERVAL)
+        self._entries = {}
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+
+    @classmethod
+    def shared(cls) -> "TemplateCache":
+        """Return the process-wide cache instance, creating it on first use."""
+        if cls._shared_instance is None:
+            with cls._shared_lock:
+                if cls._shared_instance is None:
+                    cls._shared_instance = cls()
+        return cls._shared_instance
+
+    @staticmethod
+    def _cache_key(path: Union[str, Path]) -> str:
+        return os.fspath(path)
+
+    def _load_entry(self, key: str, now: float) -> _TemplateCacheEntry:
+        st = os.stat(key)
+        with open(key, 'r', encoding='utf-8') as f:
+            text = f.read()
+        self.logger.debug("Loaded %s into the template cache", key)
+        return _TemplateCacheEntry(st.st_mtime_ns, st.st_size, now, text)
+
+    def _is_stale(self, key: str, entry: _TemplateCacheEntry, now: float) -> bool:
+        if now - entry.checked_at < self.check_interval:
+            return False
+        try:
+            st = os.stat(key)
+        except OSError:
+            return True
+        entry.checked_at = now
+        return st.st_mtime_ns != entry.mtime_ns or st.st_size != entry.size
+
+    def _get_entry(self, path: Union[str, Path]) -> _TemplateCacheEntry:
+        key = self._cache_key(path)
+        now = monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self._is_stale(key, entry, now):
+                self.hits += 1
+                return entry
+            self.misses += 1
+            try:
+                entry = self._load_entry(key, now)
+            except OSError:
+                self._entries.pop(key, None)
+                raise
+            self._entries[key] = entry
+            self.generation += 1
+            return entry
+
+    def get_text(self, path: Union[str, Path]) -> str:
+        """Return the text of ``path``, reading it from disk only on a miss."""
+        return self._get_entry(path).text
+
+    def get_template(self, path: Union[str, Path]) -> Template:
+        """Return the compiled ``string.Template`` for ``path``."""
+        entry = self._get_entry(path)
+        # compiling is idempotent, so a race here only costs a duplicate Template()
+        if entry.template is None:
+            entry.template = Template(entry.text)
+        return entry.template
+
+    def version(self, *paths: Optional[Union[str, Path]]) -> tuple:
+        """
+        Return the cached ``st_mtime_ns`` of each path (loading and freshness-checking it first),
+        so callers can tell when any of a set of templates has changed. Missing paths give None.
+        """
+        mtimes = []
+        for path in paths:
+            try:
+                mtimes.append(self._get_entry(path).mtime_ns if path is not None else None)
+            except OSError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    def invalidate(self, path: Union[str, Path]) -> None:
+        with self._lock:
+            self._entries.pop(self._cache_key(path), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'hit_ratio': self.hit_ratio}
@@ -1,4 +1,17 @@
 from EasyHTTPServerAJM.Helpers.get_upload_size import GetUploadSize
 from EasyHTTPServerAJM.Helpers.enum import PathValidationType
+from EasyHTTPServerAJM.Helpers.stat_cache import StatCache
 from EasyHTTPServerAJM.Helpers.path_validator import PathValidator, CandidatePathNotSetError
+from EasyHTTPServerAJM.Helpers.directory_scanner import DirectoryScanner, DirectoryEntryRecord
+from EasyHTTPServerAJM.Helpers.inotify import Inotify, InotifyEvent
+from EasyHTTPServerAJM.Helpers.filesystem_index import FilesystemIndex, IndexedDirectory
+from EasyHTTPServerAJM.Helpers.listing_cache import ListingCache
+from EasyHTTPServerAJM.Helpers.content_encoding import ContentEncoder
+from EasyHTTPServerAJM.Helpers.multipart import MultipartParser, MultipartPart, MultipartError, parse_options_header
+from EasyHTTPServerAJM.Helpers.resumable_uploads import ResumableUploadStore, UploadSession, UploadSessionError
+from EasyHTTPServerAJM.Helpers.upload_writer import AtomicUploadWriter
+from EasyHTTPServerAJM.Helpers.filename_allocator import UniqueFilenameAllocator
+from EasyHTTPServerAJM.Helpers.metrics import ServerMetrics
+from EasyHTTPServerAJM.Helpers.request_timings import (RequestTimings, RequestTimingHook, SlowRequestLogHook,
+                                                       TimedWriter)
 from EasyHTTPServerAJM.Helpers import HtmlTemplateBuilder
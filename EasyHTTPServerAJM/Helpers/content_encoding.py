@@ -0,0 +1,154 @@
+import os
+import zlib
+from logging import getLogger
+from stat import S_ISREG
+from threading import Lock
+from typing import Dict, Hashable, Optional, Tuple
+
+from EasyHTTPServerAJM.Helpers.listing_cache import ListingCache
+
+# zstd is optional: the standard library has it from Python 3.14, older runtimes need the zstandard package
+try:
+    from compression import zstd as _zstd
+except ImportError:
+    _zstd = None
+try:
+    import zstandard as _zstandard
+except ImportError:
+    _zstandard = None
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """Content codings this runtime can produce, in order of preference."""
+    if _zstd is not None or _zstandard is not None:
+        return 'zstd', 'gzip'
+    return ('gzip',)
+
+
+class ContentEncoder:
+    """
+    Negotiates ``Accept-Encoding`` and compresses response bodies with gzip, or zstd when the
+    runtime provides it.
+
+    Compressed bodies are kept in ``variant_cache``, a byte-bounded ``ListingCache`` without an
+    age limit, so a popular page or file is only compressed once per version. Callers provide
+    the cache key and must include everything that identifies the version (mtime, size, ...).
+    Precompressed sidecar files (``foo.txt.gz``, ``foo.txt.zst``) are preferred when they are
+    at least as new as the original.
+
+    :ivar level: Compression level used for both gzip (1-9) and zstd (1-22).
+    :type level: int
+    :ivar min_size: Bodies smaller than this many bytes are sent uncompressed.
+    :type min_size: int
+    :ivar max_size: Files larger than this are only sent compressed if a sidecar exists, since
+        compressing on the fly would read the whole file into memory.
+    :type max_size: int
+    :ivar encodings: Content codings offered to clients, in order of preference.
+    :type encodings: tuple
+    """
+    DEFAULT_LEVEL = 6
+    DEFAULT_MIN_SIZE = 1024
+    DEFAULT_MAX_SIZE = 16 * 1024 * 1024
+    DEFAULT_CACHE_BYTES = 16 * 1024 * 1024
+    COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'application/xml',
+                          'application/xhtml+xml', 'application/x-sh', 'image/svg+xml')
+    SIDECAR_SUFFIXES = {'zstd': '.zst', 'gzip': '.gz'}
+    _ALIASES = {'x-gzip': 'gzip'}
+
+    _shared: Optional["ContentEncoder"] = None
+    _shared_lock = Lock()
+
+    def __init__(self, level: Optional[int] = None, min_size: Optional[int] = None,
+                 max_size: Optional[int] = None, cache_bytes: Optional[int] = None, **kwargs):
+        self.logger = kwargs.get('logger', getLogger(__name__))
+        self.level = level if level is not None else self.__class__.DEFAULT_LEVEL
+        self.min_size = min_size if min_size is not None else self.__class__.DEFAULT_MIN_SIZE
+        self.max_size = max_size if max_size is not None else self.__class__.DEFAULT_MAX_SIZE
+        supported = available_encodings()
+        self.encodings = tuple(e for e in kwargs.get('encodings', supported) if e in supported)
+        self.variant_cache = ListingCache(
+            max_bytes=cache_bytes if cache_bytes is not None else self.__class__.DEFAULT_CACHE_BYTES,
+            max_age=None, logger=self.logger)
+
+    @classmethod
+    def shared(cls) -> "ContentEncoder":
+        """Return the process-wide encoder used by handlers that are not given one."""
+        if cls._shared is None:
+            with cls._shared_lock:
+                if cls._shared is None:
+                    cls._shared = cls()
+        return cls._shared
+
+    @classmethod
+    def _parse_accept_encoding(cls, header: str) -> Dict[str, float]:
+        qvalues = {}
+        for item in header.split(','):
+            coding, *params = [part.strip() for part in item.split(';')]
+            if not coding:
+                continue
+            q = 1.0
+            for param in params:
+                name, _, value = param.partition('=')
+                if name.strip().lower() == 'q':
+                    try:
+                        q = float(value)
+                    except ValueError:
+                        q = 0.0
+            coding = coding.lower()
+            qvalues[cls._ALIASES.get(coding, coding)] = q
+        return qvalues
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Optional[str]:
+        """Pick the content coding for a request's Accept-Encoding, or None for identity."""
+        if not accept_encoding or not self.encodings:
+            return None
+        qvalues = self._parse_accept_encoding(accept_encoding)
+        wildcard = qvalues.get('*', 0.0)
+        best, best_q = None, 0.0
+        # ties go to the server's order of preference
+        for encoding in self.encodings:
+            q = qvalues.get(encoding, wildcard)
+            if q > best_q:
+                best, best_q = encoding, q
+        return best
+
+    def is_compressible(self, ctype: Optional[str], size: Optional[int] = None) -> bool:
+        if not ctype or not ctype.startswith(self.__class__.COMPRESSIBLE_TYPES):
+            return False
+        return size is None or size >= self.min_size
+
+    def compressobj(self, encoding: str):
+        """Return an incremental compressor with ``compress(data)`` and ``flush()``."""
+        if encoding == 'gzip':
+            # wbits 31 = zlib's deflate with a gzip header and trailer
+            return zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        if encoding == 'zstd' and _zstd is not None:
+            return _zstd.ZstdCompressor(level=self.level)
+        if encoding == 'zstd' and _zstandard is not None:
+            return _zstandard.ZstdCompressor(level=self.level).compressobj()
+        raise ValueError(f"unsupported content coding: {encoding}")
+
+    def cached_variant(self, key: Hashable, encoding: str) -> Optional[bytes]:
+        return self.variant_cache.get((key, encoding, self.level))
+
+    def compress(self, data: bytes, encoding: str, key: Optional[Hashable] = None) -> bytes:
+        """Compress ``data``; when ``key`` is given the result is stored for ``cached_variant``."""
+        compressor = self.compressobj(encoding)
+        compressed = compressor.compress(data) + compressor.flush()
+        if key is not None:
+            self.variant_cache.put((key, encoding, self.level), compressed)
+        return compressed
+
+    def find_sidecar(self, path: str, fs: os.stat_result, encoding: str) -> Optional[Tuple[str, os.stat_result]]:
+        """Return (path, stat) of a precompressed copy of ``path`` that is not older than the original."""
+        sidecar = path + self.__class__.SIDECAR_SUFFIXES[encoding]
+        try:
+            sidecar_fs = os.stat(sidecar)
+        except OSError:
+            return None
+        if not S_ISREG(sidecar_fs.st_mode) or sidecar_fs.st_mtime_ns < fs.st_mtime_ns:
+            return None
+        return sidecar, sidecar_fs
+
+    def stats(self) -> dict:
+        return {'encodings': self.encodings, 'level': self.level, **self.variant_cache.stats()}
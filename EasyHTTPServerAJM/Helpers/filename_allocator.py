@@ -0,0 +1,104 @@
+import os
+from collections import OrderedDict
+from logging import getLogger
+from threading import Lock
+from typing import Optional, Tuple
+
+
+class UniqueFilenameAllocator:
+    """
+    Hands out unused file names of the form ``name.ext``, ``name (1).ext``, ``name (2).ext``, ...
+
+    A name is claimed by creating an empty placeholder with ``O_CREAT | O_EXCL``, which is atomic
+    across threads and processes, so two concurrent uploads can never be given the same name. The
+    caller publishes the real file over the placeholder (e.g. with ``os.replace``) or removes it
+    with ``release``. The next free suffix for every (directory, name) is remembered, so the
+    ten-thousandth upload of ``report.pdf`` costs one or two ``open`` calls rather than ten thousand
+    ``exists`` checks. When the hint is stale (another process took names too), suffixes are
+    probed in growing steps before settling on the first free one found.
+
+    :ivar max_hints: Number of (directory, name) suffix hints kept, least recently used first out.
+    :type max_hints: int
+    """
+    DEFAULT_MAX_HINTS = 4096
+    # suffixes probed one by one before the step starts doubling
+    LINEAR_PROBES = 4
+    _shared_instance: Optional["UniqueFilenameAllocator"] = None
+    _shared_lock = Lock()
+
+    def __init__(self, max_hints: Optional[int] = None, **kwargs):
+        self.logger = kwargs.get('logger', getLogger(__name__))
+        self.max_hints = max_hints or self.__class__.DEFAULT_MAX_HINTS
+        self._hints: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+        self._lock = Lock()
+        self.attempts = 0
+
+    @classmethod
+    def shared(cls) -> "UniqueFilenameAllocator":
+        """Return the process-wide allocator, creating it on first use."""
+        if cls._shared_instance is None:
+            with cls._shared_lock:
+                if cls._shared_instance is None:
+                    cls._shared_instance = cls()
+        return cls._shared_instance
+
+    @staticmethod
+    def candidate_name(filename: str, suffix: int) -> str:
+        if suffix == 0:
+            return filename
+        root, ext = os.path.splitext(filename)
+        return f"{root} ({suffix}){ext}"
+
+    def _try_claim(self, directory: str, filename: str, suffix: int) -> Optional[str]:
+        path = os.path.join(directory, self.candidate_name(filename, suffix))
+        self.attempts += 1
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            return None
+        os.close(fd)
+        return path
+
+    def _get_hint(self, key: Tuple[str, str]) -> int:
+        with self._lock:
+            hint = self._hints.get(key, 0)
+            if key in self._hints:
+                self._hints.move_to_end(key)
+            return hint
+
+    def _set_hint(self, key: Tuple[str, str], suffix: int) -> None:
+        with self._lock:
+            if suffix > self._hints.get(key, -1):
+                self._hints[key] = suffix
+                self._hints.move_to_end(key)
+            while len(self._hints) > self.max_hints:
+                self._hints.popitem(last=False)
+
+    def allocate(self, directory: str, filename: str) -> str:
+        """Claim a free name for ``filename`` in ``directory`` and return its full path."""
+        directory = os.fspath(directory)
+        key = (os.path.normcase(os.path.abspath(directory)), filename)
+        suffix = self._get_hint(key)
+        if suffix and (path := self._try_claim(directory, filename, 0)) is not None:
+            # the plain name was freed up again (file deleted), prefer it
+            return path
+        step, probes = 1, 0
+        while True:
+            path = self._try_claim(directory, filename, suffix)
+            if path is not None:
+                self._set_hint(key, suffix + 1)
+                return path
+            probes += 1
+            suffix += step
+            if probes >= self.__class__.LINEAR_PROBES:
+                # gallop past a long run of taken names instead of walking it one by one
+                step *= 2
+
+    @staticmethod
+    def release(path: str) -> None:
+        """Give up a claimed name that was never used."""
+        try:
+            if os.path.getsize(path) == 0:
+                os.remove(path)
+        except OSError:
+            pass
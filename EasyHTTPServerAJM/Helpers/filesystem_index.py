@@ -0,0 +1,428 @@
+import errno
+import os
+import sys
+from array import array
+from pathlib import Path
+from queue import Empty, SimpleQueue
+from threading import Event, Lock, Thread
+from time import monotonic
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from EasyHTTPServerAJM.Helpers.directory_scanner import DirectoryScanner, DirectoryEntryRecord
+from EasyHTTPServerAJM.Helpers.inotify import Inotify, InotifyEvent
+
+
+class IndexedDirectory:
+    """
+    Compact snapshot of one directory's listing: the names in one tuple and the rest of every
+    DirectoryEntryRecord packed into flat arrays (one flag byte, one size and three times per
+    entry) instead of a tuple and four boxed numbers per entry.
+
+    :ivar version: Changes whenever the listing does: the newest mtime/ctime, in nanoseconds,
+        of the directory and its entries.
+    :type version: int
+    :ivar scanned_at: ``time.monotonic()`` of the scan the snapshot was taken from.
+    :type scanned_at: float
+    :ivar nbytes: Approximate memory held by the snapshot.
+    :type nbytes: int
+    """
+    IS_DIR = 0x1
+    HAS_STAT = 0x2
+    # a real subdirectory, not a symlink to one: the crawl descends into these only
+    IS_SUBDIRECTORY = 0x4
+
+    __slots__ = ('names', 'flags', 'sizes', 'times', 'version', 'scanned_at', 'nbytes')
+
+    def __init__(self, names: Tuple[str, ...], flags: bytes, sizes: array, times: array,
+                 version: int, scanned_at: float):
+        self.names = names
+        self.flags = flags
+        self.sizes = sizes
+        self.times = times
+        self.version = version
+        self.scanned_at = scanned_at
+        self.nbytes = (sys.getsizeof(names) + sum(sys.getsizeof(name) for name in names) + sys.getsizeof(flags)
+                       + sys.getsizeof(sizes) + sys.getsizeof(times))
+
+    @classmethod
+    def from_records(cls, records: Iterable[DirectoryEntryRecord], subdirectories: Iterable[str] = (),
+                     version: int = 0, scanned_at: Optional[float] = None) -> "IndexedDirectory":
+        """Pack ``records`` (sorted by name) taken at ``scanned_at``; ``subdirectories`` names the real subdirectories."""
+        subdirectories = set(subdirectories)
+        names, flags, sizes, times = [], bytearray(), array('q'), array('d')
+        for record in records:
+            has_stat = record.size is not None
+            names.append(record.name)
+            flags.append((cls.IS_DIR if record.is_dir else 0) | (cls.HAS_STAT if has_stat else 0)
+                         | (cls.IS_SUBDIRECTORY if record.name in subdirectories else 0))
+            sizes.append(record.size if has_stat else 0)
+            times.extend((record.atime, record.mtime, record.ctime) if has_stat else (0.0, 0.0, 0.0))
+            if has_stat:
+                version = max(version, int(record.mtime * 1e9), int(record.ctime * 1e9))
+        return cls(tuple(names), bytes(flags), sizes, times, version,
+                   monotonic() if scanned_at is None else scanned_at)
+
+    def records(self) -> List[DirectoryEntryRecord]:
+        """The entries as DirectoryEntryRecords, sorted by name."""
+        records = []
+        times = self.times
+        for i, (name, flags) in enumerate(zip(self.names, self.flags)):
+            if flags & self.__class__.HAS_STAT:
+                records.append(DirectoryEntryRecord(name, bool(flags & self.__class__.IS_DIR), self.sizes[i],
+                                                    times[3 * i], times[3 * i + 1], times[3 * i + 2]))
+            else:
+                records.append(DirectoryEntryRecord(name, bool(flags & self.__class__.IS_DIR),
+                                                    None, None, None, None))
+        return records
+
+    def subdirectories(self) -> List[str]:
+        return [name for name, flags in zip(self.names, self.flags) if flags & self.__class__.IS_SUBDIRECTORY]
+
+    def __len__(self):
+        return len(self.names)
+
+
+class FilesystemIndex(DirectoryScanner):
+    """
+    A DirectoryScanner that serves listings of the tree under ``root`` from memory.
+
+    ``start`` crawls the tree once on a background thread, keeping an IndexedDirectory per
+    directory, and then keeps it current. On Linux every indexed directory gets an inotify watch
+    and a change marks its snapshot dirty, so it is listed from disk again until the background
+    thread has rescanned it, usually well under a second later. Elsewhere, with
+    ``use_inotify=False``, or for directories beyond the ``fs.inotify.max_user_watches`` limit,
+    snapshots are rescanned every ``rescan_interval`` seconds instead and may be that old.
+    Note that inotify only sees changes made through this machine's kernel: on NFS and other
+    network filesystems, files written by other clients need ``use_inotify=False``.
+
+    Directories outside ``root``, not indexed yet, dirty, or beyond ``max_entries`` are
+    scanned like ``DirectoryScanner`` does; ``stats`` counts those as misses. Access times are
+    those of the last scan. A stopped index serves nothing from memory.
+
+    :ivar root: Absolute path of the indexed tree.
+    :type root: str
+    :ivar use_inotify: Watch directories with inotify where the platform supports it.
+    :type use_inotify: bool
+    :ivar rescan_interval: Seconds between rescans of the directories inotify does not watch.
+    :type rescan_interval: float
+    :ivar max_entries: Entries held at most; directories beyond it are not indexed.
+    :type max_entries: int
+    :ivar mode: 'inotify' or 'polling' while running, 'stopped' otherwise.
+    :type mode: str
+    """
+    DEFAULT_RESCAN_INTERVAL = 30.0
+    DEFAULT_MAX_ENTRIES = 1_000_000
+    # seconds the background thread waits for events before looking at its queues again
+    POLL_INTERVAL = 0.5
+    STOP_TIMEOUT = 5.0
+    WATCH_MASK = (Inotify.IN_ATTRIB | Inotify.IN_CLOSE_WRITE | Inotify.IN_CREATE | Inotify.IN_DELETE
+                  | Inotify.IN_MOVED_FROM | Inotify.IN_MOVED_TO | Inotify.IN_DELETE_SELF | Inotify.IN_MOVE_SELF
+                  | Inotify.IN_ONLYDIR)
+
+    def __init__(self, root: Union[str, Path], **kwargs):
+        super().__init__(**kwargs)
+        self.root = os.path.normpath(os.path.abspath(root))
+        self.use_inotify = kwargs.get('use_inotify', True)
+        self.rescan_interval = kwargs.get('rescan_interval', None) or self.__class__.DEFAULT_RESCAN_INTERVAL
+        self.max_entries = kwargs.get('max_entries', None) or self.__class__.DEFAULT_MAX_ENTRIES
+        self.mode = 'stopped'
+        self.hits = 0
+        self.misses = 0
+        self.entries = 0
+        self.nbytes = 0
+        self._directories: Dict[str, IndexedDirectory] = {}
+        self._dirty: Set[str] = set()
+        # directories listed from disk while not indexed yet, for the background thread to pick up
+        self._pending: SimpleQueue = SimpleQueue()
+        self._watches: Dict[int, str] = {}
+        self._watch_paths: Dict[str, int] = {}
+        self._inotify: Optional[Inotify] = None
+        self._lock = Lock()
+        self._ready = Event()
+        self._stopping = Event()
+        self._thread: Optional[Thread] = None
+        self._next_rescan = 0.0
+        self._warned_full = False
+        self._warned_watches = False
+
+    def _key(self, path: Union[str, Path]) -> str:
+        return os.path.normpath(os.path.abspath(path))
+
+    def _is_under_root(self, key: str) -> bool:
+        return key == self.root or key.startswith(self.root.rstrip(os.sep) + os.sep)
+
+    def _snapshot(self, key: str) -> Optional[IndexedDirectory]:
+        if key in self._dirty:
+            return None
+        return self._directories.get(key)
+
+    def scan(self, path: Union[str, Path], timings=None) -> List[DirectoryEntryRecord]:
+        key = self._key(path)
+        with self._lock:
+            snapshot = self._snapshot(key)
+            if snapshot is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if snapshot is not None:
+            self.logger.debug("Listing %s from the index", key)
+            return snapshot.records()
+        records = super().scan(path, timings)
+        if self._thread is not None and self._is_under_root(key):
+            self._pending.put(key)
+        return records
+
+    def listing_version(self, path: Union[str, Path]) -> int:
+        with self._lock:
+            snapshot = self._snapshot(self._key(path))
+        if snapshot is not None:
+            return snapshot.version
+        return super().listing_version(path)
+
+    def is_indexed(self, path: Union[str, Path]) -> bool:
+        """Whether ``path`` is currently listed from memory."""
+        with self._lock:
+            return self._snapshot(self._key(path)) is not None
+
+    def start(self) -> "FilesystemIndex":
+        """Crawl and watch the tree on a background thread; returns at once (see ``wait_until_ready``)."""
+        if self._thread is not None:
+            return self
+        if self.use_inotify and Inotify.is_supported():
+            try:
+                self._inotify = Inotify()
+            except OSError as e:
+                self.logger.warning(f"Cannot use inotify ({e}), rescanning the index every "
+                                    f"{self.rescan_interval:g}s instead")
+        self.mode = 'inotify' if self._inotify is not None else 'polling'
+        self._stopping.clear()
+        self._ready.clear()
+        self._next_rescan = monotonic() + self.rescan_interval
+        self._thread = Thread(target=self._run, name="EasyHTTPServer-index", daemon=True)
+        self._thread.start()
+        return self
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until the initial crawl is done; False if ``timeout`` seconds passed first."""
+        return self._ready.wait(timeout)
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(self.__class__.STOP_TIMEOUT)
+        self._thread = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        self._clear()
+        self.mode = 'stopped'
+
+    def _clear(self) -> None:
+        with self._lock:
+            self._directories.clear()
+            self._dirty.clear()
+            self._watches.clear()
+            self._watch_paths.clear()
+            self.entries = 0
+            self.nbytes = 0
+
+    def _run(self) -> None:
+        try:
+            started = monotonic()
+            self._crawl(self.root)
+            self.logger.info(f"Indexed {len(self._directories)} directories with {self.entries} entries under "
+                             f"{self.root} in {monotonic() - started:.2f}s ({self.mode})")
+            self._ready.set()
+            while not self._stopping.is_set():
+                self._process_events()
+                self._index_pending()
+                self._refresh_dirty()
+                self._rescan_polled()
+        except Exception as e:
+            # listings keep working from disk, only slower
+            self.logger.error(f"Filesystem index stopped: {e}")
+            self._clear()
+        finally:
+            self._ready.set()
+
+    def _process_events(self) -> None:
+        if self._inotify is None:
+            self._stopping.wait(self.__class__.POLL_INTERVAL)
+            return
+        for event in self._inotify.read_events(self.__class__.POLL_INTERVAL):
+            self._handle_event(event)
+
+    def _handle_event(self, event: InotifyEvent) -> None:
+        with self._lock:
+            if event.mask & Inotify.IN_Q_OVERFLOW:
+                self.logger.warning("inotify queue overflowed, rescanning the whole index")
+                self._dirty.update(self._directories)
+                return
+            key = self._watches.get(event.wd)
+            if key is None:
+                return
+            if event.mask & Inotify.IN_IGNORED:
+                # the kernel dropped the watch: the directory is gone or its filesystem unmounted
+                del self._watches[event.wd]
+                if self._watch_paths.get(key) == event.wd:
+                    del self._watch_paths[key]
+            # moves and deletions of the directory itself are sorted out by rescanning it
+            if key in self._directories:
+                self._dirty.add(key)
+
+    def _index_pending(self) -> None:
+        while True:
+            try:
+                key = self._pending.get_nowait()
+            except Empty:
+                return
+            if key not in self._directories and os.path.isdir(key):
+                self._crawl(key)
+
+    def _refresh_dirty(self) -> None:
+        with self._lock:
+            dirty = sorted(self._dirty)
+        # parents first, so a vanished subtree is forgotten before its directories are rescanned
+        for key in dirty:
+            if key in self._dirty:
+                self._refresh(key)
+
+    def _rescan_polled(self) -> None:
+        now = monotonic()
+        if now < self._next_rescan:
+            return
+        self._next_rescan = now + self.rescan_interval
+        with self._lock:
+            polled = sorted(key for key in self._directories if key not in self._watch_paths)
+        for key in polled:
+            if key in self._directories:
+                self._refresh(key)
+
+    def _crawl(self, top: str) -> None:
+        stack = [top]
+        while stack and not self._stopping.is_set():
+            key = stack.pop()
+            snapshot = self._index_directory(key)
+            if snapshot is not None:
+                stack.extend(os.path.join(key, name) for name in snapshot.subdirectories()
+                             if os.path.join(key, name) not in self._directories)
+
+    def _refresh(self, key: str) -> None:
+        old = self._directories.get(key)
+        new = self._index_directory(key)
+        if new is None:
+            self._forget(key)
+            return
+        old_subdirectories = set(old.subdirectories()) if old is not None else set()
+        new_subdirectories = set(new.subdirectories())
+        for name in old_subdirectories - new_subdirectories:
+            self._forget(os.path.join(key, name))
+        for name in new_subdirectories - old_subdirectories:
+            self._crawl(os.path.join(key, name))
+
+    def _index_directory(self, key: str) -> Optional[IndexedDirectory]:
+        # watched *before* reading, so a change made while reading leaves an event behind
+        self._watch(key)
+        try:
+            st = os.stat(key)
+            records, subdirectories = self._read_directory(key)
+        except OSError as e:
+            self.logger.debug("Cannot index %s: %s", key, e)
+            return None
+        old = self._directories.get(key)
+        if self.entries - (len(old) if old is not None else 0) + len(records) > self.max_entries:
+            if not self._warned_full:
+                self._warned_full = True
+                self.logger.warning(f"Filesystem index is full ({self.max_entries} entries), "
+                                    f"further directories are listed from disk")
+            self._unwatch(key)
+            return None
+        snapshot = IndexedDirectory.from_records(records, subdirectories, max(st.st_mtime_ns, st.st_ctime_ns))
+        with self._lock:
+            self._directories[key] = snapshot
+            self._dirty.discard(key)
+            self.entries += len(snapshot) - (len(old) if old is not None else 0)
+            self.nbytes += snapshot.nbytes - (old.nbytes if old is not None else 0)
+        return snapshot
+
+    def _read_directory(self, key: str) -> Tuple[List[DirectoryEntryRecord], List[str]]:
+        records = []
+        subdirectories = []
+        with os.scandir(key) as it:
+            for entry in it:
+                records.append(self.record_from_dir_entry(entry))
+                try:
+                    # never followed: a symlink could lead out of the tree or around in circles
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirectories.append(entry.name)
+                except OSError:
+                    pass
+        records.sort(key=lambda record: record.name)
+        return records, subdirectories
+
+    def _forget(self, key: str) -> None:
+        """Drop ``key`` and everything below it from the index."""
+        prefix = key.rstrip(os.sep) + os.sep
+        with self._lock:
+            forgotten = [k for k in self._directories if k == key or k.startswith(prefix)]
+            for k in forgotten:
+                snapshot = self._directories.pop(k)
+                self.entries -= len(snapshot)
+                self.nbytes -= snapshot.nbytes
+                self._dirty.discard(k)
+        for k in forgotten:
+            self._unwatch(k)
+
+    def _watch(self, key: str) -> None:
+        if self._inotify is None or key in self._watch_paths:
+            return
+        try:
+            wd = self._inotify.add_watch(key, self.__class__.WATCH_MASK)
+        except OSError as e:
+            if e.errno == errno.ENOSPC and not self._warned_watches:
+                self._warned_watches = True
+                self.logger.warning(f"inotify watch limit reached (see fs.inotify.max_user_watches), "
+                                    f"rescanning the other directories every {self.rescan_interval:g}s")
+            return
+        with self._lock:
+            # watching the same directory under a new name (after a move) returns its old descriptor
+            previous = self._watches.get(wd)
+            if previous is not None:
+                self._watch_paths.pop(previous, None)
+            self._watches[wd] = key
+            self._watch_paths[key] = wd
+
+    def _unwatch(self, key: str) -> None:
+        with self._lock:
+            wd = self._watch_paths.pop(key, None)
+            if wd is None:
+                return
+            del self._watches[wd]
+        try:
+            self._inotify.rm_watch(wd)
+        except OSError:
+            # already gone with its directory
+            pass
+
+    def stats(self) -> dict:
+        """
+        Hits and misses, the entries and approximate bytes held, and ``staleness_seconds``: the
+        age of the oldest snapshot that is served without a watch keeping it current.
+        """
+        with self._lock:
+            now = monotonic()
+            polled = [snapshot.scanned_at for key, snapshot in self._directories.items()
+                      if key not in self._watch_paths and key not in self._dirty]
+            total = self.hits + self.misses
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'hit_ratio': self.hits / total if total else 0.0,
+                    'entries': self.entries,
+                    'bytes': self.nbytes,
+                    'directories': len(self._directories),
+                    'dirty': len(self._dirty),
+                    'watches': len(self._watch_paths),
+                    'staleness_seconds': now - min(polled) if polled else 0.0,
+                    'mode': self.mode,
+                    'ready': self._ready.is_set()}
@@ -0,0 +1,126 @@
+import os
+import select
+import struct
+import sys
+from typing import List, NamedTuple, Optional, Union
+
+
+class InotifyEvent(NamedTuple):
+    """One inotify event: the watch it came from, what happened and the name it happened to (if any)."""
+    wd: int
+    mask: int
+    cookie: int
+    name: str
+
+
+class Inotify:
+    """
+    Minimal ``ctypes`` binding of Linux inotify: watch directories and read their events.
+
+    ``is_supported`` tells whether the platform has inotify; constructing an ``Inotify`` where it
+    does not raises OSError, as do ``add_watch`` failures (e.g. ENOSPC once the
+    ``fs.inotify.max_user_watches`` limit is reached). ctypes and libc are only loaded on first use.
+    """
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_ISDIR = 0x40000000
+    # inotify_init1 flags, equal to the O_ flags on Linux
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    READ_SIZE = 64 * 1024
+    _EVENT_HEADER = struct.Struct('iIII')
+    _libc = None
+
+    def __init__(self):
+        libc = self.__class__._load_libc()
+        self.fd = libc.inotify_init1(self.__class__.IN_NONBLOCK | self.__class__.IN_CLOEXEC)
+        if self.fd < 0:
+            self._raise_errno()
+        self._poller = select.poll()
+        self._poller.register(self.fd, select.POLLIN)
+
+    @classmethod
+    def _load_libc(cls):
+        if cls._libc is None:
+            import ctypes
+            # the symbols of the running interpreter include libc's
+            libc = ctypes.CDLL(None, use_errno=True)
+            try:
+                libc.inotify_init1.argtypes = [ctypes.c_int]
+                libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+                libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+            except AttributeError:
+                raise OSError("this libc has no inotify") from None
+            cls._libc = libc
+        return cls._libc
+
+    @classmethod
+    def is_supported(cls) -> bool:
+        if not sys.platform.startswith('linux'):
+            return False
+        try:
+            cls._load_libc()
+        except OSError:
+            return False
+        return True
+
+    @staticmethod
+    def _raise_errno(filename: Optional[str] = None):
+        import ctypes
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err), filename)
+
+    def add_watch(self, path: Union[str, os.PathLike], mask: int) -> int:
+        """Watch ``path`` for the events in ``mask``; returns the watch descriptor."""
+        wd = self.__class__._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            self._raise_errno(os.fsdecode(path))
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        if self.__class__._libc.inotify_rm_watch(self.fd, wd) < 0:
+            self._raise_errno()
+
+    def read_events(self, timeout: Optional[float] = None) -> List[InotifyEvent]:
+        """Wait up to ``timeout`` seconds (None: forever) for events and return those that are ready."""
+        if not self._poller.poll(None if timeout is None else int(timeout * 1000)):
+            return []
+        try:
+            data = os.read(self.fd, self.__class__.READ_SIZE)
+        except BlockingIOError:
+            return []
+        header = self.__class__._EVENT_HEADER
+        events = []
+        offset = 0
+        while offset + header.size <= len(data):
+            wd, mask, cookie, length = header.unpack_from(data, offset)
+            offset += header.size
+            events.append(InotifyEvent(wd, mask, cookie, os.fsdecode(data[offset:offset + length].rstrip(b'\0'))))
+            offset += length
+        return events
+
+    def fileno(self) -> int:
+        return self.fd
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            self._poller.unregister(self.fd)
+            os.close(self.fd)
+            self.fd = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
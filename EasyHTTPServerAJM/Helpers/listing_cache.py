@@ -0,0 +1,92 @@
+from collections import OrderedDict
+from logging import getLogger
+from threading import Lock
+from time import monotonic
+from typing import Hashable, Optional
+
+
+class ListingCache:
+    """
+    Thread-safe LRU cache of encoded directory listing pages, bounded by a total byte budget.
+
+    Keys are built by the handler from the listed path, the directory's ``st_mtime_ns`` and the
+    template version, so adding, removing or renaming an entry (which bumps the directory mtime)
+    or editing a template naturally misses the cache. Changes *inside* a file do not touch the
+    directory mtime, so entries also expire after ``max_age`` seconds to keep the per-file
+    time columns from going stale.
+
+    ``ContentEncoder`` also uses one, without ``max_age``, for its compressed variants.
+
+    :ivar max_bytes: Total size of all cached pages before the least recently used ones are evicted.
+    :type max_bytes: int
+    :ivar max_age: Seconds a cached page may be served for; None means no age limit.
+    :type max_age: float, optional
+    """
+    DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+    DEFAULT_MAX_AGE = 60.0
+
+    def __init__(self, max_bytes: Optional[int] = None, max_age: Optional[float] = DEFAULT_MAX_AGE, **kwargs):
+        self.logger = kwargs.get('logger', getLogger(__name__))
+        self.max_bytes = max_bytes if max_bytes is not None else self.__class__.DEFAULT_MAX_BYTES
+        self.max_age = max_age
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, stored_at = entry
+            if self.max_age is not None and monotonic() - stored_at > self.max_age:
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: bytes) -> None:
+        size = len(value)
+        if size > self.max_bytes:
+            self.logger.debug("Listing of %d bytes exceeds the cache budget, not cached", size)
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, monotonic())
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        value, _ = self._entries.pop(key)
+        self.current_bytes -= len(value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'hit_ratio': self.hit_ratio}
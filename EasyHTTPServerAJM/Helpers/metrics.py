@@ -0,0 +1,209 @@
+from bisect import bisect_left
+from threading import Lock, get_ident
+from time import time
+from typing import Dict, List, Optional, Tuple
+
+
+class _MetricsShard:
+    """Counters written by a single thread, so updating them needs no lock."""
+    __slots__ = ('requests', 'latency', 'bytes_in', 'bytes_out', 'in_flight', 'connections')
+
+    def __init__(self):
+        # (method, status, route) -> count
+        self.requests: Dict[Tuple[str, str, str], int] = {}
+        # route -> [count per bucket..., count above the last bucket, sum of seconds]
+        self.latency: Dict[str, list] = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.in_flight = 0
+        self.connections = 0
+
+
+class ServerMetrics:
+    """
+    Request metrics of one server process, rendered in the Prometheus text format by ``render``.
+
+    Requests are counted by method, status and route class (``ROUTES``), with a latency
+    histogram per route class, bytes received and sent, requests in flight and open
+    connections. The server engine (see ``bind_server``) adds its worker threads, worker
+    utilization and, for the pool engine, queued and rejected connections. Caches added with
+    ``add_cache`` report their hits, misses and hit ratio, and their size and staleness where
+    their ``stats()`` include them.
+
+    The request path never takes a lock. Each thread updates its own shard of counters, found
+    by thread id, and ``render`` adds the shards up. Thread ids are reused once a thread has
+    ended, so the number of shards stays at the number of threads that ran at the same time.
+
+    :ivar buckets: Upper bounds in seconds of the latency histogram buckets.
+    :type buckets: tuple
+    :ivar const_labels: Labels added to every sample, e.g. the worker index of a pre-forked worker.
+    :type const_labels: dict
+    """
+    DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    ROUTES = ('listing', 'file', 'upload', 'metrics', 'other')
+    METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+    PREFIX = 'easyhttp'
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self, buckets: Optional[Tuple[float, ...]] = None, const_labels: Optional[Dict[str, str]] = None):
+        self.buckets = tuple(sorted(buckets or self.__class__.DEFAULT_BUCKETS))
+        self.const_labels = dict(const_labels or {})
+        self.start_time = time()
+        self._shards: Dict[int, _MetricsShard] = {}
+        self._shards_lock = Lock()
+        self._caches: Dict[str, object] = {}
+        self._server = None
+
+    # -- request path --
+    def _shard(self) -> _MetricsShard:
+        shard = self._shards.get(get_ident())
+        if shard is None:
+            with self._shards_lock:
+                shard = self._shards.setdefault(get_ident(), _MetricsShard())
+        return shard
+
+    def connection_opened(self) -> None:
+        self._shard().connections += 1
+
+    def connection_closed(self) -> None:
+        # the gauges are summed over all shards, so this does not need the opening thread's shard
+        self._shard().connections -= 1
+
+    def request_started(self) -> None:
+        self._shard().in_flight += 1
+
+    def request_finished(self, method: str, status: int, route: str, seconds: float,
+                         bytes_in: int = 0, bytes_out: int = 0) -> None:
+        shard = self._shard()
+        shard.in_flight -= 1
+        key = (method if method in self.__class__.METHODS else 'other', str(status), route)
+        shard.requests[key] = shard.requests.get(key, 0) + 1
+        histogram = shard.latency.get(route)
+        if histogram is None:
+            histogram = shard.latency[route] = [0] * (len(self.buckets) + 1) + [0.0]
+        histogram[bisect_left(self.buckets, seconds)] += 1
+        histogram[-1] += seconds
+        shard.bytes_in += bytes_in
+        shard.bytes_out += bytes_out
+
+    # -- sources read when rendering --
+    def add_cache(self, name: str, cache) -> None:
+        """Report ``cache`` (anything with a ``stats()`` dict holding hits and misses) as ``name``."""
+        if cache is not None:
+            self._caches[name] = cache
+
+    def bind_server(self, server) -> None:
+        """Read worker and connection figures from the server engine ``server`` when rendering."""
+        self._server = server
+
+    def snapshot(self) -> dict:
+        """The summed counters of all shards."""
+        requests: Dict[Tuple[str, str, str], int] = {}
+        latency: Dict[str, list] = {}
+        totals = {'bytes_in': 0, 'bytes_out': 0, 'in_flight': 0, 'connections': 0}
+        for shard in list(self._shards.values()):
+            for key, count in dict(shard.requests).items():
+                requests[key] = requests.get(key, 0) + count
+            for route, histogram in dict(shard.latency).items():
+                merged = latency.setdefault(route, [0] * (len(self.buckets) + 1) + [0.0])
+                for index, value in enumerate(list(histogram)):
+                    merged[index] += value
+            for name in totals:
+                totals[name] += getattr(shard, name)
+        return {'requests': requests, 'latency': latency, **totals}
+
+    # -- rendering --
+    def _labels(self, **labels) -> str:
+        labels = {**self.const_labels, **labels}
+        if not labels:
+            return ''
+        return '{' + ','.join(f'{name}="{self._escape(str(value))}"' for name, value in labels.items()) + '}'
+
+    @staticmethod
+    def _escape(value: str) -> str:
+        return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+    @staticmethod
+    def _format_value(value) -> str:
+        if isinstance(value, float):
+            return repr(value) if value != int(value) else f"{value:.1f}"
+        return str(value)
+
+    def _family(self, lines: List[str], name: str, metric_type: str, help_text: str, samples: list) -> None:
+        name = f"{self.__class__.PREFIX}_{name}"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for suffix, labels, value in samples:
+            lines.append(f"{name}{suffix}{self._labels(**labels)} {self._format_value(value)}")
+
+    def _histogram_samples(self, latency: Dict[str, list]) -> list:
+        samples = []
+        for route, histogram in sorted(latency.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, histogram):
+                cumulative += count
+                samples.append(('_bucket', {'route': route, 'le': self._format_value(float(bound))}, cumulative))
+            count = cumulative + histogram[len(self.buckets)]
+            samples.append(('_bucket', {'route': route, 'le': '+Inf'}, count))
+            samples.append(('_sum', {'route': route}, float(histogram[-1])))
+            samples.append(('_count', {'route': route}, count))
+        return samples
+
+    def _server_samples(self, lines: List[str], snapshot: dict) -> None:
+        server = self._server
+        connections = getattr(server, 'active_connections', None)
+        self._family(lines, 'active_connections', 'gauge', 'Open client connections.',
+                     [('', {}, connections if connections is not None else snapshot['connections'])])
+        self._family(lines, 'requests_in_flight', 'gauge', 'Requests being handled right now.',
+                     [('', {}, snapshot['in_flight'])])
+        max_workers = getattr(server, 'max_workers', None)
+        if max_workers:
+            self._family(lines, 'worker_threads', 'gauge', 'Worker threads of the server engine.',
+                         [('', {}, max_workers)])
+            self._family(lines, 'worker_utilization', 'gauge', 'Share of worker threads handling a request.',
+                         [('', {}, min(1.0, snapshot['in_flight'] / max_workers))])
+        if hasattr(server, 'queue_depth'):
+            self._family(lines, 'pending_connections', 'gauge', 'Accepted connections waiting for a worker.',
+                         [('', {}, server.queue_depth)])
+        if hasattr(server, 'rejected'):
+            self._family(lines, 'rejected_connections_total', 'counter',
+                         'Connections answered with 503 because every worker was busy.',
+                         [('', {}, server.rejected)])
+
+    def _cache_samples(self, lines: List[str]) -> None:
+        stats = {name: cache.stats() for name, cache in sorted(self._caches.items())}
+        if not stats:
+            return
+        self._family(lines, 'cache_hits_total', 'counter', 'Cache lookups that were served from the cache.',
+                     [('', {'cache': name}, s['hits']) for name, s in stats.items()])
+        self._family(lines, 'cache_misses_total', 'counter', 'Cache lookups that missed.',
+                     [('', {'cache': name}, s['misses']) for name, s in stats.items()])
+        self._family(lines, 'cache_hit_ratio', 'gauge', 'Hits divided by lookups since the cache was created.',
+                     [('', {'cache': name}, float(s.get('hit_ratio', 0.0))) for name, s in stats.items()])
+        self._family(lines, 'cache_entries', 'gauge', 'Entries held by the cache.',
+                     [('', {'cache': name}, s['entries']) for name, s in stats.items() if 'entries' in s])
+        self._family(lines, 'cache_bytes', 'gauge', 'Bytes held by the cache.',
+                     [('', {'cache': name}, s['bytes']) for name, s in stats.items() if 'bytes' in s])
+        self._family(lines, 'cache_staleness_seconds', 'gauge',
+                     'Age of the oldest cached result that no change notification keeps current.',
+                     [('', {'cache': name}, float(s['staleness_seconds']))
+                      for name, s in stats.items() if 'staleness_seconds' in s])
+
+    def render(self) -> bytes:
+        snapshot = self.snapshot()
+        lines: List[str] = []
+        self._family(lines, 'start_time_seconds', 'gauge', 'Unix time the metrics started counting.',
+                     [('', {}, self.start_time)])
+        self._family(lines, 'requests_total', 'counter', 'Requests answered, by method, status and route class.',
+                     [('', {'method': m, 'status': s, 'route': r}, count)
+                      for (m, s, r), count in sorted(snapshot['requests'].items())])
+        self._family(lines, 'request_duration_seconds', 'histogram',
+                     'Time from reading the request line to the end of the response, by route class.',
+                     self._histogram_samples(snapshot['latency']))
+        self._family(lines, 'request_bytes_total', 'counter', 'Request body bytes received.',
+                     [('', {}, snapshot['bytes_in'])])
+        self._family(lines, 'response_bytes_total', 'counter', 'Response bytes sent, headers included.',
+                     [('', {}, snapshot['bytes_out'])])
+        self._server_samples(lines, snapshot)
+        self._cache_samples(lines)
+        return ('\n'.join(lines) + '\n').encode('utf-8')
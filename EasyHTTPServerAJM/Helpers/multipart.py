@@ -0,0 +1,211 @@
+from email.message import Message
+from email.utils import collapse_rfc2231_value
+from logging import getLogger
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple, Union
+
+
+class MultipartError(ValueError):
+    """Raised for a malformed or truncated ``multipart/form-data`` body."""
+
+
+def parse_options_header(value: Optional[str], header: str = 'content-type') -> Tuple[str, Dict[str, str]]:
+    """
+    Split a header like ``multipart/form-data; boundary=xyz`` into its lower-cased main value
+    and a dict of parameters. Replaces ``cgi.parse_header``, which is gone in Python 3.13.
+    """
+    if not value:
+        return '', {}
+    message = Message()
+    message[header] = value
+    params = message.get_params(header=header, failobj=[])
+    if not params:
+        return '', {}
+    (main, _), *rest = params
+    return main.strip().lower(), {name.lower(): collapse_rfc2231_value(param) for name, param in rest}
+
+
+class MultipartPart:
+    """
+    One part of a multipart body. The data is not buffered: iterate over the part (or use
+    ``write_to``/``read``) to stream it from the request. Whatever is left unread is skipped
+    when the parser moves on to the next part.
+    """
+    def __init__(self, headers: Dict[str, str], chunks: Iterator[bytes]):
+        self.headers = headers
+        self._chunks = chunks
+        disposition, params = parse_options_header(headers.get('content-disposition'), 'content-disposition')
+        self.disposition = disposition
+        self.name: Optional[str] = params.get('name')
+        self.filename: Optional[str] = params.get('filename')
+        self.content_type = parse_options_header(headers.get('content-type'))[0] or 'text/plain'
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self._chunks
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(name={self.name!r}, filename={self.filename!r})"
+
+    def write_to(self, out: BinaryIO) -> int:
+        """Copy the part's data to ``out`` chunk by chunk; returns the number of bytes written."""
+        written = 0
+        for chunk in self._chunks:
+            out.write(chunk)
+            written += len(chunk)
+        return written
+
+    def read(self, limit: int) -> bytes:
+        """Read the whole part into memory; meant for small form fields, so at most ``limit`` bytes."""
+        data = bytearray()
+        for chunk in self._chunks:
+            data += chunk
+            if len(data) > limit:
+                raise MultipartError(f"form field {self.name!r} is larger than {limit} bytes")
+        return bytes(data)
+
+    def drain(self) -> None:
+        for _ in self._chunks:
+            pass
+
+
+class MultipartParser:
+    """
+    Incremental ``multipart/form-data`` parser that reads a request body in fixed-size blocks.
+
+    Iterating over the parser yields ``MultipartPart`` objects whose data is streamed straight
+    from ``rfile``, so memory use is bounded by ``buffer_size`` plus the boundary length, no
+    matter how large the upload is. Exactly ``content_length`` bytes are read when it is given,
+    which keeps a persistent connection usable for the next request.
+
+    :ivar bytes_read: Number of body bytes consumed from ``rfile`` so far.
+    :type bytes_read: int
+    """
+    DEFAULT_BUFFER_SIZE = 64 * 1024
+    MAX_HEADER_SIZE = 16 * 1024
+    MAX_PARTS = 1000
+    # RFC 2046 5.1.1 limits boundaries to 70 characters
+    MAX_BOUNDARY_LENGTH = 70
+
+    def __init__(self, rfile: BinaryIO, boundary: Union[str, bytes], content_length: Optional[int] = None,
+                 buffer_size: Optional[int] = None, **kwargs):
+        self.logger = kwargs.get('logger', getLogger(__name__))
+        if isinstance(boundary, str):
+            boundary = boundary.encode('latin-1')
+        if not boundary or len(boundary) > self.__class__.MAX_BOUNDARY_LENGTH:
+            raise MultipartError("invalid multipart boundary")
+        self.rfile = rfile
+        self.buffer_size = buffer_size or self.__class__.DEFAULT_BUFFER_SIZE
+        self.bytes_read = 0
+        self._remaining = content_length
+        self._delimiter = b"\r\n--" + boundary
+        # the leading CRLF lets the very first boundary match the same delimiter as all the others
+        self._buffer = bytearray(b"\r\n")
+        self._eof = False
+        self._finished = False
+        self._started = False
+        self._current: Optional[MultipartPart] = None
+        self._parts = 0
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        size = self.buffer_size if self._remaining is None else min(self.buffer_size, self._remaining)
+        data = self.rfile.read1(size) if size > 0 and hasattr(self.rfile, 'read1') else self.rfile.read(size)
+        if not data:
+            self._eof = True
+            return False
+        self.bytes_read += len(data)
+        if self._remaining is not None:
+            self._remaining -= len(data)
+        self._buffer += data
+        return True
+
+    def _iter_body(self) -> Iterator[bytes]:
+        """Yield data up to the next delimiter, which is consumed as well."""
+        delimiter = self._delimiter
+        # this much must stay buffered, it could be the start of a delimiter split across reads
+        keep = len(delimiter) - 1
+        while True:
+            index = self._buffer.find(delimiter)
+            if index >= 0:
+                if index:
+                    yield bytes(self._buffer[:index])
+                del self._buffer[:index + len(delimiter)]
+                return
+            if len(self._buffer) > keep:
+                cut = len(self._buffer) - keep
+                yield bytes(self._buffer[:cut])
+                del self._buffer[:cut]
+            if not self._fill():
+                raise MultipartError("multipart body ended before the closing boundary")
+
+    def _ensure(self, size: int) -> bool:
+        while len(self._buffer) < size:
+            if not self._fill():
+                return False
+        return True
+
+    def _at_close_delimiter(self) -> bool:
+        if not self._ensure(2):
+            raise MultipartError("multipart body ended after a boundary")
+        return self._buffer[:2] == b"--"
+
+    def _read_part_headers(self) -> Dict[str, str]:
+        # the buffer now starts with the CRLF that ends the boundary line (after optional padding)
+        while True:
+            end = self._buffer.find(b"\r\n\r\n")
+            if end >= 0:
+                break
+            if len(self._buffer) > self.__class__.MAX_HEADER_SIZE:
+                raise MultipartError("multipart part headers are too large")
+            if not self._fill():
+                raise MultipartError("multipart body ended inside part headers")
+        start = self._buffer.find(b"\r\n")
+        if self._buffer[:start].strip(b" \t"):
+            raise MultipartError("garbage after multipart boundary")
+        block = bytes(self._buffer[start + 2:end])
+        del self._buffer[:end + 4]
+
+        headers = {}
+        for line in block.split(b"\r\n") if block else ():
+            name, sep, value = line.decode('utf-8', 'surrogateescape').partition(':')
+            if not sep:
+                raise MultipartError(f"malformed multipart header line: {line[:100]!r}")
+            headers[name.strip().lower()] = value.strip()
+        return headers
+
+    def _drain_epilogue(self) -> None:
+        self._buffer.clear()
+        while self._remaining and self._fill():
+            self._buffer.clear()
+
+    def __iter__(self) -> Iterator[MultipartPart]:
+        if not self._started:
+            self._started = True
+            # everything before the first boundary is a preamble to be ignored
+            for _ in self._iter_body():
+                pass
+        while not self._finished:
+            if self._current is not None:
+                self._current.drain()
+                self._current = None
+            if self._at_close_delimiter():
+                self._finished = True
+                self._drain_epilogue()
+                return
+            self._parts += 1
+            if self._parts > self.__class__.MAX_PARTS:
+                raise MultipartError(f"more than {self.__class__.MAX_PARTS} parts in multipart body")
+            self._current = MultipartPart(self._read_part_headers(), self._iter_body())
+            yield self._current
+
+    @property
+    def remaining_bytes(self) -> Optional[int]:
+        """Body bytes not consumed yet, an upper bound for the rest of the current part; None if unknown."""
+        if self._remaining is None:
+            return None
+        return self._remaining + len(self._buffer)
+
+    def finish(self) -> None:
+        """Skip the rest of the body, so exactly ``content_length`` bytes have been read."""
+        for _ in self:
+            pass
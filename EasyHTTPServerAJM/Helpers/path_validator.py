@@ -1,15 +1,27 @@
 from abc import abstractmethod, ABC
 from logging import getLogger
 from pathlib import Path
-from typing import Optional, Union
+from stat import S_ISDIR, S_ISREG
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
 from EasyHTTPServerAJM.Helpers import PathValidationType
+from EasyHTTPServerAJM.Helpers.stat_cache import StatCache
 
 
 class CandidatePathNotSetError(Exception):
     ...
 
 
+def _flag_property(vt: PathValidationType) -> property:
+    def getter(self) -> bool:
+        return bool(self._flags & PathFlagResolver.FLAG_BITS[vt])
+
+    def setter(self, value: bool):
+        self.set_is_resolved_to_attr(vt, value)
+
+    return property(getter, setter, doc=f"Whether the candidate path resolved to a {vt.value}.")
+
+
 class PathFlagResolver(ABC):
     """
     Resolves flags based on the attributes of a given file system path.
@@ -21,13 +33,34 @@ class PathFlagResolver(ABC):
     such as whether the path is a directory, a file, or specific file types
     (e.g., HTML, SVG, CSS).
 
+    The flags are kept in a single int, one bit per ``PathValidationType`` (see ``FLAG_BITS``),
+    and exposed as the ``is_resolved_to_*`` properties. A path is classified from one cached
+    ``stat`` result (see ``StatCache``): a directory resolves to DIR, a regular file to the type
+    of its suffix (``SUFFIX_TYPES``) or to FILE.
+
     :ivar logger: Logger instance used for logging information, debug messages, and errors.
     :type logger: logging.Logger
+    :ivar stat_cache: Cache the paths are resolved and stat'ed through. Defaults to the
+        process-wide ``StatCache.shared()`` instance.
+    :type stat_cache: StatCache
     """
+    __slots__ = ('logger', 'stat_cache', '_flags')
+
+    FLAG_BITS: Dict[PathValidationType, int] = {vt: 1 << index for index, vt in enumerate(PathValidationType)}
+    SUFFIX_TYPES = {'.html': PathValidationType.HTML,
+                    '.svg': PathValidationType.SVG,
+                    '.css': PathValidationType.CSS}
+
+    is_resolved_to_dir = _flag_property(PathValidationType.DIR)
+    is_resolved_to_file = _flag_property(PathValidationType.FILE)
+    is_resolved_to_html = _flag_property(PathValidationType.HTML)
+    is_resolved_to_svg = _flag_property(PathValidationType.SVG)
+    is_resolved_to_css = _flag_property(PathValidationType.CSS)
+
     def __init__(self, **kwargs):
         self.logger = kwargs.get('logger', getLogger(__name__))
-        # internal storage for all “resolved” flags
-        self._resolved_flags = {vt: False for vt in PathValidationType}
+        self.stat_cache: StatCache = kwargs.get('stat_cache', None) or StatCache.shared()
+        self._flags = 0
 
     @abstractmethod
     def _check_for_path_set(self):
@@ -44,75 +77,58 @@ class PathFlagResolver(ABC):
         return p
 
     def _reset_flags(self):
-        # Reset all flags first
-        for vt in PathValidationType:
-            self.set_is_resolved_to_attr(vt, False)
-        self.logger.info("Reset all \'is_resolved_to_*\' flags")
-
-    def _resolve_existing_path(self, p: Path):
-        if p.is_dir():
-            self.logger.debug(f"{p} is a directory")
-            self._resolve_sub_dir(p)
-        elif p.is_file():
-            self.logger.debug(f"{p} is a file")
-            self._resolve_sub_file(p)
-
-    def _resolve_sub_file(self, p: Path):
-        # basic file; further refine by extension
-        ext = p.suffix.lower()
-        if ext == ".html":
-            self.is_resolved_to_html = True
-        elif ext == ".svg":
-            self.is_resolved_to_svg = True
-        elif ext == ".css":
-            self.is_resolved_to_css = True
-        else:
-            # generic file
-            self.is_resolved_to_file = True
-        self.logger.debug(f"{p} is a {ext} file")
+        self._flags = 0
 
-    def _resolve_sub_dir(self, p: Path):
-        # this check is redundant, but it's here for completeness
-        if p.is_dir():
-            self.is_resolved_to_dir = True
+    def _log_unresolved(self, p: Path):
+        if p.suffix.lstrip('.') != PathValidationType.HTML.value:
+            self.logger.error(f"{p} does not exist, could not resolve")
+        else:
+            self.logger.critical(f"{p} does not exist, could not resolve")
+
+    def _flags_for_path(self, p: Path) -> int:
+        st = self.stat_cache.stat(p)
+        if st is None:
+            self._log_unresolved(p)
+            return 0
+        if S_ISDIR(st.st_mode):
+            return self.__class__.FLAG_BITS[PathValidationType.DIR]
+        if S_ISREG(st.st_mode):
+            vt = self.__class__.SUFFIX_TYPES.get(p.suffix.lower(), PathValidationType.FILE)
+            return self.__class__.FLAG_BITS[vt]
+        return 0
 
-    # noinspection PyAttributeOutsideInit
     def resolve_flags(self):
         """Calculate resolution flags for the current candidate_path."""
         p = self._pre_resolve()
-        self._reset_flags()
+        self._flags = self._flags_for_path(p)
+        self.logger.debug("%s resolved to flags %#x", p, self._flags)
 
-        # Now set the appropriate flags based on the filesystem and type
-        if p.exists():
-            self.logger.debug(f"{p} exists")
-            self._resolve_existing_path(p)
-        else:
-            if p.suffix.lstrip('.') != PathValidationType.HTML.value:
-                self.logger.error(f"{p} does not exist, could not resolve")
-            else:
-                self.logger.critical(f"{p} does not exist, could not resolve")
-                #raise FileNotFoundError(f"{p} does not exist") from None
+    def is_resolved_to(self, vt: PathValidationType) -> bool:
+        return bool(self._flags & self.__class__.FLAG_BITS[vt])
 
     def set_is_resolved_to_attr(self, vt: PathValidationType, value: bool):
-        """Helper for resetting flags by enum."""
-        attr_name = f"is_resolved_to_{vt.name.lower()}"
-        setattr(self, attr_name, value)
+        """Helper for setting flags by enum."""
+        if value:
+            self._flags |= self.__class__.FLAG_BITS[vt]
+        else:
+            self._flags &= ~self.__class__.FLAG_BITS[vt]
 
 
 class PathValidator(PathFlagResolver):
     """
-    Responsible for validating paths and dynamically resolving associated validation attributes.
+    Responsible for validating paths and resolving their validation flags.
 
-    This class extends `PathFlagResolver` to handle validation and dynamic resolution of paths
-    and their corresponding validation types. It utilizes a logger for debugging and tracking
-    internal processes. The primary use of this class is to set, validate, and resolve paths
-    and their attributes dynamically, based on predefined validation types.
+    This class extends `PathFlagResolver` to set, resolve and validate a candidate path
+    against its expected validation type. ``validate_many`` checks several (path, type)
+    pairs at once without touching the candidate path, at one ``stat`` per unique path.
 
     :ivar candidate_path: Candidate path that should be resolved and validated.
     :type candidate_path: Optional[Union[str, Path]]
     :ivar candidate_path_validation_type: Validation type for the candidate path.
     :type candidate_path_validation_type: Union[str, PathValidationType]
     """
+    __slots__ = ('_candidate_path', '_candidate_path_validation_type')
+
     def __init__(self, **kwargs):
         self.logger = kwargs.pop('logger', getLogger(__name__))
         super().__init__(logger=self.logger, **kwargs)
@@ -125,48 +141,14 @@ class PathValidator(PathFlagResolver):
         self.candidate_path_validation_type = kwargs.get('candidate_path_validation_type',
                                                          PathValidationType.FILE)
 
-    def __getattr__(self, name: str):
-        """ this is only called if the attribute is not found using __getattribute__."""
-        vt = self._name_to_validation_type(name)
-        if vt is not None:
-            # expose a boolean attribute like .is_resolved_to_file
-            return self._resolved_flags[vt]
-        # normal AttributeError for anything else
-        raise AttributeError(f"{type(self).__name__!s} has no attribute {name!r}")
-
-    def __setattr__(self, name: str, value):
-        # make sure logger gets set first so it can handle errors etc
-        if 'logger' in name:
-            super().__setattr__(name, value)
-            return
-
-        # handle dynamic “is_resolved_to_*” attributes
-        # vt stands for 'validation type'
-        vt = None
-        if not name.startswith("_"):  # skip internal attributes i.e. _resolved_flags
-            vt = self._name_to_validation_type(name)
-        else:
-            self.logger.debug(f"skipping internal attribute {name}")
-
-        if vt is not None:
-            self._resolved_flags[vt] = bool(value)
-        # handle normal attributes
-        else:
-            super().__setattr__(name, value)
-
     def _check_for_path_set(self):
         if self.candidate_path is None:
             raise CandidatePathNotSetError("candidate_path must be set before using this class")
 
-    @staticmethod
-    def _resolve_to_full_path(candidate_path: Union[str, Path]) -> Path:
-        if isinstance(candidate_path, str):
-            candidate_path = Path(candidate_path).resolve()
-        elif isinstance(candidate_path, Path):
-            candidate_path = candidate_path.resolve()
-        else:
+    def _resolve_to_full_path(self, candidate_path: Union[str, Path]) -> Path:
+        if not isinstance(candidate_path, (str, Path)):
             raise ValueError(f"{candidate_path} is not a valid path")
-        return candidate_path
+        return self.stat_cache.resolve(candidate_path)
 
     @property
     def candidate_path(self):
@@ -175,7 +157,7 @@ class PathValidator(PathFlagResolver):
     @candidate_path.setter
     def candidate_path(self, value: Union[str, Path]):
         if value is None:
-            self.logger.debug(f"candidate_path is None, candidate_path must be still be set")
+            self.logger.debug("candidate_path is None, candidate_path must be still be set")
             self._candidate_path = None
         else:
             self._candidate_path = self._resolve_to_full_path(value)
@@ -188,24 +170,22 @@ class PathValidator(PathFlagResolver):
     def candidate_path_validation_type(self, value: Union[str, PathValidationType]):
         self._candidate_path_validation_type = PathValidationType(value)
 
-    def _name_to_validation_type(self, attr_name: str):
-        prefix = "is_resolved_to_"
-        if attr_name.startswith(prefix):
-            self.logger.debug(f"Found prefix {prefix} in {attr_name}")
-            suffix = attr_name[len(prefix):].upper()
-            for vt in PathValidationType:
-                if vt.name == suffix:
-                    self.logger.debug(f"Found validation type {vt} for {attr_name}")
-                    return vt
-        self.logger.debug(f"No validation type found for {attr_name}")
-        return None
-
     def validate(self):
         vt = self.candidate_path_validation_type
         if vt is None:
             raise ValueError("candidate_path_validation_type is not set")
-
-        # dynamic attribute name based on enum
-        # e.g., PathValidationType.FILE -> "is_resolved_to_file"
-        attr_name = f"is_resolved_to_{vt.name.lower()}"
-        return getattr(self, attr_name)
+        return self.is_resolved_to(vt)
+
+    def validate_many(self, items: Iterable[Tuple[Union[str, Path], Union[str, PathValidationType]]]) -> List[bool]:
+        """
+        Validate every (path, validation type) pair of ``items``; returns one bool per pair.
+        The candidate path and its flags are left alone.
+        """
+        flags_by_path: Dict[Path, int] = {}
+        results = []
+        for path, vt in items:
+            p = self._resolve_to_full_path(path)
+            if p not in flags_by_path:
+                flags_by_path[p] = self._flags_for_path(p)
+            results.append(bool(flags_by_path[p] & self.__class__.FLAG_BITS[PathValidationType(vt)]))
+        return results
@@ -0,0 +1,147 @@
+from logging import getLogger
+from time import perf_counter
+from typing import Dict, List, Optional
+
+
+class _Phase:
+    __slots__ = ('timings', 'name')
+
+    def __init__(self, timings: "RequestTimings", name: str):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.timings.start(self.name)
+        return self
+
+    def __exit__(self, *exc):
+        self.timings.stop()
+
+
+class RequestTimings:
+    """
+    Monotonic (``perf_counter``) timings of the phases of one request.
+
+    Phases nest and every moment is charged to the innermost running phase only, so the
+    phases never overlap and add up to at most ``total``: the ``stat`` calls made while a
+    listing is rendered are taken out of ``render``. A phase that runs several times (e.g.
+    ``stat`` once per entry) adds up. Time outside of any phase is not charged to any.
+    ``add`` charges time measured elsewhere, such as ``init``, which is over before the
+    request starts and so is not part of ``total``.
+
+    The directory handlers use the phases in ``PHASES``: ``init`` (building the handler,
+    first request of a connection only), ``translate`` (URL to filesystem path), ``listing``
+    (reading the directory), ``stat``, ``render`` (template substitution), ``encode``,
+    ``compress``, ``open`` (opening a file and sending its headers), ``send``, and for uploads
+    ``parse`` (reading and splitting the multipart body) and ``write`` (writing it to disk).
+
+    :ivar method: Request method, None if the request line could not be parsed.
+    :type method: str
+    :ivar path: Request path including the query.
+    :type path: str
+    :ivar status: Status code of the response, None if none was sent.
+    :type status: int
+    :ivar phases: Seconds per phase, in the order the phases first ran.
+    :type phases: dict
+    """
+    PHASES = ('init', 'translate', 'listing', 'stat', 'render', 'encode', 'compress', 'open', 'send',
+              'parse', 'write')
+
+    def __init__(self, method: Optional[str] = None, path: Optional[str] = None):
+        self.method = method
+        self.path = path
+        self.status: Optional[int] = None
+        self.phases: Dict[str, float] = {}
+        self.started = perf_counter()
+        self.finished: Optional[float] = None
+        self._running: List[str] = []
+        self._mark = self.started
+
+    def _charge(self, now: float) -> None:
+        if self._running:
+            name = self._running[-1]
+            self.phases[name] = self.phases.get(name, 0.0) + (now - self._mark)
+        self._mark = now
+
+    def start(self, name: str) -> None:
+        self._charge(perf_counter())
+        self._running.append(name)
+
+    def stop(self) -> None:
+        self._charge(perf_counter())
+        self._running.pop()
+
+    def phase(self, name: str) -> _Phase:
+        """Context manager timing the ``with`` block as phase ``name``."""
+        return _Phase(self, name)
+
+    def add(self, name: str, seconds: float) -> None:
+        """Charge ``seconds`` measured elsewhere to phase ``name``."""
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def finish(self) -> None:
+        # a phase left running by an exception ends here
+        now = perf_counter()
+        while self._running:
+            self._charge(now)
+            self._running.pop()
+        self.finished = now
+
+    @property
+    def total(self) -> float:
+        """Seconds from the start of the request to ``finish`` (or to now, while it is running)."""
+        return (self.finished if self.finished is not None else perf_counter()) - self.started
+
+    def as_milliseconds(self) -> Dict[str, float]:
+        return {name: round(seconds * 1000, 3) for name, seconds in self.phases.items()}
+
+    def server_timing(self) -> str:
+        """The phases so far as a ``Server-Timing`` header value, in milliseconds."""
+        return ', '.join(f"{name};dur={ms:.3f}" for name, ms in self.as_milliseconds().items())
+
+    def __repr__(self):
+        return (f"{self.__class__.__name__}({self.method} {self.path} -> {self.status}, "
+                f"total={self.total * 1000:.3f}ms, phases={self.as_milliseconds()})")
+
+
+class TimedWriter:
+    """Wraps a writable stream and times every ``write`` as ``phase`` of ``timings``."""
+    def __init__(self, stream, timings: RequestTimings, phase: str):
+        self.stream = stream
+        self.timings = timings
+        self.phase = phase
+
+    def write(self, data) -> int:
+        with self.timings.phase(self.phase):
+            return self.stream.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class RequestTimingHook:
+    """
+    Base class of the objects a handler passes every finished request's ``RequestTimings`` to.
+    Any callable taking the timings works as a hook too.
+    """
+    def on_request_complete(self, timings: RequestTimings) -> None:
+        ...
+
+
+class SlowRequestLogHook(RequestTimingHook):
+    """
+    Logs a warning with the phase breakdown of every request that took longer than ``threshold_ms``.
+
+    :ivar threshold_ms: Requests taking longer than this many milliseconds are logged.
+    :type threshold_ms: float
+    """
+    def __init__(self, threshold_ms: float, **kwargs):
+        self.threshold_ms = threshold_ms
+        self.logger = kwargs.get('logger', getLogger(__name__))
+
+    def on_request_complete(self, timings: RequestTimings) -> None:
+        total_ms = timings.total * 1000
+        if total_ms > self.threshold_ms:
+            breakdown = ', '.join(f"{name} {ms:g}ms" for name, ms in timings.as_milliseconds().items())
+            self.logger.warning(f"Slow request: {timings.method} {timings.path} -> {timings.status} "
+                                f"took {total_ms:.1f}ms ({breakdown or 'no phases'})")
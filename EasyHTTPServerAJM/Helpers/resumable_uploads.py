@@ -0,0 +1,224 @@
+import errno
+import json
+import os
+import re
+import shutil
+from dataclasses import dataclass, field, asdict
+from logging import getLogger
+from secrets import token_hex
+from threading import Lock
+from time import time
+from typing import BinaryIO, Dict, Optional, Union
+from pathlib import Path
+
+from EasyHTTPServerAJM.Helpers.upload_writer import AtomicUploadWriter
+
+
+class UploadSessionError(Exception):
+    """Raised when an operation conflicts with the state of a resumable upload session."""
+
+
+@dataclass
+class UploadSession:
+    """Persisted state of one resumable upload; ``offset`` is the size of the partial file."""
+    upload_id: str
+    target_dir: str
+    filename: str
+    length: int
+    created: float
+    metadata: Dict[str, str] = field(default_factory=dict)
+    offset: int = 0
+    last_activity: float = 0.0
+
+    @property
+    def is_complete(self) -> bool:
+        return self.offset >= self.length
+
+
+class ResumableUploadStore:
+    """
+    Keeps the partial files and the persisted state of resumable (tus-style) uploads.
+
+    Every session is a ``<id>.part`` file holding the bytes received so far and a ``<id>.json``
+    file with its target directory, file name and total length, both in ``staging_dir``. The
+    current offset is always the size of the ``.part`` file, so a session survives a server
+    restart. State read back from disk is only trusted if its ``target_dir`` lies inside ``root``
+    (the served directory, by default the parent of ``staging_dir``). Sessions without activity for ``max_age`` seconds are removed by
+    ``collect_garbage``, which ``create`` runs at most once every ``gc_interval`` seconds.
+
+    :ivar staging_dir: Directory holding the partial files and session state.
+    :type staging_dir: str
+    :ivar root: Directory every upload must end up in (or below).
+    :type root: str
+    :ivar max_age: Seconds of inactivity after which a session expires.
+    :type max_age: float
+    :ivar max_size: Largest accepted ``Upload-Length``; None means unlimited.
+    :type max_size: int, optional
+    """
+    STAGING_DIR_NAME = '.resumable_uploads'
+    DEFAULT_MAX_AGE = 24 * 60 * 60.0
+    DEFAULT_GC_INTERVAL = 10 * 60.0
+    _ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+    _shared_stores: Dict[str, "ResumableUploadStore"] = {}
+    _shared_lock = Lock()
+
+    def __init__(self, staging_dir: Union[str, Path], max_age: Optional[float] = None,
+                 max_size: Optional[int] = None, **kwargs):
+        self.logger = kwargs.get('logger', getLogger(__name__))
+        self.staging_dir = os.fspath(staging_dir)
+        self.root = os.fspath(kwargs.get('root', None) or os.path.dirname(os.path.abspath(self.staging_dir)))
+        self.max_age = max_age if max_age is not None else self.__class__.DEFAULT_MAX_AGE
+        self.max_size = max_size
+        self.gc_interval = kwargs.get('gc_interval', self.__class__.DEFAULT_GC_INTERVAL)
+        self._last_gc = 0.0
+        self._locks: Dict[str, Lock] = {}
+        self._locks_lock = Lock()
+
+    @classmethod
+    def for_root(cls, root: Union[str, Path], **kwargs) -> "ResumableUploadStore":
+        """Return the process-wide store for the served directory ``root``."""
+        staging_dir = os.path.join(os.path.abspath(root), cls.STAGING_DIR_NAME)
+        with cls._shared_lock:
+            if staging_dir not in cls._shared_stores:
+                cls._shared_stores[staging_dir] = cls(staging_dir, root=root, **kwargs)
+            return cls._shared_stores[staging_dir]
+
+    def _part_path(self, upload_id: str) -> str:
+        return os.path.join(self.staging_dir, f"{upload_id}.part")
+
+    def _state_path(self, upload_id: str) -> str:
+        return os.path.join(self.staging_dir, f"{upload_id}.json")
+
+    def _is_valid_target(self, target_dir: str) -> bool:
+        root = os.path.realpath(self.root)
+        staging_dir = os.path.realpath(self.staging_dir)
+        target_dir = os.path.realpath(target_dir)
+        if target_dir == staging_dir or target_dir.startswith(staging_dir + os.sep):
+            return False
+        return target_dir == root or target_dir.startswith(root.rstrip(os.sep) + os.sep)
+
+    def _write_state(self, session: UploadSession) -> None:
+        state = asdict(session)
+        del state['offset'], state['last_activity']
+        tmp_path = self._state_path(session.upload_id) + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self._state_path(session.upload_id))
+
+    def expires_at(self, session: UploadSession) -> float:
+        return session.last_activity + self.max_age
+
+    def create(self, target_dir: str, filename: str, length: int,
+               metadata: Optional[Dict[str, str]] = None) -> UploadSession:
+        if length < 0 or (self.max_size is not None and length > self.max_size):
+            raise UploadSessionError(f"Upload-Length {length} is not acceptable")
+        now = time()
+        if now - self._last_gc >= self.gc_interval:
+            self.collect_garbage(now)
+        os.makedirs(self.staging_dir, exist_ok=True)
+        session = UploadSession(token_hex(16), os.fspath(target_dir), filename, length, now,
+                                dict(metadata or {}), 0, now)
+        # O_EXCL: a colliding id must never share a partial file
+        os.close(os.open(self._part_path(session.upload_id), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600))
+        self._write_state(session)
+        self.logger.debug("Created resumable upload %s for %s (%s bytes)", session.upload_id, filename, length)
+        return session
+
+    def get(self, upload_id: str) -> Optional[UploadSession]:
+        """Return the session with its current offset, or None if it is unknown or expired."""
+        if not self._ID_PATTERN.match(upload_id or ''):
+            return None
+        try:
+            with open(self._state_path(upload_id), encoding='utf-8') as f:
+                state = json.load(f)
+            part_stat = os.stat(self._part_path(upload_id))
+            session = UploadSession(**state, offset=part_stat.st_size, last_activity=part_stat.st_mtime)
+        except (OSError, ValueError, TypeError):
+            return None
+        # the state file is only as trustworthy as the staging directory it was read from
+        if not isinstance(session.target_dir, str) or not self._is_valid_target(session.target_dir):
+            self.logger.warning(f"Ignoring resumable upload {upload_id}: target {session.target_dir!r} "
+                                f"is outside {self.root}")
+            return None
+        if time() > self.expires_at(session):
+            self.delete(upload_id)
+            return None
+        return session
+
+    def lock(self, upload_id: str) -> Lock:
+        """Return the lock serialising writes to one session."""
+        with self._locks_lock:
+            return self._locks.setdefault(upload_id, Lock())
+
+    def append(self, session: UploadSession, rfile: BinaryIO, count: int, buffer_size: int = 64 * 1024) -> int:
+        """
+        Append up to ``count`` bytes read from ``rfile`` to the session and return the new offset.
+        Whatever arrived before the client went away is kept, so the upload can be resumed from there.
+        """
+        if session.offset + count > session.length:
+            raise UploadSessionError("chunk would exceed Upload-Length")
+        with open(self._part_path(session.upload_id), 'ab') as part:
+            remaining = count
+            try:
+                while remaining > 0:
+                    chunk = rfile.read(min(remaining, buffer_size))
+                    if not chunk:
+                        break
+                    part.write(chunk)
+                    remaining -= len(chunk)
+            except (ConnectionError, TimeoutError) as e:
+                self.logger.warning(f"Resumable upload {session.upload_id} interrupted: {e}")
+            session.offset = part.tell()
+        session.last_activity = time()
+        return session.offset
+
+    def finalize(self, session: UploadSession, dest_path: str) -> str:
+        """Move the completed partial file to ``dest_path`` and forget the session."""
+        if not session.is_complete:
+            raise UploadSessionError("upload is not complete")
+        part_path = self._part_path(session.upload_id)
+        # the partial file is created owner-only; the published one gets the mode open() would give it
+        os.chmod(part_path, AtomicUploadWriter.default_file_mode())
+        try:
+            os.replace(part_path, dest_path)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # staging and target are on different filesystems: copy next to the target, then rename
+            tmp_path = f"{dest_path}.{session.upload_id}.tmp"
+            shutil.copyfile(part_path, tmp_path)
+            os.replace(tmp_path, dest_path)
+        self.delete(session.upload_id)
+        self.logger.info(f"Resumable upload {session.upload_id} completed as {dest_path}")
+        return dest_path
+
+    def delete(self, upload_id: str) -> None:
+        for path in (self._part_path(upload_id), self._state_path(upload_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        with self._locks_lock:
+            self._locks.pop(upload_id, None)
+
+    def collect_garbage(self, now: Optional[float] = None) -> int:
+        """Remove expired sessions and orphaned files; returns the number of sessions removed."""
+        now = now if now is not None else time()
+        self._last_gc = now
+        try:
+            names = os.listdir(self.staging_dir)
+        except FileNotFoundError:
+            return 0
+        removed = 0
+        for upload_id in {name.partition('.')[0] for name in names}:
+            try:
+                last_activity = os.stat(self._part_path(upload_id)).st_mtime
+            except FileNotFoundError:
+                last_activity = 0.0
+            if now - last_activity > self.max_age or not os.path.exists(self._state_path(upload_id)):
+                self.delete(upload_id)
+                removed += 1
+        if removed:
+            self.logger.info(f"Removed {removed} expired resumable upload(s)")
+        return removed
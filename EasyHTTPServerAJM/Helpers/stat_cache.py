@@ -0,0 +1,113 @@
+import os
+from pathlib import Path
+from threading import Lock
+from time import monotonic
+from typing import Dict, Optional, Tuple, Union
+
+
+class StatCache:
+    """
+    Small process-wide cache of ``os.stat`` results and resolved paths.
+
+    A path is resolved and stat'ed at most once per ``ttl`` seconds, so validating the same
+    asset paths over and over (one ``AssetHelper`` per template builder) costs one ``stat`` per
+    unique path. A missing path is cached as None like any other result. When ``max_entries``
+    is reached, expired entries are dropped, and if that is not enough the cache starts over.
+
+    :ivar ttl: Seconds a result is served from the cache.
+    :type ttl: float
+    :ivar max_entries: Results held at most, per kind (stat and resolve).
+    :type max_entries: int
+    :ivar hits: Lookups served from the cache.
+    :type hits: int
+    :ivar misses: Lookups that went to the filesystem.
+    :type misses: int
+    """
+    DEFAULT_TTL = 2.0
+    DEFAULT_MAX_ENTRIES = 1024
+    _shared_instance = None
+    _shared_lock = Lock()
+
+    def __init__(self, ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        self.ttl = ttl if ttl is not None else self.__class__.DEFAULT_TTL
+        self.max_entries = max_entries or self.__class__.DEFAULT_MAX_ENTRIES
+        self._stats: Dict[str, Tuple[float, Optional[os.stat_result]]] = {}
+        self._resolved: Dict[str, Tuple[float, Path]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def shared(cls) -> "StatCache":
+        """Return the process-wide cache instance, creating it on first use."""
+        if cls._shared_instance is None:
+            with cls._shared_lock:
+                if cls._shared_instance is None:
+                    cls._shared_instance = cls()
+        return cls._shared_instance
+
+    def _lookup(self, entries: dict, key: str, now: float):
+        entry = entries.get(key)
+        if entry is not None and now - entry[0] < self.ttl:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def _store(self, entries: dict, key: str, now: float, value) -> None:
+        if len(entries) >= self.max_entries:
+            for stale in [k for k, (checked_at, _) in list(entries.items()) if now - checked_at >= self.ttl]:
+                entries.pop(stale, None)
+            if len(entries) >= self.max_entries:
+                entries.clear()
+        # a single assignment: readers on other threads see the old or the new entry, never half of one
+        entries[key] = (now, value)
+
+    def stat(self, path: Union[str, Path]) -> Optional[os.stat_result]:
+        """``os.stat(path)``, or None if ``path`` does not exist (or can't be stat'ed)."""
+        key = os.fspath(path)
+        now = monotonic()
+        entry = self._lookup(self._stats, key, now)
+        if entry is not None:
+            return entry[1]
+        try:
+            st = os.stat(key)
+        except (OSError, ValueError):
+            st = None
+        self._store(self._stats, key, now, st)
+        return st
+
+    def resolve(self, path: Union[str, Path]) -> Path:
+        """``Path(path).resolve()``."""
+        key = os.fspath(path)
+        if not os.path.isabs(key):
+            # keyed on the working directory too, so a chdir does not serve a stale result
+            key = os.path.join(os.getcwd(), key)
+        now = monotonic()
+        entry = self._lookup(self._resolved, key, now)
+        if entry is not None:
+            return entry[1]
+        resolved = Path(key).resolve()
+        self._store(self._resolved, key, now, resolved)
+        return resolved
+
+    def invalidate(self, path: Union[str, Path]) -> None:
+        key = os.fspath(path)
+        self._stats.pop(key, None)
+        self._resolved.pop(key, None)
+
+    def clear(self) -> None:
+        self._stats.clear()
+        self._resolved.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._stats),
+                'hit_ratio': self.hit_ratio}
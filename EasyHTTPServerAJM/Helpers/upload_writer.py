@@ -0,0 +1,181 @@
+import os
+from logging import getLogger
+from queue import Queue
+from tempfile import mkstemp
+from threading import Thread
+from typing import Optional
+
+
+class AtomicUploadWriter:
+    """
+    Writes an upload to a temporary file next to its destination and publishes it with
+    ``os.replace``, so readers only ever see complete files. The published file gets the mode
+    a plain ``open`` would have created it with (``0o666`` less the umask).
+
+    When the expected size is known the temporary file is preallocated with
+    ``os.posix_fallocate`` (best effort, it is truncated to the real size on commit), which keeps
+    large uploads contiguous on disk. Writes are handed to a writer thread through a queue of at
+    most ``queue_depth`` chunks, so reading the next chunk from the network overlaps with writing
+    the previous one to disk while memory use stays bounded.
+
+    ``fsync_policy`` decides durability: ``'none'`` leaves flushing to the OS, ``'final'`` fsyncs
+    the file and its directory before and after publishing it, and ``'periodic'`` additionally
+    fsyncs every ``fsync_interval`` bytes so dirty pages never pile up.
+
+    :ivar dest_path: Path the file is published under by ``commit``.
+    :type dest_path: str
+    :ivar tmp_path: Temporary file the data is written to.
+    :type tmp_path: str
+    :ivar bytes_written: Number of bytes written so far.
+    :type bytes_written: int
+    """
+    FSYNC_NONE = 'none'
+    FSYNC_FINAL = 'final'
+    FSYNC_PERIODIC = 'periodic'
+    FSYNC_POLICIES = (FSYNC_NONE, FSYNC_FINAL, FSYNC_PERIODIC)
+    DEFAULT_QUEUE_DEPTH = 8
+    DEFAULT_FSYNC_INTERVAL = 64 * 1024 * 1024
+    # smaller files are not worth a fallocate call
+    PREALLOCATE_MIN_SIZE = 1024 * 1024
+    _DONE = None
+
+    def __init__(self, dest_path: str, expected_size: Optional[int] = None, fsync_policy: str = FSYNC_NONE,
+                 queue_depth: Optional[int] = None, fsync_interval: Optional[int] = None, **kwargs):
+        if fsync_policy not in self.__class__.FSYNC_POLICIES:
+            raise ValueError(f"fsync_policy must be one of {self.__class__.FSYNC_POLICIES}, not {fsync_policy!r}")
+        self.logger = kwargs.get('logger', getLogger(__name__))
+        self.dest_path = os.fspath(dest_path)
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval or self.__class__.DEFAULT_FSYNC_INTERVAL
+        self.bytes_written = 0
+        self._unsynced = 0
+        self._error: Optional[BaseException] = None
+        self._closed = False
+
+        directory, name = os.path.split(self.dest_path)
+        fd, self.tmp_path = mkstemp(prefix=f".{name}.", suffix='.upload', dir=directory or '.')
+        self._file = os.fdopen(fd, 'wb', buffering=0)
+        self.preallocated = self._preallocate(expected_size)
+
+        self._queue: Queue = Queue(maxsize=queue_depth or self.__class__.DEFAULT_QUEUE_DEPTH)
+        self._thread = Thread(target=self._write_loop, name=f"upload-writer-{name}", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def default_file_mode() -> int:
+        """Mode a plain ``open`` creates files with: ``0o666`` less the process umask."""
+        return 0o666 & ~AtomicUploadWriter._get_umask()
+
+    @staticmethod
+    def _get_umask() -> int:
+        try:
+            # Linux reports it without changing it
+            with open('/proc/self/status') as status:
+                for line in status:
+                    if line.startswith('Umask:'):
+                        return int(line.split()[1], 8)
+        except (OSError, ValueError):
+            pass
+        umask = os.umask(0o022)
+        os.umask(umask)
+        return umask
+
+    def _set_default_mode(self) -> None:
+        # mkstemp creates the file as 0600, which keeps the partial file private; the published
+        # one gets the mode open() would give it, so whoever else reads the share can read it
+        if hasattr(os, 'fchmod'):
+            os.fchmod(self._file.fileno(), self.default_file_mode())
+
+    def _preallocate(self, expected_size: Optional[int]) -> bool:
+        if not expected_size or expected_size < self.__class__.PREALLOCATE_MIN_SIZE:
+            return False
+        if not hasattr(os, 'posix_fallocate'):
+            return False
+        try:
+            os.posix_fallocate(self._file.fileno(), 0, expected_size)
+        except OSError as e:
+            # e.g. EOPNOTSUPP on filesystems without fallocate or ENOSPC for an over-estimate
+            self.logger.debug("Could not preallocate %s bytes for %s: %s", expected_size, self.dest_path, e)
+            return False
+        return True
+
+    def _write_loop(self):
+        while True:
+            chunk = self._queue.get()
+            if chunk is self.__class__._DONE:
+                return
+            if self._error is not None:
+                # keep draining so a blocked producer is released
+                continue
+            try:
+                view = memoryview(chunk)
+                while view:
+                    view = view[self._file.write(view):]
+                self.bytes_written += len(chunk)
+                self._unsynced += len(chunk)
+                if self.fsync_policy == self.__class__.FSYNC_PERIODIC and self._unsynced >= self.fsync_interval:
+                    os.fsync(self._file.fileno())
+                    self._unsynced = 0
+            except BaseException as e:
+                self._error = e
+
+    def write(self, data: bytes) -> int:
+        if self._error is not None:
+            raise self._error
+        if data:
+            self._queue.put(data)
+        return len(data)
+
+    def _stop_writer(self):
+        if self._thread.is_alive():
+            self._queue.put(self.__class__._DONE)
+            self._thread.join()
+
+    def _fsync_directory(self):
+        if not hasattr(os, 'O_DIRECTORY'):
+            return
+        fd = os.open(os.path.dirname(self.dest_path) or '.', os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def commit(self) -> int:
+        """Flush everything, publish the file under ``dest_path`` and return its size."""
+        self._stop_writer()
+        try:
+            if self._error is not None:
+                raise self._error
+            if self.preallocated:
+                self._file.truncate(self.bytes_written)
+            if self.fsync_policy != self.__class__.FSYNC_NONE:
+                os.fsync(self._file.fileno())
+            self._set_default_mode()
+            self._file.close()
+            self._closed = True
+            os.replace(self.tmp_path, self.dest_path)
+            if self.fsync_policy != self.__class__.FSYNC_NONE:
+                self._fsync_directory()
+        except BaseException:
+            self.abort()
+            raise
+        return self.bytes_written
+
+    def abort(self) -> None:
+        """Throw the partial file away."""
+        self._stop_writer()
+        if not self._closed:
+            self._file.close()
+            self._closed = True
+        try:
+            os.remove(self.tmp_path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None:
+            self.abort()
+        return False
@@ -0,0 +1,14 @@
+from typing import TYPE_CHECKING
+
+from EasyHTTPServerAJM._lazy import lazy_attributes
+from EasyHTTPServerAJM.ServerEngines.pool_engine import BoundedThreadPoolHTTPServer
+from EasyHTTPServerAJM.ServerEngines.prefork import PreforkSupervisor
+
+# asyncio is a sizeable import that only the asyncio engine needs
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'AsyncioHTTPServer': 'EasyHTTPServerAJM.ServerEngines.asyncio_engine',
+    'AsyncioConnection': 'EasyHTTPServerAJM.ServerEngines.asyncio_engine',
+})
+
+if TYPE_CHECKING:
+    from EasyHTTPServerAJM.ServerEngines.asyncio_engine import AsyncioHTTPServer, AsyncioConnection
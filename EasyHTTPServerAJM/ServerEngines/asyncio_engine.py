@@ -0,0 +1,384 @@
+import asyncio
+import io
+import os
+import socket
+import sys
+from concurrent.futures import CancelledError, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from http.client import HTTPException, parse_headers
+from logging import getLogger
+from threading import Event
+from typing import List, Optional, Tuple, Union
+
+
+class _ConnectionReader:
+    """
+    Blocking file-like view of one request on an asyncio stream, used as the handler's ``rfile``.
+
+    It starts with the request head the event loop already read and then pulls at most
+    ``body_length`` more bytes from the stream. Once the body is used up it reports EOF, so a
+    handler that loops for the next keep-alive request returns to the event loop instead of
+    blocking a worker thread while the client is idle.
+    """
+    READ_SIZE = 64 * 1024
+
+    def __init__(self, connection: "AsyncioConnection", head: bytes, body_length: Optional[int]):
+        self._connection = connection
+        self._buffer = bytearray(head)
+        # body bytes not fetched from the stream yet; None means unknown (read until EOF)
+        self.unread_body = body_length
+        # set when the handler asked for another request, i.e. it wants to keep the connection
+        self.next_request_wanted = False
+        self.closed = False
+
+    def _fill(self, size: int) -> bool:
+        if self.unread_body == 0:
+            self.next_request_wanted = True
+            return False
+        if self.unread_body is not None:
+            size = min(size, self.unread_body)
+        data = self._connection.call(self._connection.reader.read(size))
+        if not data:
+            return False
+        if self.unread_body is not None:
+            self.unread_body -= len(data)
+        self._buffer += data
+        return True
+
+    def _take(self, size: int) -> bytes:
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        if size is None or size < 0:
+            while self._fill(self.__class__.READ_SIZE):
+                pass
+            return self._take(len(self._buffer))
+        while len(self._buffer) < size and self._fill(size - len(self._buffer)):
+            pass
+        return self._take(size)
+
+    def read1(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = self.__class__.READ_SIZE
+        if not self._buffer:
+            self._fill(size)
+        return self._take(size)
+
+    def readinto(self, buffer) -> int:
+        data = self.read1(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def readline(self, limit: Optional[int] = -1) -> bytes:
+        limit = -1 if limit is None else limit
+        while True:
+            end = self._buffer.find(b"\n")
+            if end >= 0:
+                size = end + 1
+                return self._take(size if limit < 0 else min(size, limit))
+            if 0 <= limit <= len(self._buffer) or not self._fill(self.__class__.READ_SIZE):
+                return self._take(len(self._buffer) if limit < 0 else limit)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class _ConnectionWriter(io.BufferedIOBase):
+    """``wfile`` for handlers that ask for a buffered writer (``wbufsize != 0``)."""
+    def __init__(self, connection: "AsyncioConnection"):
+        self._connection = connection
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._connection.sendall(b)
+        with memoryview(b) as view:
+            return view.nbytes
+
+
+class AsyncioConnection:
+    """
+    Stands in for the client socket that a ``StreamRequestHandler`` expects as its ``request``.
+
+    The handler runs on a worker thread. What it sends is queued here and written by the event
+    loop. File segments passed to ``sendfile`` are not copied. A duplicate of the file descriptor
+    is queued and later sent with ``loop.sendfile``. The worker thread only waits for the network
+    when more than ``HIGH_WATER`` bytes are queued. Once the handler returns, the event loop sends
+    the rest, so a slow download does not hold a worker thread.
+    """
+    HIGH_WATER = 256 * 1024
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, reader: asyncio.StreamReader,
+                 writer: asyncio.StreamWriter, head: bytes, body_length: Optional[int]):
+        self.loop = loop
+        self.reader = reader
+        self.writer = writer
+        self.timeout: Optional[float] = None
+        self.rfile = _ConnectionReader(self, head, body_length)
+        # requests answered on this client connection before this one (see KeepAliveMixin)
+        self.requests_served = 0
+        self._pending: List[Union[bytes, Tuple[io.BufferedReader, int, int]]] = []
+        self._pending_bytes = 0
+
+    @property
+    def keep_alive(self) -> bool:
+        return self.rfile.next_request_wanted
+
+    # -- the parts of the socket API used by StreamRequestHandler and ZeroCopyFileMixin --
+    def settimeout(self, timeout: Optional[float]) -> None:
+        self.timeout = timeout
+
+    def gettimeout(self) -> Optional[float]:
+        return self.timeout
+
+    def setsockopt(self, *args) -> None:
+        sock = self.writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(*args)
+
+    def makefile(self, mode: str = 'r', buffering: Optional[int] = None, **kwargs):
+        if 'r' in mode:
+            return self.rfile
+        return _ConnectionWriter(self)
+
+    def sendall(self, data) -> None:
+        data = bytes(data)
+        self._pending.append(data)
+        self._pending_bytes += len(data)
+        if self._pending_bytes >= self.__class__.HIGH_WATER:
+            self.flush()
+
+    def sendfile(self, file, offset: int = 0, count: Optional[int] = None) -> int:
+        if count is None:
+            count = os.fstat(file.fileno()).st_size - offset
+        if count <= 0:
+            return 0
+        self._pending.append((open(os.dup(file.fileno()), 'rb'), offset, count))
+        return count
+
+    def call(self, coro):
+        """Run ``coro`` on the event loop from the handler's thread and wait for its result."""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(self.timeout)
+        except FutureTimeoutError:
+            # only an alias of the builtin TimeoutError from 3.11 on; socket.timeout is what
+            # http.server expects from a blocking read and catches
+            future.cancel()
+            raise socket.timeout("timed out")
+        except CancelledError:
+            raise ConnectionAbortedError("server is shutting down")
+
+    def _take_pending(self) -> list:
+        items, self._pending, self._pending_bytes = self._pending, [], 0
+        return items
+
+    def flush(self) -> None:
+        """Wait until everything queued so far has been handed to the kernel."""
+        items = self._take_pending()
+        if items:
+            self.call(self._send_items(items))
+
+    async def _send_items(self, items: list) -> None:
+        try:
+            for item in items:
+                if isinstance(item, bytes):
+                    self.writer.write(item)
+                    continue
+                file, offset, count = item
+                sent = await self.loop.sendfile(self.writer.transport, file, offset, count)
+                if sent < count:
+                    # the file shrank while it was being sent, Content-Length can no longer be met
+                    raise ConnectionAbortedError(f"short file response ({sent} of {count} bytes)")
+            await self.writer.drain()
+        finally:
+            self._close_files(items)
+
+    async def send_pending(self) -> None:
+        """Send whatever the handler left queued; called on the event loop after the handler returned."""
+        await self._send_items(self._take_pending())
+
+    @staticmethod
+    def _close_files(items: list) -> None:
+        for item in items:
+            if not isinstance(item, bytes):
+                item[0].close()
+
+    def close(self) -> None:
+        self._close_files(self._take_pending())
+
+
+class AsyncioHTTPServer:
+    """
+    Serves an ``http.server`` request handler class from an asyncio event loop.
+
+    This is a drop-in replacement for ``ThreadingHTTPServer``. It takes the same constructor
+    arguments and has the same ``serve_forever``/``shutdown``/``server_close`` methods, so
+    ``PrettyDirectoryHandler`` and its listing rendering are reused unchanged. Idle connections
+    and connections waiting for a request cost a coroutine, not a thread. Reading the request
+    head and sending finished responses (including ``sendfile``
+    segments) all happen on the event loop. A worker thread from a pool of ``max_workers`` is
+    only used while the handler itself runs, which covers the blocking filesystem work and
+    template rendering. That way one process can hold thousands of concurrent connections.
+
+    :ivar max_workers: Size of the thread pool that runs request handlers.
+    :type max_workers: int
+    :ivar keep_alive_timeout: Seconds to wait for the (next) request head before closing.
+    :type keep_alive_timeout: float
+    :ivar active_connections: Number of open client connections.
+    :type active_connections: int
+    """
+    address_family = socket.AF_INET
+    allow_reuse_address = True
+    request_queue_size = 1024
+    DEFAULT_MAX_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+    DEFAULT_KEEP_ALIVE_TIMEOUT = 15.0
+    MAX_HEADER_SIZE = 64 * 1024
+
+    def __init__(self, server_address: Tuple[str, int], RequestHandlerClass, bind_and_activate: bool = True,
+                 **kwargs):
+        self.logger = kwargs.get('logger', getLogger(__name__))
+        self.server_address = server_address
+        self.RequestHandlerClass = RequestHandlerClass
+        self.max_workers = kwargs.get('max_workers', None) or self.__class__.DEFAULT_MAX_WORKERS
+        self.keep_alive_timeout = kwargs.get('keep_alive_timeout', self.__class__.DEFAULT_KEEP_ALIVE_TIMEOUT)
+        self.request_queue_size = kwargs.get('listen_backlog', None) or self.__class__.request_queue_size
+        self.active_connections = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._shutdown_request = False
+        self._is_shut_down = Event()
+        self._is_shut_down.set()
+
+        self.socket = socket.socket(self.address_family, socket.SOCK_STREAM)
+        if bind_and_activate:
+            try:
+                self.server_bind()
+                self.server_activate()
+            except BaseException:
+                self.server_close()
+                raise
+
+    def server_bind(self) -> None:
+        if self.allow_reuse_address and hasattr(socket, 'SO_REUSEADDR'):
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind(self.server_address)
+        self.server_address = self.socket.getsockname()[:2]
+
+    def server_activate(self) -> None:
+        self.socket.listen(self.request_queue_size)
+
+    def server_close(self) -> None:
+        self.socket.close()
+
+    def fileno(self) -> int:
+        return self.socket.fileno()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.server_close()
+
+    def serve_forever(self, poll_interval: float = 0.5) -> None:
+        """Run the event loop until ``shutdown`` is called. ``poll_interval`` is accepted for compatibility."""
+        self._is_shut_down.clear()
+        try:
+            asyncio.run(self._serve())
+        finally:
+            self._shutdown_request = False
+            self._loop = self._stop = None
+            self._is_shut_down.set()
+
+    def shutdown(self) -> None:
+        """Stop ``serve_forever`` and wait for it to return; must be called from another thread."""
+        self._shutdown_request = True
+        loop, stop = self._loop, self._stop
+        if loop is not None and stop is not None:
+            try:
+                loop.call_soon_threadsafe(stop.set)
+            except RuntimeError:
+                # the loop has already been closed
+                pass
+        self._is_shut_down.wait()
+
+    async def _serve(self) -> None:
+        self._stop = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        if self._shutdown_request:
+            return
+        self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='EasyHTTPServer-worker')
+        server = await asyncio.start_server(self._handle_connection, sock=self.socket,
+                                            limit=self.__class__.MAX_HEADER_SIZE,
+                                            backlog=self.request_queue_size)
+        self.logger.debug(f"asyncio engine serving on {self.server_address} with {self.max_workers} workers")
+        try:
+            async with server:
+                await self._stop.wait()
+        finally:
+            if sys.version_info >= (3, 9):
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            else:
+                # handlers still queued are cancelled with the connection tasks asyncio.run cancels
+                self._executor.shutdown(wait=False)
+
+    async def _read_request_head(self, reader: asyncio.StreamReader) -> Optional[bytes]:
+        try:
+            return await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.keep_alive_timeout)
+        except asyncio.LimitOverrunError:
+            self.logger.warning(f"Request head larger than {self.__class__.MAX_HEADER_SIZE} bytes, closing")
+            return None
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            return None
+
+    @staticmethod
+    def _get_body_length(head: bytes) -> Optional[int]:
+        """Length of the body following ``head``; None if it is only delimited by the end of the connection."""
+        _, _, header_block = head.partition(b"\r\n")
+        try:
+            headers = parse_headers(io.BytesIO(header_block))
+        except HTTPException:
+            return None
+        if headers.get('Transfer-Encoding'):
+            return None
+        length = headers.get('Content-Length', '0').strip()
+        return int(length) if length.isdigit() else None
+
+    def _run_handler(self, connection: AsyncioConnection, client_address) -> None:
+        try:
+            self.RequestHandlerClass(connection, client_address, self)
+        except (ConnectionError, TimeoutError, socket.timeout, FutureTimeoutError) as e:
+            connection.rfile.next_request_wanted = False
+            self.logger.debug("Connection from %s ended: %s", client_address, e)
+        except Exception:
+            connection.rfile.next_request_wanted = False
+            self.logger.exception(f"Exception while handling a request from {client_address}")
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        client_address = writer.get_extra_info('peername')
+        self.active_connections += 1
+        requests_served = 0
+        try:
+            while not self._stop.is_set():
+                head = await self._read_request_head(reader)
+                if head is None:
+                    break
+                connection = AsyncioConnection(self._loop, reader, writer, head, self._get_body_length(head))
+                connection.requests_served = requests_served
+                requests_served += 1
+                try:
+                    await self._loop.run_in_executor(self._executor, self._run_handler, connection, client_address)
+                    await connection.send_pending()
+                finally:
+                    connection.close()
+                if not connection.keep_alive:
+                    break
+        except (ConnectionError, RuntimeError) as e:
+            # RuntimeError: the executor was shut down while this connection was waiting for it
+            self.logger.debug("Connection from %s closed: %s", client_address, e)
+        finally:
+            self.active_connections -= 1
+            writer.close()
@@ -0,0 +1,174 @@
+import socket
+from http.server import HTTPServer
+from logging import getLogger
+from queue import Empty, Full, Queue
+from threading import Lock, Thread, current_thread
+from time import monotonic
+from typing import List, Optional, Tuple
+
+
+class BoundedThreadPoolHTTPServer(HTTPServer):
+    """
+    ``HTTPServer`` that hands accepted connections to a fixed pool of ``max_workers`` threads.
+
+    ``ThreadingHTTPServer`` starts a new thread for every connection, so a burst of clients can
+    create thousands of them. Here, connections wait in a queue of at most ``max_pending``
+    entries until a worker is free. When the queue is full, the connection is answered right away
+    with ``503 Service Unavailable`` and ``Retry-After`` and closed, so overload gets a fast,
+    cheap refusal and memory use stays bounded. Connections the server has not accepted yet wait
+    in the kernel's listen backlog of ``listen_backlog`` entries.
+
+    A worker stays with its connection between keep-alive requests, so idle clients could pin
+    every worker while new connections wait in the queue. The wait for a connection's next
+    request is therefore capped at ``idle_timeout`` seconds (usually far below the handler's
+    ``keep_alive_timeout``), and while connections are queued every response is sent with
+    ``Connection: close`` so its worker moves on to them (see ``KeepAliveMixin``).
+
+    The pool size and queue size are logged at startup. Every rejection is counted. Rejections
+    and the current queue depth are logged at most once every ``STATS_INTERVAL`` seconds.
+
+    :ivar max_workers: Number of worker threads.
+    :type max_workers: int
+    :ivar max_pending: Accepted connections that may wait for a worker before new ones are rejected.
+    :type max_pending: int
+    :ivar retry_after: Seconds sent in the ``Retry-After`` header of the 503 response.
+    :type retry_after: int
+    :ivar idle_timeout: Seconds a worker waits for the next request on a kept-alive connection.
+    :type idle_timeout: float
+    :ivar rejected: Number of connections rejected so far.
+    :type rejected: int
+    """
+    DEFAULT_MAX_WORKERS = 32
+    DEFAULT_MAX_PENDING = 64
+    DEFAULT_LISTEN_BACKLOG = 128
+    DEFAULT_RETRY_AFTER = 1
+    DEFAULT_IDLE_TIMEOUT = 2.0
+    STATS_INTERVAL = 10.0
+    REJECT_TIMEOUT = 1.0
+    # how long server_close waits for busy workers before leaving them to finish on their own
+    WORKER_JOIN_TIMEOUT = 5.0
+    _STOP = None
+
+    def __init__(self, server_address: Tuple[str, int], RequestHandlerClass, bind_and_activate: bool = True,
+                 **kwargs):
+        self.logger = kwargs.get('logger', getLogger(__name__))
+        self.max_workers = kwargs.get('max_workers', None) or self.__class__.DEFAULT_MAX_WORKERS
+        self.max_pending = kwargs.get('max_pending', None) or self.__class__.DEFAULT_MAX_PENDING
+        self.retry_after = kwargs.get('retry_after', None) or self.__class__.DEFAULT_RETRY_AFTER
+        self.idle_timeout = kwargs.get('idle_timeout', None) or self.__class__.DEFAULT_IDLE_TIMEOUT
+        # read by server_activate
+        self.request_queue_size = kwargs.get('listen_backlog', None) or self.__class__.DEFAULT_LISTEN_BACKLOG
+        self.rejected = 0
+        self._stats_lock = Lock()
+        self._last_stats = monotonic()
+        self._rejected_since_stats = 0
+        self._pending: Queue = Queue(maxsize=self.max_pending)
+        self._workers: List[Thread] = []
+        super().__init__(server_address, RequestHandlerClass, bind_and_activate)
+        self._start_workers()
+
+    def _start_workers(self) -> None:
+        for index in range(self.max_workers):
+            worker = Thread(target=self._work, name=f"EasyHTTPServer-worker-{index}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        self.logger.info(f"Worker pool started: {self.max_workers} workers, {self.max_pending} pending "
+                         f"connections, listen backlog {self.request_queue_size}")
+
+    @property
+    def queue_depth(self) -> int:
+        return self._pending.qsize()
+
+    def _work(self) -> None:
+        while True:
+            item = self._pending.get()
+            if item is self.__class__._STOP:
+                return
+            request, client_address = item
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            except BaseException as e:
+                # e.g. the SystemExit of EasyHTTPServer.err_stop; it must not take a worker out of the pool
+                self.logger.debug("Worker %s caught %r from %s", current_thread().name, e, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    def process_request(self, request, client_address) -> None:
+        try:
+            self._pending.put_nowait((request, client_address))
+        except Full:
+            self._reject(request, client_address)
+
+    def _get_reject_response(self) -> bytes:
+        body = b"Server is busy, please retry shortly.\n"
+        return (f"HTTP/1.1 503 Service Unavailable\r\n"
+                f"Retry-After: {self.retry_after}\r\n"
+                f"Content-Type: text/plain; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n").encode('latin-1') + body
+
+    def _reject(self, request: socket.socket, client_address) -> None:
+        with self._stats_lock:
+            self.rejected += 1
+            self._rejected_since_stats += 1
+        try:
+            request.settimeout(self.__class__.REJECT_TIMEOUT)
+            request.sendall(self._get_reject_response())
+            # read what already arrived, closing with unread data would reset the connection
+            # before the client sees the 503
+            request.setblocking(False)
+            request.recv(64 * 1024)
+        except OSError:
+            pass
+        self.logger.debug("Rejected connection from %s: all %d workers busy", client_address, self.max_workers)
+        self.shutdown_request(request)
+        self._log_stats()
+
+    def _log_stats(self, force: bool = False) -> None:
+        now = monotonic()
+        with self._stats_lock:
+            if not force and now - self._last_stats < self.__class__.STATS_INTERVAL:
+                return
+            rejected, self._rejected_since_stats = self._rejected_since_stats, 0
+            self._last_stats = now
+        if rejected:
+            self.logger.warning(f"Worker pool saturated: rejected {rejected} connection(s) in the last "
+                                f"{self.__class__.STATS_INTERVAL:g}s ({self.rejected} total), "
+                                f"{self.queue_depth}/{self.max_pending} pending, {self.max_workers} workers")
+        elif force or self.queue_depth:
+            self.logger.debug("Worker pool: %d/%d pending, %d workers, %d rejected in total",
+                              self.queue_depth, self.max_pending, self.max_workers, self.rejected)
+
+    def service_actions(self) -> None:
+        # called by serve_forever between polls
+        self._log_stats()
+
+    def _stop_workers(self) -> None:
+        # connections still waiting for a worker are dropped
+        while True:
+            try:
+                item = self._pending.get_nowait()
+            except Empty:
+                break
+            if item is not self.__class__._STOP:
+                self.shutdown_request(item[0])
+        deadline = monotonic() + self.__class__.WORKER_JOIN_TIMEOUT
+        for _ in self._workers:
+            try:
+                self._pending.put(self.__class__._STOP, timeout=max(0.0, deadline - monotonic()))
+            except Full:
+                # every worker is stuck on a connection; they are daemon threads, leave them
+                break
+        for worker in self._workers:
+            # a handler may stop the server from its own worker
+            if worker is not current_thread():
+                worker.join(max(0.0, deadline - monotonic()))
+        self._workers = []
+
+    def server_close(self) -> None:
+        super().server_close()
+        if self._workers:
+            self._log_stats(force=True)
+            self._stop_workers()
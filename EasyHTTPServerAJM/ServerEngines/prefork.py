@@ -0,0 +1,299 @@
+import logging
+import os
+import signal
+import socket
+from logging import getLogger
+from threading import Event, Thread, current_thread, main_thread
+from time import monotonic, sleep
+from typing import Callable, Dict, Optional, Tuple
+
+
+class PreforkSupervisor:
+    """
+    Runs ``workers`` forked processes that all serve the same listening port.
+
+    Rendering listings and building handlers is pure Python, so one process only uses about one
+    core. Here the supervisor (the parent process) forks the workers. Each worker builds its own
+    server with ``build_server`` and serves until it is told to stop. Each worker opens its own
+    socket with ``SO_REUSEPORT``, so the kernel spreads new connections over the workers. Where
+    ``SO_REUSEPORT`` is unavailable (or ``reuse_port=False``), the parent opens the listening
+    socket and every worker accepts from the inherited copy.
+
+    The supervisor restarts workers that crash. A worker that crashes within ``MIN_UPTIME``
+    seconds of starting is restarted after a delay that doubles each time, up to
+    ``MAX_RESTART_DELAY``. ``SIGTERM``, ``SIGINT`` and ``SIGHUP`` sent to the supervisor are
+    forwarded to the workers as ``SIGTERM``.
+
+    A worker ends with ``EXIT_STOP`` when it asks for the whole server to stop, and with
+    ``EXIT_ERR_STOP`` when it hit a fatal error (including a server that could not be built).
+    The supervisor then stops every worker instead of restarting it.
+
+    :ivar server_address: Address the workers serve. The port is the real one once
+        ``open_listener`` has run, even when port 0 was requested.
+    :type server_address: tuple
+    :ivar workers: Number of worker processes.
+    :type workers: int
+    :ivar reuse_port: True if every worker binds its own socket with ``SO_REUSEPORT``.
+    :type reuse_port: bool
+    :ivar worker_index: Index of this worker in a worker process, None in the supervisor.
+    :type worker_index: int, optional
+    :ivar worker_exit_code: Exit code this worker process ends with once its server stops.
+    :type worker_exit_code: int
+    :ivar restarts: Number of workers restarted after a crash.
+    :type restarts: int
+    """
+    EXIT_STOP = 3
+    EXIT_ERR_STOP = 4
+    POLL_INTERVAL = 0.1
+    MIN_UPTIME = 1.0
+    RESTART_DELAY = 0.5
+    MAX_RESTART_DELAY = 30.0
+    # how long stop waits for workers to exit before they are killed
+    STOP_TIMEOUT = 10.0
+    FORWARDED_SIGNALS = tuple(getattr(signal, name) for name in ('SIGTERM', 'SIGINT', 'SIGHUP')
+                              if hasattr(signal, name))
+
+    def __init__(self, server_address: Tuple[str, int], build_server: Callable, workers: int, **kwargs):
+        if not self.__class__.is_supported():
+            raise ValueError("Worker processes need os.fork, which this platform does not have")
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1, got {workers}")
+        self.logger = kwargs.get('logger', getLogger(__name__))
+        self.server_address = server_address
+        self.build_server = build_server
+        self.workers = workers
+        self.reuse_port = kwargs.get('reuse_port', True) and hasattr(socket, 'SO_REUSEPORT')
+        self.worker_index: Optional[int] = None
+        self.worker_exit_code = 0
+        self.restarts = 0
+        self._listener: Optional[socket.socket] = None
+        self._children: Dict[int, Tuple[int, float]] = {}
+        # worker index -> monotonic time a crashed worker is restarted at
+        self._restart_at: Dict[int, float] = {}
+        # worker index -> delay of its last restart, doubled while it keeps crashing right away
+        self._restart_delay: Dict[int, float] = {}
+        self._stopping = False
+        self._stop_deadline: Optional[float] = None
+        self._exit_status = 0
+        self._stopped = Event()
+        self._stopped.set()
+
+    @staticmethod
+    def is_supported() -> bool:
+        return hasattr(os, 'fork')
+
+    @property
+    def is_worker(self) -> bool:
+        return self.worker_index is not None
+
+    @property
+    def worker_pids(self) -> Dict[int, int]:
+        """Worker index -> pid of the running worker processes."""
+        return {index: pid for pid, (index, _) in self._children.items()}
+
+    # -- supervisor side --
+    def open_listener(self) -> Tuple[str, int]:
+        """
+        Open the socket the workers share and resolve the real port. With ``SO_REUSEPORT`` the
+        socket is only bound, which keeps the port reserved without taking any connections.
+        """
+        if self._listener is None:
+            listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            try:
+                listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                if self.reuse_port:
+                    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+                listener.bind(self.server_address)
+                if not self.reuse_port:
+                    listener.listen(128)
+            except BaseException:
+                listener.close()
+                raise
+            self._listener = listener
+            self.server_address = listener.getsockname()[:2]
+        return self.server_address
+
+    def run(self) -> int:
+        """
+        Start the workers and supervise them until the server is stopped.
+        :return: 0 when the server was stopped, 1 when a worker stopped it with a fatal error.
+        """
+        self.open_listener()
+        self._stopping = False
+        self._stop_deadline = None
+        self._exit_status = 0
+        self._stopped.clear()
+        previous_handlers = self._install_signal_handlers()
+        try:
+            self.logger.info(f"Starting {self.workers} worker processes on {self.server_address} "
+                             f"({'SO_REUSEPORT' if self.reuse_port else 'shared listening socket'})")
+            for index in range(self.workers):
+                self._spawn(index)
+            self._supervise()
+        finally:
+            self._request_stop()
+            self._reap_all()
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+            self._listener.close()
+            self._listener = None
+            self._stopped.set()
+        return self._exit_status
+
+    def stop(self) -> None:
+        """Stop every worker and wait for ``run`` to return (unless called from ``run``'s thread)."""
+        self._request_stop()
+        if not self._stopped.is_set():
+            self._stopped.wait(self.__class__.STOP_TIMEOUT + 5)
+
+    def _request_stop(self) -> None:
+        # safe to call from a signal handler
+        if not self._stopping:
+            self._stopping = True
+            self._stop_deadline = monotonic() + self.__class__.STOP_TIMEOUT
+        self._signal_children(signal.SIGTERM)
+
+    def _signal_children(self, signum: int) -> None:
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def _on_signal(self, signum, frame) -> None:
+        self._request_stop()
+
+    def _install_signal_handlers(self) -> dict:
+        # signal handlers can only be set from the main thread; elsewhere only stop() stops the workers
+        if current_thread() is not main_thread():
+            return {}
+        return {signum: signal.signal(signum, self._on_signal) for signum in self.__class__.FORWARDED_SIGNALS}
+
+    def _spawn(self, index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker(index)
+        self._children[pid] = (index, monotonic())
+        self.logger.debug(f"Worker {index} started with pid {pid}")
+
+    @staticmethod
+    def _get_exit_code(status: int) -> int:
+        if os.WIFSIGNALED(status):
+            return -os.WTERMSIG(status)
+        return os.WEXITSTATUS(status)
+
+    def _supervise(self) -> None:
+        while self._children or (self._restart_at and not self._stopping):
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                pid, status = 0, 0
+            except InterruptedError:
+                continue
+            if pid == 0:
+                self._restart_due_workers()
+                self._kill_overdue_workers()
+                sleep(self.__class__.POLL_INTERVAL)
+                continue
+            if pid in self._children:
+                self._on_worker_exit(pid, self._get_exit_code(status))
+
+    def _on_worker_exit(self, pid: int, exit_code: int) -> None:
+        index, started = self._children.pop(pid)
+        if self._stopping:
+            self.logger.debug(f"Worker {index} (pid {pid}) exited with {exit_code}")
+        elif exit_code == self.__class__.EXIT_STOP:
+            self.logger.info(f"Worker {index} (pid {pid}) asked to stop the server, stopping all workers")
+            self._request_stop()
+        elif exit_code == self.__class__.EXIT_ERR_STOP:
+            self.logger.critical(f"Worker {index} (pid {pid}) stopped with a fatal error, stopping all workers")
+            self._exit_status = 1
+            self._request_stop()
+        else:
+            if monotonic() - started < self.__class__.MIN_UPTIME:
+                delay = min(max(self._restart_delay.get(index, 0.0) * 2, self.__class__.RESTART_DELAY),
+                            self.__class__.MAX_RESTART_DELAY)
+            else:
+                delay = 0.0
+            self._restart_delay[index] = delay
+            self.logger.error(f"Worker {index} (pid {pid}) exited unexpectedly with {exit_code}, "
+                              f"restarting it in {delay:g}s")
+            self._restart_at[index] = monotonic() + delay
+
+    def _restart_due_workers(self) -> None:
+        if self._stopping:
+            self._restart_at.clear()
+            return
+        now = monotonic()
+        for index, due in list(self._restart_at.items()):
+            if due <= now:
+                del self._restart_at[index]
+                self._spawn(index)
+                self.restarts += 1
+
+    def _kill_overdue_workers(self) -> None:
+        if self._stop_deadline is not None and monotonic() > self._stop_deadline and self._children:
+            self.logger.warning(f"{len(self._children)} worker(s) did not stop in time, killing them")
+            self._signal_children(signal.SIGKILL)
+            self._stop_deadline = None
+
+    def _reap_all(self) -> None:
+        while self._children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self._children.clear()
+                break
+            if pid == 0:
+                self._kill_overdue_workers()
+                sleep(self.__class__.POLL_INTERVAL)
+            elif pid in self._children:
+                self._on_worker_exit(pid, self._get_exit_code(status))
+
+    # -- worker side --
+    def _run_worker(self, index: int) -> None:
+        """Body of a forked worker process; never returns."""
+        self.worker_index = index
+        self.worker_exit_code = 0
+        self._children = {}
+        self._restart_at = {}
+        exit_code = 1
+        try:
+            for signum in self.__class__.FORWARDED_SIGNALS:
+                # the terminal sends SIGINT/SIGHUP to the whole process group; the supervisor decides
+                signal.signal(signum, signal.SIG_IGN)
+            try:
+                httpd = self.build_server()
+                self._activate(httpd)
+            except BaseException:
+                # restarting would only fail again, so stop the whole server
+                self.logger.exception(f"Worker {index} could not start its server")
+                exit_code = self.__class__.EXIT_ERR_STOP
+                return
+            with httpd:
+                signal.signal(signal.SIGTERM, lambda *_: Thread(target=httpd.shutdown, daemon=True).start())
+                httpd.serve_forever()
+            exit_code = self.worker_exit_code
+        except SystemExit as e:
+            exit_code = self.worker_exit_code or (e.code if isinstance(e.code, int) else 1)
+        except BaseException:
+            self.logger.exception(f"Worker {index} crashed")
+            exit_code = self.worker_exit_code or 1
+        finally:
+            # os._exit skips atexit: write out buffered and queued log records first
+            logging.shutdown()
+            os._exit(exit_code)
+
+    def _activate(self, httpd) -> None:
+        """Make the unbound server ``httpd`` listen on the shared port."""
+        if self.reuse_port:
+            httpd.server_address = self.server_address
+            httpd.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            httpd.server_bind()
+            httpd.server_activate()
+            # the bound-only socket of the supervisor is not needed here
+            self._listener.close()
+        else:
+            httpd.socket.close()
+            httpd.socket = self._listener
+            httpd.server_address = self.server_address
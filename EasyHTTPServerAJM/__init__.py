@@ -1,3 +1,18 @@
-from EasyHTTPServerAJM.logger import EasyHTTPLogger
-from EasyHTTPServerAJM import CustomHandlers, Helpers
-from EasyHTTPServerAJM.easy_http_server import EasyHTTPServer, EasyHTTPServerUpload
+from typing import TYPE_CHECKING
+
+from EasyHTTPServerAJM._lazy import lazy_attributes
+
+# imported on first use, so that importing the package (e.g. for one of its helpers) stays cheap
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'EasyHTTPLogger': 'EasyHTTPServerAJM.logger',
+    'CustomHandlers': 'EasyHTTPServerAJM.CustomHandlers',
+    'Helpers': 'EasyHTTPServerAJM.Helpers',
+    'ServerEngines': 'EasyHTTPServerAJM.ServerEngines',
+    'EasyHTTPServer': 'EasyHTTPServerAJM.easy_http_server',
+    'EasyHTTPServerUpload': 'EasyHTTPServerAJM.easy_http_server',
+})
+
+if TYPE_CHECKING:
+    from EasyHTTPServerAJM.logger import EasyHTTPLogger
+    from EasyHTTPServerAJM import CustomHandlers, Helpers, ServerEngines
+    from EasyHTTPServerAJM.easy_http_server import EasyHTTPServer, EasyHTTPServerUpload
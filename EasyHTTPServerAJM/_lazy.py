@@ -0,0 +1,32 @@
+import sys
+from importlib import import_module
+from typing import Callable, Dict, List, Tuple
+
+
+def lazy_attributes(package: str, attributes: Dict[str, str]) -> Tuple[Callable, Callable]:
+    """
+    Return the module ``__getattr__`` and ``__dir__`` (PEP 562) of ``package``, which import
+    each name of ``attributes`` from the module it maps to the first time it is looked up.
+    A name mapping to the module ``package.name`` is that submodule itself. Once imported, a
+    name is stored in the package so later lookups don't come back here.
+
+    Usage, in a package ``__init__``::
+
+        __getattr__, __dir__ = lazy_attributes(__name__, {'Thing': 'package.things'})
+    """
+    package_globals = sys.modules[package].__dict__
+
+    def __getattr__(name: str):
+        try:
+            module_name = attributes[name]
+        except KeyError:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}") from None
+        module = import_module(module_name)
+        value = module if module_name == f"{package}.{name}" else getattr(module, name)
+        package_globals[name] = value
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(package_globals) | set(attributes))
+
+    return __getattr__, __dir__
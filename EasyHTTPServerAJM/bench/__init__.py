@@ -0,0 +1,4 @@
+from EasyHTTPServerAJM.bench.trees import SyntheticTree, SyntheticTreeBuilder
+from EasyHTTPServerAJM.bench.client import LoadClient, Request, Workloads, WorkloadResult
+from EasyHTTPServerAJM.bench.runner import BenchmarkRunner
+from EasyHTTPServerAJM.bench.startup import StartupBenchmark
@@ -0,0 +1,100 @@
+"""
+Load-test EasyHTTPServer end to end.
+
+Generates a synthetic directory tree, serves it on a local port and drives the listing,
+download and upload workloads from concurrent keep-alive clients. Prints a JSON report with
+req/s, p50/p99 latency and bytes/s per workload. With --baseline, exits with status 1 if any
+workload regressed by more than --max-regression against a stored report.
+
+With --startup, measures the cold start instead: import time and time to first response of
+fresh processes (see StartupBenchmark).
+
+usage: python -m EasyHTTPServerAJM.bench [--tree {wide,deep,huge}] [--workloads listing,download]
+                                         [--concurrency N] [--duration S] [--baseline FILE]
+       python -m EasyHTTPServerAJM.bench --startup [--runs N] [--baseline FILE]
+"""
+import argparse
+import json
+import sys
+from tempfile import TemporaryDirectory
+
+from EasyHTTPServerAJM.bench.client import Workloads
+from EasyHTTPServerAJM.bench.runner import BenchmarkRunner
+from EasyHTTPServerAJM.bench.startup import StartupBenchmark
+from EasyHTTPServerAJM.bench.trees import SyntheticTreeBuilder
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='python -m EasyHTTPServerAJM.bench',
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tree', choices=SyntheticTreeBuilder.SHAPES, default='wide',
+                        help='Shape of the generated tree (default: wide)')
+    parser.add_argument('--files', type=int, default=None,
+                        help='Files in the tree (default: '
+                             + ', '.join(f"{k} {v}" for k, v in SyntheticTreeBuilder.DEFAULT_FILES.items()) + ')')
+    parser.add_argument('--width', type=int, default=None,
+                        help=f'Directories of the wide tree (default: {SyntheticTreeBuilder.DEFAULT_WIDTH})')
+    parser.add_argument('--depth', type=int, default=None,
+                        help=f'Levels of the deep tree (default: {SyntheticTreeBuilder.DEFAULT_DEPTH})')
+    parser.add_argument('--payload-kb', type=int, default=SyntheticTreeBuilder.DEFAULT_PAYLOAD_BYTES // 1024,
+                        help='Size of the downloaded file in KB (default: %(default)s)')
+    parser.add_argument('--upload-kb', type=int, default=64, help='Size of each uploaded file in KB (default: 64)')
+    parser.add_argument('--workloads', default=','.join(Workloads.NAMES),
+                        help='Comma separated workloads to run (default: %(default)s)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients (default: 8)')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per workload (default: 5)')
+    parser.add_argument('--requests', type=int, default=None,
+                        help='Stop each workload after this many requests instead of after --duration')
+    parser.add_argument('--engine', default=None, help='Server engine (default: the server default)')
+    parser.add_argument('--workers', type=int, default=None, help='Server worker processes (default: 1)')
+    parser.add_argument('--listing-cache-mb', type=float, default=0,
+                        help='Listing cache budget of the server in MB (default: 0 = disabled)')
+    parser.add_argument('--startup', action='store_true',
+                        help='Measure import time and time to first response instead of the workloads')
+    parser.add_argument('--runs', type=int, default=StartupBenchmark.DEFAULT_RUNS,
+                        help='Processes each --startup figure is the median of (default: %(default)s)')
+    parser.add_argument('--output', default=None, help='Also write the report to this file')
+    parser.add_argument('--baseline', default=None, help='Report to compare against')
+    parser.add_argument('--max-regression', type=float, default=None,
+                        help='Allowed drop in req/s or growth in latency as a fraction '
+                             f'(default: {BenchmarkRunner.DEFAULT_MAX_REGRESSION}, '
+                             f'{StartupBenchmark.DEFAULT_MAX_REGRESSION} with --startup)')
+    return parser.parse_args(argv)
+
+
+def _run_workloads(args: argparse.Namespace) -> dict:
+    builder = SyntheticTreeBuilder(args.tree, args.files, width=args.width, depth=args.depth,
+                                   payload_bytes=args.payload_kb * 1024)
+    with TemporaryDirectory(prefix='easyhttp-bench-') as root:
+        tree = builder.build(root)
+        runner = BenchmarkRunner(tree, concurrency=args.concurrency,
+                                 duration=None if args.requests else args.duration,
+                                 total_requests=args.requests, upload_bytes=args.upload_kb * 1024,
+                                 engine=args.engine, workers=args.workers,
+                                 listing_cache_bytes=int(args.listing_cache_mb * 1024 * 1024))
+        return runner.run([name.strip() for name in args.workloads.split(',') if name.strip()])
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    benchmark = StartupBenchmark if args.startup else BenchmarkRunner
+    report = StartupBenchmark(args.runs).run() if args.startup else _run_workloads(args)
+
+    status = 0
+    if args.baseline:
+        max_regression = args.max_regression
+        if max_regression is None:
+            max_regression = benchmark.DEFAULT_MAX_REGRESSION
+        regressions = benchmark.compare(report, BenchmarkRunner.load_report(args.baseline), max_regression)
+        report['regressions'] = regressions
+        status = 1 if regressions else 0
+    if args.output:
+        BenchmarkRunner.save_report(report, args.output)
+    print(json.dumps(report, indent=2))
+    for regression in report.get('regressions', []):
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
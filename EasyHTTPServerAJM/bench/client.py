@@ -0,0 +1,168 @@
+import http.client
+import math
+from itertools import cycle
+from os import urandom
+from threading import Lock, Thread
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+
+class Request(NamedTuple):
+    method: str
+    path: str
+    body: Optional[bytes] = None
+    headers: Optional[Dict[str, str]] = None
+
+
+class WorkloadResult(NamedTuple):
+    """What one workload measured; ``to_dict`` is the form written to the JSON report."""
+    name: str
+    concurrency: int
+    requests: int
+    errors: int
+    duration: float
+    latencies: List[float]
+    bytes_in: int
+    bytes_out: int
+
+    @staticmethod
+    def percentile(sorted_values: List[float], fraction: float) -> float:
+        """Nearest-rank percentile of an already sorted list; 0.0 for an empty one."""
+        if not sorted_values:
+            return 0.0
+        rank = max(1, math.ceil(fraction * len(sorted_values)))
+        return sorted_values[min(rank, len(sorted_values)) - 1]
+
+    def to_dict(self) -> dict:
+        latencies = sorted(self.latencies)
+        duration = self.duration or float('inf')
+        return {'concurrency': self.concurrency,
+                'requests': self.requests,
+                'errors': self.errors,
+                'duration_s': round(self.duration, 3),
+                'req_per_s': round(self.requests / duration, 2),
+                'latency_ms': {'p50': round(self.percentile(latencies, 0.50) * 1000, 3),
+                               'p99': round(self.percentile(latencies, 0.99) * 1000, 3),
+                               'max': round((latencies[-1] if latencies else 0.0) * 1000, 3)},
+                'bytes_in_per_s': round(self.bytes_in / duration),
+                'bytes_out_per_s': round(self.bytes_out / duration)}
+
+
+class LoadClient:
+    """
+    Drives a running server with ``concurrency`` threads, each on its own persistent connection.
+
+    Each thread sends requests produced by ``make_requests`` until ``duration`` seconds have
+    passed or ``total_requests`` requests have been sent, whichever comes first. Every request
+    is timed from sending it to reading the last byte of the response. Responses with a status of
+    400 or above and failed connections count as errors. A connection that the server closed is
+    reopened before the next request.
+    """
+    READ_SIZE = 1024 * 1024
+    DEFAULT_TIMEOUT = 60.0
+
+    def __init__(self, host: str, port: int, concurrency: int = 8, timeout: float = DEFAULT_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+    def _connect(self) -> http.client.HTTPConnection:
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _send(self, conn: http.client.HTTPConnection, request: Request) -> Tuple[int, int]:
+        """Send ``request`` and read the whole response; returns (status, body bytes received)."""
+        conn.request(request.method, request.path, body=request.body, headers=request.headers or {})
+        resp = conn.getresponse()
+        received = 0
+        while True:
+            chunk = resp.read(self.__class__.READ_SIZE)
+            if not chunk:
+                break
+            received += len(chunk)
+        return resp.status, received
+
+    def run(self, name: str, make_requests: Callable[[int], Iterator[Request]], duration: Optional[float] = None,
+            total_requests: Optional[int] = None) -> WorkloadResult:
+        if duration is None and total_requests is None:
+            raise ValueError("Pass a duration, a number of requests or both")
+        lock = Lock()
+        state = {'budget': total_requests, 'requests': 0, 'errors': 0, 'bytes_in': 0, 'bytes_out': 0}
+        latencies: List[float] = []
+        deadline = perf_counter() + duration if duration is not None else None
+
+        def take_request_slot() -> bool:
+            if deadline is not None and perf_counter() >= deadline:
+                return False
+            with lock:
+                if state['budget'] is None:
+                    return True
+                if state['budget'] <= 0:
+                    return False
+                state['budget'] -= 1
+                return True
+
+        def worker(index: int) -> None:
+            conn = self._connect()
+            requests = make_requests(index)
+            try:
+                while take_request_slot():
+                    request = next(requests)
+                    start = perf_counter()
+                    try:
+                        status, received = self._send(conn, request)
+                        failed = status >= 400
+                    except (OSError, http.client.HTTPException):
+                        conn.close()
+                        conn = self._connect()
+                        status, received, failed = 0, 0, True
+                    elapsed = perf_counter() - start
+                    with lock:
+                        state['requests'] += 1
+                        state['errors'] += failed
+                        state['bytes_in'] += received
+                        state['bytes_out'] += len(request.body or b'')
+                        latencies.append(elapsed)
+            finally:
+                conn.close()
+
+        threads = [Thread(target=worker, args=(index,), name=f"bench-client-{index}", daemon=True)
+                   for index in range(self.concurrency)]
+        start = perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return WorkloadResult(name, self.concurrency, state['requests'], state['errors'], perf_counter() - start,
+                              latencies, state['bytes_in'], state['bytes_out'])
+
+
+class Workloads:
+    """Request generators for the ``listing``, ``download`` and ``upload`` workloads."""
+    NAMES = ('listing', 'download', 'upload')
+    BOUNDARY = 'EasyHTTPServerBenchBoundary'
+
+    def __init__(self, listing_paths: List[str], download_path: str, upload_path: str, upload_bytes: int = 64 * 1024):
+        self.listing_paths = listing_paths
+        self.download_path = download_path
+        self.upload_path = upload_path
+        self.upload_bytes = upload_bytes
+
+    def listing(self, index: int) -> Iterator[Request]:
+        # every client starts at a different directory so they do not move in lockstep
+        paths = self.listing_paths[index % len(self.listing_paths):] + self.listing_paths[:index % len(self.listing_paths)]
+        return (Request('GET', path) for path in cycle(paths))
+
+    def download(self, index: int) -> Iterator[Request]:
+        return cycle([Request('GET', self.download_path)])
+
+    def _build_upload_body(self, filename: str) -> bytes:
+        return (f"--{self.BOUNDARY}\r\n"
+                f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+                f"Content-Type: application/octet-stream\r\n\r\n").encode('latin-1') + \
+            urandom(self.upload_bytes) + f"\r\n--{self.BOUNDARY}--\r\n".encode('latin-1')
+
+    def upload(self, index: int) -> Iterator[Request]:
+        body = self._build_upload_body(f"client_{index}.bin")
+        headers = {'Content-Type': f"multipart/form-data; boundary={self.BOUNDARY}", 'Accept': 'application/json'}
+        return cycle([Request('POST', self.upload_path, body, headers)])
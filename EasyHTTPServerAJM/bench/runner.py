@@ -0,0 +1,151 @@
+import json
+import multiprocessing
+import os
+import socket
+import sys
+from pathlib import Path
+from platform import python_version
+from time import monotonic, sleep
+from typing import Dict, List, Optional, Union
+
+from EasyHTTPServerAJM._version import __version__
+from EasyHTTPServerAJM.bench.client import LoadClient, Workloads, WorkloadResult
+from EasyHTTPServerAJM.bench.trees import SyntheticTree
+
+
+def _serve(directory: str, port: int, server_kwargs: dict) -> None:
+    """Body of the server process: run an EasyHTTPServerUpload on ``port`` until terminated."""
+    # imported here so that a spawned child does not pay for it twice
+    from EasyHTTPServerAJM.CustomHandlers import UploadPrettyDirectoryHandler
+    from EasyHTTPServerAJM.easy_http_server import EasyHTTPServerUpload
+    from EasyHTTPServerAJM.logger import EasyHTTPCustomLogger
+
+    class QuietUploadHandler(UploadPrettyDirectoryHandler):
+        # the access log would be written to stderr for every request
+        def log_message(self, format, *args):
+            pass
+
+    # the report goes to stdout, keep the server's console messages out of it
+    sys.stdout = open(os.devnull, 'w')
+    logger = EasyHTTPCustomLogger('EasyHTTPServerAJM.bench.server')
+    logger.setLevel('WARNING')
+    server = EasyHTTPServerUpload(directory, host='127.0.0.1', port=port, logger=logger,
+                                  handler_class=QuietUploadHandler, **server_kwargs)
+    server.start(print_msg=False)
+
+
+class BenchmarkRunner:
+    """
+    Serves a ``SyntheticTree`` with ``EasyHTTPServerUpload`` in a child process and runs the
+    workloads against it with ``LoadClient``. The server runs in its own process so that the
+    client threads do not compete with it for the GIL. ``server_kwargs`` are passed to the
+    server (e.g. ``engine``, ``workers``, ``listing_cache_bytes``).
+
+    ``compare`` checks a report against a stored baseline report: a workload regresses when its
+    req/s drops, or its p99 latency grows, by more than ``max_regression`` (a fraction).
+    """
+    STARTUP_TIMEOUT = 30.0
+    STOP_TIMEOUT = 15.0
+    DEFAULT_MAX_REGRESSION = 0.10
+
+    def __init__(self, tree: SyntheticTree, concurrency: int = 8, duration: Optional[float] = 5.0,
+                 total_requests: Optional[int] = None, upload_bytes: int = 64 * 1024, **server_kwargs):
+        self.tree = tree
+        self.concurrency = concurrency
+        self.duration = duration
+        self.total_requests = total_requests
+        self.upload_bytes = upload_bytes
+        self.server_kwargs = server_kwargs
+        self.port: Optional[int] = None
+        self._process = None
+
+    @staticmethod
+    def _get_free_port() -> int:
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            return sock.getsockname()[1]
+
+    def _wait_until_listening(self) -> None:
+        deadline = monotonic() + self.__class__.STARTUP_TIMEOUT
+        while monotonic() < deadline:
+            if not self._process.is_alive():
+                raise RuntimeError(f"Benchmark server exited with {self._process.exitcode} during startup")
+            try:
+                socket.create_connection(('127.0.0.1', self.port), timeout=1).close()
+                return
+            except OSError:
+                sleep(0.05)
+        raise RuntimeError(f"Benchmark server did not listen on port {self.port} "
+                           f"within {self.__class__.STARTUP_TIMEOUT:g}s")
+
+    def start_server(self) -> None:
+        ctx = multiprocessing.get_context('fork') if hasattr(os, 'fork') else multiprocessing.get_context()
+        self.port = self._get_free_port()
+        self._process = ctx.Process(target=_serve, args=(str(self.tree.root), self.port, self.server_kwargs),
+                                    name='EasyHTTPServer-bench', daemon=False)
+        self._process.start()
+        self._wait_until_listening()
+
+    def stop_server(self) -> None:
+        if self._process is None:
+            return
+        self._process.terminate()
+        self._process.join(self.__class__.STOP_TIMEOUT)
+        if self._process.is_alive():
+            self._process.kill()
+            self._process.join()
+        self._process = None
+
+    def __enter__(self):
+        self.start_server()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop_server()
+
+    def run_workload(self, name: str) -> WorkloadResult:
+        workloads = Workloads(self.tree.listing_paths, self.tree.download_path, self.tree.upload_path,
+                              self.upload_bytes)
+        client = LoadClient('127.0.0.1', self.port, self.concurrency)
+        return client.run(name, getattr(workloads, name), self.duration, self.total_requests)
+
+    def run(self, workload_names: List[str]) -> dict:
+        """Run every workload in ``workload_names`` against one server and return the report."""
+        unknown = [name for name in workload_names if name not in Workloads.NAMES]
+        if unknown:
+            raise ValueError(f"Unknown workload(s) {', '.join(unknown)}, expected {', '.join(Workloads.NAMES)}")
+        with self:
+            results = {name: self.run_workload(name).to_dict() for name in workload_names}
+        return {'version': str(__version__),
+                'python': python_version(),
+                'server': {k: v for k, v in self.server_kwargs.items() if v is not None},
+                'tree': {'shape': self.tree.shape, 'files': self.tree.files,
+                         'directories': self.tree.directories,
+                         'build_s': round(self.tree.build_seconds, 3)},
+                'workloads': results}
+
+    @classmethod
+    def compare(cls, report: dict, baseline: dict, max_regression: float = DEFAULT_MAX_REGRESSION) -> List[str]:
+        """Describe every workload of ``report`` that regressed against ``baseline``; empty if none did."""
+        regressions = []
+        for name, result in report['workloads'].items():
+            base = baseline.get('workloads', {}).get(name)
+            if base is None:
+                continue
+            if result['req_per_s'] < base['req_per_s'] * (1 - max_regression):
+                regressions.append(f"{name}: {result['req_per_s']} req/s, baseline {base['req_per_s']} req/s")
+            if result['latency_ms']['p99'] > base['latency_ms']['p99'] * (1 + max_regression):
+                regressions.append(f"{name}: p99 {result['latency_ms']['p99']} ms, "
+                                   f"baseline {base['latency_ms']['p99']} ms")
+        return regressions
+
+    @staticmethod
+    def load_report(path: Union[str, Path]) -> dict:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    @staticmethod
+    def save_report(report: Dict, path: Union[str, Path]) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
@@ -0,0 +1,141 @@
+import http.client
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from platform import python_version
+from tempfile import TemporaryDirectory
+from time import monotonic, sleep
+from typing import List, Optional, Sequence, Union
+
+from EasyHTTPServerAJM._version import __version__
+from EasyHTTPServerAJM.bench.runner import BenchmarkRunner
+
+# run in a fresh interpreter: times one import and lists the modules it loaded
+_IMPORT_SCRIPT = """\
+import json, sys, time
+started = time.perf_counter()
+import {module}
+print(json.dumps({{'seconds': time.perf_counter() - started, 'modules': sorted(sys.modules)}}))
+"""
+
+# run in a fresh interpreter: serves the directory argv[1] on port argv[2] until terminated
+_SERVE_SCRIPT = """\
+import os, sys
+from EasyHTTPServerAJM.easy_http_server import EasyHTTPServer
+from EasyHTTPServerAJM.logger import EasyHTTPCustomLogger
+sys.stdout = open(os.devnull, 'w')
+logger = EasyHTTPCustomLogger('EasyHTTPServerAJM.bench.startup')
+logger.setLevel('WARNING')
+EasyHTTPServer(sys.argv[1], host='127.0.0.1', port=int(sys.argv[2]), logger=logger).start(print_msg=False)
+"""
+
+
+class StartupBenchmark:
+    """
+    Measures the cold start of the package in fresh interpreters: the import time of each of
+    ``modules``, and the time to first response, from spawning a process that serves a small
+    directory with ``EasyHTTPServer`` to having read its first listing. Every figure is the median
+    of ``runs`` processes and includes the start of the interpreter.
+
+    The report also lists the ``LAZY_MODULES`` that the imports loaded anyway: optional or heavy
+    dependencies that a plain listing server must not pay for. ``compare`` checks a report against
+    a stored baseline like ``BenchmarkRunner.compare`` does; startup figures are noisier than
+    throughput, hence the larger ``DEFAULT_MAX_REGRESSION``.
+    """
+    SERVER_MODULE = 'EasyHTTPServerAJM.easy_http_server'
+    DEFAULT_MODULES = ('EasyHTTPServerAJM', SERVER_MODULE)
+    LAZY_MODULES = ('PyEmailerAJM', 'asyncio', 'EasyHTTPServerAJM.ServerEngines.asyncio_engine')
+    DEFAULT_RUNS = 5
+    DEFAULT_MAX_REGRESSION = 0.25
+    STARTUP_TIMEOUT = 30.0
+    STOP_TIMEOUT = 15.0
+    POLL_INTERVAL = 0.005
+
+    def __init__(self, runs: int = DEFAULT_RUNS, modules: Optional[Sequence[str]] = None):
+        self.runs = runs
+        self.modules = tuple(modules or self.__class__.DEFAULT_MODULES)
+
+    def measure_import(self, module: str) -> dict:
+        """Import ``module`` in a fresh interpreter; returns the import time in seconds and the loaded modules."""
+        completed = subprocess.run([sys.executable, '-c', _IMPORT_SCRIPT.format(module=module)],
+                                   capture_output=True, text=True, timeout=self.__class__.STARTUP_TIMEOUT)
+        if completed.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{completed.stderr}")
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+    def _get_first_response(self, port: int) -> Optional[int]:
+        """Status of ``GET /`` on ``port``, None while nothing listens there yet."""
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=self.__class__.STARTUP_TIMEOUT)
+        try:
+            conn.request('GET', '/')
+            response = conn.getresponse()
+            response.read()
+            return response.status
+        except OSError:
+            return None
+        finally:
+            conn.close()
+
+    def measure_first_response(self, directory: Union[str, Path]) -> float:
+        """Seconds from spawning a server process for ``directory`` to having read its first listing."""
+        port = BenchmarkRunner._get_free_port()
+        started = monotonic()
+        process = subprocess.Popen([sys.executable, '-c', _SERVE_SCRIPT, str(directory), str(port)],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            while True:
+                status = self._get_first_response(port)
+                if status is not None:
+                    elapsed = monotonic() - started
+                    if status != 200:
+                        raise RuntimeError(f"Startup benchmark server answered {status}")
+                    return elapsed
+                if process.poll() is not None:
+                    raise RuntimeError(f"Startup benchmark server exited with {process.returncode} during startup")
+                if monotonic() - started > self.__class__.STARTUP_TIMEOUT:
+                    raise RuntimeError(f"Startup benchmark server did not answer on port {port} "
+                                       f"within {self.__class__.STARTUP_TIMEOUT:g}s")
+                sleep(self.__class__.POLL_INTERVAL)
+        finally:
+            process.terminate()
+            try:
+                process.wait(self.__class__.STOP_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+    @staticmethod
+    def _median_ms(seconds: List[float]) -> float:
+        return round(statistics.median(seconds) * 1000, 3)
+
+    def run(self) -> dict:
+        imports = {module: [self.measure_import(module) for _ in range(self.runs)] for module in self.modules}
+        with TemporaryDirectory(prefix='easyhttp-startup-') as root:
+            for i in range(10):
+                (Path(root) / f"file_{i}.txt").write_text("x" * i)
+            first_response = [self.measure_first_response(root) for _ in range(self.runs)]
+        loaded = {name for results in imports.values() for result in results for name in result['modules']}
+        return {'version': str(__version__),
+                'python': python_version(),
+                'runs': self.runs,
+                'import_ms': {module: self._median_ms([r['seconds'] for r in results])
+                              for module, results in imports.items()},
+                'first_response_ms': self._median_ms(first_response),
+                'lazy_modules_loaded': sorted(name for name in self.__class__.LAZY_MODULES if name in loaded)}
+
+    @classmethod
+    def compare(cls, report: dict, baseline: dict, max_regression: float = DEFAULT_MAX_REGRESSION) -> List[str]:
+        """Describe every figure of ``report`` that regressed against ``baseline``; empty if none did."""
+        regressions = []
+        figures = [(f"import {module}", ms, baseline.get('import_ms', {}).get(module))
+                   for module, ms in report['import_ms'].items()]
+        figures.append(('first response', report['first_response_ms'], baseline.get('first_response_ms')))
+        for name, ms, base in figures:
+            if base is not None and ms > base * (1 + max_regression):
+                regressions.append(f"{name}: {ms} ms, baseline {base} ms")
+        for module in report['lazy_modules_loaded']:
+            if module not in baseline.get('lazy_modules_loaded', []):
+                regressions.append(f"{module} is imported at startup")
+        return regressions
@@ -0,0 +1,99 @@
+import os
+from pathlib import Path
+from time import perf_counter
+from typing import List, NamedTuple, Union
+
+
+class SyntheticTree(NamedTuple):
+    """A generated directory tree and the URL paths the workloads request from it."""
+    root: Path
+    shape: str
+    files: int
+    directories: int
+    listing_paths: List[str]
+    download_path: str
+    upload_path: str
+    build_seconds: float
+
+
+class SyntheticTreeBuilder:
+    """
+    Generates the directory trees the load tests are run against.
+
+    - ``wide``: ``width`` directories next to each other, holding ``files`` files in total.
+    - ``deep``: ``depth`` nested directories with ``files_per_level`` files in each.
+    - ``huge``: one directory holding ``files`` files (100k by default), which is listed by streaming.
+
+    Every tree also gets a ``payload.bin`` of ``payload_bytes`` random bytes for the download
+    workload and an empty ``uploads/`` directory for the upload workload. The generated files
+    are empty, only their names and count matter for listings.
+    """
+    SHAPES = ('wide', 'deep', 'huge')
+    DEFAULT_FILES = {'wide': 10_000, 'deep': 1_000, 'huge': 100_000}
+    DEFAULT_WIDTH = 100
+    DEFAULT_DEPTH = 50
+    DEFAULT_PAYLOAD_BYTES = 1024 * 1024
+    PAYLOAD_NAME = 'payload.bin'
+    UPLOAD_DIR_NAME = 'uploads'
+
+    def __init__(self, shape: str = 'wide', files: int = None, **kwargs):
+        if shape not in self.__class__.SHAPES:
+            raise ValueError(f"Unknown tree shape {shape!r}, expected one of {', '.join(self.__class__.SHAPES)}")
+        self.shape = shape
+        self.files = files if files is not None else self.__class__.DEFAULT_FILES[shape]
+        self.width = kwargs.get('width', None) or self.__class__.DEFAULT_WIDTH
+        self.depth = kwargs.get('depth', None) or self.__class__.DEFAULT_DEPTH
+        self.payload_bytes = kwargs.get('payload_bytes', self.__class__.DEFAULT_PAYLOAD_BYTES)
+
+    @staticmethod
+    def _touch_files(directory: Path, count: int, prefix: str = 'file') -> None:
+        for index in range(count):
+            os.close(os.open(directory / f"{prefix}_{index:06d}.txt", os.O_CREAT | os.O_WRONLY, 0o644))
+
+    @staticmethod
+    def _spread(total: int, buckets: int) -> List[int]:
+        base, extra = divmod(total, buckets)
+        return [base + (1 if index < extra else 0) for index in range(buckets)]
+
+    def _build_wide(self, root: Path) -> List[str]:
+        listing_paths = ['/']
+        for index, count in enumerate(self._spread(self.files, self.width)):
+            directory = root / f"dir_{index:04d}"
+            directory.mkdir()
+            self._touch_files(directory, count)
+            listing_paths.append(f"/{directory.name}/")
+        return listing_paths
+
+    def _build_deep(self, root: Path) -> List[str]:
+        listing_paths = []
+        directory, url = root, '/'
+        for count in self._spread(self.files, self.depth):
+            directory, url = directory / 'level', url + 'level/'
+            directory.mkdir()
+            self._touch_files(directory, count)
+            listing_paths.append(url)
+        return listing_paths
+
+    def _build_huge(self, root: Path) -> List[str]:
+        directory = root / 'huge'
+        directory.mkdir()
+        self._touch_files(directory, self.files)
+        return ['/huge/']
+
+    def _write_payload(self, root: Path) -> None:
+        with open(root / self.__class__.PAYLOAD_NAME, 'wb') as f:
+            remaining = self.payload_bytes
+            block = os.urandom(min(remaining, 1024 * 1024))
+            while remaining > 0:
+                remaining -= f.write(block[:remaining])
+
+    def build(self, root: Union[str, Path]) -> SyntheticTree:
+        root = Path(root)
+        start = perf_counter()
+        listing_paths = getattr(self, f"_build_{self.shape}")(root)
+        self._write_payload(root)
+        (root / self.__class__.UPLOAD_DIR_NAME).mkdir()
+        directories = len(listing_paths) - (1 if self.shape == 'wide' else 0)
+        return SyntheticTree(root, self.shape, self.files, directories, listing_paths,
+                             f"/{self.__class__.PAYLOAD_NAME}", f"/{self.__class__.UPLOAD_DIR_NAME}/",
+                             perf_counter() - start)
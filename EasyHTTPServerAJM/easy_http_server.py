@@ -1,14 +1,28 @@
+import errno
+import socket
 from datetime import datetime, timedelta
-from typing import Union, Optional
+from functools import partial
+from importlib import import_module
+from typing import TYPE_CHECKING, Union, Optional
 
 from EasyHTTPServerAJM._version import __version__
-from EasyHTTPServerAJM.CustomHandlers import PrettyDirectoryHandler, UploadPrettyDirectoryHandler
+from EasyHTTPServerAJM.CustomHandlers import PrettyDirectoryHandler, UploadPrettyDirectoryHandler, MetricsHandler
+from EasyHTTPServerAJM.CustomHandlers.metrics import MetricsMixin
+from EasyHTTPServerAJM.Helpers import (ContentEncoder, FilesystemIndex, ListingCache, ServerMetrics, SlowRequestLogHook,
+                                      StatCache)
+from EasyHTTPServerAJM.Helpers.HtmlTemplateBuilder import SiteConfig, TemplateCache
+from EasyHTTPServerAJM.ServerEngines import BoundedThreadPoolHTTPServer, PreforkSupervisor
 import argparse
 from http.server import ThreadingHTTPServer
 from socketserver import TCPServer
-from os import chdir
+from os import chdir, cpu_count
+from threading import Thread
 from pathlib import Path
 from EasyHTTPServerAJM import EasyHTTPLogger
+from EasyHTTPServerAJM.logger import BoundedQueueHandler
+
+if TYPE_CHECKING:
+    from EasyHTTPServerAJM.ServerEngines import AsyncioHTTPServer
 
 
 class EasyHTTPServer:
@@ -20,7 +34,9 @@ class EasyHTTPServer:
     handlers, and file-serving options. The server is designed to be started using
     command-line arguments or programmatically.
 
-    :ivar logger: Logger instance to track server events and errors.
+    :ivar logger: Logger instance to track server events and errors. Unless one is passed in, it
+        is built by ``EasyHTTPLogger`` from the constructor kwargs, e.g. ``queue_logging=True`` to
+        write the logs on a background thread.
     :type logger: EasyHTTPLogger.logger
     :ivar html_template_path: Path to an optional HTML template for custom directory
         listing pages. Defaults to None if not provided.
@@ -39,6 +55,52 @@ class EasyHTTPServer:
     :ivar start_time: Timestamp indicating when the server started. None if the
         server has not started yet.
     :type start_time: datetime, optional
+    :ivar site_config: Template and asset paths, validated once here and handed to every
+        handler so that building a handler does not touch the filesystem.
+    :type site_config: SiteConfig, optional
+    :ivar listing_cache: Cache of rendered directory listings shared by all handlers. Only
+        created when ``listing_cache_bytes`` is passed and greater than 0.
+    :type listing_cache: ListingCache, optional
+    :ivar filesystem_index: In-memory index of ``directory`` that every handler lists directories
+        from, kept current with inotify or by rescanning it every ``index_rescan_interval`` seconds
+        (see ``FilesystemIndex``). Only created when ``filesystem_index`` is True (or a
+        ``FilesystemIndex``). It crawls in the background once the server starts, in every worker.
+    :type filesystem_index: FilesystemIndex, optional
+    :ivar content_encoder: Compresses responses for every handler and holds the shared cache
+        of compressed variants. None when compression is disabled with ``compression=False``.
+    :type content_encoder: ContentEncoder, optional
+    :ivar handler_options: Handler settings (see ``HANDLER_OPTION_KEYS``) taken from the
+        constructor kwargs and passed to every handler.
+    :type handler_options: dict
+    :ivar engine: Name of the server engine ``start`` runs, one of ``SERVER_ENGINES``.
+        ``'threading'`` starts a thread per connection. ``'pool'`` hands connections to a
+        fixed pool of threads and answers ``503`` when the pool and its queue are full.
+        ``'asyncio'`` serves every connection from one event loop and runs handlers on a
+        bounded thread pool.
+    :type engine: str
+    :ivar engine_options: Engine settings (see ``ENGINE_OPTION_KEYS``) taken from the
+        constructor kwargs. The threading engine ignores them.
+    :type engine_options: dict
+    :ivar workers: Number of worker processes ``start`` forks. Each one runs its own server
+        engine on the same port (see ``PreforkSupervisor``). 1 serves from this process.
+    :type workers: int
+    :ivar metrics: Request counters, latency histograms and cache hit ratios shared by all
+        handlers. Only created when ``metrics`` is True (or a ``ServerMetrics``) or a
+        ``metrics_port`` is passed.
+    :type metrics: ServerMetrics, optional
+    :ivar metrics_path: Path the metrics are served at, in the Prometheus text format.
+    :type metrics_path: str
+    :ivar metrics_port: Serve the metrics on this port instead of the main one. Worker process
+        ``i`` uses ``metrics_port + i`` and labels its samples with ``worker="i"``.
+    :type metrics_port: int, optional
+    :ivar timing_hooks: Hooks every handler passes the phase timings of each finished request to
+        (see ``RequestTimingMixin``): the ``timing_hooks`` passed in, plus a ``SlowRequestLogHook``
+        when ``slow_request_ms`` is passed. ``server_timing=True`` also sends the timings to the
+        client in a ``Server-Timing`` header.
+    :type timing_hooks: list
+    :ivar reuse_port: Give every worker its own listening socket with ``SO_REUSEPORT`` instead of
+        sharing one socket opened before forking. Ignored where ``SO_REUSEPORT`` is unavailable.
+    :type reuse_port: bool
     """
 
     DEFAULT_HANDLER_CLASS = PrettyDirectoryHandler
@@ -46,11 +108,25 @@ class EasyHTTPServer:
     DEFAULT_DIRECTORY = "."
     DEFAULT_HOST = "0.0.0.0"
     WIN_ERRS_TO_IGNORE = [10053, 10054]
+    # a client that resets or abandons its connection only ends that connection
+    CONNECTION_ERRNOS = (errno.EPIPE, errno.ECONNRESET, errno.ECONNABORTED)
+    # kwargs that are passed straight through to every handler instance
+    HANDLER_OPTION_KEYS = ('stream_threshold', 'stream_batch_size', 'use_sendfile', 'resumable_store',
+                           'upload_fsync_policy', 'keep_alive', 'keep_alive_timeout', 'max_keep_alive_requests',
+                           'server_timing')
+    # engines given as 'module:class' are imported when they are first used
+    SERVER_ENGINES = {'threading': ThreadingHTTPServer, 'pool': BoundedThreadPoolHTTPServer,
+                      'asyncio': 'EasyHTTPServerAJM.ServerEngines.asyncio_engine:AsyncioHTTPServer'}
+    DEFAULT_ENGINE = 'threading'
+    # kwargs that are passed to the server engine (all but the threading engine)
+    ENGINE_OPTION_KEYS = ('max_workers', 'max_pending', 'retry_after', 'keep_alive_timeout', 'idle_timeout',
+                          'listen_backlog')
 
     def __init__(self, directory: Optional[Union[Path, str]] = None,
                  host: Optional[str] = None, port: Optional[int] = None, **kwargs) -> None:
         self._runtime = None
-        self.logger = kwargs.pop("logger", EasyHTTPLogger(**kwargs)())
+        # only built when no logger is given: it sets up handlers and log files
+        self.logger = kwargs.pop("logger", None) or EasyHTTPLogger(**kwargs)()
         self.html_template_path = kwargs.get("html_template_path", None)
 
         self.directory = Path(directory) if directory is not None else Path(self.__class__.DEFAULT_DIRECTORY)
@@ -62,7 +138,24 @@ class EasyHTTPServer:
         if not self.directory.exists() or not self.directory.is_dir():
             raise ValueError(f"{self.directory} is not a valid directory")
 
-        self._httpd: Optional[TCPServer] = None
+        self.site_config: Optional[SiteConfig] = kwargs.get('site_config', None) or self._build_site_config()
+        self.listing_cache: Optional[ListingCache] = self._build_listing_cache(**kwargs)
+        self.filesystem_index: Optional[FilesystemIndex] = self._build_filesystem_index(**kwargs)
+        self.content_encoder: Optional[ContentEncoder] = self._build_content_encoder(**kwargs)
+        self.metrics_path = kwargs.get('metrics_path', None) or MetricsMixin.DEFAULT_METRICS_PATH
+        self.metrics_port = kwargs.get('metrics_port', None)
+        self.metrics: Optional[ServerMetrics] = self._build_metrics(**kwargs)
+        self.timing_hooks: list = self._build_timing_hooks(**kwargs)
+        self.handler_options = {k: kwargs[k] for k in self.__class__.HANDLER_OPTION_KEYS if k in kwargs}
+        self.engine = kwargs.get('engine', None) or self.__class__.DEFAULT_ENGINE
+        self._get_server_class(self.engine)
+        self.engine_options = {k: kwargs[k] for k in self.__class__.ENGINE_OPTION_KEYS if k in kwargs}
+        self.workers = self._get_workers(kwargs.get('workers', None))
+        self.reuse_port = kwargs.get('reuse_port', True)
+
+        self._httpd: Optional[Union[TCPServer, 'AsyncioHTTPServer']] = None
+        self._supervisor: Optional[PreforkSupervisor] = None
+        self._metrics_httpd: Optional[ThreadingHTTPServer] = None
         self.start_time: Optional[datetime] = None
         self.ignore_win_1005x_err = kwargs.get('ignore_win_1005x_err', True)
 
@@ -77,7 +170,19 @@ class EasyHTTPServer:
     def from_cli(cls) -> "EasyHTTPServer":
         """Create an EasyHTTPServer instance using command-line arguments."""
         args = cls._parse_args()
-        return cls(directory=args.directory, host=args.host, port=args.port)
+        return cls(directory=args.directory, host=args.host, port=args.port,
+                   listing_cache_bytes=int(args.listing_cache_mb * 1024 * 1024),
+                   filesystem_index=args.index or args.index_poll, index_use_inotify=not args.index_poll,
+                   index_rescan_interval=args.index_rescan,
+                   compression=not args.no_compression, compression_level=args.compression_level,
+                   engine=args.engine, max_workers=args.max_workers, max_pending=args.max_pending,
+                   listen_backlog=args.listen_backlog, workers=args.workers, keep_alive=not args.no_keep_alive,
+                   keep_alive_timeout=args.keep_alive_timeout, max_keep_alive_requests=args.max_keep_alive_requests,
+                   metrics=args.metrics, metrics_path=args.metrics_path, metrics_port=args.metrics_port,
+                   server_timing=args.server_timing, slow_request_ms=args.log_slow_requests,
+                   queue_logging=args.queue_logging, log_queue_size=args.log_queue_size,
+                   log_drop_policy=args.log_drop_policy,
+                   file_logger_levels=['INFO', 'ERROR'] if args.no_debug_log else None)
 
     @classmethod
     def get_welcome_string(cls) -> str:
@@ -134,9 +239,293 @@ class EasyHTTPServer:
             default=8000,
             help="Port to listen on (default: 8000)",
         )
+        parser.add_argument(
+            "--listing-cache-mb",
+            type=float,
+            default=0,
+            help="Memory budget in MB for caching rendered directory listings (default: 0 = disabled)",
+        )
+        parser.add_argument(
+            "--index",
+            action="store_true",
+            help="Keep an in-memory index of the directory tree and serve listings from it",
+        )
+        parser.add_argument(
+            "--index-poll",
+            action="store_true",
+            help="Keep the index current by rescanning instead of with inotify, e.g. on NFS (implies --index)",
+        )
+        parser.add_argument(
+            "--index-rescan",
+            type=float,
+            default=FilesystemIndex.DEFAULT_RESCAN_INTERVAL,
+            metavar="SECONDS",
+            help="Seconds between rescans of the index where inotify is not used (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--compression-level",
+            type=int,
+            default=ContentEncoder.DEFAULT_LEVEL,
+            help=f"gzip/zstd compression level (default: {ContentEncoder.DEFAULT_LEVEL})",
+        )
+        parser.add_argument(
+            "--no-compression",
+            action="store_true",
+            help="Never compress responses, even if the client accepts gzip or zstd",
+        )
+        parser.add_argument(
+            "--engine",
+            choices=sorted(EasyHTTPServer.SERVER_ENGINES),
+            default=EasyHTTPServer.DEFAULT_ENGINE,
+            help=f"Server engine to run (default: {EasyHTTPServer.DEFAULT_ENGINE})",
+        )
+        parser.add_argument(
+            "--max-workers",
+            type=int,
+            default=None,
+            help="Worker threads of the pool and asyncio engines (default: engine specific)",
+        )
+        parser.add_argument(
+            "--max-pending",
+            type=int,
+            default=None,
+            help="Connections the pool engine queues before answering 503 (default: "
+                 f"{BoundedThreadPoolHTTPServer.DEFAULT_MAX_PENDING})",
+        )
+        parser.add_argument(
+            "--listen-backlog",
+            type=int,
+            default=None,
+            help="Listen backlog of the pool and asyncio engines (default: engine specific)",
+        )
+        parser.add_argument(
+            "--keep-alive-timeout",
+            type=float,
+            default=PrettyDirectoryHandler.DEFAULT_KEEP_ALIVE_TIMEOUT,
+            help="Seconds an idle connection is kept open for the next request "
+                 f"(default: {PrettyDirectoryHandler.DEFAULT_KEEP_ALIVE_TIMEOUT:g})",
+        )
+        parser.add_argument(
+            "--max-keep-alive-requests",
+            type=int,
+            default=PrettyDirectoryHandler.DEFAULT_MAX_KEEP_ALIVE_REQUESTS,
+            help="Requests served on one connection before it is closed "
+                 f"(default: {PrettyDirectoryHandler.DEFAULT_MAX_KEEP_ALIVE_REQUESTS})",
+        )
+        parser.add_argument(
+            "--no-keep-alive",
+            action="store_true",
+            help="Close every connection after one request (HTTP/1.0)",
+        )
+        parser.add_argument(
+            "--metrics",
+            action="store_true",
+            help="Count requests and serve the counters in the Prometheus text format",
+        )
+        parser.add_argument(
+            "--metrics-path",
+            default=MetricsMixin.DEFAULT_METRICS_PATH,
+            help=f"Path the metrics are served at (default: {MetricsMixin.DEFAULT_METRICS_PATH})",
+        )
+        parser.add_argument(
+            "--metrics-port",
+            type=int,
+            default=None,
+            help="Serve the metrics on this port instead of the main one (implies --metrics)",
+        )
+        parser.add_argument(
+            "--server-timing",
+            action="store_true",
+            help="Send the time spent in each phase of a request in a Server-Timing header",
+        )
+        parser.add_argument(
+            "--log-slow-requests",
+            type=float,
+            default=None,
+            metavar="MS",
+            help="Log a warning with the phase timings of every request taking longer than MS milliseconds",
+        )
+        parser.add_argument(
+            "--queue-logging",
+            action="store_true",
+            help="Write log files and console output on a background thread instead of the request threads",
+        )
+        parser.add_argument(
+            "--log-queue-size",
+            type=int,
+            default=EasyHTTPLogger.DEFAULT_LOG_QUEUE_SIZE,
+            help="Log records --queue-logging holds before --log-drop-policy applies (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--log-drop-policy",
+            choices=BoundedQueueHandler.DROP_POLICIES,
+            default=EasyHTTPLogger.DEFAULT_LOG_DROP_POLICY,
+            help="What --queue-logging does with a record when the queue is full (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--no-debug-log",
+            action="store_true",
+            help="Do not write the DEBUG log file; debug messages are then skipped at no cost",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Worker processes sharing the port, 0 = one per CPU (default: 1 = no extra processes)",
+        )
         return parser.parse_args()
 
-    def _handle_win_err(self, err: WindowsError):
+    def _build_site_config(self) -> Optional[SiteConfig]:
+        build_site_config = getattr(self.handler_class, 'build_site_config', None)
+        if build_site_config is None:
+            self.logger.debug(f"{self.handler_class.__name__} does not support a site config")
+            return None
+        site_config = build_site_config(self.html_template_path, logger=self.logger)
+        self.logger.debug(f"Site config built: {site_config}")
+        return site_config
+
+    def _build_listing_cache(self, **kwargs) -> Optional[ListingCache]:
+        if kwargs.get('listing_cache', None) is not None:
+            return kwargs['listing_cache']
+        listing_cache_bytes = kwargs.get('listing_cache_bytes', 0)
+        if not listing_cache_bytes:
+            return None
+        self.logger.debug(f"Listing cache enabled with a budget of {listing_cache_bytes} bytes")
+        return ListingCache(max_bytes=listing_cache_bytes,
+                            max_age=kwargs.get('listing_cache_max_age', ListingCache.DEFAULT_MAX_AGE),
+                            logger=self.logger)
+
+    def _build_filesystem_index(self, **kwargs) -> Optional[FilesystemIndex]:
+        filesystem_index = kwargs.get('filesystem_index', None)
+        if isinstance(filesystem_index, FilesystemIndex) or not filesystem_index:
+            return filesystem_index or None
+        filesystem_index = FilesystemIndex(self.directory, use_inotify=kwargs.get('index_use_inotify', True),
+                                           rescan_interval=kwargs.get('index_rescan_interval', None),
+                                           max_entries=kwargs.get('index_max_entries', None), logger=self.logger)
+        self.logger.debug(f"Filesystem index enabled for {filesystem_index.root}")
+        return filesystem_index
+
+    def _build_content_encoder(self, **kwargs) -> Optional[ContentEncoder]:
+        if not kwargs.get('compression', True):
+            self.logger.debug("Response compression disabled")
+            return None
+        if kwargs.get('content_encoder', None) is not None:
+            return kwargs['content_encoder']
+        content_encoder = ContentEncoder(level=kwargs.get('compression_level', None),
+                                         min_size=kwargs.get('compression_min_size', None),
+                                         cache_bytes=kwargs.get('compression_cache_bytes', None),
+                                         logger=self.logger)
+        self.logger.debug(f"Response compression enabled: {', '.join(content_encoder.encodings)} "
+                          f"at level {content_encoder.level}")
+        return content_encoder
+
+    def _build_metrics(self, **kwargs) -> Optional[ServerMetrics]:
+        metrics = kwargs.get('metrics', None)
+        if not isinstance(metrics, ServerMetrics):
+            if not metrics and self.metrics_port is None:
+                return None
+            metrics = ServerMetrics()
+        metrics.add_cache('listing', self.listing_cache)
+        metrics.add_cache('index', self.filesystem_index)
+        if self.content_encoder is not None:
+            metrics.add_cache('compression', self.content_encoder.variant_cache)
+        metrics.add_cache('template', TemplateCache.shared())
+        metrics.add_cache('stat', StatCache.shared())
+        where = f"port {self.metrics_port}" if self.metrics_port is not None else "the main port"
+        self.logger.debug(f"Metrics enabled at {self.metrics_path} on {where}")
+        return metrics
+
+    def _build_timing_hooks(self, **kwargs) -> list:
+        timing_hooks = list(kwargs.get('timing_hooks', None) or [])
+        slow_request_ms = kwargs.get('slow_request_ms', None)
+        if slow_request_ms is not None:
+            timing_hooks.append(SlowRequestLogHook(slow_request_ms, logger=self.logger))
+            self.logger.debug(f"Logging requests slower than {slow_request_ms:g}ms")
+        return timing_hooks
+
+    def _start_metrics(self, httpd, worker_index: Optional[int] = None) -> None:
+        if self.metrics is None:
+            return
+        self.metrics.bind_server(httpd)
+        if worker_index is not None:
+            self.metrics.const_labels['worker'] = str(worker_index)
+        if self.metrics_port is None:
+            return
+        port = self.metrics_port + (worker_index or 0)
+        self._metrics_httpd = ThreadingHTTPServer((self.host, port), partial(MetricsHandler, metrics=self.metrics,
+                                                                             metrics_path=self.metrics_path))
+        Thread(target=self._metrics_httpd.serve_forever, name="EasyHTTPServer-metrics", daemon=True).start()
+        # noinspection HttpUrlsUsage
+        self.logger.info(f"Serving metrics at http://{self.host}:{port}{self.metrics_path}")
+
+    def _stop_metrics(self) -> None:
+        if self._metrics_httpd is not None:
+            self._metrics_httpd.shutdown()
+            self._metrics_httpd.server_close()
+            self._metrics_httpd = None
+
+    def _get_workers(self, workers: Optional[int]) -> int:
+        if workers is None:
+            return 1
+        workers = int(workers)
+        if workers < 0:
+            raise ValueError(f"workers must be 0 (one per CPU) or more, got {workers}")
+        if workers == 0:
+            workers = cpu_count() or 1
+        if workers > 1 and not PreforkSupervisor.is_supported():
+            self.logger.warning(f"{workers} workers requested, but this platform cannot fork; "
+                                f"serving from a single process")
+            return 1
+        return workers
+
+    def _get_server_class(self, engine: str):
+        try:
+            server_class = self.__class__.SERVER_ENGINES[engine]
+        except KeyError:
+            raise ValueError(f"Unknown server engine {engine!r}, "
+                             f"expected one of {', '.join(self.__class__.SERVER_ENGINES)}") from None
+        if isinstance(server_class, str):
+            module_name, _, class_name = server_class.partition(':')
+            server_class = getattr(import_module(module_name), class_name)
+        return server_class
+
+    def _build_httpd(self, engine: str, bind_and_activate: bool = True) -> Union[TCPServer, 'AsyncioHTTPServer']:
+        server_class = self._get_server_class(engine)
+        self.logger.debug(f"Using the {engine} server engine")
+        if server_class is ThreadingHTTPServer:
+            # noinspection PyTypeChecker
+            return server_class((self.host, self.port), self._handler_factory, bind_and_activate)
+        return server_class((self.host, self.port), self._handler_factory, bind_and_activate,
+                            logger=self.logger, **self.engine_options)
+
+    def _build_worker_httpd(self, engine: str) -> Union[TCPServer, 'AsyncioHTTPServer']:
+        # runs in a forked worker; the supervisor binds it to the shared port
+        self._httpd = self._build_httpd(engine, bind_and_activate=False)
+        self._start_metrics(self._httpd, self._supervisor.worker_index)
+        # threads do not survive fork, so every worker crawls and watches on its own
+        self._start_filesystem_index()
+        return self._httpd
+
+    def _start_filesystem_index(self) -> None:
+        if self.filesystem_index is not None:
+            self.filesystem_index.start()
+
+    def _stop_filesystem_index(self) -> None:
+        if self.filesystem_index is not None:
+            self.filesystem_index.stop()
+
+    @classmethod
+    def _is_connection_error(cls, err: OSError) -> bool:
+        return isinstance(err, (ConnectionError, socket.timeout)) or err.errno in cls.CONNECTION_ERRNOS
+
+    def _handle_os_error(self, err: OSError, client_address=None):
+        if self._is_connection_error(err):
+            self.logger.debug("Connection from %s ended: %s", client_address, err)
+            return
+        self._handle_win_err(err)
+
+    # WindowsError only exists on Windows, where it is an alias of OSError
+    def _handle_win_err(self, err: OSError):
         if err.errno in self.__class__.WIN_ERRS_TO_IGNORE and self.ignore_win_1005x_err:  # existing connection was forcibly closed
             self.logger.error(err)
             self.logger.warning("this error was logged and ignored...")
@@ -151,8 +540,8 @@ class EasyHTTPServer:
         This method initializes and returns a handler object using
         the `handler_class` attribute. It passes the necessary arguments
         such as request, client address, server, and additional
-        parameters like directory, logger, and HTML template path
-        to the handler's constructor.
+        parameters like directory, logger, HTML template path and the
+        pre-validated site config to the handler's constructor.
 
         :param request: The incoming client request to be handled.
         :param client_address: The address of the client sending the request.
@@ -166,9 +555,19 @@ class EasyHTTPServer:
                                       server,
                                       directory=self.directory,
                                       logger=self.logger,
-                                      html_template_path=self.html_template_path)
-        except WindowsError as e:
-            self._handle_win_err(e)
+                                      html_template_path=self.html_template_path,
+                                      site_config=self.site_config,
+                                      listing_cache=self.listing_cache,
+                                      directory_scanner=self.filesystem_index,
+                                      content_encoder=self.content_encoder,
+                                      compression=self.content_encoder is not None,
+                                      metrics=self.metrics,
+                                      # with a port of their own the metrics are not served by every handler
+                                      metrics_path=None if self.metrics_port is not None else self.metrics_path,
+                                      timing_hooks=self.timing_hooks,
+                                      **self.handler_options)
+        except OSError as e:
+            self._handle_os_error(e, client_address)
         except Exception as e:
             self.logger.critical(f"Failed to create handler: {e}")
             self.err_stop()
@@ -179,14 +578,24 @@ class EasyHTTPServer:
         self.start_time = datetime.strptime(self.start_time, dt_fmt)
 
     def start(self, **kwargs) -> None:
-        """Start the HTTP server and block until interrupted (Ctrl+C)."""
+        """
+        Start the HTTP server and block until interrupted (Ctrl+C).
+        Pass ``engine`` to override the server engine chosen in the constructor.
+        With more than one worker, this process supervises the workers instead of serving itself.
+        """
+        engine = kwargs.pop('engine', None) or self.engine
         chdir(self.directory)
         self.logger.debug(f"Changing working directory to {self.directory}")
 
-        # noinspection PyTypeChecker
-        with ThreadingHTTPServer((self.host, self.port), self._handler_factory) as httpd:
+        if self.workers > 1:
+            self._start_workers(engine, **kwargs)
+            return
+
+        with self._build_httpd(engine) as httpd:
             # self._httpd seems to only be used by the close method
             self._httpd = httpd
+            self._start_metrics(httpd)
+            self._start_filesystem_index()
 
             self._log_all_basic_server_info(**kwargs)
 
@@ -196,22 +605,52 @@ class EasyHTTPServer:
                 httpd.serve_forever()
             except KeyboardInterrupt:
                 self.logger.warning(f"Shutting down server (ran for {self.runtime}).")
+            finally:
+                self._stop_metrics()
+                self._stop_filesystem_index()
+
+    def _start_workers(self, engine: str, **kwargs) -> None:
+        self._supervisor = PreforkSupervisor((self.host, self.port), partial(self._build_worker_httpd, engine),
+                                             self.workers, reuse_port=self.reuse_port, logger=self.logger)
+        self.port = self._supervisor.open_listener()[1]
+        self._log_all_basic_server_info(**kwargs)
+
+        self._set_start_time()
+        self.logger.info(f"Server started at {self.start_time} with {self.workers} workers", print_msg=True)
+        exit_status = self._supervisor.run()
+        self._supervisor = None
+        self.logger.warning(f"Shutting down server (ran for {self.runtime}).")
+        if exit_status:
+            self.logger.critical("Server stopped because a worker hit a fatal error")
+            exit(exit_status)
 
     def stop(self) -> None:
         """
         Stop the server if it's running.
         (Only useful if you manage the server in a separate thread/process.)
+        With worker processes, this stops every worker, whether it is called in the
+        supervising process or in one of the workers.
         """
+        if self._supervisor is not None and self._supervisor.is_worker:
+            # the supervisor stops the other workers once this one exits
+            self._supervisor.worker_exit_code = self._supervisor.worker_exit_code or PreforkSupervisor.EXIT_STOP
+        elif self._supervisor is not None:
+            self._supervisor.stop()
         if self._httpd is not None:
             self._httpd.shutdown()
             self._httpd.server_close()
             self._httpd = None
+        self._stop_metrics()
+        self._stop_filesystem_index()
 
     def err_stop(self) -> None:
         """
         Stop the server if it's running.
         (Only useful if you manage the server in a separate thread/process.)
+        In a worker process, the exit code makes the supervisor stop every worker and exit with an error.
         """
+        if self._supervisor is not None and self._supervisor.is_worker:
+            self._supervisor.worker_exit_code = PreforkSupervisor.EXIT_ERR_STOP
         self.stop()
         # FIXME: this error exit seems to be ignored - create my own ThreadingHTTPServer class and override shutdown?
         exit(1)
@@ -1,6 +1,12 @@
+import atexit
+import logging
+import os
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
+from queue import Empty, Full, Queue
+from typing import List, Optional
+
 from EasyLoggerAJM import EasyLogger, _EasyLoggerCustomLogger
-from EasyLoggerAJM.logger_parts.handlers import OutlookEmailHandler
-from PyEmailerAJM import Msg
 
 
 # FIXME: figure out how to make this work - needs OutlookEmailHandler support
@@ -8,15 +14,210 @@ class EasyHTTPCustomLogger(_EasyLoggerCustomLogger):
     ...
 
 
+@lru_cache(maxsize=None)
+def email_handler_class() -> type:
+    """
+    The ``OutlookEmailHandler`` subclass taking ``PyEmailerAJM.Msg`` messages. PyEmailerAJM (Outlook
+    automation) is by far the slowest import of the package, so it is only imported here, the first
+    time an email handler is configured.
+    """
+    from EasyLoggerAJM.logger_parts.handlers import OutlookEmailHandler
+    from PyEmailerAJM import Msg
+    return type('EasyHTTPEmailHandler', (OutlookEmailHandler,), {'VALID_EMAIL_MSG_TYPES': [Msg]})
+
+
+class SanitizedArgsFilter(logging.Filter):
+    """
+    ``_EasyLoggerCustomLogger`` only sanitizes the message template, so lazily formatted
+    messages (``logger.debug("Listing %s", path)``) are merged with their args and sanitized
+    here. Logger filters only run for records that pass the level check, so a disabled
+    ``debug`` call never gets this far.
+    """
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.args:
+            record.msg = _EasyLoggerCustomLogger.sanitize_msg(record.getMessage())
+            record.args = None
+        return True
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Puts records on a bounded queue for a ``QueueListener`` to write out. When the queue is full
+    the record is dropped (``drop_newest``), makes room by dropping the oldest queued record
+    (``drop_oldest``), or the logging thread waits for room (``block``).
+
+    Records are passed on as they are instead of being formatted here as ``QueueHandler`` does:
+    the listener runs in this process, so formatting is left to the real handlers on its thread.
+    Closing the handler (e.g. in ``logging.shutdown``) stops ``listener`` once it has written out
+    the queued records.
+
+    :ivar listener: Listener writing out the records of this handler's queue.
+    :type listener: QueueListener, optional
+    :ivar dropped: Records dropped because the queue was full.
+    :type dropped: int
+    """
+    DROP_NEWEST = 'drop_newest'
+    DROP_OLDEST = 'drop_oldest'
+    BLOCK = 'block'
+    DROP_POLICIES = (DROP_NEWEST, DROP_OLDEST, BLOCK)
+
+    def __init__(self, queue: Queue, drop_policy: str = DROP_NEWEST):
+        if drop_policy not in self.__class__.DROP_POLICIES:
+            raise ValueError(f"drop_policy must be one of {', '.join(self.__class__.DROP_POLICIES)}, "
+                             f"not {drop_policy!r}")
+        super().__init__(queue)
+        self.drop_policy = drop_policy
+        self.listener: Optional[QueueListener] = None
+        self.dropped = 0
+
+    def start_listener(self, *handlers: logging.Handler) -> None:
+        self.listener = QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+
+    def stop_listener(self) -> None:
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def close(self) -> None:
+        self.stop_listener()
+        super().close()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # called under the handler lock, so the drop counter needs no lock of its own
+        if self.drop_policy == self.__class__.BLOCK:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+            return
+        except Full:
+            pass
+        if self.drop_policy == self.__class__.DROP_OLDEST:
+            try:
+                self.queue.get_nowait()
+                self.queue.put_nowait(record)
+            except (Empty, Full):
+                pass
+        self.dropped += 1
+
+
 class EasyHTTPLogger(EasyLogger):
+    """
+    EasyLogger for the server. After the handlers are set up, the logger level is raised to the
+    lowest handler level (at most INFO), so ``debug`` calls cost a single level check when no
+    handler takes DEBUG records (e.g. ``file_logger_levels=['INFO', 'ERROR']``).
+
+    With ``queue_logging`` the file and console handlers are moved behind a ``BoundedQueueHandler``
+    and a ``QueueListener`` writes the records out on a background thread, so request threads
+    never wait on log I/O. The queue holds ``log_queue_size`` records; ``log_drop_policy`` decides
+    what happens when it is full (see ``BoundedQueueHandler``). The listener is stopped, and the
+    handlers are put back on the logger, at exit or by ``stop_queue_logging``; forked worker
+    processes start a listener of their own.
+
+    With ``email_recipient`` and ``email_msg`` (a ``PyEmailerAJM.Msg``) records of ``email_log_level``
+    and up are also emailed. The email handler and PyEmailerAJM are only imported when configured
+    (see ``email_handler_class``).
+
+    :ivar queue_logging: Write log records on a background thread.
+    :type queue_logging: bool
+    :ivar log_queue_size: Records the queue holds before ``log_drop_policy`` applies.
+    :type log_queue_size: int
+    :ivar log_drop_policy: One of ``BoundedQueueHandler.DROP_POLICIES``.
+    :type log_drop_policy: str
+    :ivar email_recipient: Address(es) log records are emailed to, None to send no email.
+    :type email_recipient: Union[str, list], optional
+    :ivar email_log_level: Lowest level that is emailed.
+    :type email_log_level: Union[int, str]
+    """
+    DEFAULT_LOG_QUEUE_SIZE = 10000
+    DEFAULT_LOG_DROP_POLICY = BoundedQueueHandler.DROP_NEWEST
+    DEFAULT_EMAIL_LOG_LEVEL = logging.ERROR
+
     def __init__(self, **kwargs):
         self.log_spec = kwargs.pop('log_spec', 'HOURLY')
         # done this way to avoid _internal_logger issues since assigning it directly is a property
         pn = kwargs.pop('project_name', 'EasyHTTPServerAJM')
         self.show_warning_logs_in_console = kwargs.pop('show_warning_logs_in_console', True)
+        self.queue_logging = kwargs.pop('queue_logging', False)
+        self.log_queue_size = kwargs.pop('log_queue_size', None) or self.__class__.DEFAULT_LOG_QUEUE_SIZE
+        self.log_drop_policy = kwargs.pop('log_drop_policy', None) or self.__class__.DEFAULT_LOG_DROP_POLICY
+        self.email_recipient = kwargs.pop('email_recipient', None)
+        self.email_msg = kwargs.pop('email_msg', None)
+        self.email_log_level = kwargs.pop('email_log_level', None) or self.__class__.DEFAULT_EMAIL_LOG_LEVEL
+        self.email_handler: Optional[logging.Handler] = None
+        self.queue_handler: Optional[BoundedQueueHandler] = None
+        self._queued_handlers: List[logging.Handler] = []
+        self._queue_hooks_registered = False
         super().__init__(project_name=pn, log_spec=self.log_spec,
                          show_warning_logs_in_console=self.show_warning_logs_in_console,
                          **kwargs)
 
     def __call__(self, *args, **kwargs):
         return self.logger
+
+    def post_handler_setup(self):
+        super().post_handler_setup()
+        self.logger.addFilter(SanitizedArgsFilter())
+        if self.email_recipient and self.email_msg is not None:
+            self._add_email_handler()
+        self._trim_logger_level()
+        if self.queue_logging:
+            self.start_queue_logging()
+
+    def _add_email_handler(self) -> None:
+        self.email_handler = email_handler_class()(self.email_msg, self.log_location, self.email_recipient,
+                                                    project_name=self.project_name)
+        self.email_handler.setLevel(self.email_log_level)
+        self.logger.addHandler(self.email_handler)
+        self.logger.debug("email handler added for %s", self.email_recipient)
+
+    def _trim_logger_level(self) -> None:
+        # capped at INFO: messages logged with print_msg=True must still reach the console
+        lowest = min((handler.level or logging.DEBUG for handler in self.logger.handlers), default=logging.DEBUG)
+        self.logger.setLevel(min(lowest, logging.INFO))
+        self.logger.debug("logger level set to %s", logging.getLevelName(self.logger.level))
+
+    @property
+    def queue_listener(self) -> Optional[QueueListener]:
+        return self.queue_handler.listener if self.queue_handler is not None else None
+
+    def _restart_queue_listener_in_child(self) -> None:
+        # the parent's listener thread does not exist in a forked child, and its queue may have
+        # been locked by that thread at the time of the fork
+        if self.queue_listener is not None:
+            self.queue_handler.queue = Queue(self.log_queue_size)
+            self.queue_handler.start_listener(*self._queued_handlers)
+
+    def start_queue_logging(self) -> None:
+        if self.queue_listener is not None:
+            return
+        self._queued_handlers = list(self.logger.handlers)
+        for handler in self._queued_handlers:
+            self.logger.removeHandler(handler)
+        self.queue_handler = BoundedQueueHandler(Queue(self.log_queue_size), self.log_drop_policy)
+        self.logger.addHandler(self.queue_handler)
+        self.queue_handler.start_listener(*self._queued_handlers)
+        if not self._queue_hooks_registered:
+            # fork hooks can't be unregistered, another one per restart would start one listener each
+            atexit.register(self.stop_queue_logging)
+            if hasattr(os, 'register_at_fork'):
+                os.register_at_fork(after_in_child=self._restart_queue_listener_in_child)
+            self._queue_hooks_registered = True
+        self.logger.debug("queue logging started with a queue of %d records, drop policy %s",
+                          self.log_queue_size, self.log_drop_policy)
+
+    def stop_queue_logging(self) -> None:
+        """Write out the queued records, stop the listener and log synchronously again."""
+        if self.queue_listener is None:
+            return
+        self.queue_handler.stop_listener()
+        self.logger.removeHandler(self.queue_handler)
+        for handler in self._queued_handlers:
+            self.logger.addHandler(handler)
+        if self.queue_handler.dropped:
+            self.logger.warning(f"{self.queue_handler.dropped} log records were dropped because the log queue "
+                                f"({self.log_queue_size} records) was full")
@@ -0,0 +1,104 @@
+"""
+Benchmark rendering a directory listing from plain os.listdir names (the old path)
+against DirectoryScanner records built with os.scandir.
+
+The os.stat/os.lstat/os.path.* calls made from Python are counted per entry.
+DirEntry.stat() calls stat() in C, once per entry at most (zero on Windows), and
+is reported separately as "scandir stat".
+
+usage: python benchmarks/bench_directory_listing.py [-n FILES] [-r REPEATS]
+"""
+import argparse
+import logging
+import os
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from EasyHTTPServerAJM.Helpers import DirectoryScanner
+from EasyHTTPServerAJM.Helpers.HtmlTemplateBuilder import HTMLTemplateBuilder
+
+
+class _SyscallCounter:
+    PATCHED = ((os, 'stat'), (os, 'lstat'), (os.path, 'isdir'), (os.path, 'exists'))
+
+    def __init__(self):
+        self.calls = 0
+        self._originals = []
+
+    def __enter__(self):
+        for module, name in self.__class__.PATCHED:
+            orig = getattr(module, name)
+            self._originals.append((module, name, orig))
+
+            def wrapper(*args, _orig=orig, **kwargs):
+                self.calls += 1
+                return _orig(*args, **kwargs)
+            setattr(module, name, wrapper)
+        return self
+
+    def __exit__(self, *exc):
+        for module, name, orig in self._originals:
+            setattr(module, name, orig)
+
+
+def _make_tree(root: str, n_files: int):
+    for i in range(n_files):
+        with open(os.path.join(root, f"file_{i:06d}.txt"), 'wb') as f:
+            f.write(b'x')
+    for i in range(max(1, n_files // 100)):
+        os.mkdir(os.path.join(root, f"dir_{i:04d}"))
+
+
+def _render(builder, entries, path):
+    return builder.build_page_body(entries, path).encode('utf-8', 'surrogateescape')
+
+
+def bench_listdir(builder, path, repeats):
+    with _SyscallCounter() as counter:
+        start = perf_counter()
+        for _ in range(repeats):
+            _render(builder, sorted(os.listdir(path)), path)
+        elapsed = perf_counter() - start
+    return elapsed / repeats, counter.calls / repeats
+
+
+def bench_scandir(builder, scanner, path, repeats):
+    with _SyscallCounter() as counter:
+        start = perf_counter()
+        for _ in range(repeats):
+            _render(builder, scanner.scan(path), path)
+        elapsed = perf_counter() - start
+    return elapsed / repeats, counter.calls / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', '--files', type=int, default=20000)
+    parser.add_argument('-r', '--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    logger = logging.getLogger('bench_directory_listing')
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+
+    builder = HTMLTemplateBuilder(logger=logger)
+    builder.enc, builder.title, builder.path = 'utf-8', 'Index of /bench/', '/bench/'
+    scanner = DirectoryScanner(logger=logger)
+
+    with TemporaryDirectory() as td:
+        _make_tree(td, args.files)
+        n_entries = len(os.listdir(td))
+        old_time, old_calls = bench_listdir(builder, td, args.repeats)
+        new_time, new_calls = bench_scandir(builder, scanner, td, args.repeats)
+
+    print(f"{n_entries} entries, {args.repeats} repeats")
+    print(f"  listdir + per-entry stat: {old_time * 1e3:9.1f} ms/listing, "
+          f"{old_calls / n_entries:4.2f} python stat calls/entry")
+    print(f"  scandir records:          {new_time * 1e3:9.1f} ms/listing, "
+          f"{new_calls / n_entries:4.2f} python stat calls/entry "
+          f"(+ at most 1 scandir stat/entry)")
+    print(f"  speedup: {old_time / new_time:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
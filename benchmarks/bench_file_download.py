@@ -0,0 +1,102 @@
+"""
+Benchmark file download throughput of PrettyDirectoryHandler with the zero-copy
+sendfile path against the buffered shutil.copyfileobj path.
+
+The server runs in a child process so its CPU time can be reported separately
+from the benchmark clients; "CPU s/GB" is the server's user+system CPU time per
+GB sent, which is what decides throughput per core.
+
+usage: python benchmarks/bench_file_download.py [--size-mb MB] [--clients N] [--rounds R]
+"""
+import argparse
+import http.client
+import logging
+import multiprocessing
+import os
+import resource
+from functools import partial
+from http.server import ThreadingHTTPServer
+from tempfile import TemporaryDirectory
+from threading import Thread
+from time import perf_counter
+
+from EasyHTTPServerAJM.CustomHandlers import PrettyDirectoryHandler
+
+READ_SIZE = 1024 * 1024
+
+
+def _serve(directory, use_sendfile, port_queue, stop_event):
+    logger = logging.getLogger('bench_file_download')
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    factory = partial(PrettyDirectoryHandler, directory=directory, logger=logger, use_sendfile=use_sendfile)
+    # the default handler logs every request to stderr
+    factory.func.log_message = lambda *args, **kwargs: None
+    with ThreadingHTTPServer(('127.0.0.1', 0), factory) as httpd:
+        port_queue.put(httpd.server_address[1])
+        Thread(target=httpd.serve_forever, daemon=True).start()
+        stop_event.wait()
+        httpd.shutdown()
+
+
+def _download(port, path, rounds, results):
+    received = 0
+    for _ in range(rounds):
+        conn = http.client.HTTPConnection('127.0.0.1', port)
+        conn.request('GET', path)
+        resp = conn.getresponse()
+        while True:
+            chunk = resp.read(READ_SIZE)
+            if not chunk:
+                break
+            received += len(chunk)
+        conn.close()
+    results.append(received)
+
+
+def bench(directory, use_sendfile, clients, rounds):
+    ctx = multiprocessing.get_context('fork') if hasattr(os, 'fork') else multiprocessing.get_context()
+    port_queue, stop_event = ctx.Queue(), ctx.Event()
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    proc = ctx.Process(target=_serve, args=(directory, use_sendfile, port_queue, stop_event))
+    proc.start()
+    port = port_queue.get()
+
+    results = []
+    threads = [Thread(target=_download, args=(port, '/payload.bin', rounds, results)) for _ in range(clients)]
+    start = perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = perf_counter() - start
+
+    stop_event.set()
+    proc.join()
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    server_cpu = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+    total = sum(results)
+    return total / elapsed / 1024 ** 2, server_cpu / (total / 1024 ** 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=256)
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as td:
+        with open(os.path.join(td, 'payload.bin'), 'wb') as f:
+            block = os.urandom(READ_SIZE)
+            for _ in range(args.size_mb):
+                f.write(block)
+
+        print(f"{args.clients} clients x {args.rounds} downloads of {args.size_mb} MB")
+        for label, use_sendfile in (('buffered copyfileobj', False), ('sendfile', True)):
+            mb_s, cpu_per_gb = bench(td, use_sendfile, args.clients, args.rounds)
+            print(f"  {label:20s} {mb_s:9.1f} MB/s  {cpu_per_gb:6.2f} server CPU s/GB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark the cost of constructing a PrettyDirectoryHandler per connection,
+with and without a pre-built SiteConfig.
+
+Each iteration builds a handler on one end of a socketpair whose other end is
+already shut down, so the handler does its full construction and then returns
+immediately from handle(). os.stat/os.lstat calls are counted to show how many
+filesystem syscalls are made per handler.
+
+usage: python benchmarks/bench_handler_construction.py [-n ITERATIONS]
+"""
+import argparse
+import logging
+import os
+import socket
+from time import perf_counter
+
+from EasyHTTPServerAJM.CustomHandlers import PrettyDirectoryHandler, UploadPrettyDirectoryHandler
+
+
+class _StatCounter:
+    def __init__(self):
+        self.calls = 0
+        self._orig_stat = os.stat
+        self._orig_lstat = os.lstat
+
+    def __enter__(self):
+        def counting(orig):
+            def wrapper(*args, **kwargs):
+                self.calls += 1
+                return orig(*args, **kwargs)
+            return wrapper
+        os.stat = counting(self._orig_stat)
+        os.lstat = counting(self._orig_lstat)
+        return self
+
+    def __exit__(self, *exc):
+        os.stat = self._orig_stat
+        os.lstat = self._orig_lstat
+
+
+def _build_handler(handler_class, logger, **kwargs):
+    srv_sock, cli_sock = socket.socketpair()
+    try:
+        cli_sock.shutdown(socket.SHUT_WR)
+        handler_class(srv_sock, ('127.0.0.1', 0), None, logger=logger, **kwargs)
+    finally:
+        srv_sock.close()
+        cli_sock.close()
+
+
+def bench(handler_class, iterations: int, logger, **kwargs):
+    # warm up the template cache so both runs are measured on equal footing
+    _build_handler(handler_class, logger, **kwargs)
+    with _StatCounter() as counter:
+        start = perf_counter()
+        for _ in range(iterations):
+            _build_handler(handler_class, logger, **kwargs)
+        elapsed = perf_counter() - start
+    return elapsed / iterations, counter.calls / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', '--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    logger = logging.getLogger('bench_handler_construction')
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+
+    for handler_class in (PrettyDirectoryHandler, UploadPrettyDirectoryHandler):
+        site_config = handler_class.build_site_config(logger=logger)
+        before = bench(handler_class, args.iterations, logger)
+        after = bench(handler_class, args.iterations, logger, site_config=site_config)
+        print(f"{handler_class.__name__}:")
+        print(f"  without site_config: {before[0] * 1e6:8.1f} us/handler, {before[1]:5.1f} stat calls/handler")
+        print(f"  with site_config:    {after[0] * 1e6:8.1f} us/handler, {after[1]:5.1f} stat calls/handler")
+        print(f"  speedup: {before[0] / after[0]:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
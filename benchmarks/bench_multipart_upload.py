@@ -0,0 +1,96 @@
+"""
+Benchmark parsing a multipart/form-data upload with the streaming MultipartParser
+against the old cgi.FieldStorage + field.file.read() path (when the runtime still
+has the cgi module, i.e. Python < 3.13).
+
+Every run happens in a fresh child process, so "peak RSS" is the maximum resident
+set size of that run alone.
+
+usage: python benchmarks/bench_multipart_upload.py [--size-mb MB]
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import warnings
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from EasyHTTPServerAJM.Helpers import MultipartParser
+
+BOUNDARY = "----benchboundary0123456789"
+BLOCK = 1024 * 1024
+
+
+def _write_form(path, size_mb):
+    with open(path, 'wb') as f:
+        f.write(f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="big.bin"\r\n'
+                f'Content-Type: application/octet-stream\r\n\r\n'.encode())
+        block = os.urandom(BLOCK)
+        for _ in range(size_mb):
+            f.write(block)
+        f.write(f'\r\n--{BOUNDARY}--\r\n'.encode())
+    return os.path.getsize(path)
+
+
+def _parse_streaming(body_path, out_path):
+    with open(body_path, 'rb') as rfile, open(out_path, 'wb') as out:
+        parser = MultipartParser(rfile, BOUNDARY, os.path.getsize(body_path))
+        for part in parser:
+            if part.filename:
+                part.write_to(out)
+
+
+def _parse_fieldstorage(body_path, out_path):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', DeprecationWarning)
+        import cgi
+    size = os.path.getsize(body_path)
+    with open(body_path, 'rb') as rfile, open(out_path, 'wb') as out:
+        form = cgi.FieldStorage(fp=rfile,
+                                headers={'content-type': f'multipart/form-data; boundary={BOUNDARY}',
+                                         'content-length': str(size)},
+                                environ={'REQUEST_METHOD': 'POST'})
+        out.write(form['file'].file.read())
+
+
+def _run(target, body_path, out_path, results):
+    start = perf_counter()
+    target(body_path, out_path)
+    elapsed = perf_counter() - start
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.put((elapsed, peak / 1024 if sys.platform != 'darwin' else peak / 1024 ** 2))
+
+
+def bench(target, body_path, out_path):
+    ctx = multiprocessing.get_context('fork') if hasattr(os, 'fork') else multiprocessing.get_context()
+    results = ctx.Queue()
+    proc = ctx.Process(target=_run, args=(target, body_path, out_path, results))
+    proc.start()
+    elapsed, peak_mb = results.get()
+    proc.join()
+    return elapsed, peak_mb
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=256)
+    args = parser.parse_args()
+
+    variants = [('MultipartParser', _parse_streaming)]
+    if sys.version_info < (3, 13):
+        variants.insert(0, ('cgi.FieldStorage', _parse_fieldstorage))
+
+    with TemporaryDirectory() as td:
+        body_path, out_path = os.path.join(td, 'form.bin'), os.path.join(td, 'out.bin')
+        size = _write_form(body_path, args.size_mb)
+        print(f"upload of {args.size_mb} MB ({size} bytes of multipart body)")
+        for label, target in variants:
+            elapsed, peak_mb = bench(target, body_path, out_path)
+            print(f"  {label:18s} {size / elapsed / 1024 ** 2:9.1f} MB/s  peak RSS {peak_mb:8.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
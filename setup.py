@@ -25,7 +25,8 @@ setup(
     version=get_property('__version__', project_name),
     packages=['EasyHTTPServerAJM', 'EasyHTTPServerAJM.Helpers',
               'EasyHTTPServerAJM.Helpers.HtmlTemplateBuilder',
-              'EasyHTTPServerAJM.CustomHandlers'],
+              'EasyHTTPServerAJM.CustomHandlers', 'EasyHTTPServerAJM.ServerEngines',
+              'EasyHTTPServerAJM.bench'],
     url='https://github.com/amcsparron2793-Water/EasyHTTPServerAJM',
     download_url=f'https://github.com/amcsparron2793-Water/EasyHTTPServerAJM/archive/refs/tags/{get_property("__version__", project_name)}.tar.gz',
     keywords=[],
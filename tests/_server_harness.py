@@ -0,0 +1,50 @@
+import http.client
+import logging
+from functools import partial
+from http.server import ThreadingHTTPServer
+from threading import Thread
+
+
+def quiet_logger(name: str = 'EasyHTTPServerAJM.tests') -> logging.Logger:
+    logger = logging.getLogger(name)
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    return logger
+
+
+class RunningServer:
+    """Serve ``directory`` with ``handler_class`` on an ephemeral localhost port for the duration of a with block."""
+    def __init__(self, handler_class, directory, server_class=ThreadingHTTPServer, **handler_kwargs):
+        handler_kwargs.setdefault('logger', quiet_logger())
+        self.factory = partial(handler_class, directory=str(directory), **handler_kwargs)
+        self.server_class = server_class
+        self.httpd = None
+        self._thread = None
+
+    def __enter__(self):
+        self.httpd = self.server_class(('127.0.0.1', 0), self.factory)
+        self._thread = Thread(target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self._thread.join()
+
+    @property
+    def port(self) -> int:
+        return self.httpd.server_address[1]
+
+    def connection(self, timeout: float = 10) -> http.client.HTTPConnection:
+        return http.client.HTTPConnection('127.0.0.1', self.port, timeout=timeout)
+
+    def request(self, method: str, path: str, body=None, headers: dict = None):
+        """Send one request on a fresh connection and return (status, headers, body)."""
+        conn = self.connection()
+        try:
+            conn.request(method, path, body=body, headers=headers or {})
+            resp = conn.getresponse()
+            return resp.status, resp.headers, resp.read()
+        finally:
+            conn.close()
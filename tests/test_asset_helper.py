@@ -1,7 +1,7 @@
 import unittest
 from pathlib import Path
 
-from EasyHTTPServerAJM.Helpers.HtmlTemplateBuilder import AssetHelper
+from EasyHTTPServerAJM.Helpers.HtmlTemplateBuilder import AssetHelper, UploadAssetHelper, SiteConfig
 
 
 def project_root() -> Path:
@@ -53,6 +53,32 @@ class TestAssetHelper(unittest.TestCase):
         # invalid CSS path should not be set (remains None)
         self.assertIsNone(ah.directory_page_css_path)
 
+    def test_site_config_round_trip_skips_validation(self):
+        ah = AssetHelper(
+            html_template_path=self.html,
+            templates_path=self.templates,
+            assets_path=self.assets,
+            back_svg_path=self.svg,
+            directory_page_css_path=self.css,
+        )
+        config = ah.to_site_config()
+        self.assertIsInstance(config, SiteConfig)
+        with self.assertRaises(AttributeError):
+            # noinspection PyDataclass
+            config.html_template_path = None
+
+        from_config = AssetHelper(site_config=config)
+        self.assertIsNone(from_config.path_validator)
+        self.assertEqual(from_config.to_site_config(), config)
+        self.assertEqual(Path(from_config.back_svg_path), self.svg)
+
+    def test_upload_site_config_keeps_upload_form_path(self):
+        upload_form = self.templates / "_upload_form.html"
+        uah = UploadAssetHelper(html_template_path=self.html, upload_form_path=upload_form)
+        config = uah.to_site_config()
+        self.assertEqual(Path(config.upload_form_path), upload_form)
+        self.assertEqual(Path(UploadAssetHelper(site_config=config).upload_form_path), upload_form)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from EasyHTTPServerAJM.bench import BenchmarkRunner, SyntheticTreeBuilder, WorkloadResult
+
+
+class TestSyntheticTrees(unittest.TestCase):
+    def setUp(self):
+        self._td = TemporaryDirectory()
+        self.root = Path(self._td.name)
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def test_wide_tree(self):
+        tree = SyntheticTreeBuilder('wide', 25, width=4, payload_bytes=1000).build(self.root)
+        self.assertEqual(tree.listing_paths, ['/', '/dir_0000/', '/dir_0001/', '/dir_0002/', '/dir_0003/'])
+        self.assertEqual(sum(len(list((self.root / p.strip('/')).iterdir())) for p in tree.listing_paths[1:]), 25)
+        self.assertEqual((self.root / 'payload.bin').stat().st_size, 1000)
+        self.assertTrue((self.root / 'uploads').is_dir())
+
+    def test_deep_tree(self):
+        tree = SyntheticTreeBuilder('deep', 6, depth=3).build(self.root)
+        self.assertEqual(tree.listing_paths, ['/level/', '/level/level/', '/level/level/level/'])
+        self.assertEqual(tree.directories, 3)
+
+    def test_unknown_shape(self):
+        with self.assertRaises(ValueError):
+            SyntheticTreeBuilder('tall')
+
+
+class TestReport(unittest.TestCase):
+    def test_percentiles(self):
+        values = [float(v) for v in range(1, 101)]
+        self.assertEqual(WorkloadResult.percentile(values, 0.50), 50.0)
+        self.assertEqual(WorkloadResult.percentile(values, 0.99), 99.0)
+        self.assertEqual(WorkloadResult.percentile([], 0.99), 0.0)
+
+    def test_compare_against_baseline(self):
+        def report(req_per_s, p99):
+            return {'workloads': {'listing': {'req_per_s': req_per_s, 'latency_ms': {'p99': p99}}}}
+        self.assertEqual(BenchmarkRunner.compare(report(95, 10.5), report(100, 10), 0.10), [])
+        regressions = BenchmarkRunner.compare(report(80, 20), report(100, 10), 0.10)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(all(r.startswith('listing:') for r in regressions))
+
+
+class TestBenchmarkRunner(unittest.TestCase):
+    def test_runs_all_workloads(self):
+        with TemporaryDirectory() as td:
+            tree = SyntheticTreeBuilder('wide', 20, width=2, payload_bytes=64 * 1024).build(td)
+            runner = BenchmarkRunner(tree, concurrency=2, duration=None, total_requests=6, upload_bytes=1024)
+            report = runner.run(['listing', 'download', 'upload'])
+            self.assertEqual(len(list((Path(td) / 'uploads').iterdir())), 6)
+        for name, result in report['workloads'].items():
+            self.assertEqual((result['requests'], result['errors']), (6, 0), name)
+            self.assertGreater(result['req_per_s'], 0)
+            self.assertLessEqual(result['latency_ms']['p50'], result['latency_ms']['p99'])
+        self.assertGreater(report['workloads']['download']['bytes_in_per_s'], 0)
+        self.assertGreater(report['workloads']['upload']['bytes_out_per_s'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
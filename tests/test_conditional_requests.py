@@ -0,0 +1,103 @@
+import os
+import time
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from EasyHTTPServerAJM.CustomHandlers import PrettyDirectoryHandler
+from EasyHTTPServerAJM.Helpers import ListingCache
+from _server_harness import RunningServer
+
+
+class TestFileETags(unittest.TestCase):
+    def setUp(self):
+        self._td = TemporaryDirectory()
+        self.root = Path(self._td.name)
+        self.payload = os.urandom(10_000)
+        self.file = self.root / "payload.bin"
+        self.file.write_bytes(self.payload)
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def test_matching_if_none_match_gets_304(self):
+        with RunningServer(PrettyDirectoryHandler, self.root) as srv:
+            status, headers, body = srv.request("GET", "/payload.bin")
+            etag = headers["ETag"]
+            self.assertEqual((status, body), (200, self.payload))
+            status, headers, body = srv.request("GET", "/payload.bin", headers={"If-None-Match": etag})
+            self.assertEqual((status, body), (304, b""))
+            self.assertEqual(headers["ETag"], etag)
+            # weak comparison and lists of tags
+            status, _, _ = srv.request("GET", "/payload.bin", headers={"If-None-Match": f'"x", W/{etag}'})
+            self.assertEqual(status, 304)
+
+    def test_changed_file_gets_new_etag(self):
+        with RunningServer(PrettyDirectoryHandler, self.root) as srv:
+            etag = srv.request("HEAD", "/payload.bin")[1]["ETag"]
+            self.file.write_bytes(b"changed")
+            status, headers, body = srv.request("GET", "/payload.bin", headers={"If-None-Match": etag})
+        self.assertEqual((status, body), (200, b"changed"))
+        self.assertNotEqual(headers["ETag"], etag)
+
+    def test_if_range_with_etag(self):
+        with RunningServer(PrettyDirectoryHandler, self.root) as srv:
+            etag = srv.request("HEAD", "/payload.bin")[1]["ETag"]
+            status, _, body = srv.request("GET", "/payload.bin", headers={"Range": "bytes=0-9", "If-Range": etag})
+            self.assertEqual((status, body), (206, self.payload[:10]))
+            status, _, body = srv.request("GET", "/payload.bin",
+                                          headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+            self.assertEqual((status, body), (200, self.payload))
+
+
+class TestListingETags(unittest.TestCase):
+    def setUp(self):
+        self._td = TemporaryDirectory()
+        self.root = Path(self._td.name)
+        (self.root / "one.txt").write_text("1", encoding="utf-8")
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def test_unchanged_listing_gets_304(self):
+        cache = ListingCache()
+        with RunningServer(PrettyDirectoryHandler, self.root, listing_cache=cache) as srv:
+            status, headers, _ = srv.request("GET", "/")
+            etag = headers["ETag"]
+            self.assertEqual(status, 200)
+            self.assertTrue(etag.startswith('W/"'))
+            status, _, body = srv.request("GET", "/", headers={"If-None-Match": etag})
+        self.assertEqual((status, body), (304, b""))
+        # the 304 is answered before the listing cache is consulted
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+    def test_changed_directory_gets_200(self):
+        with RunningServer(PrettyDirectoryHandler, self.root) as srv:
+            etag = srv.request("GET", "/")[1]["ETag"]
+            (self.root / "two.txt").write_text("2", encoding="utf-8")
+            os.utime(self.root, ns=(0, self.root.stat().st_mtime_ns + 1_000_000_000))
+            status, headers, body = srv.request("GET", "/", headers={"If-None-Match": etag})
+        self.assertEqual(status, 200)
+        self.assertNotEqual(headers["ETag"], etag)
+        self.assertIn(b"two.txt", body)
+
+    def test_file_rewritten_in_place_retires_the_etag_after_max_age(self):
+        with RunningServer(PrettyDirectoryHandler, self.root, listing_cache=ListingCache(max_age=0.5)) as srv:
+            etag = srv.request("GET", "/")[1]["ETag"]
+            directory_times = self.root.stat()
+            (self.root / "one.txt").write_text("1" * 50_000, encoding="utf-8")
+            os.utime(self.root, ns=(directory_times.st_atime_ns, directory_times.st_mtime_ns))
+            time.sleep(0.6)
+            status, headers, _ = srv.request("GET", "/", headers={"If-None-Match": etag})
+        self.assertEqual(status, 200)
+        self.assertNotEqual(headers["ETag"], etag)
+
+    def test_pages_have_distinct_etags(self):
+        with RunningServer(PrettyDirectoryHandler, self.root) as srv:
+            first = srv.request("GET", "/?page=1")[1]["ETag"]
+            second = srv.request("GET", "/?page=2")[1]["ETag"]
+        self.assertNotEqual(first, second)
+
+
+if __name__ == "__main__":
+    unittest.main()
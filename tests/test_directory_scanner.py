@@ -0,0 +1,63 @@
+import os
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from EasyHTTPServerAJM.Helpers import DirectoryScanner, DirectoryEntryRecord
+from EasyHTTPServerAJM.Helpers.HtmlTemplateBuilder import HTMLTemplateBuilder
+
+
+class TestDirectoryScanner(unittest.TestCase):
+    def setUp(self):
+        self._td = TemporaryDirectory()
+        self.tmp = Path(self._td.name)
+        (self.tmp / "b.txt").write_bytes(b"12345")
+        (self.tmp / "a_folder").mkdir()
+        (self.tmp / "c.bin").write_bytes(b"")
+        self.scanner = DirectoryScanner()
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def test_scan_returns_sorted_records(self):
+        records = self.scanner.scan(self.tmp)
+        self.assertEqual([r.name for r in records], ["a_folder", "b.txt", "c.bin"])
+        self.assertTrue(all(isinstance(r, DirectoryEntryRecord) for r in records))
+
+    def test_records_carry_type_size_and_times(self):
+        by_name = {r.name: r for r in self.scanner.scan(self.tmp)}
+        self.assertTrue(by_name["a_folder"].is_dir)
+        self.assertFalse(by_name["b.txt"].is_dir)
+        self.assertEqual(by_name["b.txt"].size, 5)
+        st = os.stat(self.tmp / "b.txt")
+        self.assertEqual(by_name["b.txt"].mtime, st.st_mtime)
+
+    def test_empty_directory_is_an_empty_list(self):
+        empty = self.tmp / "a_folder"
+        self.assertEqual(self.scanner.scan(empty), [])
+
+    def test_missing_directory_raises(self):
+        with self.assertRaises(OSError):
+            self.scanner.scan(self.tmp / "missing")
+
+    @unittest.skipUnless(hasattr(os, "symlink"), "symlinks not supported")
+    def test_broken_symlink_has_no_stats(self):
+        try:
+            os.symlink(self.tmp / "nowhere", self.tmp / "dangling")
+        except OSError:
+            self.skipTest("cannot create symlinks here")
+        record = {r.name: r for r in self.scanner.scan(self.tmp)}["dangling"]
+        self.assertFalse(record.is_dir)
+        self.assertIsNone(record.mtime)
+
+    def test_records_render_like_names(self):
+        builder = HTMLTemplateBuilder()
+        builder.enc, builder.title, builder.path = "utf-8", "Index of /", "/"
+        from_records = builder.build_page_body(self.scanner.scan(self.tmp), str(self.tmp))
+        from_names = builder.build_page_body(sorted(os.listdir(self.tmp)), str(self.tmp))
+        self.assertEqual(from_records, from_names)
+        self.assertIn("<a href='a_folder/'>a_folder/</a>", from_records)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import email
+import os
+import unittest
+from email.utils import formatdate
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from EasyHTTPServerAJM.CustomHandlers import PrettyDirectoryHandler
+from EasyHTTPServerAJM.CustomHandlers.file_transfer import RangeRequestMixin
+from _server_harness import RunningServer
+
+
+class _RecordingHandler(PrettyDirectoryHandler):
+    sendfile_calls = []
+
+    def _send_file_segment(self, source, offset, count=None):
+        self.__class__.sendfile_calls.append(self._can_sendfile(source, self.wfile))
+        return super()._send_file_segment(source, offset, count)
+
+
+class TestZeroCopyDownloads(unittest.TestCase):
+    def setUp(self):
+        self._td = TemporaryDirectory()
+        self.root = Path(self._td.name)
+        self.payload = os.urandom(300_000)
+        (self.root / "payload.bin").write_bytes(self.payload)
+        _RecordingHandler.sendfile_calls = []
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    @unittest.skipUnless(hasattr(os, "sendfile"), "os.sendfile not available")
+    def test_sendfile_download_is_complete(self):
+        with RunningServer(_RecordingHandler, self.root) as srv:
+            status, headers, body = srv.request("GET", "/payload.bin")
+        self.assertEqual(status, 200)
+        self.assertEqual(body, self.payload)
+        self.assertEqual(int(headers["Content-Length"]), len(self.payload))
+        self.assertEqual(_RecordingHandler.sendfile_calls, [True])
+
+    def test_buffered_fallback_is_complete(self):
+        with RunningServer(_RecordingHandler, self.root, use_sendfile=False) as srv:
+            status, _, body = srv.request("GET", "/payload.bin")
+        self.assertEqual(status, 200)
+        self.assertEqual(body, self.payload)
+        # the buffered path never goes through _send_file_segment
+        self.assertEqual(_RecordingHandler.sendfile_calls, [])
+
+
+class TestParseByteRanges(unittest.TestCase):
+    def test_single_and_open_ended(self):
+        self.assertEqual(RangeRequestMixin.parse_byte_ranges("bytes=0-9", 100), [(0, 9)])
+        self.assertEqual(RangeRequestMixin.parse_byte_ranges("bytes=90-", 100), [(90, 99)])
+        self.assertEqual(RangeRequestMixin.parse_byte_ranges("bytes=90-500", 100), [(90, 99)])
+
+    def test_suffix(self):
+        self.assertEqual(RangeRequestMixin.parse_byte_ranges("bytes=-10", 100), [(90, 99)])
+        self.assertEqual(RangeRequestMixin.parse_byte_ranges("bytes=-500", 100), [(0, 99)])
+
+    def test_overlapping_ranges_are_merged(self):
+        self.assertEqual(RangeRequestMixin.parse_byte_ranges("bytes=20-29, 0-9,5-14", 100),
+                         [(0, 14), (20, 29)])
+
+    def test_unsatisfiable_and_ignored(self):
+        self.assertEqual(RangeRequestMixin.parse_byte_ranges("bytes=100-", 100), [])
+        self.assertEqual(RangeRequestMixin.parse_byte_ranges("bytes=-0", 100), [])
+        self.assertIsNone(RangeRequestMixin.parse_byte_ranges("items=0-1", 100))
+        self.assertIsNone(RangeRequestMixin.parse_byte_ranges("bytes=9-1", 100))
+        self.assertIsNone(RangeRequestMixin.parse_byte_ranges("bytes=abc", 100))
+        too_many = "bytes=" + ",".join(f"{i}-{i}" for i in range(RangeRequestMixin.MAX_RANGES + 1))
+        self.assertIsNone(RangeRequestMixin.parse_byte_ranges(too_many, 1000))
+
+
+class TestRangeRequests(unittest.TestCase):
+    def setUp(self):
+        self._td = TemporaryDirectory()
+        self.root = Path(self._td.name)
+        self.payload = os.urandom(100_000)
+        self.file = self.root / "payload.bin"
+        self.file.write_bytes(self.payload)
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def _get(self, headers, use_sendfile=True):
+        with RunningServer(PrettyDirectoryHandler, self.root, use_sendfile=use_sendfile) as srv:
+            return srv.request("GET", "/payload.bin", headers=headers)
+
+    def test_single_range(self):
+        for use_sendfile in (True, False):
+            with self.subTest(use_sendfile=use_sendfile):
+                status, headers, body = self._get({"Range": "bytes=1000-1999"}, use_sendfile)
+                self.assertEqual(status, 206)
+                self.assertEqual(headers["Content-Range"], f"bytes 1000-1999/{len(self.payload)}")
+                self.assertEqual(body, self.payload[1000:2000])
+
+    def test_full_response_advertises_ranges(self):
+        status, headers, _ = self._get({})
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["Accept-Ranges"], "bytes")
+
+    def test_multiple_ranges(self):
+        status, headers, body = self._get({"Range": "bytes=0-99,-100"})
+        self.assertEqual(status, 206)
+        self.assertTrue(headers["Content-Type"].startswith("multipart/byteranges"))
+        self.assertEqual(int(headers["Content-Length"]), len(body))
+        message = email.message_from_bytes(
+            f"Content-Type: {headers['Content-Type']}\r\n\r\n".encode() + body)
+        parts = message.get_payload()
+        self.assertEqual(len(parts), 2)
+        self.assertEqual(parts[0]["Content-Range"], f"bytes 0-99/{len(self.payload)}")
+        self.assertEqual(parts[0].get_payload(decode=True), self.payload[:100])
+        self.assertEqual(parts[1].get_payload(decode=True), self.payload[-100:])
+
+    def test_unsatisfiable_range(self):
+        status, headers, body = self._get({"Range": f"bytes={len(self.payload)}-"})
+        self.assertEqual(status, 416)
+        self.assertEqual(headers["Content-Range"], f"bytes */{len(self.payload)}")
+        self.assertEqual(body, b"")
+
+    def test_if_range_date(self):
+        last_modified = formatdate(self.file.stat().st_mtime, usegmt=True)
+        status, _, body = self._get({"Range": "bytes=0-9", "If-Range": last_modified})
+        self.assertEqual((status, body), (206, self.payload[:10]))
+
+        outdated = formatdate(self.file.stat().st_mtime - 3600, usegmt=True)
+        status, _, body = self._get({"Range": "bytes=0-9", "If-Range": outdated})
+        self.assertEqual((status, body), (200, self.payload))
+
+
+if __name__ == "__main__":
+    unittest.main()
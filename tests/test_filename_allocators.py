@@ -0,0 +1,56 @@
+import os
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from EasyHTTPServerAJM.Helpers import UniqueFilenameAllocator
+
+
+class TestUniqueFilenameAllocator(unittest.TestCase):
+    def setUp(self):
+        self._td = TemporaryDirectory()
+        self.root = Path(self._td.name)
+        self.allocator = UniqueFilenameAllocator()
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def test_names_follow_the_upload_naming_scheme(self):
+        names = [os.path.basename(self.allocator.allocate(self.root, "report.pdf")) for _ in range(3)]
+        self.assertEqual(names, ["report.pdf", "report (1).pdf", "report (2).pdf"])
+        self.assertTrue(all((self.root / name).exists() for name in names))
+
+    def test_hint_keeps_allocation_constant_time(self):
+        for _ in range(200):
+            self.allocator.allocate(self.root, "a.txt")
+        self.allocator.attempts = 0
+        self.allocator.allocate(self.root, "a.txt")
+        # one try for the plain name, one for the hinted suffix
+        self.assertEqual(self.allocator.attempts, 2)
+
+    def test_stale_hint_gallops(self):
+        for i in range(1000):
+            (self.root / UniqueFilenameAllocator.candidate_name("b.txt", i)).touch()
+        path = self.allocator.allocate(self.root, "b.txt")
+        self.assertNotEqual(os.path.basename(path), "b.txt")
+        self.assertLess(self.allocator.attempts, 30)
+        self.assertEqual(len(os.listdir(self.root)), 1001)
+
+    def test_concurrent_allocations_are_unique(self):
+        with ThreadPoolExecutor(8) as pool:
+            paths = list(pool.map(lambda _: UniqueFilenameAllocator().allocate(self.root, "c.txt"), range(64)))
+        self.assertEqual(len(set(paths)), 64)
+
+    def test_release_removes_only_unused_claims(self):
+        unused = self.allocator.allocate(self.root, "d.txt")
+        used = self.allocator.allocate(self.root, "d.txt")
+        Path(used).write_bytes(b"data")
+        UniqueFilenameAllocator.release(unused)
+        UniqueFilenameAllocator.release(used)
+        self.assertFalse(os.path.exists(unused))
+        self.assertTrue(os.path.exists(used))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,191 @@
+import os
+import shutil
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import monotonic, sleep
+
+from EasyHTTPServerAJM import EasyHTTPServer
+from EasyHTTPServerAJM.CustomHandlers import PrettyDirectoryHandler
+from EasyHTTPServerAJM.Helpers import DirectoryScanner, FilesystemIndex, IndexedDirectory, Inotify
+from _server_harness import RunningServer, quiet_logger
+
+
+def wait_for(condition, timeout: float = 10.0) -> bool:
+    deadline = monotonic() + timeout
+    while not condition():
+        if monotonic() > deadline:
+            return False
+        sleep(0.02)
+    return True
+
+
+class TestIndexedDirectory(unittest.TestCase):
+    def test_records_roundtrip(self):
+        with TemporaryDirectory() as td:
+            (Path(td) / "b.txt").write_bytes(b"12345")
+            (Path(td) / "a_folder").mkdir()
+            records = DirectoryScanner().scan(td)
+            snapshot = IndexedDirectory.from_records(records, ["a_folder"])
+            self.assertEqual(snapshot.records(), records)
+            self.assertEqual(snapshot.subdirectories(), ["a_folder"])
+            self.assertEqual(len(snapshot), 2)
+            self.assertGreater(snapshot.nbytes, 0)
+            self.assertGreaterEqual(snapshot.version, max(int(r.mtime * 1e9) for r in records))
+
+
+class _IndexTestCase(unittest.TestCase):
+    USE_INOTIFY = False
+
+    def setUp(self):
+        self._td = TemporaryDirectory()
+        self.tmp = Path(self._td.name)
+        (self.tmp / "a.txt").write_bytes(b"a")
+        (self.tmp / "sub" / "deeper").mkdir(parents=True)
+        (self.tmp / "sub" / "deeper" / "c.txt").write_bytes(b"ccc")
+        # short enough for the polling tests to see a rescan
+        self.index = FilesystemIndex(self.tmp, use_inotify=self.USE_INOTIFY, rescan_interval=0.2,
+                                     logger=quiet_logger())
+        self.index.start()
+        self.assertTrue(self.index.wait_until_ready(10))
+
+    def tearDown(self):
+        self.index.stop()
+        self._td.cleanup()
+
+    def names(self, path) -> list:
+        return [r.name for r in self.index.scan(path)]
+
+
+class TestFilesystemIndexPolling(_IndexTestCase):
+    def test_crawls_the_tree(self):
+        self.assertEqual(self.index.mode, 'polling')
+        for path in (self.tmp, self.tmp / "sub", self.tmp / "sub" / "deeper"):
+            self.assertTrue(self.index.is_indexed(path), path)
+        self.assertEqual(self.names(self.tmp / "sub" / "deeper"), ["c.txt"])
+        stats = self.index.stats()
+        self.assertEqual((stats['directories'], stats['entries'], stats['hits']), (3, 4, 1))
+        self.assertGreater(stats['bytes'], 0)
+
+    def test_rescan_picks_up_changes(self):
+        (self.tmp / "new.txt").write_bytes(b"new")
+        self.assertTrue(wait_for(lambda: "new.txt" in self.names(self.tmp)))
+        shutil.rmtree(self.tmp / "sub")
+        self.assertTrue(wait_for(lambda: not self.index.is_indexed(self.tmp / "sub" / "deeper")))
+        self.assertEqual(self.index.stats()['directories'], 1)
+
+    def test_outside_root_is_scanned_from_disk(self):
+        with TemporaryDirectory() as other:
+            (Path(other) / "x.txt").write_bytes(b"x")
+            self.assertEqual(self.names(other), ["x.txt"])
+            self.assertFalse(self.index.is_indexed(other))
+        self.assertEqual(self.index.stats()['misses'], 1)
+
+    def test_stop_forgets_the_index(self):
+        self.index.stop()
+        self.assertEqual(self.index.mode, 'stopped')
+        self.assertFalse(self.index.is_indexed(self.tmp))
+        self.assertEqual(self.names(self.tmp), ["a.txt", "sub"])
+
+    def test_max_entries(self):
+        small = FilesystemIndex(self.tmp, use_inotify=False, max_entries=2, logger=quiet_logger()).start()
+        try:
+            self.assertTrue(small.wait_until_ready(10))
+            self.assertTrue(small.is_indexed(self.tmp))
+            self.assertFalse(small.is_indexed(self.tmp / "sub"))
+            self.assertEqual(small.stats()['entries'], 2)
+            self.assertEqual([r.name for r in small.scan(self.tmp / "sub")], ["deeper"])
+        finally:
+            small.stop()
+
+
+@unittest.skipUnless(Inotify.is_supported(), "inotify is not available")
+class TestFilesystemIndexInotify(_IndexTestCase):
+    USE_INOTIFY = True
+
+    def setUp(self):
+        super().setUp()
+        if self.index.mode != 'inotify':
+            self.skipTest("inotify cannot be initialised here")
+
+    def test_watches_every_directory(self):
+        stats = self.index.stats()
+        self.assertEqual((stats['watches'], stats['staleness_seconds']), (3, 0.0))
+
+    def test_new_file_and_directory(self):
+        version = self.index.listing_version(self.tmp)
+        (self.tmp / "new.txt").write_bytes(b"new")
+        (self.tmp / "newdir").mkdir()
+        self.assertTrue(wait_for(lambda: self.index.is_indexed(self.tmp / "newdir")
+                                 and "new.txt" in self.names(self.tmp)))
+        self.assertNotEqual(self.index.listing_version(self.tmp), version)
+        (self.tmp / "newdir" / "inner.txt").write_bytes(b"")
+        self.assertTrue(wait_for(lambda: self.names(self.tmp / "newdir") == ["inner.txt"]))
+
+    def test_file_content_change_updates_size(self):
+        (self.tmp / "a.txt").write_bytes(b"longer now")
+        self.assertTrue(wait_for(lambda: self.index.is_indexed(self.tmp) and
+                                 self.index.scan(self.tmp)[0].size == len(b"longer now")))
+
+    def test_deleted_and_moved_directories(self):
+        os.rename(self.tmp / "sub", self.tmp / "moved")
+        self.assertTrue(wait_for(lambda: self.index.is_indexed(self.tmp / "moved" / "deeper")
+                                 and not self.index.is_indexed(self.tmp / "sub")))
+        self.assertEqual(self.names(self.tmp / "moved" / "deeper"), ["c.txt"])
+        shutil.rmtree(self.tmp / "moved")
+        self.assertTrue(wait_for(lambda: self.index.stats()['directories'] == 1))
+        self.assertTrue(wait_for(lambda: self.index.stats()['watches'] == 1))
+
+
+@unittest.skipUnless(Inotify.is_supported(), "inotify is not available")
+class TestInotify(unittest.TestCase):
+    def test_reports_created_files(self):
+        with TemporaryDirectory() as td, Inotify() as inotify:
+            wd = inotify.add_watch(td, Inotify.IN_CREATE)
+            self.assertEqual(inotify.read_events(0), [])
+            (Path(td) / "x.txt").write_bytes(b"")
+            events = inotify.read_events(5)
+            self.assertEqual([(e.wd, e.name) for e in events], [(wd, "x.txt")])
+            self.assertTrue(events[0].mask & Inotify.IN_CREATE)
+
+    def test_missing_directory_raises(self):
+        with TemporaryDirectory() as td, Inotify() as inotify:
+            with self.assertRaises(FileNotFoundError):
+                inotify.add_watch(os.path.join(td, "missing"), Inotify.IN_CREATE)
+
+
+class TestHandlerWithIndex(unittest.TestCase):
+    def test_listings_are_served_from_the_index(self):
+        with TemporaryDirectory() as td:
+            (Path(td) / "indexed.txt").write_bytes(b"x")
+            index = FilesystemIndex(td, use_inotify=False, logger=quiet_logger()).start()
+            try:
+                self.assertTrue(index.wait_until_ready(10))
+                with RunningServer(PrettyDirectoryHandler, td, directory_scanner=index) as server:
+                    status, headers, body = server.request('GET', '/')
+                    self.assertEqual(status, 200)
+                    self.assertIn(b"indexed.txt", body)
+                    self.assertEqual(server.request('GET', '/', headers={'If-None-Match': headers['ETag']})[0], 304)
+                self.assertEqual(index.stats()['hits'], 1)
+            finally:
+                index.stop()
+
+    def test_server_builds_and_reports_the_index(self):
+        with TemporaryDirectory() as td:
+            server = EasyHTTPServer(td, host="127.0.0.1", port=0, logger=quiet_logger(), metrics=True,
+                                    filesystem_index=True, index_use_inotify=False, index_rescan_interval=5)
+            self.assertEqual((server.filesystem_index.root, server.filesystem_index.rescan_interval),
+                             (os.path.abspath(td), 5))
+            server._start_filesystem_index()
+            try:
+                self.assertTrue(server.filesystem_index.wait_until_ready(10))
+                page = server.metrics.render().decode('utf-8')
+            finally:
+                server._stop_filesystem_index()
+        self.assertIn('easyhttp_cache_entries{cache="index"} 0', page)
+        self.assertIn('easyhttp_cache_staleness_seconds{cache="index"}', page)
+        self.assertIsNone(EasyHTTPServer('.', logger=quiet_logger()).filesystem_index)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+import re
+import socket
+import time
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from EasyHTTPServerAJM.CustomHandlers import PrettyDirectoryHandler, UploadPrettyDirectoryHandler
+from EasyHTTPServerAJM.ServerEngines import AsyncioHTTPServer
+from _server_harness import RunningServer
+from test_multipart_parser import BOUNDARY, build_form
+
+
+class TestKeepAlive(unittest.TestCase):
+    def setUp(self):
+        self._td = TemporaryDirectory()
+        self.root = Path(self._td.name)
+        (self.root / "sub").mkdir()
+        (self.root / "a.txt").write_text("hello")
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def _exchange(self, conn, method, path, body=None, headers=None):
+        conn.request(method, path, body=body, headers=headers or {})
+        resp = conn.getresponse()
+        return resp.status, resp.headers, resp.read()
+
+    def test_every_response_path_reuses_the_connection(self):
+        with RunningServer(PrettyDirectoryHandler, self.root) as srv:
+            conn = srv.connection()
+            try:
+                status, headers, body = self._exchange(conn, "GET", "/")
+                self.assertEqual(status, 200)
+                self.assertEqual(int(headers["Content-Length"]), len(body))
+                sock = conn.sock
+                etag = headers["ETag"]
+
+                requests = [("HEAD", "/", {}, 200, b""),
+                            ("GET", "/", {"If-None-Match": etag}, 304, b""),
+                            ("GET", "/sub", {}, 301, b""),
+                            ("GET", "/a.txt", {"Range": "bytes=1-2"}, 206, b"el"),
+                            ("GET", "/a.txt", {}, 200, b"hello")]
+                for method, path, headers, expected_status, expected_body in requests:
+                    status, _, body = self._exchange(conn, method, path, headers=headers)
+                    self.assertEqual((status, body), (expected_status, expected_body), path)
+                    self.assertIs(conn.sock, sock)
+            finally:
+                conn.close()
+
+    def test_upload_response_keeps_the_connection(self):
+        form = build_form(("file", "up.txt", b"uploaded"))
+        with RunningServer(UploadPrettyDirectoryHandler, self.root) as srv:
+            conn = srv.connection()
+            try:
+                status, _, page = self._exchange(conn, "POST", "/sub/", body=form, headers={
+                    "Content-Type": f"multipart/form-data; boundary={BOUNDARY}"})
+                self.assertEqual(status, 200)
+                self.assertIn(b"Uploaded up.txt", page)
+                sock = conn.sock
+                status, _, body = self._exchange(conn, "GET", "/sub/up.txt")
+                self.assertEqual((status, body), (200, b"uploaded"))
+                self.assertIs(conn.sock, sock)
+            finally:
+                conn.close()
+
+    def test_rejected_upload_closes_the_connection(self):
+        with RunningServer(UploadPrettyDirectoryHandler, self.root) as srv:
+            status, headers, _ = srv.request("POST", "/sub/", body=b"x" * 100,
+                                             headers={"Content-Type": "text/plain"})
+        self.assertEqual(status, 400)
+        self.assertEqual(headers["Connection"], "close")
+
+    def _check_request_limit(self, **kwargs):
+        with RunningServer(PrettyDirectoryHandler, self.root, max_keep_alive_requests=2, **kwargs) as srv:
+            conn = srv.connection()
+            try:
+                _, headers, _ = self._exchange(conn, "GET", "/a.txt")
+                self.assertIsNone(headers["Connection"])
+                _, headers, body = self._exchange(conn, "GET", "/a.txt")
+                self.assertEqual(headers.get_all("Connection"), ["close"])
+                self.assertEqual(body, b"hello")
+                self.assertIsNone(conn.sock)
+            finally:
+                conn.close()
+
+    def test_connection_closes_after_max_requests(self):
+        self._check_request_limit()
+
+    def test_asyncio_engine_honours_max_requests(self):
+        self._check_request_limit(server_class=AsyncioHTTPServer)
+
+    def test_idle_connection_is_closed(self):
+        with RunningServer(PrettyDirectoryHandler, self.root, keep_alive_timeout=0.2) as srv:
+            with socket.create_connection(("127.0.0.1", srv.port), timeout=5) as sock:
+                sock.sendall(b"GET /a.txt HTTP/1.1\r\nHost: localhost\r\n\r\n")
+                time.sleep(0.6)
+                received = b""
+                while True:
+                    data = sock.recv(65536)
+                    if not data:
+                        break
+                    received += data
+        self.assertTrue(received.startswith(b"HTTP/1.1 200"))
+        self.assertTrue(received.endswith(b"hello"))
+
+    SMUGGLED = b"GET /smuggled HTTP/1.1\r\nHost: localhost\r\n\r\n"
+
+    def _pipeline_statuses(self, head: bytes, body: bytes, **kwargs) -> list:
+        """Send ``head`` with ``body`` and then a plain GET on one connection; return every status answered."""
+        request = head + f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+        follow_up = b"GET /a.txt HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n"
+        with RunningServer(UploadPrettyDirectoryHandler, self.root, **kwargs) as srv:
+            with socket.create_connection(("127.0.0.1", srv.port), timeout=5) as sock:
+                sock.sendall(request + follow_up)
+                received = b""
+                while True:
+                    try:
+                        data = sock.recv(65536)
+                    except ConnectionResetError:
+                        break
+                    if not data:
+                        break
+                    received += data
+        return [int(status) for status in re.findall(rb"^HTTP/1\.1 (\d{3}) ", received, re.M)]
+
+    def test_unread_request_body_is_never_served_as_a_request(self):
+        options = b"OPTIONS /sub/ HTTP/1.1\r\nHost: localhost\r\nTus-Resumable: 1.0.0\r\n"
+        wrong_version = b"POST /sub/ HTTP/1.1\r\nHost: localhost\r\nTus-Resumable: 0.2.0\r\n"
+        for server_kwargs in ({}, {'server_class': AsyncioHTTPServer}):
+            with self.subTest(**server_kwargs):
+                # a small body is read and dropped, and the connection carries on
+                self.assertEqual(self._pipeline_statuses(options, self.SMUGGLED, **server_kwargs), [204, 200])
+                self.assertEqual(self._pipeline_statuses(wrong_version, self.SMUGGLED, **server_kwargs), [412])
+                # a large one closes the connection instead
+                padding = b"x" * (PrettyDirectoryHandler.MAX_DRAIN_BYTES + 1)
+                self.assertEqual(self._pipeline_statuses(options, self.SMUGGLED + padding, **server_kwargs), [204])
+
+    def test_keep_alive_can_be_disabled(self):
+        with RunningServer(PrettyDirectoryHandler, self.root, keep_alive=False) as srv:
+            conn = srv.connection()
+            try:
+                conn.request("GET", "/a.txt")
+                resp = conn.getresponse()
+                self.assertEqual(resp.version, 10)
+                self.assertEqual(resp.read(), b"hello")
+                self.assertIsNone(conn.sock)
+            finally:
+                conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
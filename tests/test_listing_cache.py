@@ -0,0 +1,96 @@
+import os
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import sleep
+
+from EasyHTTPServerAJM.CustomHandlers import PrettyDirectoryHandler, UploadPrettyDirectoryHandler
+from EasyHTTPServerAJM.Helpers import ListingCache
+from _server_harness import RunningServer
+
+
+class TestListingCache(unittest.TestCase):
+    def test_get_put_and_counters(self):
+        cache = ListingCache(max_bytes=100)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", b"x" * 10)
+        self.assertEqual(cache.get("a"), b"x" * 10)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(cache.current_bytes, 10)
+
+    def test_lru_eviction_by_byte_budget(self):
+        cache = ListingCache(max_bytes=30)
+        cache.put("a", b"a" * 10)
+        cache.put("b", b"b" * 10)
+        cache.put("c", b"c" * 10)
+        cache.get("a")  # "b" is now the least recently used
+        cache.put("d", b"d" * 10)
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertEqual(cache.evictions, 1)
+        self.assertLessEqual(cache.current_bytes, 30)
+
+    def test_oversized_values_are_not_cached(self):
+        cache = ListingCache(max_bytes=5)
+        cache.put("a", b"too large")
+        self.assertEqual(len(cache), 0)
+
+    def test_max_age_expires_entries(self):
+        cache = ListingCache(max_age=0.01)
+        cache.put("a", b"a")
+        sleep(0.05)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.current_bytes, 0)
+
+
+class TestHandlerListingCache(unittest.TestCase):
+    def setUp(self):
+        self._td = TemporaryDirectory()
+        self.root = Path(self._td.name)
+        (self.root / "one.txt").write_text("1", encoding="utf-8")
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def test_second_listing_is_served_from_cache(self):
+        cache = ListingCache()
+        with RunningServer(PrettyDirectoryHandler, self.root, listing_cache=cache) as srv:
+            first = srv.request("GET", "/")
+            second = srv.request("GET", "/")
+        self.assertEqual(first[0], 200)
+        self.assertEqual(first[2], second[2])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_directory_change_invalidates(self):
+        cache = ListingCache()
+        with RunningServer(PrettyDirectoryHandler, self.root, listing_cache=cache) as srv:
+            srv.request("GET", "/")
+            (self.root / "two.txt").write_text("2", encoding="utf-8")
+            st = os.stat(self.root)
+            # make sure the directory mtime moves even on coarse-grained filesystems
+            os.utime(self.root, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+            status, _, body = srv.request("GET", "/")
+        self.assertEqual(status, 200)
+        self.assertIn(b"two.txt", body)
+        self.assertEqual(cache.hits, 0)
+
+    def test_upload_message_bypasses_cache(self):
+        cache = ListingCache()
+        boundary = "testboundary"
+        body = (f"--{boundary}\r\n"
+                f"Content-Disposition: form-data; name=\"file\"; filename=\"up.txt\"\r\n"
+                f"Content-Type: text/plain\r\n\r\n"
+                f"uploaded\r\n"
+                f"--{boundary}--\r\n").encode()
+        headers = {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+        with RunningServer(UploadPrettyDirectoryHandler, self.root, listing_cache=cache) as srv:
+            srv.request("GET", "/")
+            status, _, page = srv.request("POST", "/", body=body, headers=headers)
+        self.assertEqual(status, 200)
+        self.assertIn(b"Uploaded up.txt", page)
+        self.assertEqual(len(cache), 1)
+        self.assertTrue((self.root / "up.txt").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
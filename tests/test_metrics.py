@@ -0,0 +1,138 @@
+import http.client
+import re
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import monotonic, sleep
+
+from EasyHTTPServerAJM import EasyHTTPServer
+from EasyHTTPServerAJM.CustomHandlers import PrettyDirectoryHandler, UploadPrettyDirectoryHandler
+from EasyHTTPServerAJM.Helpers import ListingCache, ServerMetrics
+from EasyHTTPServerAJM.ServerEngines import BoundedThreadPoolHTTPServer
+from _server_harness import RunningServer, quiet_logger
+from test_multipart_parser import BOUNDARY, build_form
+
+
+def parse_samples(text: str) -> dict:
+    """Map 'name{labels}' -> value for every sample line of a Prometheus text page."""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = float(value)
+    return samples
+
+
+class TestServerMetrics(unittest.TestCase):
+    def test_render(self):
+        metrics = ServerMetrics(buckets=(0.01, 0.1), const_labels={'worker': '0'})
+        cache = ListingCache(max_bytes=1000)
+        cache.put('a', b'x')
+        cache.get('a')
+        cache.get('b')
+        metrics.add_cache('listing', cache)
+        for seconds in (0.005, 0.05, 0.5):
+            metrics.request_started()
+            metrics.request_finished('GET', 200, 'listing', seconds, bytes_out=10)
+        metrics.request_started()
+        metrics.request_finished('BREW', 501, 'other', 0.001, bytes_in=5)
+
+        page = metrics.render().decode('utf-8')
+        self.assertIn('# TYPE easyhttp_request_duration_seconds histogram', page)
+        samples = parse_samples(page)
+        self.assertEqual(samples['easyhttp_requests_total{worker="0",method="GET",status="200",route="listing"}'], 3)
+        self.assertEqual(samples['easyhttp_requests_total{worker="0",method="other",status="501",route="other"}'], 1)
+        self.assertEqual(samples['easyhttp_request_duration_seconds_bucket{worker="0",route="listing",le="0.01"}'], 1)
+        self.assertEqual(samples['easyhttp_request_duration_seconds_bucket{worker="0",route="listing",le="0.1"}'], 2)
+        self.assertEqual(samples['easyhttp_request_duration_seconds_bucket{worker="0",route="listing",le="+Inf"}'], 3)
+        self.assertAlmostEqual(samples['easyhttp_request_duration_seconds_sum{worker="0",route="listing"}'], 0.555)
+        self.assertEqual(samples['easyhttp_response_bytes_total{worker="0"}'], 30)
+        self.assertEqual(samples['easyhttp_request_bytes_total{worker="0"}'], 5)
+        self.assertEqual(samples['easyhttp_requests_in_flight{worker="0"}'], 0)
+        self.assertEqual(samples['easyhttp_cache_hit_ratio{worker="0",cache="listing"}'], 0.5)
+
+    def test_worker_figures_come_from_the_engine(self):
+        class Engine:
+            max_workers = 4
+            queue_depth = 2
+            rejected = 7
+            active_connections = 3
+
+        metrics = ServerMetrics()
+        metrics.bind_server(Engine())
+        metrics.request_started()
+        samples = parse_samples(metrics.render().decode('utf-8'))
+        self.assertEqual(samples['easyhttp_worker_utilization'], 0.25)
+        self.assertEqual(samples['easyhttp_pending_connections'], 2)
+        self.assertEqual(samples['easyhttp_rejected_connections_total'], 7)
+        self.assertEqual(samples['easyhttp_active_connections'], 3)
+
+
+class TestMetricsEndpoint(unittest.TestCase):
+    def setUp(self):
+        self._td = TemporaryDirectory()
+        self.root = Path(self._td.name)
+        (self.root / "sub").mkdir()
+        self.payload = b"p" * 100_000
+        (self.root / "payload.bin").write_bytes(self.payload)
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def test_requests_are_counted_by_route(self):
+        metrics = ServerMetrics()
+        form = build_form(("file", "up.txt", b"uploaded"))
+        with RunningServer(UploadPrettyDirectoryHandler, self.root, server_class=BoundedThreadPoolHTTPServer,
+                           metrics=metrics) as srv:
+            metrics.bind_server(srv.httpd)
+            self.assertEqual(srv.request("GET", "/")[0], 200)
+            self.assertEqual(srv.request("GET", "/payload.bin")[2], self.payload)
+            self.assertEqual(srv.request("GET", "/missing.txt")[0], 404)
+            self.assertEqual(srv.request("POST", "/sub/", body=form, headers={
+                "Content-Type": f"multipart/form-data; boundary={BOUNDARY}"})[0], 200)
+            # a request is recorded once its response is out, so the client can get ahead of the counters
+            deadline = monotonic() + 10
+            while True:
+                status, headers, page = srv.request("GET", "/metrics")
+                samples = parse_samples(page.decode('utf-8'))
+                recorded = sum(samples.get(f'easyhttp_request_duration_seconds_count{{route="{route}"}}', 0)
+                               for route in ('listing', 'file', 'upload'))
+                if recorded >= 4 or monotonic() > deadline:
+                    break
+                sleep(0.05)
+        self.assertEqual(status, 200)
+        self.assertTrue(headers["Content-Type"].startswith("text/plain; version=0.0.4"))
+        self.assertEqual(samples['easyhttp_requests_total{method="GET",status="200",route="listing"}'], 1)
+        self.assertEqual(samples['easyhttp_requests_total{method="GET",status="200",route="file"}'], 1)
+        self.assertEqual(samples['easyhttp_requests_total{method="GET",status="404",route="file"}'], 1)
+        self.assertEqual(samples['easyhttp_requests_total{method="POST",status="200",route="upload"}'], 1)
+        self.assertEqual(samples['easyhttp_request_duration_seconds_count{route="file"}'], 2)
+        # sendfile bypasses wfile, its bytes are counted all the same
+        self.assertGreater(samples['easyhttp_response_bytes_total'], len(self.payload))
+        self.assertEqual(samples['easyhttp_request_bytes_total'], len(form))
+        # the scrape itself is in flight while rendering
+        self.assertEqual(samples['easyhttp_requests_in_flight'], 1)
+        self.assertEqual(samples['easyhttp_worker_threads'], BoundedThreadPoolHTTPServer.DEFAULT_MAX_WORKERS)
+
+    def test_no_endpoint_without_metrics_path(self):
+        with RunningServer(PrettyDirectoryHandler, self.root, metrics=ServerMetrics(), metrics_path=None) as srv:
+            self.assertEqual(srv.request("GET", "/metrics")[0], 404)
+
+    def test_metrics_on_their_own_port(self):
+        server = EasyHTTPServer(self.root, host="127.0.0.1", port=0, logger=quiet_logger(), metrics_port=0,
+                                listing_cache_bytes=1024 * 1024)
+        with server._build_httpd(server.engine) as httpd:
+            server._start_metrics(httpd)
+            try:
+                conn = http.client.HTTPConnection('127.0.0.1', server._metrics_httpd.server_address[1], timeout=10)
+                conn.request("GET", "/metrics")
+                page = conn.getresponse().read().decode('utf-8')
+                conn.close()
+            finally:
+                server._stop_metrics()
+        self.assertIsNotNone(re.search(r'^easyhttp_cache_hits_total\{cache="listing"} 0$', page, re.M))
+        self.assertIn('cache="compression"', page)
+
+
+if __name__ == '__main__':
+    unittest.main()
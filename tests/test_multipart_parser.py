@@ -0,0 +1,137 @@
+import io
+import json
+import os
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from EasyHTTPServerAJM.CustomHandlers import UploadPrettyDirectoryHandler
+from EasyHTTPServerAJM.Helpers import MultipartParser, MultipartError, parse_options_header
+from _server_harness import RunningServer
+
+BOUNDARY = "----formboundary7MA4YWxk"
+
+
+def build_form(*parts, boundary=BOUNDARY, preamble=b"", epilogue=b""):
+    body = bytearray(preamble)
+    for name, filename, data in parts:
+        disposition = f'form-data; name="{name}"'
+        if filename is not None:
+            disposition += f'; filename="{filename}"'
+        body += f"--{boundary}\r\nContent-Disposition: {disposition}\r\n".encode()
+        body += b"Content-Type: application/octet-stream\r\n\r\n" + data + b"\r\n"
+    body += f"--{boundary}--\r\n".encode() + epilogue
+    return bytes(body)
+
+
+class TestParseOptionsHeader(unittest.TestCase):
+    def test_content_type(self):
+        self.assertEqual(parse_options_header(f"Multipart/Form-Data; boundary={BOUNDARY}"),
+                         ("multipart/form-data", {"boundary": BOUNDARY}))
+        self.assertEqual(parse_options_header(""), ("", {}))
+
+    def test_quoted_and_extended_filenames(self):
+        _, params = parse_options_header('form-data; name="file"; filename="a; b.txt"', 'content-disposition')
+        self.assertEqual(params, {"name": "file", "filename": "a; b.txt"})
+        _, params = parse_options_header("form-data; filename*=UTF-8''%C3%A9t%C3%A9.txt", 'content-disposition')
+        self.assertEqual(params["filename"], "été.txt")
+
+
+class TestMultipartParser(unittest.TestCase):
+    def _parse(self, body, buffer_size=7):
+        parser = MultipartParser(io.BufferedReader(io.BytesIO(body)), BOUNDARY, len(body), buffer_size=buffer_size)
+        return [(part.name, part.filename, b"".join(part)) for part in parser], parser
+
+    def test_parts_across_tiny_reads(self):
+        payload = os.urandom(5000) + f"\r\n--{BOUNDARY[:-1]}".encode()
+        body = build_form(("comment", None, b"hello"), ("file", "x.bin", payload),
+                          preamble=b"ignore me\r\n", epilogue=b"trailing junk")
+        parts, parser = self._parse(body)
+        self.assertEqual(parts, [("comment", None, b"hello"), ("file", "x.bin", payload)])
+        self.assertEqual(parser.bytes_read, len(body))
+
+    def test_unread_parts_are_skipped(self):
+        body = build_form(("a", "a.txt", b"A" * 1000), ("b", "b.txt", b"B" * 10))
+        parser = MultipartParser(io.BytesIO(body), BOUNDARY, len(body), buffer_size=64)
+        names = [part.name for part in parser]
+        self.assertEqual(names, ["a", "b"])
+        self.assertEqual(parser.bytes_read, len(body))
+
+    def test_empty_part(self):
+        parts, _ = self._parse(build_form(("file", "empty.txt", b"")))
+        self.assertEqual(parts, [("file", "empty.txt", b"")])
+
+    def test_truncated_body(self):
+        body = build_form(("file", "x.bin", b"data" * 100))[:-30]
+        with self.assertRaises(MultipartError):
+            self._parse(body)
+
+    def test_oversized_headers(self):
+        body = f"--{BOUNDARY}\r\nX-Junk: {'a' * (MultipartParser.MAX_HEADER_SIZE + 10)}\r\n\r\n".encode()
+        with self.assertRaises(MultipartError):
+            self._parse(body, buffer_size=4096)
+
+    def test_invalid_boundary(self):
+        with self.assertRaises(MultipartError):
+            MultipartParser(io.BytesIO(b""), "")
+        with self.assertRaises(MultipartError):
+            MultipartParser(io.BytesIO(b""), "x" * 71)
+
+
+class TestStreamingUpload(unittest.TestCase):
+    def setUp(self):
+        self._td = TemporaryDirectory()
+        self.root = Path(self._td.name)
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def _post(self, body, content_type=f"multipart/form-data; boundary={BOUNDARY}"):
+        with RunningServer(UploadPrettyDirectoryHandler, self.root) as srv:
+            return srv.request("POST", "/", body=body, headers={"Content-Type": content_type})
+
+    def test_large_upload_is_written_intact(self):
+        payload = os.urandom(3 * 1024 * 1024 + 17)
+        status, _, page = self._post(build_form(("note", None, b"x"), ("file", "big.bin", payload)))
+        self.assertEqual(status, 200)
+        self.assertIn(b"Uploaded big.bin", page)
+        self.assertEqual((self.root / "big.bin").read_bytes(), payload)
+
+    def test_missing_file_part(self):
+        status, _, page = self._post(build_form(("note", None, b"x")))
+        self.assertEqual(status, 200)
+        self.assertEqual(list(self.root.iterdir()), [])
+
+    def test_truncated_upload_leaves_no_file(self):
+        body = build_form(("file", "cut.bin", os.urandom(200_000)))[:-100]
+        status, _, _ = self._post(body)
+        self.assertEqual(status, 200)
+        self.assertFalse((self.root / "cut.bin").exists())
+
+    def test_many_files_in_one_request(self):
+        files = [(f"f{i}.txt", os.urandom(i * 1000)) for i in range(20)]
+        body = build_form(*[("file", name, data) for name, data in files], ("file", "", b""))
+        status, _, page = self._post(body)
+        self.assertEqual(status, 200)
+        self.assertIn(b"Uploaded 20 file(s)", page)
+        for name, data in files:
+            self.assertEqual((self.root / name).read_bytes(), data)
+
+    def test_json_summary(self):
+        body = build_form(("file", "a.txt", b"aaa"), ("file", "a.txt", b"bb"))
+        with RunningServer(UploadPrettyDirectoryHandler, self.root) as srv:
+            status, headers, raw = srv.request("POST", "/", body=body, headers={
+                "Content-Type": f"multipart/form-data; boundary={BOUNDARY}", "Accept": "application/json"})
+        self.assertEqual((status, headers["Content-Type"]), (200, "application/json"))
+        summary = json.loads(raw)
+        self.assertEqual([(u["filename"], u["size"]) for u in summary["uploaded"]], [("a.txt", 3), ("a.txt", 2)])
+        self.assertEqual(summary["uploaded"][1]["path"], "a (1).txt")
+        self.assertEqual(summary["failed"], [])
+
+    def test_unsupported_content_type(self):
+        status, _, _ = self._post(b"a=b", content_type="application/x-www-form-urlencoded")
+        self.assertEqual(status, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
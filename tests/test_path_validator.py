@@ -4,6 +4,7 @@ from tempfile import TemporaryDirectory
 
 from EasyHTTPServerAJM.Helpers.path_validator import PathValidator, CandidatePathNotSetError
 from EasyHTTPServerAJM.Helpers.enum import PathValidationType
+from EasyHTTPServerAJM.Helpers.stat_cache import StatCache
 
 
 class TestPathValidator(unittest.TestCase):
@@ -57,6 +58,64 @@ class TestPathValidator(unittest.TestCase):
             self.assertFalse(pv.is_resolved_to_css)
             self.assertFalse(pv.is_resolved_to_svg)
 
+    def test_flags_are_settable(self):
+        pv = PathValidator()
+        pv.is_resolved_to_css = True
+        self.assertTrue(pv.is_resolved_to(PathValidationType.CSS))
+        self.assertFalse(pv.is_resolved_to_dir)
+        pv.set_is_resolved_to_attr(PathValidationType.CSS, False)
+        self.assertFalse(pv.is_resolved_to_css)
+        with self.assertRaises(AttributeError):
+            pv.is_resolved_to_nothing = True
+
+    def test_validate_many(self):
+        with TemporaryDirectory() as td:
+            tmpdir = Path(td)
+            (tmpdir / "style.css").write_text("body {}", encoding="utf-8")
+            pv = PathValidator(candidate_path=tmpdir, candidate_path_validation_type=PathValidationType.DIR,
+                               stat_cache=StatCache())
+            pv.resolve_flags()
+            results = pv.validate_many([(tmpdir, PathValidationType.DIR),
+                                        (str(tmpdir / "style.css"), 'css'),
+                                        (tmpdir / "style.css", PathValidationType.HTML),
+                                        (tmpdir / "missing.svg", PathValidationType.SVG)])
+            self.assertEqual(results, [True, True, False, False])
+            # the candidate path is left alone
+            self.assertEqual(pv.candidate_path, tmpdir.resolve())
+            self.assertTrue(pv.validate())
+
+    def test_validate_many_stats_each_path_once(self):
+        with TemporaryDirectory() as td:
+            css_f = Path(td) / "style.css"
+            css_f.write_text("body {}", encoding="utf-8")
+            cache = StatCache()
+            pv = PathValidator(stat_cache=cache)
+            self.assertEqual(pv.validate_many([(css_f, 'css'), (css_f, 'file'), (str(css_f), 'css')]),
+                             [True, False, True])
+            self.assertEqual(cache.stats()['entries'], 1)
+            misses = cache.misses
+            self.assertEqual(pv.validate_many([(css_f, 'css')]), [True])
+            self.assertEqual(cache.misses, misses)
+
+    def test_stat_cache_ttl(self):
+        with TemporaryDirectory() as td:
+            f = Path(td) / "late.txt"
+            cache = StatCache(ttl=60)
+            self.assertIsNone(cache.stat(f))
+            f.write_text("data", encoding="utf-8")
+            # cached for the ttl, until invalidated
+            self.assertIsNone(cache.stat(f))
+            cache.invalidate(f)
+            self.assertIsNotNone(cache.stat(f))
+            self.assertIsNotNone(StatCache(ttl=0).stat(f))
+
+    def test_stat_cache_max_entries(self):
+        with TemporaryDirectory() as td:
+            cache = StatCache(ttl=60, max_entries=4)
+            for i in range(10):
+                cache.stat(Path(td) / f"f{i}")
+            self.assertLessEqual(cache.stats()['entries'], 4)
+
 
 if __name__ == "__main__":
     unittest.main()
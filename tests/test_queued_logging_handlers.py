@@ -0,0 +1,128 @@
+import logging
+import os
+import unittest
+from unittest import mock
+from pathlib import Path
+from queue import Queue
+from tempfile import TemporaryDirectory
+from threading import Event
+
+from EasyHTTPServerAJM import EasyHTTPLogger
+from EasyHTTPServerAJM.logger import BoundedQueueHandler, SanitizedArgsFilter
+
+
+class ListHandler(logging.Handler):
+    def __init__(self, block: Event = None):
+        super().__init__()
+        self.messages = []
+        self.block = block
+
+    def emit(self, record):
+        if self.block is not None:
+            self.block.wait(10)
+        self.messages.append(record.getMessage())
+
+
+class TestBoundedQueueHandler(unittest.TestCase):
+    def _record(self, msg, *args) -> logging.LogRecord:
+        return logging.LogRecord('test', logging.INFO, __file__, 1, msg, args, None)
+
+    def test_drop_newest(self):
+        handler = BoundedQueueHandler(Queue(2))
+        for i in range(4):
+            handler.handle(self._record("message %d", i))
+        self.assertEqual(handler.dropped, 2)
+        self.assertEqual([handler.queue.get_nowait().getMessage() for _ in range(2)], ["message 0", "message 1"])
+
+    def test_drop_oldest(self):
+        handler = BoundedQueueHandler(Queue(2), BoundedQueueHandler.DROP_OLDEST)
+        for i in range(4):
+            handler.handle(self._record("message %d", i))
+        self.assertEqual(handler.dropped, 2)
+        self.assertEqual([handler.queue.get_nowait().getMessage() for _ in range(2)], ["message 2", "message 3"])
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            BoundedQueueHandler(Queue(2), 'drop_everything')
+
+    def test_records_are_formatted_by_the_listener(self):
+        release = Event()
+        target = ListHandler(block=release)
+        handler = BoundedQueueHandler(Queue(100))
+        handler.start_listener(target)
+        try:
+            handler.handle(self._record("lazy %s", "argument"))
+            # the logging thread does not wait for the slow handler
+            self.assertEqual(target.messages, [])
+        finally:
+            release.set()
+            handler.close()
+        self.assertEqual(target.messages, ["lazy argument"])
+        self.assertIsNone(handler.listener)
+
+    def test_sanitized_args_filter(self):
+        record = self._record("name %s", "café ✓")
+        self.assertTrue(SanitizedArgsFilter().filter(record))
+        self.assertEqual((record.msg, record.args), ("name café ", None))
+
+
+class TestEasyHTTPLoggerQueue(unittest.TestCase):
+    def setUp(self):
+        self._td = TemporaryDirectory()
+        self.addCleanup(self._td.cleanup)
+
+    def _make_logger(self, name: str, **kwargs) -> EasyHTTPLogger:
+        easy_logger = EasyHTTPLogger(root_log_location=self._td.name, logger_name=f'EasyHTTPServerAJM.tests.{name}',
+                                     show_warning_logs_in_console=False, **kwargs)
+        self.addCleanup(self._close_handlers, easy_logger)
+        return easy_logger
+
+    @staticmethod
+    def _close_handlers(easy_logger: EasyHTTPLogger):
+        easy_logger.stop_queue_logging()
+        for handler in list(easy_logger.logger.handlers):
+            easy_logger.logger.removeHandler(handler)
+            handler.close()
+
+    def _read_log(self, level: str) -> str:
+        return ''.join(p.read_text() for p in Path(self._td.name).rglob(f'{level}-*.log'))
+
+    def test_queue_logging(self):
+        easy_logger = self._make_logger('queued', queue_logging=True)
+        logger = easy_logger()
+        self.assertEqual([type(h) for h in logger.handlers], [BoundedQueueHandler])
+        self.assertTrue(easy_logger.queue_listener is not None)
+        logger.info("queued %s", "message")
+        logger.debug("queued debug")
+        easy_logger.stop_queue_logging()
+        self.assertNotIn(easy_logger.queue_handler, logger.handlers)
+        self.assertIn("queued message", self._read_log('INFO'))
+        self.assertIn("queued debug", self._read_log('DEBUG'))
+
+    @unittest.skipUnless(hasattr(os, 'register_at_fork'), "needs os.register_at_fork")
+    def test_restarting_queue_logging_registers_the_fork_hook_once(self):
+        with mock.patch.object(os, 'register_at_fork') as register_at_fork:
+            easy_logger = self._make_logger('restarted', queue_logging=True)
+            easy_logger.stop_queue_logging()
+            easy_logger.start_queue_logging()
+        self.assertIsNotNone(easy_logger.queue_listener)
+        self.assertEqual(register_at_fork.call_count, 1)
+
+    def test_debug_disabled_without_debug_handler(self):
+        logger = self._make_logger('nodebug', file_logger_levels=['INFO', 'ERROR'])()
+        self.assertFalse(logger.isEnabledFor(logging.DEBUG))
+        self.assertTrue(logger.isEnabledFor(logging.INFO))
+
+        class Exploding:
+            def __str__(self):
+                raise AssertionError("a disabled debug message was formatted")
+
+        logger.debug("never formatted %s", Exploding())
+
+    def test_debug_enabled_by_default(self):
+        logger = self._make_logger('debug')()
+        self.assertTrue(logger.isEnabledFor(logging.DEBUG))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import logging
+import unittest
+from pathlib import Path
+from queue import Queue
+from tempfile import TemporaryDirectory
+from time import sleep
+
+from EasyHTTPServerAJM.CustomHandlers import PrettyDirectoryHandler, UploadPrettyDirectoryHandler
+from EasyHTTPServerAJM.Helpers import RequestTimingHook, RequestTimings, SlowRequestLogHook
+from _server_harness import RunningServer
+from test_multipart_parser import BOUNDARY, build_form
+
+
+class CollectingHook(RequestTimingHook):
+    def __init__(self):
+        self.completed = Queue()
+
+    def on_request_complete(self, timings):
+        self.completed.put(timings)
+
+    def next(self) -> RequestTimings:
+        # hooks run once the response is out, so wait for them rather than racing the server thread
+        return self.completed.get(timeout=10)
+
+
+class TestRequestTimings(unittest.TestCase):
+    def test_nested_phases_are_exclusive(self):
+        timings = RequestTimings('GET', '/')
+        with timings.phase('render'):
+            sleep(0.02)
+            for _ in range(2):
+                with timings.phase('stat'):
+                    sleep(0.01)
+        timings.finish()
+        self.assertEqual(list(timings.phases), ['render', 'stat'])
+        self.assertGreaterEqual(timings.phases['stat'], 0.02)
+        self.assertGreaterEqual(timings.phases['render'], 0.02)
+        self.assertLess(timings.phases['render'], 0.02 + timings.phases['stat'])
+        self.assertLessEqual(sum(timings.phases.values()), timings.total)
+
+    def test_finish_ends_running_phases(self):
+        timings = RequestTimings()
+        timings.start('send')
+        timings.finish()
+        self.assertIn('send', timings.phases)
+        self.assertRegex(timings.server_timing(), r'^send;dur=\d+\.\d{3}$')
+
+    def test_slow_request_log_hook(self):
+        logger = logging.getLogger('EasyHTTPServerAJM.tests.slow')
+        timings = RequestTimings('GET', '/big/')
+        timings.add('listing', 0.5)
+        timings.finish()
+        with self.assertLogs(logger, 'WARNING') as logs:
+            SlowRequestLogHook(0, logger=logger).on_request_complete(timings)
+        self.assertIn('GET /big/', logs.output[0])
+        self.assertIn('listing 500ms', logs.output[0])
+
+
+class TestHandlerTimings(unittest.TestCase):
+    def setUp(self):
+        self._td = TemporaryDirectory()
+        self.root = Path(self._td.name)
+        for i in range(20):
+            (self.root / f"file_{i}.txt").write_text("x" * i)
+        (self.root / "sub").mkdir()
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def test_listing_phases(self):
+        hook = CollectingHook()
+        with RunningServer(PrettyDirectoryHandler, self.root, timing_hooks=[hook]) as srv:
+            status, headers, _ = srv.request("GET", "/")
+            timings = hook.next()
+        self.assertEqual(status, 200)
+        self.assertNotIn("Server-Timing", headers)
+        self.assertEqual((timings.method, timings.path, timings.status), ('GET', '/', 200))
+        for phase in ('init', 'translate', 'listing', 'stat', 'render', 'encode', 'send'):
+            self.assertIn(phase, timings.phases)
+        # building the handler happens before the request starts
+        self.assertLessEqual(sum(timings.phases.values()) - timings.phases['init'], timings.total)
+
+    def test_streamed_listing_phases(self):
+        hook = CollectingHook()
+        with RunningServer(PrettyDirectoryHandler, self.root, timing_hooks=[hook], stream_threshold=5,
+                           stream_batch_size=4) as srv:
+            self.assertEqual(srv.request("GET", "/")[0], 200)
+            timings = hook.next()
+        for phase in ('listing', 'stat', 'render', 'send'):
+            self.assertIn(phase, timings.phases)
+
+    def test_file_phases(self):
+        hook = CollectingHook()
+        with RunningServer(PrettyDirectoryHandler, self.root, timing_hooks=[hook]) as srv:
+            self.assertEqual(srv.request("GET", "/file_5.txt")[2], b"xxxxx")
+            timings = hook.next()
+        for phase in ('translate', 'open', 'send'):
+            self.assertIn(phase, timings.phases)
+        self.assertNotIn('listing', timings.phases)
+
+    def test_upload_phases(self):
+        hook = CollectingHook()
+        form = build_form(("file", "up.txt", b"uploaded" * 1000))
+        with RunningServer(UploadPrettyDirectoryHandler, self.root, timing_hooks=[hook]) as srv:
+            status = srv.request("POST", "/sub/", body=form, headers={
+                "Content-Type": f"multipart/form-data; boundary={BOUNDARY}", "Accept": "application/json"})[0]
+            timings = hook.next()
+        self.assertEqual(status, 200)
+        self.assertEqual((timings.method, timings.status), ('POST', 200))
+        self.assertIn('parse', timings.phases)
+        self.assertIn('write', timings.phases)
+
+    def test_server_timing_header(self):
+        with RunningServer(PrettyDirectoryHandler, self.root, server_timing=True) as srv:
+            _, headers, _ = srv.request("GET", "/")
+            not_found = srv.request("GET", "/missing.txt")[1]
+        names = [metric.split(';')[0] for metric in headers["Server-Timing"].split(', ')]
+        self.assertIn('listing', names)
+        self.assertIn('render', names)
+        # the body is sent after the headers
+        self.assertNotIn('send', names)
+        self.assertIn('translate', not_found["Server-Timing"])
+
+    def test_failing_hook_does_not_break_requests(self):
+        hook = CollectingHook()
+
+        def broken(timings):
+            raise RuntimeError("broken hook")
+
+        with RunningServer(PrettyDirectoryHandler, self.root, timing_hooks=[broken, hook]) as srv:
+            self.assertEqual(srv.request("GET", "/")[0], 200)
+            self.assertEqual(hook.next().status, 200)
+            self.assertEqual(srv.request("GET", "/sub/")[0], 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
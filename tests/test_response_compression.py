@@ -0,0 +1,142 @@
+import gzip
+import os
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from EasyHTTPServerAJM.CustomHandlers import PrettyDirectoryHandler
+from EasyHTTPServerAJM.Helpers import ContentEncoder, ListingCache
+from _server_harness import RunningServer
+
+
+class TestContentEncoder(unittest.TestCase):
+    def setUp(self):
+        self.encoder = ContentEncoder(encodings=('gzip',))
+
+    def test_negotiate(self):
+        self.assertEqual(self.encoder.negotiate("gzip, deflate"), "gzip")
+        self.assertEqual(self.encoder.negotiate("x-gzip"), "gzip")
+        self.assertEqual(self.encoder.negotiate("*"), "gzip")
+        self.assertIsNone(self.encoder.negotiate("identity"))
+        self.assertIsNone(self.encoder.negotiate("gzip;q=0"))
+        self.assertIsNone(self.encoder.negotiate("*;q=0, br"))
+        self.assertIsNone(self.encoder.negotiate(None))
+
+    def test_compressible(self):
+        self.assertTrue(self.encoder.is_compressible("text/html"))
+        self.assertTrue(self.encoder.is_compressible("application/json", 4096))
+        self.assertFalse(self.encoder.is_compressible("text/plain", 10))
+        self.assertFalse(self.encoder.is_compressible("image/png", 4096))
+
+    def test_compress_and_cached_variant(self):
+        data = b"abc" * 1000
+        compressed = self.encoder.compress(data, "gzip", key="k")
+        self.assertEqual(gzip.decompress(compressed), data)
+        self.assertIs(self.encoder.cached_variant("k", "gzip"), compressed)
+        self.assertIsNone(self.encoder.cached_variant("other", "gzip"))
+
+
+class TestCompressedResponses(unittest.TestCase):
+    def setUp(self):
+        self._td = TemporaryDirectory()
+        self.root = Path(self._td.name)
+        self.text = ("line of text\n" * 2000).encode()
+        (self.root / "notes.txt").write_bytes(self.text)
+        (self.root / "image.png").write_bytes(os.urandom(4096))
+        self.encoder = ContentEncoder(encodings=('gzip',))
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def _get(self, path, headers=None):
+        with RunningServer(PrettyDirectoryHandler, self.root, content_encoder=self.encoder) as srv:
+            return srv.request("GET", path, headers=headers)
+
+    def test_text_file_is_gzipped(self):
+        status, headers, body = self._get("/notes.txt", {"Accept-Encoding": "gzip"})
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertEqual(headers["Vary"], "Accept-Encoding")
+        self.assertEqual(int(headers["Content-Length"]), len(body))
+        self.assertEqual(gzip.decompress(body), self.text)
+        self.assertTrue(headers["ETag"].endswith('-gzip"'))
+
+    def test_identity_when_not_accepted_or_ranged(self):
+        status, headers, body = self._get("/notes.txt")
+        self.assertEqual((status, body), (200, self.text))
+        self.assertIsNone(headers["Content-Encoding"])
+        self.assertEqual(headers["Vary"], "Accept-Encoding")
+
+        status, headers, body = self._get("/notes.txt", {"Accept-Encoding": "gzip", "Range": "bytes=0-3"})
+        self.assertEqual((status, body), (206, self.text[:4]))
+        self.assertIsNone(headers["Content-Encoding"])
+
+    def test_binary_types_are_not_compressed(self):
+        status, headers, _ = self._get("/image.png", {"Accept-Encoding": "gzip"})
+        self.assertEqual(status, 200)
+        self.assertIsNone(headers["Content-Encoding"])
+        self.assertIsNone(headers["Vary"])
+
+    def test_fresh_sidecar_is_preferred(self):
+        sidecar = self.root / "notes.txt.gz"
+        sidecar.write_bytes(gzip.compress(b"from the sidecar"))
+        _, headers, body = self._get("/notes.txt", {"Accept-Encoding": "gzip"})
+        self.assertEqual(gzip.decompress(body), b"from the sidecar")
+
+        # a sidecar older than the original is ignored
+        mtime = (self.root / "notes.txt").stat().st_mtime
+        os.utime(sidecar, (mtime - 60, mtime - 60))
+        _, headers, body = self._get("/notes.txt", {"Accept-Encoding": "gzip"})
+        self.assertEqual(gzip.decompress(body), self.text)
+
+    def test_encoded_etag_gets_304(self):
+        with RunningServer(PrettyDirectoryHandler, self.root, content_encoder=self.encoder) as srv:
+            etag = srv.request("GET", "/notes.txt", headers={"Accept-Encoding": "gzip"})[1]["ETag"]
+            status, _, body = srv.request("GET", "/notes.txt",
+                                          headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+        self.assertEqual((status, body), (304, b""))
+
+    def test_listing_is_compressed_and_cached(self):
+        for name in range(50):
+            (self.root / f"file-{name}.txt").write_text("x", encoding="utf-8")
+        # compressed listings are only reused for pages that come from the listing cache
+        with RunningServer(PrettyDirectoryHandler, self.root, content_encoder=self.encoder,
+                           listing_cache=ListingCache()) as srv:
+            _, plain_headers, plain = srv.request("GET", "/")
+            status, headers, body = srv.request("GET", "/", headers={"Accept-Encoding": "gzip"})
+            srv.request("GET", "/", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertNotEqual(headers["ETag"], plain_headers["ETag"])
+        self.assertLess(len(body), len(plain))
+        self.assertEqual(gzip.decompress(body), plain)
+        self.assertEqual(self.encoder.variant_cache.hits, 1)
+
+    def test_compressed_listing_shows_files_rewritten_in_place(self):
+        gzipped = {"Accept-Encoding": "gzip"}
+        directory_times = (self.root.stat().st_atime_ns, self.root.stat().st_mtime_ns)
+        with RunningServer(PrettyDirectoryHandler, self.root, content_encoder=self.encoder) as srv:
+            before = gzip.decompress(srv.request("GET", "/", headers=gzipped)[2])
+            (self.root / "notes.txt").write_bytes(b"rewritten")
+            # the listing shows times to the second, make the rewrite visible in it
+            os.utime(self.root / "notes.txt", (1_000_000_000, 1_000_000_000))
+            # a rewrite does not touch the directory, so the listing keeps its validator
+            os.utime(self.root, ns=directory_times)
+            after = gzip.decompress(srv.request("GET", "/", headers=gzipped)[2])
+            plain = srv.request("GET", "/")[2]
+        self.assertNotEqual(after, before)
+        self.assertEqual(after, plain)
+
+    def test_streamed_listing_is_compressed(self):
+        for name in range(30):
+            (self.root / f"file-{name}.txt").write_text("x", encoding="utf-8")
+        with RunningServer(PrettyDirectoryHandler, self.root, content_encoder=self.encoder,
+                           stream_threshold=10, stream_batch_size=4) as srv:
+            status, headers, body = srv.request("GET", "/", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertIn(b"file-29.txt", gzip.decompress(body))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,179 @@
+import base64
+import json
+import os
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import time
+
+from EasyHTTPServerAJM.CustomHandlers import UploadPrettyDirectoryHandler
+from EasyHTTPServerAJM.Helpers import ResumableUploadStore
+from _server_harness import RunningServer
+from test_multipart_parser import BOUNDARY, build_form
+
+TUS = {"Tus-Resumable": "1.0.0"}
+
+
+class TestResumableUploadStore(unittest.TestCase):
+    def setUp(self):
+        self._td = TemporaryDirectory()
+        self.root = Path(self._td.name)
+        self.store = ResumableUploadStore(self.root / ResumableUploadStore.STAGING_DIR_NAME, max_age=60)
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def test_state_survives_a_new_store(self):
+        session = self.store.create(str(self.root), "a.bin", 10)
+        (self.root / ResumableUploadStore.STAGING_DIR_NAME / f"{session.upload_id}.part").write_bytes(b"1234")
+        reloaded = ResumableUploadStore(self.store.staging_dir).get(session.upload_id)
+        self.assertEqual((reloaded.filename, reloaded.length, reloaded.offset), ("a.bin", 10, 4))
+
+    def test_state_outside_the_root_is_ignored(self):
+        session = self.store.create(str(self.root), "a.bin", 0)
+        state_path = self.root / ResumableUploadStore.STAGING_DIR_NAME / f"{session.upload_id}.json"
+        state = json.loads(state_path.read_text())
+        for target_dir in (os.path.dirname(self.root), self.store.staging_dir):
+            state_path.write_text(json.dumps({**state, "target_dir": target_dir}))
+            self.assertIsNone(self.store.get(session.upload_id), target_dir)
+        state_path.write_text(json.dumps({**state, "unexpected": 1}))
+        self.assertIsNone(self.store.get(session.upload_id))
+
+    def test_unknown_and_malformed_ids(self):
+        self.assertIsNone(self.store.get("0" * 32))
+        self.assertIsNone(self.store.get("../../etc/passwd"))
+
+    def test_garbage_collection_removes_expired_sessions(self):
+        old = self.store.create(str(self.root), "old.bin", 10)
+        fresh = self.store.create(str(self.root), "fresh.bin", 10)
+        part = Path(self.store.staging_dir) / f"{old.upload_id}.part"
+        os.utime(part, (time() - 120, time() - 120))
+        self.assertEqual(self.store.collect_garbage(), 1)
+        self.assertIsNone(self.store.get(old.upload_id))
+        self.assertIsNotNone(self.store.get(fresh.upload_id))
+        self.assertEqual(sorted(os.listdir(self.store.staging_dir)),
+                         sorted([f"{fresh.upload_id}.part", f"{fresh.upload_id}.json"]))
+
+
+class TestResumableUploadProtocol(unittest.TestCase):
+    def setUp(self):
+        self._td = TemporaryDirectory()
+        self.root = Path(self._td.name)
+        (self.root / "sub").mkdir()
+        self.payload = os.urandom(300_000)
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def _create(self, srv, path="/sub/", length=None, filename="big.bin"):
+        metadata = "filename " + base64.b64encode(filename.encode()).decode()
+        headers = {**TUS, "Upload-Length": str(len(self.payload) if length is None else length),
+                   "Upload-Metadata": metadata}
+        return srv.request("POST", path, headers=headers)
+
+    def _patch(self, srv, location, offset, data):
+        headers = {**TUS, "Upload-Offset": str(offset), "Content-Type": "application/offset+octet-stream"}
+        return srv.request("PATCH", location, body=data, headers=headers)
+
+    def test_upload_in_chunks_and_resume(self):
+        with RunningServer(UploadPrettyDirectoryHandler, self.root) as srv:
+            status, headers, _ = self._create(srv)
+            self.assertEqual(status, 201)
+            location = headers["Location"]
+            self.assertTrue(location.startswith("/.resumable/"))
+
+            status, headers, _ = self._patch(srv, location, 0, self.payload[:100_000])
+            self.assertEqual((status, headers["Upload-Offset"]), (204, "100000"))
+
+            # a chunk for the wrong offset is rejected with the current offset
+            status, headers, _ = self._patch(srv, location, 5, b"x")
+            self.assertEqual((status, headers["Upload-Offset"]), (409, "100000"))
+
+            status, headers, _ = srv.request("HEAD", location, headers=TUS)
+            self.assertEqual((status, headers["Upload-Offset"], headers["Upload-Length"]),
+                             (200, "100000", str(len(self.payload))))
+
+            status, headers, _ = self._patch(srv, location, 100_000, self.payload[100_000:])
+            self.assertEqual(status, 204)
+            self.assertEqual(headers["Content-Location"], "/sub/big.bin")
+
+            status, _, _ = srv.request("HEAD", location, headers=TUS)
+            self.assertEqual(status, 404)
+        self.assertEqual((self.root / "sub" / "big.bin").read_bytes(), self.payload)
+        self.assertEqual(os.listdir(self.root / ResumableUploadStore.STAGING_DIR_NAME), [])
+
+    def test_delete_and_bad_requests(self):
+        with RunningServer(UploadPrettyDirectoryHandler, self.root) as srv:
+            location = self._create(srv)[1]["Location"]
+            status, _, _ = srv.request("DELETE", location, headers=TUS)
+            self.assertEqual(status, 204)
+            self.assertEqual(self._patch(srv, location, 0, b"x")[0], 404)
+            self.assertEqual(srv.request("PATCH", location, body=b"x", headers={"Tus-Resumable": "0.2"})[0], 412)
+            self.assertEqual(srv.request("POST", "/sub/", headers=TUS)[0], 400)
+
+    def test_malformed_metadata_and_oversized_uploads(self):
+        store = ResumableUploadStore(self.root / ResumableUploadStore.STAGING_DIR_NAME, max_size=10)
+        with RunningServer(UploadPrettyDirectoryHandler, self.root, resumable_store=store) as srv:
+            status, _, _ = srv.request("POST", "/sub/", headers={**TUS, "Upload-Length": "5",
+                                                                 "Upload-Metadata": "filename !!!"})
+            self.assertEqual(status, 400)
+            self.assertEqual(self._create(srv, length=11)[0], 413)
+            self.assertEqual(self._create(srv, length=10)[0], 201)
+
+    def test_sessions_cannot_be_forged_through_the_staging_dir(self):
+        staging_dir = self.root / ResumableUploadStore.STAGING_DIR_NAME
+        upload_id = "0" * 32
+        with RunningServer(UploadPrettyDirectoryHandler, self.root) as srv:
+            self.assertEqual(self._create(srv)[0], 201)
+            form = build_form(("file", f"{upload_id}.json", b"{}"))
+            status, _, _ = srv.request("POST", f"/{ResumableUploadStore.STAGING_DIR_NAME}/", body=form,
+                                       headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"})
+            self.assertEqual(status, 404)
+            self.assertEqual(self._create(srv, path=f"/{ResumableUploadStore.STAGING_DIR_NAME}/")[0], 404)
+            self.assertFalse((staging_dir / f"{upload_id}.json").exists())
+
+            # planted by other means, the state still cannot point outside the served directory
+            with TemporaryDirectory() as outside:
+                (staging_dir / f"{upload_id}.part").write_bytes(b"")
+                state = {"upload_id": upload_id, "target_dir": outside, "filename": "evil.txt",
+                         "length": 0, "created": time(), "metadata": {}}
+                (staging_dir / f"{upload_id}.json").write_text(json.dumps(state))
+                self.assertEqual(self._patch(srv, f"/.resumable/{upload_id}", 0, b"")[0], 404)
+                self.assertEqual(os.listdir(outside), [])
+
+                # nor can its file name
+                state.update(target_dir=str(self.root / "sub"), filename="../evil.txt")
+                (staging_dir / f"{upload_id}.json").write_text(json.dumps(state))
+                status, headers, _ = self._patch(srv, f"/.resumable/{upload_id}", 0, b"")
+                self.assertEqual((status, headers["Content-Location"]), (204, "/sub/evil.txt"))
+        self.assertFalse((self.root / "evil.txt").exists())
+
+    @unittest.skipUnless(hasattr(os, 'umask'), "needs a umask")
+    def test_finished_upload_gets_the_default_mode(self):
+        self.payload = b"shared"
+        umask = os.umask(0o027)
+        try:
+            with RunningServer(UploadPrettyDirectoryHandler, self.root) as srv:
+                location = self._create(srv)[1]["Location"]
+                self.assertEqual(self._patch(srv, location, 0, self.payload)[0], 204)
+        finally:
+            os.umask(umask)
+        self.assertEqual((self.root / "sub" / "big.bin").stat().st_mode & 0o777, 0o640)
+
+    def test_staging_dir_is_hidden(self):
+        with RunningServer(UploadPrettyDirectoryHandler, self.root) as srv:
+            self._create(srv)
+            _, _, listing = srv.request("GET", "/")
+            status, _, _ = srv.request("GET", f"/{ResumableUploadStore.STAGING_DIR_NAME}/")
+        self.assertNotIn(ResumableUploadStore.STAGING_DIR_NAME.encode(), listing)
+        self.assertEqual(status, 404)
+
+    def test_options_advertises_extensions(self):
+        with RunningServer(UploadPrettyDirectoryHandler, self.root) as srv:
+            status, headers, _ = srv.request("OPTIONS", "/")
+        self.assertEqual((status, headers["Tus-Version"]), (204, "1.0.0"))
+        self.assertIn("creation", headers["Tus-Extension"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,344 @@
+import asyncio
+import http.client
+import os
+import signal
+import socket
+import threading
+import time
+import unittest
+from functools import partial
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from EasyHTTPServerAJM import EasyHTTPServer
+from EasyHTTPServerAJM.CustomHandlers import PrettyDirectoryHandler, UploadPrettyDirectoryHandler
+from EasyHTTPServerAJM.ServerEngines import AsyncioHTTPServer, BoundedThreadPoolHTTPServer, PreforkSupervisor
+from EasyHTTPServerAJM.ServerEngines.asyncio_engine import AsyncioConnection
+from _server_harness import RunningServer, quiet_logger
+from test_multipart_parser import BOUNDARY, build_form
+
+
+class _KeepAliveHandler(PrettyDirectoryHandler):
+    protocol_version = "HTTP/1.1"
+
+
+class TestAsyncioEngine(unittest.TestCase):
+    def setUp(self):
+        self._td = TemporaryDirectory()
+        self.root = Path(self._td.name)
+        (self.root / "sub").mkdir()
+        self.payload = os.urandom(2 * 1024 * 1024 + 3)
+        (self.root / "payload.bin").write_bytes(self.payload)
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def test_listing(self):
+        with RunningServer(PrettyDirectoryHandler, self.root, server_class=AsyncioHTTPServer) as srv:
+            status, _, page = srv.request("GET", "/")
+        self.assertEqual(status, 200)
+        self.assertIn(b"payload.bin", page)
+        self.assertIn(b"sub/", page)
+
+    def test_download_and_range(self):
+        with RunningServer(PrettyDirectoryHandler, self.root, server_class=AsyncioHTTPServer) as srv:
+            status, _, body = srv.request("GET", "/payload.bin")
+            self.assertEqual(status, 200)
+            self.assertEqual(body, self.payload)
+            status, _, body = srv.request("GET", "/payload.bin", headers={"Range": "bytes=100-199"})
+        self.assertEqual(status, 206)
+        self.assertEqual(body, self.payload[100:200])
+
+    def test_buffered_download(self):
+        with RunningServer(PrettyDirectoryHandler, self.root, server_class=AsyncioHTTPServer,
+                           use_sendfile=False) as srv:
+            status, _, body = srv.request("GET", "/payload.bin")
+        self.assertEqual(status, 200)
+        self.assertEqual(body, self.payload)
+
+    def test_upload(self):
+        body = build_form(("file", "up.bin", self.payload))
+        with RunningServer(UploadPrettyDirectoryHandler, self.root, server_class=AsyncioHTTPServer) as srv:
+            status, _, page = srv.request("POST", "/sub/", body=body,
+                                          headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"})
+        self.assertEqual(status, 200)
+        self.assertIn(b"Uploaded up.bin", page)
+        self.assertEqual((self.root / "sub" / "up.bin").read_bytes(), self.payload)
+
+    def test_keep_alive_serves_several_requests_per_connection(self):
+        with RunningServer(_KeepAliveHandler, self.root, server_class=AsyncioHTTPServer) as srv:
+            conn = srv.connection()
+            try:
+                for _ in range(3):
+                    conn.request("GET", "/payload.bin", headers={"Range": "bytes=0-9"})
+                    resp = conn.getresponse()
+                    self.assertEqual(resp.read(), self.payload[:10])
+                self.assertEqual(srv.httpd.active_connections, 1)
+            finally:
+                conn.close()
+
+    def test_idle_connections_do_not_hold_threads(self):
+        with RunningServer(PrettyDirectoryHandler, self.root, server_class=AsyncioHTTPServer) as srv:
+            idle = [socket.create_connection(("127.0.0.1", srv.port)) for _ in range(200)]
+            try:
+                status, _, body = srv.request("GET", "/payload.bin")
+                self.assertEqual(status, 200)
+                self.assertEqual(body, self.payload)
+                self.assertLess(threading.active_count(), 50)
+            finally:
+                for sock in idle:
+                    sock.close()
+
+
+class TestAsyncioConnection(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+
+    def tearDown(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(5)
+        self.loop.close()
+
+    def test_read_timeout_raises_socket_timeout_and_cancels_the_read(self):
+        async def make_reader():
+            return asyncio.StreamReader()
+
+        reader = asyncio.run_coroutine_threadsafe(make_reader(), self.loop).result(5)
+        connection = AsyncioConnection(self.loop, reader, None, b"", 4)
+        connection.settimeout(0.05)
+        with self.assertRaises(socket.timeout):
+            connection.rfile.read(4)
+        # the timed out read no longer waits on the stream, so it does not swallow this data
+        self.loop.call_soon_threadsafe(reader.feed_data, b"body")
+        connection.settimeout(5)
+        self.assertEqual(connection.rfile.read(4), b"body")
+
+
+class _BlockingHandler(PrettyDirectoryHandler):
+    entered = threading.Event()
+    release = threading.Event()
+
+    def do_GET(self):
+        self.__class__.entered.set()
+        self.__class__.release.wait(10)
+        super().do_GET()
+
+
+class TestBoundedThreadPoolEngine(unittest.TestCase):
+    def setUp(self):
+        self._td = TemporaryDirectory()
+        self.root = Path(self._td.name)
+        (self.root / "a.txt").write_text("hello")
+        _BlockingHandler.entered.clear()
+        _BlockingHandler.release.clear()
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def test_serves_requests(self):
+        with RunningServer(PrettyDirectoryHandler, self.root, server_class=BoundedThreadPoolHTTPServer) as srv:
+            results = [srv.request("GET", "/a.txt") for _ in range(5)]
+        self.assertEqual([(status, body) for status, _, body in results], [(200, b"hello")] * 5)
+
+    def test_saturated_pool_answers_503(self):
+        logger = quiet_logger('EasyHTTPServerAJM.tests.pool')
+        server_class = partial(BoundedThreadPoolHTTPServer, max_workers=1, max_pending=1, retry_after=7,
+                               logger=logger)
+        with self.assertLogs(logger, 'WARNING') as logs:
+            with RunningServer(_BlockingHandler, self.root, server_class=server_class) as srv:
+                busy, queued = srv.connection(), srv.connection()
+                busy.request("GET", "/a.txt")
+                self.assertTrue(_BlockingHandler.entered.wait(5))
+                queued.request("GET", "/a.txt")
+                deadline = time.monotonic() + 5
+                while srv.httpd.queue_depth < 1 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+
+                status, headers, _ = srv.request("GET", "/a.txt")
+                self.assertEqual(status, 503)
+                self.assertEqual(headers["Retry-After"], "7")
+                self.assertEqual(srv.httpd.rejected, 1)
+
+                _BlockingHandler.release.set()
+                for conn in (busy, queued):
+                    self.assertEqual(conn.getresponse().read(), b"hello")
+                    conn.close()
+        self.assertIn("rejected 1 connection(s)", "\n".join(logs.output))
+
+    def test_workers_survive_handlers_that_stop_the_server(self):
+        errors, handled = [], []
+
+        def stopping_handler(request, client_address, server):
+            handled.append(client_address)
+            if len(handled) == 1:
+                raise SystemExit(1)
+            try:
+                server.server_close()
+            except BaseException as e:
+                errors.append(e)
+
+        server = BoundedThreadPoolHTTPServer(('127.0.0.1', 0), stopping_handler, max_workers=1,
+                                             logger=quiet_logger())
+        try:
+            for client_address in ("exit", "close"):
+                request, peer = socket.socketpair()
+                peer.close()
+                server.process_request(request, client_address)
+            self.assertTrue(_wait_for(lambda: not server._workers))
+        finally:
+            server.server_close()
+        # the single worker outlived the SystemExit and closed the server without joining itself
+        self.assertEqual((handled, errors), (["exit", "close"], []))
+
+    def test_idle_keep_alive_connection_does_not_pin_a_worker(self):
+        server_class = partial(BoundedThreadPoolHTTPServer, max_workers=1, idle_timeout=0.2)
+        with RunningServer(PrettyDirectoryHandler, self.root, server_class=server_class) as srv:
+            idle = srv.connection()
+            try:
+                idle.request("GET", "/a.txt")
+                resp = idle.getresponse()
+                self.assertEqual((resp.read(), resp.headers["Connection"]), (b"hello", None))
+                started = time.monotonic()
+                status, _, body = srv.request("GET", "/a.txt")
+                self.assertEqual((status, body), (200, b"hello"))
+                # far below the handler's keep_alive_timeout
+                self.assertLess(time.monotonic() - started, 5)
+            finally:
+                idle.close()
+
+    def test_responses_close_the_connection_while_connections_wait(self):
+        server_class = partial(BoundedThreadPoolHTTPServer, max_workers=1)
+        with RunningServer(_BlockingHandler, self.root, server_class=server_class) as srv:
+            busy, queued = srv.connection(), srv.connection()
+            try:
+                busy.request("GET", "/a.txt")
+                self.assertTrue(_BlockingHandler.entered.wait(5))
+                queued.request("GET", "/a.txt")
+                deadline = time.monotonic() + 5
+                while srv.httpd.queue_depth < 1 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                _BlockingHandler.release.set()
+                resp = busy.getresponse()
+                self.assertEqual((resp.read(), resp.headers["Connection"]), (b"hello", "close"))
+                resp = queued.getresponse()
+                self.assertEqual((resp.read(), resp.headers["Connection"]), (b"hello", None))
+            finally:
+                busy.close()
+                queued.close()
+
+
+def _wait_for(condition, timeout: float = 10) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+@unittest.skipUnless(PreforkSupervisor.is_supported(), "needs os.fork")
+class TestPreforkSupervisor(unittest.TestCase):
+    def setUp(self):
+        self._td = TemporaryDirectory()
+        self.root = Path(self._td.name)
+        (self.root / "a.txt").write_text("hello")
+        self.logger = quiet_logger('EasyHTTPServerAJM.tests.prefork')
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def _build_server(self, server_class=BoundedThreadPoolHTTPServer):
+        factory = partial(PrettyDirectoryHandler, directory=str(self.root), logger=self.logger)
+        return lambda: server_class(('127.0.0.1', 0), factory, False, logger=self.logger)
+
+    def _run(self, supervisor: PreforkSupervisor):
+        result = {}
+        thread = threading.Thread(target=lambda: result.setdefault('status', supervisor.run()), daemon=True)
+        thread.start()
+        return thread, result
+
+    @staticmethod
+    def _get(port: int):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        try:
+            conn.request("GET", "/a.txt")
+            resp = conn.getresponse()
+            return resp.status, resp.headers, resp.read()
+        finally:
+            conn.close()
+
+    def _check_workers(self, reuse_port: bool):
+        supervisor = PreforkSupervisor(('127.0.0.1', 0), self._build_server(), 2, reuse_port=reuse_port,
+                                       logger=self.logger)
+        port = supervisor.open_listener()[1]
+        self.assertNotEqual(port, 0)
+        thread, result = self._run(supervisor)
+        try:
+            self.assertTrue(_wait_for(lambda: len(supervisor.worker_pids) == 2))
+            self.assertTrue(_wait_for(lambda: self._try_get(port)))
+            for _ in range(6):
+                status, _, body = self._get(port)
+                self.assertEqual((status, body), (200, b"hello"))
+
+            crashed = supervisor.worker_pids[0]
+            os.kill(crashed, signal.SIGKILL)
+            self.assertTrue(_wait_for(lambda: supervisor.worker_pids.get(0, crashed) != crashed))
+            self.assertEqual(supervisor.restarts, 1)
+            for _ in range(4):
+                self.assertEqual(self._get(port)[0], 200)
+        finally:
+            supervisor.stop()
+            thread.join(15)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(result['status'], 0)
+        self.assertEqual(supervisor.worker_pids, {})
+
+    def _try_get(self, port: int) -> bool:
+        try:
+            return self._get(port)[0] == 200
+        except OSError:
+            return False
+
+    def test_workers_share_port_with_so_reuseport(self):
+        if not hasattr(socket, 'SO_REUSEPORT'):
+            self.skipTest("needs SO_REUSEPORT")
+        self._check_workers(reuse_port=True)
+
+    def test_workers_share_inherited_socket(self):
+        self._check_workers(reuse_port=False)
+
+    def test_server_that_cannot_start_stops_all_workers(self):
+        def build_server():
+            raise OSError("no such engine")
+
+        supervisor = PreforkSupervisor(('127.0.0.1', 0), build_server, 2, logger=self.logger)
+        thread, result = self._run(supervisor)
+        thread.join(15)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(result['status'], 1)
+        self.assertEqual(supervisor.restarts, 0)
+
+
+class TestEngineSelection(unittest.TestCase):
+    def setUp(self):
+        self._td = TemporaryDirectory()
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def test_engine_is_built_with_options(self):
+        server = EasyHTTPServer(self._td.name, host="127.0.0.1", port=0, logger=quiet_logger(),
+                                engine="asyncio", max_workers=3)
+        with server._build_httpd(server.engine) as httpd:
+            self.assertIsInstance(httpd, AsyncioHTTPServer)
+            self.assertEqual(httpd.max_workers, 3)
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            EasyHTTPServer(self._td.name, logger=quiet_logger(), engine="gevent")
+
+
+if __name__ == '__main__':
+    unittest.main()
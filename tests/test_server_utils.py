@@ -1,7 +1,9 @@
+import errno
 import unittest
 
 from EasyHTTPServerAJM.easy_http_server import EasyHTTPServer
 from EasyHTTPServerAJM._version import __version__
+from _server_harness import quiet_logger
 
 
 class TestServerUtils(unittest.TestCase):
@@ -15,5 +17,35 @@ class TestServerUtils(unittest.TestCase):
         self.assertIn(__version__, welcome)
 
 
+class _FailingHandler:
+    error: OSError = OSError()
+
+    def __init__(self, *args, **kwargs):
+        raise self.__class__.error
+
+
+class TestHandlerErrors(unittest.TestCase):
+    def setUp(self):
+        self.server = EasyHTTPServer('.', logger=quiet_logger(), handler_class=_FailingHandler)
+        self.stopped = []
+        self.server.err_stop = lambda: self.stopped.append(True)
+
+    def _create_handler(self, error: OSError) -> bool:
+        """Return True if ``error`` raised by a handler stopped the server."""
+        self.stopped.clear()
+        _FailingHandler.error = error
+        self.server._handler_factory(None, ('127.0.0.1', 1), None)
+        return bool(self.stopped)
+
+    def test_client_disconnects_only_end_their_connection(self):
+        for error in (ConnectionResetError(errno.ECONNRESET, "reset"), BrokenPipeError(errno.EPIPE, "pipe"),
+                      OSError(errno.ECONNABORTED, "aborted"), OSError(errno.EPIPE, "pipe"), TimeoutError()):
+            with self.subTest(error=error):
+                self.assertFalse(self._create_handler(error))
+
+    def test_other_os_errors_stop_the_server(self):
+        self.assertTrue(self._create_handler(OSError(errno.EMFILE, "too many open files")))
+
+
 if __name__ == "__main__":
     unittest.main()
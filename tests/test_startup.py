@@ -0,0 +1,79 @@
+import subprocess
+import sys
+import unittest
+from tempfile import TemporaryDirectory
+
+from EasyHTTPServerAJM.bench import StartupBenchmark
+from EasyHTTPServerAJM.logger import EasyHTTPLogger, email_handler_class
+
+
+class TestStartup(unittest.TestCase):
+    # generous ceilings, to catch a heavy import sneaking back in rather than a slow machine;
+    # python -m EasyHTTPServerAJM.bench --startup gives the actual figures
+    IMPORT_BUDGET_MS = 1000
+    FIRST_RESPONSE_BUDGET_MS = 5000
+
+    @classmethod
+    def setUpClass(cls):
+        cls.report = StartupBenchmark(runs=1).run()
+
+    def test_no_lazy_modules_at_startup(self):
+        self.assertEqual(self.report['lazy_modules_loaded'], [])
+
+    def test_startup_budget(self):
+        self.assertLess(self.report['import_ms']['EasyHTTPServerAJM'], self.IMPORT_BUDGET_MS)
+        self.assertGreater(self.report['first_response_ms'], 0)
+        self.assertLess(self.report['first_response_ms'], self.FIRST_RESPONSE_BUDGET_MS)
+
+    def test_package_import_loads_no_submodules(self):
+        modules = StartupBenchmark().measure_import('EasyHTTPServerAJM')['modules']
+        self.assertNotIn('EasyHTTPServerAJM.easy_http_server', modules)
+        self.assertNotIn('EasyLoggerAJM', modules)
+
+    def test_lazy_attributes(self):
+        code = ("import EasyHTTPServerAJM, EasyHTTPServerAJM.ServerEngines as engines, sys; "
+                "assert 'EasyHTTPServer' in dir(EasyHTTPServerAJM); "
+                "assert EasyHTTPServerAJM.EasyHTTPServer.__name__ == 'EasyHTTPServer'; "
+                "assert 'asyncio' not in sys.modules; "
+                "assert engines.AsyncioHTTPServer.__name__ == 'AsyncioHTTPServer'; "
+                "assert 'asyncio' in sys.modules")
+        completed = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, timeout=60)
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+
+    def test_compare(self):
+        baseline = {'import_ms': {'EasyHTTPServerAJM': 20.0}, 'first_response_ms': 200.0, 'lazy_modules_loaded': []}
+        report = {'import_ms': {'EasyHTTPServerAJM': 24.0}, 'first_response_ms': 400.0,
+                  'lazy_modules_loaded': ['PyEmailerAJM']}
+        regressions = StartupBenchmark.compare(report, baseline)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith('first response:'))
+        self.assertIn('PyEmailerAJM', regressions[1])
+
+
+class TestEmailHandler(unittest.TestCase):
+    def test_not_configured(self):
+        with TemporaryDirectory() as td:
+            easy_logger = EasyHTTPLogger(root_log_location=td, logger_name='EasyHTTPServerAJM.tests.noemail',
+                                         show_warning_logs_in_console=False, email_recipient='ops@example.com')
+            try:
+                # without a message to send there is no email handler
+                self.assertIsNone(easy_logger.email_handler)
+            finally:
+                for handler in list(easy_logger.logger.handlers):
+                    easy_logger.logger.removeHandler(handler)
+                    handler.close()
+
+    def test_email_handler_class(self):
+        try:
+            handler_class = email_handler_class()
+        except ImportError as e:
+            self.skipTest(f"PyEmailerAJM cannot be imported here: {e}")
+        from EasyLoggerAJM.logger_parts.handlers import OutlookEmailHandler
+        from PyEmailerAJM import Msg
+        self.assertTrue(issubclass(handler_class, OutlookEmailHandler))
+        self.assertEqual(handler_class.VALID_EMAIL_MSG_TYPES, [Msg])
+        self.assertIs(email_handler_class(), handler_class)
+
+
+if __name__ == '__main__':
+    unittest.main()
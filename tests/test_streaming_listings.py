@@ -0,0 +1,84 @@
+import io
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from EasyHTTPServerAJM.CustomHandlers import PrettyDirectoryHandler
+from EasyHTTPServerAJM.CustomHandlers.streaming import ChunkedWriter
+from _server_harness import RunningServer
+
+
+class _HTTP11Handler(PrettyDirectoryHandler):
+    protocol_version = "HTTP/1.1"
+
+
+class TestChunkedWriter(unittest.TestCase):
+    def test_chunk_framing(self):
+        buf = io.BytesIO()
+        writer = ChunkedWriter(buf)
+        writer.write(b"hello")
+        writer.write(b"")
+        writer.write(b"x" * 16)
+        writer.close()
+        self.assertEqual(buf.getvalue(), b"5\r\nhello\r\n10\r\n" + b"x" * 16 + b"\r\n0\r\n\r\n")
+
+
+class TestStreamingListings(unittest.TestCase):
+    def setUp(self):
+        self._td = TemporaryDirectory()
+        self.root = Path(self._td.name)
+        self.names = [f"file_{i:03d}.txt" for i in range(25)]
+        for name in self.names:
+            (self.root / name).write_text(name, encoding="utf-8")
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def _assert_full_listing(self, body: bytes):
+        for name in self.names:
+            self.assertIn(f"<a href='{name}'>".encode(), body)
+        self.assertTrue(body.rstrip().endswith(b"</html>"))
+
+    def test_http11_listing_is_chunked(self):
+        with RunningServer(_HTTP11Handler, self.root, stream_threshold=10, stream_batch_size=4) as srv:
+            status, headers, body = srv.request("GET", "/")
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["Transfer-Encoding"], "chunked")
+        self.assertIsNone(headers["Content-Length"])
+        self._assert_full_listing(body)
+
+    def test_http10_listing_is_close_delimited(self):
+        with RunningServer(PrettyDirectoryHandler, self.root, stream_threshold=10, keep_alive=False) as srv:
+            status, headers, body = srv.request("GET", "/")
+        self.assertEqual(status, 200)
+        self.assertIsNone(headers["Transfer-Encoding"])
+        self.assertEqual(headers["Connection"], "close")
+        self._assert_full_listing(body)
+
+    def test_small_listing_is_not_streamed(self):
+        with RunningServer(_HTTP11Handler, self.root, stream_threshold=100) as srv:
+            status, headers, body = srv.request("GET", "/")
+        self.assertEqual(int(headers["Content-Length"]), len(body))
+        self._assert_full_listing(body)
+
+    def test_pagination(self):
+        with RunningServer(PrettyDirectoryHandler, self.root) as srv:
+            status, _, body = srv.request("GET", "/?page=2&per_page=10")
+        self.assertEqual(status, 200)
+        shown = [n for n in self.names if f"<a href='{n}'>".encode() in body]
+        self.assertEqual(shown, self.names[10:20])
+        self.assertIn(b"Page 2 of 3 (25 entries)", body)
+        self.assertIn(b"page=1&amp;per_page=10", body)
+        self.assertIn(b"page=3&amp;per_page=10", body)
+        # the query string is not part of the title
+        self.assertIn(b"<title>Index of /</title>", body)
+
+    def test_invalid_pagination_values_fall_back_to_defaults(self):
+        with RunningServer(PrettyDirectoryHandler, self.root) as srv:
+            status, _, body = srv.request("GET", "/?page=abc&per_page=-3")
+        self.assertEqual(status, 200)
+        self.assertIn(b"Page 1 of 1 (25 entries)", body)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Thread
+
+from EasyHTTPServerAJM.Helpers.HtmlTemplateBuilder import TemplateCache, HTMLTemplateBuilder
+
+
+class TestTemplateCache(unittest.TestCase):
+    def setUp(self):
+        self._td = TemporaryDirectory()
+        self.tmp = Path(self._td.name)
+        self.template = self.tmp / "page.html"
+        self.template.write_text("<p>$message</p>", encoding="utf-8")
+        # check on every access so mtime invalidation is observable in the test
+        self.cache = TemplateCache(check_interval=0)
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def test_hits_and_misses_are_counted(self):
+        self.cache.get_text(self.template)
+        self.cache.get_text(self.template)
+        self.cache.get_template(self.template)
+        self.assertEqual(self.cache.misses, 1)
+        self.assertEqual(self.cache.hits, 2)
+
+    def test_template_is_compiled_once(self):
+        first = self.cache.get_template(self.template)
+        second = self.cache.get_template(self.template)
+        self.assertIs(first, second)
+        self.assertEqual(first.safe_substitute(message="hi"), "<p>hi</p>")
+
+    def test_mtime_change_invalidates_entry(self):
+        self.assertEqual(self.cache.get_text(self.template), "<p>$message</p>")
+        self.template.write_text("<div>$message</div>", encoding="utf-8")
+        st = self.template.stat()
+        os.utime(self.template, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        self.assertEqual(self.cache.get_text(self.template), "<div>$message</div>")
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_check_interval_skips_stat(self):
+        cache = TemplateCache(check_interval=3600)
+        cache.get_text(self.template)
+        self.template.write_text("changed", encoding="utf-8")
+        # still inside the check interval, so the cached text is served
+        self.assertEqual(cache.get_text(self.template), "<p>$message</p>")
+        self.assertEqual(cache.hits, 1)
+
+    def test_missing_file_raises(self):
+        with self.assertRaises(FileNotFoundError):
+            self.cache.get_text(self.tmp / "missing.html")
+
+    def test_concurrent_access(self):
+        results = []
+
+        def worker():
+            for _ in range(100):
+                results.append(self.cache.get_text(self.template))
+
+        threads = [Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(results), 800)
+        self.assertEqual(self.cache.hits + self.cache.misses, 800)
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_builder_reads_through_cache(self):
+        cache = TemplateCache(check_interval=3600)
+        b1 = HTMLTemplateBuilder(template_cache=cache)
+        misses_after_first = cache.misses
+        b2 = HTMLTemplateBuilder(template_cache=cache)
+        self.assertEqual(cache.misses, misses_after_first)
+        self.assertEqual(b1.dir_page_css, b2.dir_page_css)
+
+        b2.enc = "utf-8"
+        b2.title = "Index of /"
+        b2.path = "/"
+        b2.build_page_body([], path=self._td.name)
+        b2.build_page_body([], path=self._td.name)
+        # the page template is read from disk once, then served from the cache
+        self.assertEqual(cache.misses, misses_after_first + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from EasyHTTPServerAJM.CustomHandlers import UploadPrettyDirectoryHandler
+from EasyHTTPServerAJM.Helpers import AtomicUploadWriter, MultipartPart
+from _server_harness import RunningServer
+from test_multipart_parser import BOUNDARY, build_form
+
+
+class TestAtomicUploadWriter(unittest.TestCase):
+    def setUp(self):
+        self._td = TemporaryDirectory()
+        self.root = Path(self._td.name)
+        self.dest = self.root / "upload.bin"
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def test_file_is_published_only_on_commit(self):
+        payload = os.urandom(3 * 1024 * 1024)
+        for policy in AtomicUploadWriter.FSYNC_POLICIES:
+            with self.subTest(fsync_policy=policy):
+                writer = AtomicUploadWriter(self.dest, expected_size=len(payload) * 2, fsync_policy=policy,
+                                            fsync_interval=1024 * 1024)
+                for start in range(0, len(payload), 65536):
+                    writer.write(payload[start:start + 65536])
+                self.assertFalse(self.dest.exists())
+                self.assertEqual(writer.commit(), len(payload))
+                # the preallocated over-estimate is truncated away
+                self.assertEqual(self.dest.read_bytes(), payload)
+                self.assertEqual(os.listdir(self.root), ["upload.bin"])
+                self.dest.unlink()
+
+    def test_commit_replaces_an_existing_file(self):
+        self.dest.write_bytes(b"old")
+        with AtomicUploadWriter(self.dest) as writer:
+            writer.write(b"new")
+            writer.commit()
+        self.assertEqual(self.dest.read_bytes(), b"new")
+
+    def test_exception_aborts(self):
+        with self.assertRaises(RuntimeError):
+            with AtomicUploadWriter(self.dest) as writer:
+                writer.write(b"partial")
+                raise RuntimeError("client went away")
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_write_errors_surface_on_commit(self):
+        writer = AtomicUploadWriter(self.dest)
+        writer.write("not bytes")
+        with self.assertRaises(TypeError):
+            writer.commit()
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_invalid_fsync_policy(self):
+        with self.assertRaises(ValueError):
+            AtomicUploadWriter(self.dest, fsync_policy="always")
+
+    @unittest.skipUnless(hasattr(os, "fchmod"), "file modes are not settable here")
+    def test_published_file_gets_the_default_mode(self):
+        umask = os.umask(0o027)
+        try:
+            with AtomicUploadWriter(self.dest) as writer:
+                writer.write(b"shared")
+                writer.commit()
+        finally:
+            os.umask(umask)
+        self.assertEqual(self.dest.stat().st_mode & 0o777, 0o640)
+
+
+class TestUploadPreallocation(unittest.TestCase):
+    def test_file_parts_are_not_preallocated_with_the_rest_of_the_body(self):
+        expected_sizes = []
+
+        class RecordingHandler(UploadPrettyDirectoryHandler):
+            def _get_upload_writer(self, dest_path, expected_size=None):
+                expected_sizes.append(expected_size)
+                return super()._get_upload_writer(dest_path, expected_size)
+
+        form = build_form(("file", "a.bin", b"a" * 1000), ("file", "b.bin", b"b" * 1000))
+        with TemporaryDirectory() as td:
+            with RunningServer(RecordingHandler, td) as srv:
+                status, _, _ = srv.request("POST", "/", body=form, headers={
+                    "Content-Type": f"multipart/form-data; boundary={BOUNDARY}"})
+        self.assertEqual(status, 200)
+        self.assertEqual(expected_sizes, [None, None])
+
+    def test_part_content_length_is_used(self):
+        part = MultipartPart({'content-disposition': 'form-data; name="file"; filename="a.bin"',
+                              'content-length': '4096'}, iter(()))
+        self.assertEqual(UploadPrettyDirectoryHandler._expected_part_size(part), 4096)
+
+
+if __name__ == "__main__":
+    unittest.main()